@@ -0,0 +1,19 @@
+"""
+Authentication helpers for the content service.
+"""
+
+from .token_validation import (
+    TokenValidator,
+    TokenValidationError,
+    InvalidTokenError,
+    IdentityServiceError,
+    IdentityServiceUnavailableError
+)
+
+__all__ = [
+    "TokenValidator",
+    "TokenValidationError",
+    "InvalidTokenError",
+    "IdentityServiceError",
+    "IdentityServiceUnavailableError"
+]
@@ -0,0 +1,392 @@
+"""
+Cached bearer token validation.
+
+Validating a token used to cost a fresh TCP connection to the Identity
+Service plus an identity database query on every request. TokenValidator
+instead:
+
+- verifies the JWT signature and expiry locally when the signing key is
+  configured, rejecting forged or expired tokens without a network call;
+- caches validated user data in a bounded LRU whose entries live for the
+  configured TTL, but never past the token's own ``exp``;
+- falls back to the Identity Service over one pooled keep-alive client,
+  coalescing concurrent validations of the same token;
+- drops cached entries when a token, jti or whole user is revoked through
+  the revoke_* methods.
+
+Nothing publishes revocations to this service yet (the Identity Service's
+logout does not invalidate tokens), so a logged-out or revoked token stays
+valid from the cache for up to the cache TTL.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence
+
+import httpx
+import jwt
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_TTL_SECONDS = 60
+DEFAULT_CACHE_MAX_ENTRIES = 10000
+
+
+class TokenValidationError(Exception):
+    """Base exception for token validation."""
+    pass
+
+
+class InvalidTokenError(TokenValidationError):
+    """Token is malformed, forged, expired or revoked."""
+    pass
+
+
+class IdentityServiceError(TokenValidationError):
+    """Identity Service answered with an unexpected status or body."""
+    pass
+
+
+class IdentityServiceUnavailableError(TokenValidationError):
+    """Identity Service could not be reached."""
+
+    def __init__(self, message: str, timed_out: bool = False):
+        super().__init__(message)
+        self.timed_out = timed_out
+
+
+def token_digest(token: str) -> str:
+    """Cache key for a token, so raw tokens are never kept in memory."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+@dataclass
+class _CacheEntry:
+    user_data: Dict[str, Any]
+    expires_at: float  # time.monotonic() deadline
+    user_id: Optional[str] = None
+    jti: Optional[str] = None
+    issued_at: Optional[float] = None  # Unix time from the iat claim
+
+
+@dataclass
+class TokenCacheStats:
+    """Counters for cache effectiveness."""
+    hits: int = 0
+    misses: int = 0
+    local_rejections: int = 0
+    remote_validations: int = 0
+    revocations: int = 0
+
+    def snapshot(self) -> Dict[str, int]:
+        return dict(self.__dict__)
+
+
+class TokenValidator:
+    """Validates bearer tokens with local verification, caching and a pooled client."""
+
+    def __init__(
+        self,
+        identity_service_url: str,
+        verification_key: Optional[str] = None,
+        algorithms: Sequence[str] = ("HS256",),
+        cache_ttl_seconds: float = DEFAULT_CACHE_TTL_SECONDS,
+        cache_max_entries: int = DEFAULT_CACHE_MAX_ENTRIES,
+        request_timeout: float = 5.0,
+        max_connections: int = 100
+    ):
+        """
+        Args:
+            identity_service_url: Base URL of the Identity Service
+            verification_key: Secret or public key the Identity Service signs
+                tokens with (None = no local signature verification)
+            algorithms: Accepted JWT signing algorithms
+            cache_ttl_seconds: Upper bound on how long a validation is reused
+                (0 disables caching)
+            cache_max_entries: LRU capacity
+            request_timeout: Timeout for one Identity Service call
+            max_connections: Size of the pooled client's connection pool
+        """
+        self.identity_service_url = identity_service_url
+        self.verification_key = verification_key
+        self.algorithms = list(algorithms)
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.cache_max_entries = cache_max_entries
+        self.request_timeout = request_timeout
+        self.max_connections = max_connections
+        self.stats = TokenCacheStats()
+
+        self._cache: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._revoked_tokens: Dict[str, float] = {}  # digest or jti -> Unix expiry
+        self._users_revoked_at: Dict[str, float] = {}  # user_id -> Unix time
+        self._client: Optional[httpx.AsyncClient] = None
+        self._exit_stack: Optional[AsyncExitStack] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    # ------------------------------------------------------------------
+    # Validation
+    # ------------------------------------------------------------------
+
+    async def validate(self, token: str) -> Dict[str, Any]:
+        """
+        Validate a bearer token and return the user data for it.
+
+        Args:
+            token: Raw bearer token
+
+        Returns:
+            User data as returned by the Identity Service /auth/validate
+
+        Raises:
+            InvalidTokenError: If the token is invalid, expired or revoked
+            IdentityServiceError: If the Identity Service gave a bad answer
+            IdentityServiceUnavailableError: If it could not be reached
+        """
+        key = token_digest(token)
+
+        entry = self._cache.get(key)
+        if entry is not None:
+            if entry.expires_at > time.monotonic():
+                self._cache.move_to_end(key)
+                self.stats.hits += 1
+                return entry.user_data
+            del self._cache[key]
+
+        self.stats.misses += 1
+        claims = self._verify_locally(token, key)
+
+        # Share one Identity Service round trip between concurrent requests
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            user_data = await self._validate_remotely(token)
+            # A revocation may have arrived while the request was in flight
+            if self._is_revoked(key, claims):
+                raise InvalidTokenError("Token has been revoked")
+            self._store(key, user_data, claims)
+            future.set_result(user_data)
+            return user_data
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so waiter-less failures don't log warnings
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def _verify_locally(self, token: str, key: str) -> Dict[str, Any]:
+        """
+        Check signature, expiry and revocation without a network call.
+
+        Without a verification key the claims are only read (never trusted)
+        to cap the cache lifetime at the token's expiry.
+        """
+        try:
+            if self.verification_key:
+                claims = jwt.decode(
+                    token,
+                    self.verification_key,
+                    algorithms=self.algorithms,
+                    options={"require": ["exp"], "verify_aud": False}
+                )
+                if claims.get("type", "access") != "access":
+                    raise InvalidTokenError("Not an access token")
+            else:
+                claims = jwt.decode(token, options={"verify_signature": False})
+        except jwt.PyJWTError as e:
+            if self.verification_key:
+                self.stats.local_rejections += 1
+                raise InvalidTokenError(f"Token rejected locally: {e}")
+            # Opaque or malformed token: leave the verdict to the Identity Service
+            claims = {}
+        except InvalidTokenError:
+            self.stats.local_rejections += 1
+            raise
+
+        if self._is_revoked(key, claims):
+            self.stats.local_rejections += 1
+            raise InvalidTokenError("Token has been revoked")
+        return claims
+
+    def _is_revoked(self, key: str, claims: Dict[str, Any]) -> bool:
+        if key in self._revoked_tokens:
+            return True
+        jti = claims.get("jti")
+        if jti and jti in self._revoked_tokens:
+            return True
+        revoked_at = self._users_revoked_at.get(str(claims.get("sub", "")))
+        issued_at = claims.get("iat")
+        return bool(revoked_at and isinstance(issued_at, (int, float)) and issued_at <= revoked_at)
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        # Pooled connections belong to the loop that opened them
+        loop = asyncio.get_running_loop()
+        if self._client is not None and self._client_loop is not loop:
+            self.reset()
+        if self._client is None:
+            self._client_loop = loop
+            self._exit_stack = AsyncExitStack()
+            self._client = await self._exit_stack.enter_async_context(
+                httpx.AsyncClient(
+                    timeout=10.0,
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections
+                    )
+                )
+            )
+        return self._client
+
+    async def _validate_remotely(self, token: str) -> Dict[str, Any]:
+        """Ask the Identity Service for the authoritative verdict."""
+        client = await self._get_client()
+        self.stats.remote_validations += 1
+        try:
+            response = await client.post(
+                f"{self.identity_service_url}/auth/validate",
+                headers={"Authorization": f"Bearer {token}"},
+                timeout=self.request_timeout
+            )
+        except httpx.TimeoutException as e:
+            raise IdentityServiceUnavailableError(str(e), timed_out=True)
+        except httpx.RequestError as e:
+            raise IdentityServiceUnavailableError(str(e))
+
+        if response.status_code == 200:
+            return response.json()
+        if response.status_code == 401:
+            raise InvalidTokenError("Invalid or expired token")
+        raise IdentityServiceError(
+            f"Identity service returned unexpected status: {response.status_code}"
+        )
+
+    def _store(self, key: str, user_data: Dict[str, Any], claims: Dict[str, Any]) -> None:
+        if self.cache_ttl_seconds <= 0 or not isinstance(user_data, dict):
+            return
+
+        ttl = self.cache_ttl_seconds
+        exp = claims.get("exp")
+        if isinstance(exp, (int, float)):
+            ttl = min(ttl, exp - time.time())
+        if ttl <= 0:
+            return
+
+        issued_at = claims.get("iat")
+        self._cache[key] = _CacheEntry(
+            user_data=user_data,
+            expires_at=time.monotonic() + ttl,
+            user_id=str(user_data.get("user_id") or claims.get("sub") or "") or None,
+            jti=claims.get("jti"),
+            issued_at=issued_at if isinstance(issued_at, (int, float)) else None
+        )
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_max_entries:
+            self._cache.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Revocation
+    # ------------------------------------------------------------------
+
+    def _remember_revoked(self, key: str, expires_at: Optional[float]) -> None:
+        now = time.time()
+        # Forget revocations of tokens that have expired anyway
+        for revoked, until in list(self._revoked_tokens.items()):
+            if until <= now:
+                del self._revoked_tokens[revoked]
+        self._revoked_tokens[key] = expires_at or now + max(self.cache_ttl_seconds, 3600)
+
+    def revoke_token(self, token: str) -> None:
+        """Invalidate one token."""
+        key = token_digest(token)
+        self._cache.pop(key, None)
+        try:
+            exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+        except jwt.PyJWTError:
+            exp = None
+        self._remember_revoked(key, exp)
+        self.stats.revocations += 1
+
+    def revoke_digest(self, digest: str, expires_at: Optional[float] = None) -> None:
+        """Invalidate a token identified by its token_digest()."""
+        self._cache.pop(digest, None)
+        self._remember_revoked(digest, expires_at)
+        self.stats.revocations += 1
+
+    def revoke_jti(self, jti: str, expires_at: Optional[float] = None) -> None:
+        """Invalidate the token with the given JWT ID."""
+        for key in [k for k, entry in self._cache.items() if entry.jti == jti]:
+            del self._cache[key]
+        self._remember_revoked(jti, expires_at)
+        self.stats.revocations += 1
+
+    def revoke_user(self, user_id: str, revoked_at: Optional[float] = None) -> int:
+        """
+        Invalidate every token of a user issued up to revoked_at.
+
+        Args:
+            user_id: User whose tokens are revoked
+            revoked_at: Unix time of the revocation (defaults to now)
+
+        Returns:
+            Number of cached entries dropped
+        """
+        revoked_at = revoked_at or time.time()
+        user_id = str(user_id)
+        self._users_revoked_at[user_id] = max(revoked_at, self._users_revoked_at.get(user_id, 0))
+
+        dropped = [
+            key for key, entry in self._cache.items()
+            if entry.user_id == user_id
+            and (entry.issued_at is None or entry.issued_at <= revoked_at)
+        ]
+        for key in dropped:
+            del self._cache[key]
+        self.stats.revocations += 1
+        return len(dropped)
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def clear(self) -> None:
+        """Drop all cached validations and revocations."""
+        self._cache.clear()
+        self._revoked_tokens.clear()
+        self._users_revoked_at.clear()
+
+    def reset(self) -> None:
+        """Drop cached state and forget (without closing) the pooled client."""
+        self.clear()
+        self._inflight.clear()
+        self._client = None
+        self._exit_stack = None
+        self._client_loop = None
+
+    async def close(self) -> None:
+        """Close the pooled Identity Service client."""
+        if self._exit_stack is not None:
+            await self._exit_stack.aclose()
+        self._client = None
+        self._exit_stack = None
+        self._client_loop = None
+
+    def cache_info(self) -> Dict[str, Any]:
+        """Cache size and counters for health reporting."""
+        return {
+            "token_cache_entries": len(self._cache),
+            "token_cache_max_entries": self.cache_max_entries,
+            **{f"token_{name}": value for name, value in self.stats.snapshot().items()}
+        }
@@ -0,0 +1,8 @@
+-- Migration: Allow Deduplicated Uploads
+-- Created: 2026-10-16
+-- Description: Drop the unique constraint on documents.file_hash so identical uploads
+-- can share one content-addressed blob; lookups keep using idx_documents_hash
+
+ALTER TABLE documents DROP CONSTRAINT IF EXISTS documents_file_hash_key;
+
+COMMENT ON COLUMN documents.file_hash IS 'SHA-256 of the content; shared by documents referencing the same stored blob';
@@ -0,0 +1,10 @@
+-- Migration: Keyset Pagination Indexes
+-- Created: 2026-10-16
+-- Description: Add id as a tie-breaker to the organization listing indexes so cursor
+-- pages on (created_at, id) are served by an index range scan at any depth
+
+DROP INDEX IF EXISTS idx_documents_org_created;
+CREATE INDEX idx_documents_org_created ON documents(organization_id, created_at DESC, id DESC);
+
+DROP INDEX IF EXISTS idx_audit_org;
+CREATE INDEX idx_audit_org ON document_audit(organization_id, created_at DESC, id DESC);
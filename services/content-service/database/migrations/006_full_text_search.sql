@@ -0,0 +1,65 @@
+-- Migration: Full-Text Search
+-- Created: 2026-10-16
+-- Description: Weighted search_vector maintained only when searchable columns change,
+-- and an organization-scoped GIN index over active documents
+
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+
+-- Title and filenames rank above tags, keywords and description, which rank above body text.
+-- Body text is capped so large extractions stay well under the 1MB tsvector limit.
+CREATE OR REPLACE FUNCTION document_search_vector(
+    p_filename TEXT,
+    p_original_filename TEXT,
+    p_extracted_text TEXT,
+    p_metadata JSONB
+)
+RETURNS tsvector AS $$
+    SELECT
+        setweight(to_tsvector('english'::regconfig,
+            COALESCE(p_metadata->>'title', '') || ' ' ||
+            COALESCE(p_filename, '') || ' ' ||
+            COALESCE(p_original_filename, '')
+        ), 'A') ||
+        setweight(to_tsvector('english'::regconfig,
+            COALESCE(p_metadata->>'description', '') || ' ' ||
+            COALESCE(p_metadata->>'author', '') || ' ' ||
+            COALESCE((
+                SELECT string_agg(value, ' ')
+                FROM jsonb_array_elements_text(
+                    CASE WHEN jsonb_typeof(p_metadata->'tags') = 'array' THEN p_metadata->'tags' ELSE '[]'::jsonb END ||
+                    CASE WHEN jsonb_typeof(p_metadata->'keywords') = 'array' THEN p_metadata->'keywords' ELSE '[]'::jsonb END
+                )
+            ), '')
+        ), 'B') ||
+        setweight(to_tsvector('english'::regconfig, LEFT(COALESCE(p_extracted_text, ''), 500000)), 'C')
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION update_document_search_vector()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.search_vector := document_search_vector(
+        NEW.filename, NEW.original_filename, NEW.extracted_text, NEW.metadata
+    );
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Status, counters and processing flags no longer re-parse the document text
+DROP TRIGGER IF EXISTS documents_search_vector_update ON documents;
+CREATE TRIGGER documents_search_vector_update
+    BEFORE INSERT OR UPDATE OF filename, original_filename, extracted_text, metadata ON documents
+    FOR EACH ROW
+    EXECUTE FUNCTION update_document_search_vector();
+
+-- Searches always filter on organization and active status
+DROP INDEX IF EXISTS idx_documents_search;
+CREATE INDEX idx_documents_search ON documents
+    USING GIN(organization_id, search_vector) WHERE status = 'active';
+
+-- Superseded by search_vector, which already contains extracted_text
+DROP INDEX IF EXISTS idx_documents_text;
+
+-- Recompute vectors with the new weights (large tables can instead run this
+-- in batches by id range before applying the migration)
+UPDATE documents
+SET search_vector = document_search_vector(filename, original_filename, extracted_text, metadata);
@@ -0,0 +1,9 @@
+-- Migration: Autocomplete Feed Indexes
+-- Created: 2026-10-16
+-- Description: Let the autocomplete refresher page through changed documents and
+-- audited search queries on (timestamp, id) with index range scans
+
+CREATE INDEX IF NOT EXISTS idx_documents_updated ON documents(updated_at, id);
+
+DROP INDEX IF EXISTS idx_audit_action;
+CREATE INDEX idx_audit_action ON document_audit(action, created_at, id);
@@ -8,6 +8,11 @@ from .image_extractor import ImageExtractor
 from .text_extractor import TextExtractor
 from .office_extractor import OfficeExtractor
 from .factory import MetadataExtractorFactory
+from .process_pool import (
+    ExtractionProcessPool, ExtractionJobError, ExtractionTimeoutError, WorkerCrashedError
+)
+from .cache import ExtractionCache
+from .ocr_engine import OCREngine
 
 __all__ = [
     'BaseExtractor',
@@ -16,5 +21,11 @@ __all__ = [
     'ImageExtractor',
     'TextExtractor',
     'OfficeExtractor',
-    'MetadataExtractorFactory'
+    'MetadataExtractorFactory',
+    'ExtractionProcessPool',
+    'ExtractionJobError',
+    'ExtractionTimeoutError',
+    'WorkerCrashedError',
+    'ExtractionCache',
+    'OCREngine'
 ]
\ No newline at end of file
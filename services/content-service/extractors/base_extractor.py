@@ -3,7 +3,7 @@ Base metadata extractor class and data structures
 """
 
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, List, Optional
@@ -11,6 +11,25 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Words that are never keywords
+STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 
+    'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have',
+    'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should',
+    'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we',
+    'they', 'le', 'la', 'les', 'un', 'une', 'des', 'et', 'ou', 'de', 'du',
+    'der', 'die', 'das', 'und', 'oder', 'ist', 'sind', 'el', 'la', 'los',
+    'las', 'y', 'o', 'es', 'son'
+})
+
+# Language detection scores a language by how many of its indicators occur
+LANGUAGE_INDICATORS = {
+    'fr': ['le ', 'la ', 'les ', 'un ', 'une ', 'des ', 'du ', 'de ', 'et ', 'ou ', 'ce ', 'cette ', 'avec ', 'pour ', 'dans '],
+    'en': ['the ', 'a ', 'an ', 'and ', 'or ', 'is ', 'are ', 'was ', 'were ', 'this ', 'that ', 'with ', 'for ', 'in '],
+    'de': ['der ', 'die ', 'das ', 'den ', 'dem ', 'des ', 'ein ', 'eine ', 'und ', 'oder ', 'ist ', 'sind ', 'mit ', 'für ', 'in '],
+    'es': ['el ', 'la ', 'los ', 'las ', 'un ', 'una ', 'y ', 'o ', 'es ', 'son ', 'con ', 'para ', 'en ']
+}
+
 
 @dataclass
 class ExtractedMetadata:
@@ -18,6 +37,7 @@ class ExtractedMetadata:
     
     # Content information
     text_content: Optional[str] = None
+    text_truncated: bool = False  # text_content holds only the first part of the text
     title: Optional[str] = None
     author: Optional[str] = None
     subject: Optional[str] = None
@@ -82,6 +102,16 @@ class ExtractedMetadata:
                 result[key] = value
         return result
     
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ExtractedMetadata":
+        """Rebuild from to_dict() output; unknown keys are ignored"""
+        known = {f.name for f in fields(cls)}
+        values = {key: value for key, value in data.items() if key in known}
+        for key in ('creation_date', 'modification_date'):
+            if isinstance(values.get(key), str):
+                values[key] = datetime.fromisoformat(values[key])
+        return cls(**values)
+    
     def has_text_content(self) -> bool:
         """Check if meaningful text content was extracted"""
         return bool(self.text_content and len(self.text_content.strip()) > 10)
@@ -126,6 +156,10 @@ class BaseExtractor(ABC):
         """Get list of supported MIME types"""
         pass
     
+    def get_cache_options(self) -> Dict[str, Any]:
+        """Settings that change this extractor's output, part of its extraction cache key"""
+        return {}
+    
     def _safe_extract(self, extraction_func, *args, **kwargs) -> Any:
         """Safely execute extraction with error handling"""
         try:
@@ -143,27 +177,9 @@ class BaseExtractor(ABC):
             # Simple language detection - can be enhanced with proper library
             text_lower = text.lower()
             
-            # French indicators
-            french_indicators = ['le ', 'la ', 'les ', 'un ', 'une ', 'des ', 'du ', 'de ', 'et ', 'ou ', 'ce ', 'cette ', 'avec ', 'pour ', 'dans ']
-            french_score = sum(1 for indicator in french_indicators if indicator in text_lower)
-            
-            # English indicators  
-            english_indicators = ['the ', 'a ', 'an ', 'and ', 'or ', 'is ', 'are ', 'was ', 'were ', 'this ', 'that ', 'with ', 'for ', 'in ']
-            english_score = sum(1 for indicator in english_indicators if indicator in text_lower)
-            
-            # German indicators
-            german_indicators = ['der ', 'die ', 'das ', 'den ', 'dem ', 'des ', 'ein ', 'eine ', 'und ', 'oder ', 'ist ', 'sind ', 'mit ', 'für ', 'in ']
-            german_score = sum(1 for indicator in german_indicators if indicator in text_lower)
-            
-            # Spanish indicators
-            spanish_indicators = ['el ', 'la ', 'los ', 'las ', 'un ', 'una ', 'y ', 'o ', 'es ', 'son ', 'con ', 'para ', 'en ']
-            spanish_score = sum(1 for indicator in spanish_indicators if indicator in text_lower)
-            
             scores = {
-                'fr': french_score,
-                'en': english_score, 
-                'de': german_score,
-                'es': spanish_score
+                language: sum(1 for indicator in indicators if indicator in text_lower)
+                for language, indicators in LANGUAGE_INDICATORS.items()
             }
             
             max_lang = max(scores, key=scores.get)
@@ -188,21 +204,10 @@ class BaseExtractor(ABC):
             text_clean = re.sub(r'[^\w\s]', ' ', text.lower())
             words = text_clean.split()
             
-            # Filter out common stop words and short words
-            stop_words = {
-                'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 
-                'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have',
-                'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should',
-                'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we',
-                'they', 'le', 'la', 'les', 'un', 'une', 'des', 'et', 'ou', 'de', 'du',
-                'der', 'die', 'das', 'und', 'oder', 'ist', 'sind', 'el', 'la', 'los',
-                'las', 'y', 'o', 'es', 'son'
-            }
-            
             # Filter and count words
             meaningful_words = [
                 word for word in words 
-                if len(word) > 3 and word not in stop_words and word.isalpha()
+                if len(word) > 3 and word not in STOP_WORDS and word.isalpha()
             ]
             
             # Get most common words
@@ -0,0 +1,246 @@
+"""
+Persistent cache of extraction results
+
+Duplicate uploads, retries and reprocessing requests hand the same bytes to
+the same extractor again. Results are stored on disk keyed by the file's
+SHA-256, the extractor class and version, the MIME type and the extractor's
+options, so known content skips parsing and OCR. The cache is bounded by
+total size and evicts least recently used entries.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .base_extractor import BaseExtractor, ExtractedMetadata
+
+logger = logging.getLogger(__name__)
+
+# Shard directories modified this recently may change again within the same
+# mtime tick, so they are rescanned at the next sync
+_MTIME_SLACK_NS = 2_000_000_000
+
+
+@dataclass
+class ExtractionCacheStats:
+    """Counters for cache effectiveness."""
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    errors: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return round(self.hits / lookups, 4) if lookups else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**self.__dict__, "hit_rate": self.hit_rate}
+
+
+def hash_file(file_path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file, read in chunks."""
+    hasher = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        while chunk := file.read(chunk_size):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class ExtractionCache:
+    """
+    Size-bounded LRU cache of ExtractedMetadata on local disk.
+
+    Each entry is a gzipped JSON file named by its key, in a shard
+    directory named by the key's first two characters. Recency is the file's
+    mtime, so the LRU order survives restarts. Several processes may share
+    the directory: before evicting, the index rescans the shards whose
+    directory mtime changed, so entries other processes stored or evicted
+    count towards max_bytes. Methods block on file I/O and are meant to run
+    in an executor.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        """
+        Args:
+            directory: Where entries are stored
+            max_bytes: Total size of entries kept before the oldest are evicted
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.stats = ExtractionCacheStats()
+
+        self._lock = threading.Lock()
+        self._entries: Optional["OrderedDict[str, int]"] = None  # key -> size, oldest first
+        self._total_bytes = 0
+        self._shard_keys: Dict[str, Set[str]] = {}
+        # Shard -> directory mtime when last scanned; None forces a rescan
+        self._shard_mtimes: Dict[str, Optional[int]] = {}
+
+    @staticmethod
+    def make_key(file_hash: str, extractor: BaseExtractor, mime_type: str, **options: Any) -> str:
+        """Key for a file's result from one extractor version and configuration."""
+        parts = [
+            file_hash, extractor.__class__.__name__, extractor.version, mime_type,
+            {**extractor.get_cache_options(), **options}
+        ]
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json.gz"
+
+    def _add(self, key: str, size: int) -> None:
+        self._total_bytes += size - self._entries.pop(key, 0)
+        self._entries[key] = size
+        self._shard_keys.setdefault(key[:2], set()).add(key)
+
+    def _drop(self, key: str) -> Optional[int]:
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._total_bytes -= size
+            self._shard_keys[key[:2]].discard(key)
+        return size
+
+    def _load_index(self) -> "OrderedDict[str, int]":
+        if self._entries is None:
+            self._entries = OrderedDict()
+            self._sync_index()
+        return self._entries
+
+    def _sync_index(self) -> None:
+        """Rescan shard directories changed since their last scan, by this or another process."""
+        try:
+            shards = [(shard, shard.stat().st_mtime_ns) for shard in self.directory.iterdir() if shard.is_dir()]
+        except OSError:
+            shards = []
+        now = time.time_ns()
+
+        found: List[Tuple[float, str, int]] = []
+        for shard, mtime in shards:
+            if self._shard_mtimes.get(shard.name) == mtime:
+                continue
+            self._shard_mtimes[shard.name] = mtime if now - mtime > _MTIME_SLACK_NS else None
+            on_disk = {}
+            for path in shard.glob("*.json.gz"):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                on_disk[path.name[:-len(".json.gz")]] = (stat.st_mtime, stat.st_size)
+            for key in self._shard_keys.get(shard.name, set()) - on_disk.keys():
+                self._drop(key)
+            for key, (file_mtime, size) in on_disk.items():
+                if self._entries.get(key) != size:
+                    found.append((file_mtime, key, size))
+
+        # New entries go in mtime order after the known ones
+        for _, key, size in sorted(found):
+            self._add(key, size)
+
+    def get(self, key: str) -> Optional[ExtractedMetadata]:
+        """Cached result for key, or None."""
+        with self._lock:
+            entries = self._load_index()
+            indexed = key in entries
+            if indexed:
+                entries.move_to_end(key)
+
+        path = self._path(key)
+        if not indexed:
+            # Stored by another worker process after the index was loaded
+            try:
+                size = path.stat().st_size
+            except OSError:
+                self.stats.misses += 1
+                return None
+            with self._lock:
+                self._add(key, size)
+
+        try:
+            data = json.loads(gzip.decompress(path.read_bytes()))
+            os.utime(path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Dropping unreadable extraction cache entry {key}: {e}")
+            self._forget(key)
+            self.stats.errors += 1
+            self.stats.misses += 1
+            return None
+
+        self.stats.hits += 1
+        return ExtractedMetadata.from_dict(data)
+
+    def put(self, key: str, metadata: ExtractedMetadata) -> None:
+        """Store a result, evicting the least recently used entries beyond max_bytes."""
+        try:
+            payload = gzip.compress(json.dumps(metadata.to_dict(), default=str).encode(), compresslevel=5)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Extraction result for {key} is not cacheable: {e}")
+            self.stats.errors += 1
+            return
+        if len(payload) > self.max_bytes:
+            return
+
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, temp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, 'wb') as file:
+                file.write(payload)
+            os.replace(temp_name, path)
+        except OSError as e:
+            logger.warning(f"Failed to store extraction cache entry {key}: {e}")
+            self.stats.errors += 1
+            return
+
+        with self._lock:
+            entries = self._load_index()
+            # Count entries other processes stored or evicted since the last store
+            self._sync_index()
+            self._add(key, len(payload))
+            self.stats.stores += 1
+            evicted = []
+            while self._total_bytes > self.max_bytes and entries:
+                old_key = next(iter(entries))
+                self._drop(old_key)
+                evicted.append(old_key)
+
+        for old_key in evicted:
+            self._path(old_key).unlink(missing_ok=True)
+            self.stats.evictions += 1
+
+    def _forget(self, key: str) -> None:
+        with self._lock:
+            self._load_index()
+            self._drop(key)
+        self._path(key).unlink(missing_ok=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = len(self._entries) if self._entries is not None else None
+            total_bytes = self._total_bytes if self._entries is not None else None
+        return {**self.stats.snapshot(), "entries": entries, "bytes": total_bytes, "max_bytes": self.max_bytes}
+
+
+def extraction_cache_from_env() -> Optional[ExtractionCache]:
+    """
+    Build the cache from EXTRACTION_CACHE_* settings.
+
+    EXTRACTION_CACHE_MAX_MB=0 disables caching.
+    """
+    max_mb = int(os.getenv("EXTRACTION_CACHE_MAX_MB", 1024))
+    if max_mb <= 0:
+        return None
+    return ExtractionCache(
+        os.getenv("EXTRACTION_CACHE_DIR", "./extraction_cache"),
+        max_bytes=max_mb * 1024 * 1024
+    )
@@ -2,6 +2,7 @@
 Metadata extractor factory for selecting appropriate extractor
 """
 
+import asyncio
 from pathlib import Path
 from typing import List, Optional
 import logging
@@ -11,14 +12,40 @@ from .pdf_extractor import PDFExtractor
 from .image_extractor import ImageExtractor
 from .text_extractor import TextExtractor
 from .office_extractor import OfficeExtractor
+from .process_pool import ExtractionProcessPool, extraction_pool_from_env
+from .cache import ExtractionCache, extraction_cache_from_env, hash_file
+from .ocr_engine import OCREngine, ocr_engine_from_env
 
 logger = logging.getLogger(__name__)
 
+# Event loop of an extraction worker process, reused across jobs
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _extract_in_worker(extractor: BaseExtractor, file_path: Path, mime_type: str) -> ExtractedMetadata:
+    """Run a whole extraction, parsing and text analysis, inside a pool worker"""
+    global _worker_loop
+    if _worker_loop is None:
+        _worker_loop = asyncio.new_event_loop()
+    return _worker_loop.run_until_complete(extractor.extract_metadata(file_path, mime_type))
+
 
 class MetadataExtractorFactory:
     """Factory class for creating and managing metadata extractors"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        process_pool: Optional[ExtractionProcessPool] = None,
+        cache: Optional[ExtractionCache] = None,
+        ocr_engine: Optional[OCREngine] = None
+    ):
+        # Extractions run in these worker processes when set, else in this process
+        self.process_pool = process_pool
+        # Results reused for content that was extracted before
+        self.cache = cache
+        # Recognizes image-only PDF pages for OCR requests
+        self.ocr_engine = ocr_engine
+        
         # Initialize all available extractors
         self.extractors: List[BaseExtractor] = [
             PDFExtractor(),
@@ -81,13 +108,17 @@ class MetadataExtractorFactory:
             logger.error(f"Error finding extractor for {file_path}: {e}")
             return None
     
-    async def extract_metadata(self, file_path: Path, mime_type: str) -> ExtractedMetadata:
+    async def extract_metadata(
+        self, file_path: Path, mime_type: str, file_hash: Optional[str] = None, ocr: bool = False
+    ) -> ExtractedMetadata:
         """
         Extract metadata from file using the best available extractor
         
         Args:
             file_path: Path to the file
             mime_type: MIME type of the file
+            file_hash: SHA-256 of the file if known; computed when the cache needs it
+            ocr: Also recognize PDF pages that have no text layer
             
         Returns:
             ExtractedMetadata object with extracted information
@@ -113,7 +144,7 @@ class MetadataExtractorFactory:
         
         try:
             # Extract metadata using selected extractor
-            metadata = await extractor.extract_metadata(file_path, mime_type)
+            metadata = await self._run_extractor(extractor, file_path, mime_type, file_hash, ocr)
             
             # Add file system metadata if not already present
             if not metadata.creation_date or not metadata.modification_date:
@@ -148,6 +179,55 @@ class MetadataExtractorFactory:
         """Get all supported MIME types across all extractors"""
         return list(self._mime_type_cache.keys())
     
+    async def _run_extractor(
+        self, extractor: BaseExtractor, file_path: Path, mime_type: str, file_hash: Optional[str], ocr: bool
+    ) -> ExtractedMetadata:
+        """Run the extractor, or reuse its cached result for the same content"""
+        loop = asyncio.get_running_loop()
+        # Images are always OCRed by their extractor
+        ocr_pass = ocr and self.ocr_engine is not None and isinstance(extractor, PDFExtractor)
+        key = None
+        if self.cache is not None:
+            if file_hash is None:
+                file_hash = await loop.run_in_executor(None, hash_file, file_path)
+            options = {'ocr': self.ocr_engine.get_cache_options()} if ocr_pass else {}
+            key = self.cache.make_key(file_hash, extractor, mime_type, **options)
+            cached = await loop.run_in_executor(None, self.cache.get, key)
+            if cached is not None:
+                logger.debug(f"Reusing cached {extractor.__class__.__name__} result for {file_path}")
+                return cached
+        
+        if self.process_pool is not None:
+            metadata = await self.process_pool.run(
+                extractor.__class__.__name__, _extract_in_worker, extractor, file_path, mime_type
+            )
+        else:
+            metadata = await extractor.extract_metadata(file_path, mime_type)
+        
+        if ocr_pass and not metadata.errors:
+            await self._recognize_pdf(extractor, file_path, metadata)
+        
+        # Failed extractions may succeed on retry
+        if key is not None and not metadata.errors:
+            await loop.run_in_executor(None, self.cache.put, key, metadata)
+        return metadata
+    
+    async def _recognize_pdf(self, extractor: PDFExtractor, file_path: Path, metadata: ExtractedMetadata):
+        """Merge OCR text of image-only pages with the text layer, in page order"""
+        try:
+            if self.process_pool is not None:
+                result = await self.process_pool.run(
+                    "OCREngine", self.ocr_engine.recognize_pdf, file_path, timeout=self.ocr_engine.timeout
+                )
+            else:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(None, self.ocr_engine.recognize_pdf, file_path)
+        except Exception as e:
+            metadata.warnings.append(f"OCR failed: {e}")
+            logger.error(f"OCR failed for {file_path}: {e}")
+            return
+        result.apply_to(metadata, max_text_chars=extractor.max_text_chars)
+    
     def get_extractor_info(self) -> dict:
         """Get information about available extractors"""
         info = {
@@ -169,6 +249,11 @@ class MetadataExtractorFactory:
             
             info['extractors'].append(extractor_info)
         
+        if self.process_pool is not None:
+            info['process_pool'] = self.process_pool.get_stats()
+        if self.cache is not None:
+            info['cache'] = self.cache.get_stats()
+        
         return info
     
     async def test_extractor_availability(self) -> dict:
@@ -212,5 +297,15 @@ class MetadataExtractorFactory:
         return results
 
 
-# Global factory instance
-metadata_factory = MetadataExtractorFactory()
\ No newline at end of file
+    async def close(self):
+        """Stop the extraction worker processes"""
+        if self.process_pool is not None:
+            await self.process_pool.close()
+
+
+# Global factory instance; worker processes start on the first extraction
+metadata_factory = MetadataExtractorFactory(
+    process_pool=extraction_pool_from_env(),
+    cache=extraction_cache_from_env(),
+    ocr_engine=ocr_engine_from_env()
+)
\ No newline at end of file
@@ -8,6 +8,7 @@ from typing import List, Optional, Dict, Any
 import time
 
 from .base_extractor import BaseExtractor, ExtractedMetadata
+from .ocr_engine import OCREngine, image_pages
 
 
 class ImageExtractor(BaseExtractor):
@@ -27,6 +28,14 @@ class ImageExtractor(BaseExtractor):
         import os
         self.ocr_languages = os.getenv('OCR_LANGUAGES', 'eng,fra,deu,spa').split(',')
         self.ocr_confidence_threshold = int(os.getenv('OCR_CONFIDENCE_THRESHOLD', 60))
+        # Recognizes every frame of multi-page images, in parallel bands
+        self.ocr_engine = OCREngine(
+            languages=self.ocr_languages, confidence_threshold=self.ocr_confidence_threshold
+        )
+    
+    def get_cache_options(self) -> Dict[str, Any]:
+        """OCR settings change the recognized text"""
+        return self.ocr_engine.get_cache_options()
     
     async def can_extract(self, file_path: Path, mime_type: str) -> bool:
         """Check if this extractor can handle image files"""
@@ -49,6 +58,7 @@ class ImageExtractor(BaseExtractor):
                 metadata.resolution = image_data.get('resolution')
                 metadata.color_mode = image_data.get('color_mode')
                 metadata.format_version = image_data.get('format')
+                metadata.page_count = image_data.get('page_count')
                 metadata.compression = image_data.get('compression')
                 metadata.raw_metadata = image_data.get('exif_data', {})
                 
@@ -61,6 +71,8 @@ class ImageExtractor(BaseExtractor):
                 if ocr_result:
                     metadata.text_content = ocr_result.get('text', '')
                     metadata.ocr_confidence = ocr_result.get('confidence')
+                    if ocr_result.get('failed_pages'):
+                        metadata.warnings.append(f"OCR failed on pages {ocr_result['failed_pages']}")
                     
                     # Process extracted text
                     if metadata.text_content and len(metadata.text_content.strip()) > 10:
@@ -93,7 +105,6 @@ class ImageExtractor(BaseExtractor):
         try:
             from PIL import Image
             from PIL.ExifTags import TAGS
-            import pytesseract
             
             result = {}
             
@@ -102,6 +113,7 @@ class ImageExtractor(BaseExtractor):
                 result['dimensions'] = {'width': img.width, 'height': img.height}
                 result['color_mode'] = img.mode
                 result['format'] = img.format
+                result['page_count'] = getattr(img, 'n_frames', 1)
                 
                 # Resolution (DPI)
                 dpi = getattr(img, 'dpi', None)
@@ -125,40 +137,15 @@ class ImageExtractor(BaseExtractor):
                     result['creation_date'] = self._parse_date(exif_data.get('DateTime'))
                     result['modification_date'] = self._parse_date(exif_data.get('DateTimeOriginal'))
                 
-                # OCR text extraction
+                # OCR text extraction, page by page for multi-page scans
                 try:
-                    # Convert to RGB if necessary for OCR
-                    ocr_image = img.convert('RGB') if img.mode != 'RGB' else img
-                    
-                    # Configure OCR with multiple languages
-                    ocr_config = f'-l {"+".join(self.ocr_languages)} --psm 3'
-                    
-                    # Extract text with confidence
-                    ocr_data = pytesseract.image_to_data(
-                        ocr_image,
-                        config=ocr_config,
-                        output_type=pytesseract.Output.DICT
-                    )
-                    
-                    # Filter text by confidence threshold
-                    filtered_words = []
-                    confidences = []
-                    
-                    for i, confidence in enumerate(ocr_data['conf']):
-                        if int(confidence) > self.ocr_confidence_threshold:
-                            word = ocr_data['text'][i].strip()
-                            if word:
-                                filtered_words.append(word)
-                                confidences.append(int(confidence))
-                    
-                    extracted_text = ' '.join(filtered_words)
-                    avg_confidence = sum(confidences) / len(confidences) if confidences else 0
+                    ocr = self.ocr_engine.recognize(image_pages(img))
                     
                     result['ocr_result'] = {
-                        'text': extracted_text,
-                        'confidence': avg_confidence,
-                        'word_count': len(filtered_words),
-                        'raw_data': ocr_data
+                        'text': ocr.text,
+                        'confidence': ocr.confidence or 0,
+                        'word_count': ocr.word_count,
+                        'failed_pages': [page.page_number for page in ocr.pages if page.error]
                     }
                     
                 except ImportError:
@@ -0,0 +1,336 @@
+"""
+Page-level OCR for scans and image-only PDFs
+
+Instead of handing a whole document to a single tesseract call, the engine
+takes it a page at a time, splits tall pages into bands cut along blank
+rows, preprocesses each page with numpy (grayscale, downsampling to the
+target resolution, Otsu binarization) and recognizes the bands
+concurrently. Every band runs in its own tesseract process, so a thread
+per band keeps all cores busy, including inside extraction pool workers,
+which may not start multiprocessing children. Text is merged back in page
+order with word confidences.
+"""
+
+import logging
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .base_extractor import ExtractedMetadata
+from .text_analysis import StreamingTextAnalyzer
+
+logger = logging.getLogger(__name__)
+
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", 0)) or os.cpu_count() or 1
+# Pages scanned at a higher resolution are downsampled to this
+OCR_TARGET_DPI = int(os.getenv("OCR_TARGET_DPI", 300))
+# Pages taller than this many rows (after downsampling) are split into bands
+OCR_MAX_TILE_ROWS = int(os.getenv("OCR_MAX_TILE_ROWS", 1200))
+# PDF pages with at least this much text in their text layer are not OCRed
+OCR_MIN_TEXT_LAYER_CHARS = int(os.getenv("OCR_MIN_TEXT_LAYER_CHARS", 20))
+OCR_TIMEOUT_SECONDS = float(os.getenv("OCR_TIMEOUT_SECONDS", 1800))
+
+# Largest page handed to tesseract, about A4 at 400 dpi
+MAX_PAGE_PIXELS = 16_000_000
+
+
+@dataclass
+class OCRPage:
+    """Text recognized on one page."""
+    page_number: int
+    text: str
+    confidence: Optional[float]  # Mean confidence of kept words; None for text layer pages
+    word_count: int
+    source: str = "ocr"  # "ocr" or "text_layer"
+    error: Optional[str] = None
+
+
+@dataclass
+class OCRResult:
+    """Pages of a document in page order."""
+    pages: List[OCRPage]
+
+    @property
+    def text(self) -> str:
+        return "\n".join(page.text for page in self.pages if page.text)
+
+    @property
+    def word_count(self) -> int:
+        return sum(page.word_count for page in self.pages)
+
+    @property
+    def confidence(self) -> Optional[float]:
+        """Mean confidence of all recognized words"""
+        recognized = [page for page in self.pages if page.confidence is not None and page.word_count]
+        words = sum(page.word_count for page in recognized)
+        if not words:
+            return None
+        return sum(page.confidence * page.word_count for page in recognized) / words
+
+    def apply_to(self, metadata: ExtractedMetadata, max_text_chars: Optional[int] = None) -> None:
+        """Replace the text and text statistics of metadata with the merged pages."""
+        analysis = StreamingTextAnalyzer(max_stored_chars=max_text_chars)
+        for page in self.pages:
+            if page.text:
+                analysis.feed(page.text)
+
+        metadata.text_content = analysis.text
+        metadata.text_truncated = analysis.truncated
+        metadata.word_count = analysis.word_count
+        metadata.character_count = analysis.character_count
+        metadata.language = analysis.language()
+        metadata.keywords = analysis.keywords()
+        metadata.ocr_confidence = self.confidence
+        if self.confidence is not None:
+            metadata.text_extraction_confidence = round(self.confidence / 100.0, 4)
+        metadata.raw_metadata['ocr'] = {
+            'pages_recognized': sum(1 for page in self.pages if page.source == "ocr"),
+            'text_layer_pages': sum(1 for page in self.pages if page.source == "text_layer"),
+            'failed_pages': [page.page_number for page in self.pages if page.error]
+        }
+        for page in self.pages:
+            if page.error:
+                metadata.warnings.append(f"OCR failed on page {page.page_number}: {page.error}")
+
+
+def otsu_threshold(pixels: np.ndarray) -> int:
+    """Gray level that best separates ink from background."""
+    histogram = np.bincount(pixels.ravel(), minlength=256).astype(np.float64)
+    probabilities = histogram / pixels.size
+    background_weight = np.cumsum(probabilities)
+    cumulative_mean = np.cumsum(probabilities * np.arange(256))
+    total_mean = cumulative_mean[-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        between_variance = (total_mean * background_weight - cumulative_mean) ** 2 / (
+            background_weight * (1.0 - background_weight)
+        )
+    return int(np.argmax(np.nan_to_num(between_variance)))
+
+
+def split_tiles(binary: np.ndarray, max_rows: int) -> List[Tuple[int, int]]:
+    """
+    Row ranges of at most max_rows, cut along blank rows so no text line is split.
+
+    Bands without ink are left out.
+    """
+    ink_per_row = np.count_nonzero(binary == 0, axis=1)
+    # A few specks of noise still count as blank
+    blank = ink_per_row <= max(1, binary.shape[1] // 500)
+    height = binary.shape[0]
+
+    tiles = []
+    start = 0
+    while start < height:
+        end = min(start + max_rows, height)
+        if end < height:
+            # Cut at the last blank row in the second half of the band
+            candidates = np.flatnonzero(blank[start + max_rows // 2:end])
+            if candidates.size:
+                end = start + max_rows // 2 + int(candidates[-1]) + 1
+        if not blank[start:end].all():
+            tiles.append((start, end))
+        start = end
+    return tiles
+
+
+def _ocr_tile(pixels: np.ndarray, config: str, confidence_threshold: int) -> Tuple[str, List[float]]:
+    """Recognize one band; returns its text, one line per text line, and word confidences."""
+    import pytesseract
+    from PIL import Image
+
+    data = pytesseract.image_to_data(
+        Image.fromarray(pixels), config=config, output_type=pytesseract.Output.DICT
+    )
+    lines: Dict[Tuple[int, int, int], List[str]] = {}
+    confidences = []
+    for i, confidence in enumerate(data['conf']):
+        confidence = float(confidence)
+        word = data['text'][i].strip()
+        if confidence > confidence_threshold and word:
+            key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+            lines.setdefault(key, []).append(word)
+            confidences.append(confidence)
+    return "\n".join(" ".join(words) for words in lines.values()), confidences
+
+
+def image_pages(image) -> Iterator[Tuple[int, Any]]:
+    """Frames of a (multi-page) image, numbered from 1."""
+    from PIL import ImageSequence
+
+    for index, frame in enumerate(ImageSequence.Iterator(image)):
+        yield index + 1, frame
+
+
+class OCREngine:
+    """
+    Parallel page-level OCR.
+
+    The engine only holds settings, so it can be sent to extraction pool
+    workers along with the extractors.
+    """
+
+    def __init__(
+        self,
+        languages: Iterable[str] = ("eng",),
+        confidence_threshold: int = 60,
+        max_workers: int = OCR_WORKERS,
+        target_dpi: int = OCR_TARGET_DPI,
+        max_tile_rows: int = OCR_MAX_TILE_ROWS,
+        min_text_layer_chars: int = OCR_MIN_TEXT_LAYER_CHARS,
+        timeout: float = OCR_TIMEOUT_SECONDS
+    ):
+        """
+        Args:
+            languages: tesseract language codes
+            confidence_threshold: Words at or below this confidence are dropped
+            max_workers: tesseract processes running at once
+            target_dpi: Resolution pages are downsampled to
+            max_tile_rows: Tallest band handed to one tesseract call
+            min_text_layer_chars: PDF pages with this much text are not OCRed
+            timeout: Seconds a whole document may take when run in the extraction pool
+        """
+        self.languages = list(languages)
+        self.confidence_threshold = confidence_threshold
+        self.max_workers = max(1, max_workers)
+        self.target_dpi = target_dpi
+        self.max_tile_rows = max_tile_rows
+        self.min_text_layer_chars = min_text_layer_chars
+        self.timeout = timeout
+
+    def get_cache_options(self) -> Dict[str, Any]:
+        """Settings that change the recognized text"""
+        return {
+            'languages': self.languages,
+            'confidence_threshold': self.confidence_threshold,
+            'target_dpi': self.target_dpi,
+            'max_tile_rows': self.max_tile_rows,
+            'min_text_layer_chars': self.min_text_layer_chars
+        }
+
+    @property
+    def config(self) -> str:
+        return f'-l {"+".join(self.languages)} --psm 3'
+
+    def preprocess(self, image) -> np.ndarray:
+        """Grayscale, downsampled and binarized page pixels (0 = ink, 255 = background)."""
+        from PIL import Image
+
+        gray = image.convert('L')
+        width, height = gray.size
+        scale = 1.0
+        dpi = image.info.get('dpi')
+        if dpi and dpi[0] and dpi[0] > self.target_dpi:
+            scale = self.target_dpi / float(dpi[0])
+        if width * height * scale * scale > MAX_PAGE_PIXELS:
+            scale = (MAX_PAGE_PIXELS / float(width * height)) ** 0.5
+        if scale < 1.0:
+            gray = gray.resize(
+                (max(1, round(width * scale)), max(1, round(height * scale))), Image.Resampling.BOX
+            )
+
+        pixels = np.asarray(gray, dtype=np.uint8)
+        threshold = otsu_threshold(pixels)
+        return np.where(pixels > threshold, 255, 0).astype(np.uint8)
+
+    def recognize(self, pages: Iterable[Tuple[int, Union[Any, OCRPage]]]) -> OCRResult:
+        """
+        Recognize pages given as (page number, PIL image) pairs.
+
+        A page may be given as a ready OCRPage instead, e.g. a PDF page with
+        a text layer; it is merged in order. Pages are preprocessed one at a
+        time here while earlier bands are recognized.
+        """
+        if self.max_workers > 1:
+            # tesseract would otherwise start a thread per core for every band
+            os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+        submitted: List[Tuple[int, Union[OCRPage, List]]] = []
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ocr") as executor:
+            in_flight = deque()
+            for page_number, page in pages:
+                if isinstance(page, OCRPage):
+                    submitted.append((page_number, page))
+                    continue
+                try:
+                    binary = self.preprocess(page)
+                except Exception as e:
+                    submitted.append((page_number, OCRPage(page_number, "", None, 0, error=str(e))))
+                    continue
+                futures = [
+                    executor.submit(_ocr_tile, binary[start:end], self.config, self.confidence_threshold)
+                    for start, end in split_tiles(binary, self.max_tile_rows)
+                ]
+                submitted.append((page_number, futures))
+                in_flight.extend(futures)
+                # Bound the preprocessed pages held in memory
+                while len(in_flight) > 2 * self.max_workers:
+                    wait([in_flight.popleft()])
+
+        return OCRResult([self._merge(page_number, page) for page_number, page in submitted])
+
+    def _merge(self, page_number: int, page: Union[OCRPage, List]) -> OCRPage:
+        if isinstance(page, OCRPage):
+            return page
+        texts, confidences = [], []
+        try:
+            for future in page:
+                text, tile_confidences = future.result()
+                if text:
+                    texts.append(text)
+                confidences.extend(tile_confidences)
+        except Exception as e:
+            logger.debug(f"OCR failed on page {page_number}: {e}")
+            return OCRPage(page_number, "", None, 0, error=str(e))
+        text = "\n".join(texts)
+        confidence = sum(confidences) / len(confidences) if confidences else None
+        return OCRPage(page_number, text, confidence, len(text.split()))
+
+    def recognize_pdf(self, file_path: Path) -> OCRResult:
+        """OCR the pages of a PDF that have no usable text layer."""
+        import PyPDF2
+
+        with open(file_path, 'rb') as file:
+            reader = PyPDF2.PdfReader(file)
+            if reader.is_encrypted:
+                reader.decrypt('')
+            return self.recognize(self._pdf_pages(reader))
+
+    def _pdf_pages(self, reader) -> Iterator[Tuple[int, Union[Any, OCRPage]]]:
+        from io import BytesIO
+        from PIL import Image
+
+        for index, page in enumerate(reader.pages):
+            page_number = index + 1
+            try:
+                text = page.extract_text() or ''
+            except Exception:
+                text = ''
+            if len(text.strip()) >= self.min_text_layer_chars:
+                yield page_number, OCRPage(page_number, text, None, len(text.split()), source="text_layer")
+                continue
+
+            try:
+                images = list(page.images)
+            except Exception as e:
+                yield page_number, OCRPage(page_number, "", None, 0, error=f"Unreadable page images: {e}")
+                continue
+            if not images:
+                # Nothing to recognize; keep whatever little text there was
+                yield page_number, OCRPage(page_number, text, None, len(text.split()), source="text_layer")
+                continue
+            # A scanned page is one full-page image; smaller ones are logos and stamps
+            scan = max(images, key=lambda image: len(image.data))
+            yield page_number, Image.open(BytesIO(scan.data))
+
+
+def ocr_engine_from_env() -> OCREngine:
+    """Build the engine from OCR_* settings."""
+    return OCREngine(
+        languages=os.getenv('OCR_LANGUAGES', 'eng,fra,deu,spa').split(','),
+        confidence_threshold=int(os.getenv('OCR_CONFIDENCE_THRESHOLD', 60))
+    )
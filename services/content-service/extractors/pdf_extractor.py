@@ -3,21 +3,46 @@ PDF metadata extractor using PyPDF2 and additional libraries
 """
 
 import asyncio
+import os
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 import time
 
 from .base_extractor import BaseExtractor, ExtractedMetadata
+from .text_analysis import StreamingTextAnalyzer
+
+# Text kept in memory and returned as text_content; the analysis covers all of it
+PDF_MAX_TEXT_CHARS = int(os.getenv("PDF_MAX_TEXT_CHARS", 10_000_000))
+# Pages read before extraction stops; 0 reads every page
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", 0))
+
+CATEGORY_KEYWORDS = {
+    'business': ['contract', 'agreement', 'invoice', 'proposal', 'report', 'analysis', 'budget', 'financial'],
+    'legal': ['legal', 'law', 'court', 'lawsuit', 'attorney', 'counsel', 'jurisdiction', 'whereas'],
+    'technical': ['technical', 'specification', 'manual', 'guide', 'documentation', 'api', 'system'],
+    'academic': ['research', 'study', 'paper', 'thesis', 'dissertation', 'abstract', 'bibliography'],
+    'medical': ['medical', 'patient', 'diagnosis', 'treatment', 'clinical', 'health', 'medicine']
+}
 
 
 class PDFExtractor(BaseExtractor):
     """Extract metadata from PDF files"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        max_text_chars: Optional[int] = PDF_MAX_TEXT_CHARS,
+        max_pages: int = PDF_MAX_PAGES
+    ):
         super().__init__()
         self.supported_types = [
             'application/pdf'
         ]
+        self.max_text_chars = max_text_chars
+        self.max_pages = max_pages
+    
+    def get_cache_options(self) -> Dict[str, Any]:
+        """Text cap and page cut-off change the extracted text"""
+        return {'max_text_chars': self.max_text_chars, 'max_pages': self.max_pages}
     
     async def can_extract(self, file_path: Path, mime_type: str) -> bool:
         """Check if this extractor can handle PDF files"""
@@ -44,38 +69,17 @@ class PDFExtractor(BaseExtractor):
                 metadata.creation_date = pdf_data.get('creation_date')
                 metadata.modification_date = pdf_data.get('modification_date')
                 metadata.page_count = pdf_data.get('page_count', 0)
-                metadata.text_content = pdf_data.get('text_content', '')
                 metadata.encrypted = pdf_data.get('encrypted', False)
                 metadata.password_protected = pdf_data.get('password_protected', False)
                 metadata.format_version = pdf_data.get('pdf_version')
                 metadata.raw_metadata = pdf_data.get('raw_metadata', {})
                 
-                # Process extracted text
-                if metadata.text_content:
-                    metadata.word_count = self._count_words(metadata.text_content)
-                    metadata.character_count = self._count_characters(metadata.text_content)
-                    metadata.language = self._detect_language(metadata.text_content)
-                    metadata.keywords = self._extract_keywords(metadata.text_content)
-                    
-                    # Simple content analysis
-                    content_lower = metadata.text_content.lower()
-                    metadata.tables_detected = content_lower.count('table')
-                    metadata.images_detected = pdf_data.get('image_count', 0)
-                    metadata.links_detected = content_lower.count('http')
-                    
-                    # Confidence based on text length and page count
-                    if metadata.page_count and metadata.page_count > 0:
-                        avg_words_per_page = metadata.word_count / metadata.page_count
-                        if avg_words_per_page > 100:
-                            metadata.text_extraction_confidence = 0.9
-                        elif avg_words_per_page > 50:
-                            metadata.text_extraction_confidence = 0.7
-                        else:
-                            metadata.text_extraction_confidence = 0.4
-                
-                # Content-based classification suggestions
-                metadata.suggested_categories = self._suggest_categories(metadata.text_content)
-                metadata.suggested_tags = self._suggest_tags(metadata.text_content, metadata.title)
+                # Text was analyzed page by page as it was extracted
+                analysis = pdf_data.get('analysis')
+                if analysis is not None:
+                    self._apply_analysis(metadata, analysis, pdf_data)
+                else:
+                    metadata.suggested_tags = self._suggest_tags([], metadata.title)
                 
         except Exception as e:
             error_msg = f"PDF extraction failed: {str(e)}"
@@ -88,13 +92,48 @@ class PDFExtractor(BaseExtractor):
         
         return metadata
     
+    def _apply_analysis(self, metadata: ExtractedMetadata, analysis: StreamingTextAnalyzer, pdf_data: dict):
+        """Fill text statistics and suggestions from the page-by-page analysis"""
+        metadata.text_content = analysis.text
+        metadata.text_truncated = analysis.truncated
+        if analysis.truncated:
+            metadata.warnings.append(f"Stored the first {self.max_text_chars} characters of the text")
+        
+        pages_read = pdf_data.get('pages_read', metadata.page_count)
+        if pages_read < metadata.page_count:
+            metadata.warnings.append(f"Extracted text from the first {pages_read} of {metadata.page_count} pages")
+        
+        if analysis.chunk_count:
+            metadata.word_count = analysis.word_count
+            metadata.character_count = analysis.character_count
+            metadata.language = analysis.language()
+            metadata.keywords = analysis.keywords()
+            
+            # Simple content analysis
+            metadata.tables_detected = analysis.term_counts['table']
+            metadata.images_detected = pdf_data.get('image_count', 0)
+            metadata.links_detected = analysis.term_counts['http']
+            
+            # Confidence based on text length and page count
+            if pages_read > 0:
+                avg_words_per_page = metadata.word_count / pages_read
+                if avg_words_per_page > 100:
+                    metadata.text_extraction_confidence = 0.9
+                elif avg_words_per_page > 50:
+                    metadata.text_extraction_confidence = 0.7
+                else:
+                    metadata.text_extraction_confidence = 0.4
+        
+        # Content-based classification suggestions
+        metadata.suggested_categories = self._categories_for_terms(analysis.found_terms)
+        metadata.suggested_tags = self._suggest_tags(analysis.keywords(max_keywords=10), metadata.title)
+    
     def _extract_pdf_sync(self, file_path: Path) -> dict:
         """Synchronous PDF extraction (runs in thread pool)"""
         try:
             import PyPDF2
             
             result = {
-                'text_content': '',
                 'page_count': 0,
                 'encrypted': False,
                 'password_protected': False,
@@ -117,7 +156,6 @@ class PDFExtractor(BaseExtractor):
                         pdf_reader.decrypt('')
                     except:
                         # Cannot proceed without password
-                        result['text_content'] = ''
                         return result
                 
                 # Extract metadata
@@ -143,18 +181,10 @@ class PDFExtractor(BaseExtractor):
                     if 'moddate' in metadata_dict:
                         result['modification_date'] = self._parse_date(metadata_dict['moddate'])
                 
-                # Extract text from all pages
-                text_content = []
-                for page_num, page in enumerate(pdf_reader.pages):
-                    try:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text_content.append(page_text)
-                    except Exception as e:
-                        self.logger.debug(f"Failed to extract text from page {page_num}: {e}")
-                        continue
-                
-                result['text_content'] = '\n'.join(text_content)
+                # Analyze the text page by page instead of joining it first
+                result['analysis'], result['pages_read'] = self._analyze_pages(
+                    self._iter_page_text(pdf_reader)
+                )
                 
                 # Try to get PDF version
                 if hasattr(pdf_reader, 'pdf_header'):
@@ -168,43 +198,58 @@ class PDFExtractor(BaseExtractor):
         
         return result
     
+    def _iter_page_text(self, pdf_reader) -> Iterator[str]:
+        """Yield the text of each page, one page in memory at a time"""
+        for page_num, page in enumerate(pdf_reader.pages):
+            if self.max_pages and page_num >= self.max_pages:
+                return
+            try:
+                page_text = page.extract_text()
+            except Exception as e:
+                self.logger.debug(f"Failed to extract text from page {page_num}: {e}")
+                page_text = None
+            # Empty pages still count towards max_pages
+            yield page_text or ''
+    
+    def _analyze_pages(self, pages: Iterator[str]) -> tuple:
+        """
+        Feed page texts to a streaming analyzer in a single pass.
+        
+        Returns:
+            The analyzer and the number of pages read
+        """
+        analysis = StreamingTextAnalyzer(
+            max_stored_chars=self.max_text_chars,
+            count_terms=('table', 'http'),
+            presence_terms=[term for terms in CATEGORY_KEYWORDS.values() for term in terms]
+        )
+        pages_read = 0
+        for page_text in pages:
+            pages_read += 1
+            if page_text:
+                analysis.feed(page_text)
+        return analysis, pages_read
+    
     def _suggest_categories(self, text_content: Optional[str]) -> List[str]:
         """Suggest document categories based on content"""
         if not text_content:
             return []
         
-        categories = []
         content_lower = text_content.lower()
-        
-        # Business documents
-        business_keywords = ['contract', 'agreement', 'invoice', 'proposal', 'report', 'analysis', 'budget', 'financial']
-        if any(keyword in content_lower for keyword in business_keywords):
-            categories.append('business')
-        
-        # Legal documents
-        legal_keywords = ['legal', 'law', 'court', 'lawsuit', 'attorney', 'counsel', 'jurisdiction', 'whereas']
-        if any(keyword in content_lower for keyword in legal_keywords):
-            categories.append('legal')
-        
-        # Technical documents
-        tech_keywords = ['technical', 'specification', 'manual', 'guide', 'documentation', 'api', 'system']
-        if any(keyword in content_lower for keyword in tech_keywords):
-            categories.append('technical')
-        
-        # Academic documents
-        academic_keywords = ['research', 'study', 'paper', 'thesis', 'dissertation', 'abstract', 'bibliography']
-        if any(keyword in content_lower for keyword in academic_keywords):
-            categories.append('academic')
-        
-        # Medical documents
-        medical_keywords = ['medical', 'patient', 'diagnosis', 'treatment', 'clinical', 'health', 'medicine']
-        if any(keyword in content_lower for keyword in medical_keywords):
-            categories.append('medical')
-        
+        return self._categories_for_terms(
+            {term for terms in CATEGORY_KEYWORDS.values() for term in terms if term in content_lower}
+        )
+    
+    def _categories_for_terms(self, found_terms) -> List[str]:
+        """Categories with at least one of their keywords in the content"""
+        categories = [
+            category for category, keywords in CATEGORY_KEYWORDS.items()
+            if any(keyword in found_terms for keyword in keywords)
+        ]
         return categories[:3]  # Limit to top 3 categories
     
-    def _suggest_tags(self, text_content: Optional[str], title: Optional[str]) -> List[str]:
-        """Suggest tags based on content and title"""
+    def _suggest_tags(self, content_keywords: List[str], title: Optional[str]) -> List[str]:
+        """Suggest tags based on content keywords and title"""
         tags = []
         
         # Extract from title
@@ -213,9 +258,7 @@ class PDFExtractor(BaseExtractor):
             tags.extend(title_words[:5])
         
         # Extract from content
-        if text_content:
-            content_tags = self._extract_keywords(text_content, max_keywords=10)
-            tags.extend(content_tags[:8])
+        tags.extend(content_keywords[:8])
         
         # Remove duplicates and return
         return list(set(tags))[:15]
@@ -0,0 +1,275 @@
+"""
+Process pool for CPU-bound extraction work
+
+PDF parsing, OCR and spreadsheet loading hold the GIL, so running them on
+the default thread pool serializes every extraction in the worker process.
+The pool keeps warm worker processes with the parser libraries already
+imported, limits how many jobs of each extractor run at once, caps worker
+memory and kills workers whose job exceeds its timeout.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import resource
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Imported by every worker at start so the first job doesn't pay for it
+PRELOAD_MODULES = (
+    "PyPDF2", "PIL.Image", "pytesseract", "openpyxl", "docx", "pptx", "odf.opendocument", "bs4"
+)
+
+
+class ExtractionJobError(Exception):
+    """An extraction job could not complete in its worker process"""
+
+
+class ExtractionTimeoutError(ExtractionJobError):
+    """The job ran longer than its timeout and its worker was killed"""
+
+
+class WorkerCrashedError(ExtractionJobError):
+    """The worker process exited during the job, e.g. when it hit its memory cap"""
+
+
+def _worker_main(connection, memory_limit_bytes: Optional[int], preload: Iterable[str]) -> None:
+    """Run jobs received on connection until told to stop."""
+    if memory_limit_bytes:
+        # Inherited by tesseract and other helper processes the job starts
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit_bytes, memory_limit_bytes))
+
+    for module in preload:
+        try:
+            __import__(module)
+        except Exception:
+            pass
+
+    while True:
+        try:
+            job = connection.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+
+        fn, args = job
+        try:
+            reply = (True, fn(*args))
+        except BaseException as e:
+            reply = (False, e)
+        try:
+            connection.send(reply)
+        except Exception as e:
+            # Unpicklable result or exception
+            connection.send((False, ExtractionJobError(f"{type(e).__name__}: {e}")))
+
+
+class _Worker:
+    """One worker process and the parent's end of its pipe"""
+
+    def __init__(self, context, memory_limit_bytes: Optional[int], preload: Iterable[str]):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_connection, memory_limit_bytes, tuple(preload)),
+            daemon=True
+        )
+        self.process.start()
+        child_connection.close()
+        self.jobs_completed = 0
+
+    async def run(self, fn: Callable, args: tuple, timeout: Optional[float]) -> Any:
+        loop = asyncio.get_running_loop()
+        readable = loop.create_future()
+        fileno = self.connection.fileno()
+
+        try:
+            self.connection.send((fn, args))
+        except (BrokenPipeError, ConnectionResetError):
+            raise WorkerCrashedError(f"Extraction worker exited with code {self._exit_code()}")
+        loop.add_reader(fileno, lambda: readable.done() or readable.set_result(None))
+        try:
+            await asyncio.wait_for(readable, timeout)
+        finally:
+            loop.remove_reader(fileno)
+
+        try:
+            ok, value = self.connection.recv()
+        except (EOFError, OSError):
+            raise WorkerCrashedError(f"Extraction worker exited with code {self._exit_code()}")
+        self.jobs_completed += 1
+        if not ok:
+            raise value
+        return value
+
+    def _exit_code(self) -> Optional[int]:
+        self.process.join(timeout=1)
+        return self.process.exitcode
+
+    def stop(self) -> None:
+        try:
+            self.connection.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=5)
+        self.kill()
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.connection.close()
+
+
+class ExtractionProcessPool:
+    """
+    Runs synchronous extraction functions in warm worker processes.
+
+    Functions and their arguments must be picklable; bound methods of the
+    extractors are. Workers are started on first use and recycled after
+    max_tasks_per_worker jobs to bound leaks in the parser libraries.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        extractor_limits: Optional[Dict[str, int]] = None,
+        memory_limit_mb: Optional[int] = None,
+        task_timeout: Optional[float] = 300.0,
+        max_tasks_per_worker: int = 500,
+        preload: Iterable[str] = PRELOAD_MODULES,
+        start_method: str = "spawn"
+    ):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.extractor_limits = dict(extractor_limits or {})
+        self.memory_limit_bytes = memory_limit_mb * 1024 * 1024 if memory_limit_mb else None
+        self.task_timeout = task_timeout
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.preload = tuple(preload)
+        self._context = multiprocessing.get_context(start_method)
+
+        self._idle: List[_Worker] = []
+        self._busy = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._limits: Dict[str, asyncio.Semaphore] = {}
+        self._closed = False
+        self.stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"completed": 0, "failed": 0, "timed_out": 0, "crashed": 0}
+        )
+
+    def _limit(self, name: str) -> asyncio.Semaphore:
+        if self._slots is None:
+            # Created on first use so they bind to the running loop
+            self._slots = asyncio.Semaphore(self.max_workers)
+        if name not in self._limits:
+            self._limits[name] = asyncio.Semaphore(self.extractor_limits.get(name, self.max_workers))
+        return self._limits[name]
+
+    async def _acquire_worker(self) -> _Worker:
+        if self._idle:
+            return self._idle.pop()
+        loop = asyncio.get_running_loop()
+        # Spawning imports the interpreter and the preloaded parsers
+        return await loop.run_in_executor(
+            None, _Worker, self._context, self.memory_limit_bytes, self.preload
+        )
+
+    def _release_worker(self, worker: _Worker) -> None:
+        if self._closed or worker.jobs_completed >= self.max_tasks_per_worker:
+            worker.stop()
+        else:
+            self._idle.append(worker)
+
+    async def run(self, name: str, fn: Callable, *args, timeout: Optional[float] = None) -> Any:
+        """
+        Run fn(*args) in a worker process.
+
+        Args:
+            name: Extractor name the per-extractor concurrency limit applies to
+            timeout: Seconds before the worker is killed; defaults to task_timeout
+
+        Raises:
+            ExtractionTimeoutError: The job ran too long
+            WorkerCrashedError: The worker died, e.g. on exceeding its memory cap
+            Exception: Whatever fn raised
+        """
+        if self._closed:
+            raise RuntimeError("Extraction pool is closed")
+        timeout = self.task_timeout if timeout is None else timeout
+        stats = self.stats[name]
+
+        async with self._limit(name), self._slots:
+            worker = await self._acquire_worker()
+            self._busy += 1
+            try:
+                result = await worker.run(fn, args, timeout)
+            except asyncio.TimeoutError:
+                worker.kill()
+                stats["timed_out"] += 1
+                raise ExtractionTimeoutError(f"{name} job exceeded {timeout}s")
+            except WorkerCrashedError:
+                worker.kill()
+                stats["crashed"] += 1
+                raise
+            except asyncio.CancelledError:
+                # The job keeps running and would answer a later request
+                worker.kill()
+                raise
+            except BaseException:
+                stats["failed"] += 1
+                self._release_worker(worker)
+                raise
+            finally:
+                self._busy -= 1
+
+            stats["completed"] += 1
+            self._release_worker(worker)
+            return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "idle_workers": len(self._idle),
+            "busy_workers": self._busy,
+            "extractors": {name: dict(counts) for name, counts in self.stats.items()}
+        }
+
+    async def close(self) -> None:
+        """Stop idle workers; busy ones stop when their job finishes."""
+        self._closed = True
+        workers, self._idle = self._idle, []
+        if workers:
+            await asyncio.get_running_loop().run_in_executor(None, lambda: [w.stop() for w in workers])
+
+
+def _parse_limits(value: str) -> Dict[str, int]:
+    """Parse "PDFExtractor=4,ImageExtractor=2" into a mapping."""
+    limits = {}
+    for item in value.split(","):
+        if "=" in item:
+            name, limit = item.split("=", 1)
+            limits[name.strip()] = int(limit)
+    return limits
+
+
+def extraction_pool_from_env() -> Optional[ExtractionProcessPool]:
+    """
+    Build the pool from EXTRACTION_* settings.
+
+    EXTRACTION_WORKERS=0 keeps extraction on the default thread pool.
+    """
+    workers = int(os.getenv("EXTRACTION_WORKERS", os.cpu_count() or 1))
+    if workers <= 0:
+        return None
+    memory_limit_mb = int(os.getenv("EXTRACTION_MEMORY_LIMIT_MB", 2048))
+    return ExtractionProcessPool(
+        max_workers=workers,
+        extractor_limits=_parse_limits(os.getenv("EXTRACTION_LIMITS", "")),
+        memory_limit_mb=memory_limit_mb or None,
+        task_timeout=float(os.getenv("EXTRACTION_TIMEOUT_SECONDS", 300)),
+        max_tasks_per_worker=int(os.getenv("EXTRACTION_MAX_TASKS_PER_WORKER", 500))
+    )
@@ -0,0 +1,141 @@
+"""
+Single-pass text analysis for text that arrives in chunks
+
+The BaseExtractor helpers each rescan the complete text. For long documents
+StreamingTextAnalyzer takes the text one chunk (e.g. one PDF page) at a
+time, keeps the word, keyword, language and term counts as it goes and only
+holds as much of the text as it is told to store. The results match the
+batch helpers on the joined text.
+"""
+
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set
+
+from .base_extractor import LANGUAGE_INDICATORS, STOP_WORDS
+
+_NON_WORD = re.compile(r'[^\w\s]')
+_ALL_INDICATORS = frozenset(
+    indicator for indicators in LANGUAGE_INDICATORS.values() for indicator in indicators
+)
+
+
+class StreamingTextAnalyzer:
+    """
+    Incremental word, keyword and language statistics.
+
+    Chunks are joined with separator, as if the text had been built with
+    separator.join(chunks). Substring checks never span chunks, so terms
+    must not contain the separator.
+    """
+
+    def __init__(
+        self,
+        max_stored_chars: Optional[int] = None,
+        separator: str = '\n',
+        count_terms: Iterable[str] = (),
+        presence_terms: Iterable[str] = ()
+    ):
+        """
+        Args:
+            max_stored_chars: Keep at most this much text in memory; None keeps it all
+            count_terms: Substrings of the lowercased text to count
+            presence_terms: Substrings of the lowercased text to look for
+        """
+        self.max_stored_chars = max_stored_chars
+        self.separator = separator
+
+        self.chunk_count = 0
+        self.word_count = 0
+        self.character_count = 0
+        self.truncated = False
+        self.term_counts: Dict[str, int] = {term: 0 for term in count_terms}
+        self.found_terms: Set[str] = set()
+        self._presence_terms = set(presence_terms)
+        self._indicators_found: Set[str] = set()
+        self._keyword_counts: Counter = Counter()
+
+        self._stored: List[str] = []
+        self._stored_chars = 0
+        # Offsets of the first and last non-whitespace characters, for strip() lengths
+        self._length = 0
+        self._content_start: Optional[int] = None
+        self._content_end = 0
+
+    def feed(self, chunk: str) -> None:
+        """Add the next chunk of text."""
+        piece = self.separator + chunk if self.chunk_count else chunk
+        self.chunk_count += 1
+
+        self._track_bounds(piece)
+        self._store(piece)
+
+        words = chunk.split()
+        self.word_count += len(words)
+        self.character_count += len(chunk) - chunk.count(' ') - chunk.count('\n') - chunk.count('\t')
+
+        lower = chunk.lower()
+        for term in self.term_counts:
+            self.term_counts[term] += lower.count(term)
+        if self._presence_terms:
+            found = {term for term in self._presence_terms if term in lower}
+            self.found_terms |= found
+            self._presence_terms -= found
+        if len(self._indicators_found) < len(_ALL_INDICATORS):
+            self._indicators_found.update(
+                indicator for indicator in _ALL_INDICATORS - self._indicators_found if indicator in lower
+            )
+
+        self._keyword_counts.update(
+            word for word in _NON_WORD.sub(' ', lower).split()
+            if len(word) > 3 and word not in STOP_WORDS and word.isalpha()
+        )
+
+    def _track_bounds(self, piece: str) -> None:
+        stripped = piece.strip()
+        if stripped:
+            if self._content_start is None:
+                self._content_start = self._length + len(piece) - len(piece.lstrip())
+            self._content_end = self._length + len(piece.rstrip())
+        self._length += len(piece)
+
+    def _store(self, piece: str) -> None:
+        if self.max_stored_chars is None:
+            self._stored.append(piece)
+            return
+        room = self.max_stored_chars - self._stored_chars
+        if len(piece) > room:
+            self.truncated = True
+            piece = piece[:max(room, 0)]
+        if piece:
+            self._stored.append(piece)
+            self._stored_chars += len(piece)
+
+    @property
+    def stripped_length(self) -> int:
+        """len(text.strip()) of the complete text"""
+        if self._content_start is None:
+            return 0
+        return self._content_end - self._content_start
+
+    @property
+    def text(self) -> str:
+        """The stored text"""
+        return ''.join(self._stored)
+
+    def keywords(self, max_keywords: int = 20) -> List[str]:
+        """Same result as BaseExtractor._extract_keywords on the complete text"""
+        if self.stripped_length < 20:
+            return []
+        return [word for word, _ in self._keyword_counts.most_common(max_keywords)]
+
+    def language(self) -> Optional[str]:
+        """Same result as BaseExtractor._detect_language on the complete text"""
+        if self.stripped_length < 50:
+            return None
+        scores = {
+            language: sum(1 for indicator in indicators if indicator in self._indicators_found)
+            for language, indicators in LANGUAGE_INDICATORS.items()
+        }
+        best = max(scores, key=scores.get)
+        return best if scores[best] > 3 else None
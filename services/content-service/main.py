@@ -3,6 +3,7 @@ Content Service - Document Management, Search & Audit
 Port: 8002
 """
 import os
+import asyncio
 import time
 import logging
 import psutil
@@ -11,15 +12,14 @@ import aiofiles
 import magic
 import uuid as uuid_lib
 from contextlib import asynccontextmanager
-from typing import List, Optional
+from typing import List, Optional, Set
 from uuid import UUID
 from pathlib import Path
 from datetime import datetime
 
-from fastapi import FastAPI, HTTPException, Depends, status, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, Depends, Query, status, UploadFile, File, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer
-from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # Import database and models
@@ -27,14 +27,41 @@ from database import (
     db, get_db_session, init_database, close_database, check_database_health
 )
 from models import Document
-from repositories import DocumentRepository, AuditRepository, PermissionRepository
+from repositories import (
+    DocumentRepository, AuditRepository, AuditWriter, PermissionRepository,
+    PermissionResolver, AclCache, InvalidCursorError
+)
+from repositories.permission_repository import PERMISSION_TYPES
+from repositories.full_text import SORT_COLUMNS, SearchHit, fragment_offsets
 from schemas import (
     DocumentCreate, DocumentResponse, DocumentListResponse, 
     DocumentDetailResponse, ErrorResponse, PaginationParams,
     GrantUserPermissionRequest, GrantRolePermissionRequest,
     ShareDocumentRequest, ShareDocumentResponse,
     DocumentPermissionSummary, EffectivePermissionsResponse,
-    DocumentAccessCheckRequest, DocumentAccessCheckResponse
+    DocumentAccessCheckRequest, DocumentAccessCheckResponse,
+    MultipartUploadCreate, MultipartUploadStatus,
+    SearchRequest, SearchResponse, SuggestionResponse, SemanticSearchRequest
+)
+from schemas.search import SearchType, SearchHighlight, SearchResultItem, SuggestionItem
+from auth import (
+    TokenValidator, InvalidTokenError, IdentityServiceError,
+    IdentityServiceUnavailableError
+)
+from storage import LocalFileStorage, MultipartUploadManager, reconcile_usage_periodically
+from storage.base import StorageQuotaExceededError
+from storage.multipart import (
+    UploadSession, UploadSessionNotFoundError, InvalidUploadPartError,
+    UploadConflictError, IncompleteUploadError
+)
+from transport import build_file_response, make_etag, transfer_metrics
+from search import (
+    AutocompleteIndex, refresh_autocomplete_periodically, search_backend_from_env, semantic_index_from_env,
+    suggest_for_user
+)
+from search.analysis import tokenize
+from storage.ingest import (
+    IngestResult, ingest_upload, UploadTooLargeError, ContentTypeNotAllowedError
 )
 
 # Import missing dependencies
@@ -53,11 +80,61 @@ SERVICE_VERSION = "1.0.0"
 SERVICE_PORT = int(os.getenv("SERVICE_PORT", 8002))
 IDENTITY_SERVICE_URL = os.getenv("IDENTITY_SERVICE_URL", "http://localhost:8001")
 
+# Token validation configuration
+JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")  # Enables local signature verification
+JWT_ALGORITHMS = os.getenv("JWT_ALGORITHMS", "HS256").split(",")
+TOKEN_CACHE_TTL_SECONDS = int(os.getenv("TOKEN_CACHE_TTL_SECONDS", 60))  # Capped by token exp; also bounds how long a revoked token is accepted
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", 10000))
+IDENTITY_SERVICE_MAX_CONNECTIONS = int(os.getenv("IDENTITY_SERVICE_MAX_CONNECTIONS", 100))
+
+# Document ACL cache configuration
+ACL_CACHE_ENABLED = os.getenv("ACL_CACHE_ENABLED", "true").lower() == "true"
+ACL_CACHE_TTL_SECONDS = int(os.getenv("ACL_CACHE_TTL_SECONDS", 300))  # Redis tier
+ACL_LOCAL_CACHE_TTL_SECONDS = float(os.getenv("ACL_LOCAL_CACHE_TTL_SECONDS", 5))  # Staleness bound if an invalidation is missed
+ACL_LOCAL_CACHE_MAX_ENTRIES = int(os.getenv("ACL_LOCAL_CACHE_MAX_ENTRIES", 50000))
+ACL_INVALIDATION_CHANNEL = os.getenv("ACL_INVALIDATION_CHANNEL", "content.acl.invalidated")
+
+# Listing configuration
+PAGINATION_COUNT_LIMIT = int(os.getenv("PAGINATION_COUNT_LIMIT", 10000))  # Totals above this are lower bounds
+SEARCH_COUNT_LIMIT = int(os.getenv("SEARCH_COUNT_LIMIT", 10000))  # Search totals and facets stop here
+SEARCH_CANDIDATE_LIMIT = int(os.getenv("SEARCH_CANDIDATE_LIMIT", 1000))  # Embedded backend matches per query
+SEMANTIC_CANDIDATE_LIMIT = int(os.getenv("SEMANTIC_CANDIDATE_LIMIT", 200))  # Documents ranked before permission filtering
+SEMANTIC_SNIPPET_CHARS = int(os.getenv("SEMANTIC_SNIPPET_CHARS", 300))  # Leading part of the matching chunk shown
+
+# Autocomplete configuration
+AUTOCOMPLETE_REFRESH_INTERVAL_SECONDS = float(os.getenv("AUTOCOMPLETE_REFRESH_INTERVAL_SECONDS", 15))
+AUTOCOMPLETE_SNAPSHOT_PATH = os.getenv("AUTOCOMPLETE_SNAPSHOT_PATH", "./search_index/autocomplete.json.gz")
+AUTOCOMPLETE_SNAPSHOT_INTERVAL_SECONDS = float(os.getenv("AUTOCOMPLETE_SNAPSHOT_INTERVAL_SECONDS", 300))
+AUTOCOMPLETE_MIN_QUERY_USERS = int(os.getenv("AUTOCOMPLETE_MIN_QUERY_USERS", 3))  # Distinct users before a query is suggested to everyone
+
+# Audit logging configuration
+AUDIT_ASYNC_WRITES = os.getenv("AUDIT_ASYNC_WRITES", "true").lower() == "true"
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", 500))
+AUDIT_FLUSH_INTERVAL_MS = int(os.getenv("AUDIT_FLUSH_INTERVAL_MS", 1000))  # Max delay for queued events
+AUDIT_MAX_BUFFER_SIZE = int(os.getenv("AUDIT_MAX_BUFFER_SIZE", 10000))
+# Roles allowed to read the organization-wide audit log
+AUDIT_ACTIVITY_ROLES = set(os.getenv("AUDIT_ACTIVITY_ROLES", "admin,auditor").split(","))
+AUDIT_SYNC_ACTIONS = os.getenv(
+    "AUDIT_SYNC_ACTIONS",
+    "uploaded,delete,share_document,grant_user_permission,grant_role_permission,"
+    "revoke_user_permission,revoke_role_permission"
+).split(",")
+
 # File upload configuration
 MAX_FILE_SIZE_MB = int(os.getenv("MAX_FILE_SIZE_MB", 50))
 MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 1024 * 1024))  # 1MB read buffer
+CONTENT_ADDRESSED_STORAGE = os.getenv("CONTENT_ADDRESSED_STORAGE", "true").lower() == "true"
+TRANSFER_CHUNK_SIZE = int(os.getenv("TRANSFER_CHUNK_SIZE", 256 * 1024))  # Chunked download reads
+ZERO_COPY_TRANSFERS = os.getenv("ZERO_COPY_TRANSFERS", "false").lower() == "true"  # Opt-in; needs an ASGI server with zerocopysend (not uvicorn)
+STORAGE_QUOTA_BYTES = int(os.getenv("STORAGE_QUOTA_BYTES", 0)) or None  # Disk-wide limit
+ORGANIZATION_QUOTA_BYTES = int(os.getenv("ORGANIZATION_QUOTA_BYTES", 0)) or None  # Default per-tenant limit
+USAGE_RECONCILE_INTERVAL_SECONDS = int(os.getenv("USAGE_RECONCILE_INTERVAL_SECONDS", 3600))
+MAX_MULTIPART_UPLOAD_SIZE_MB = int(os.getenv("MAX_MULTIPART_UPLOAD_SIZE_MB", 5120))  # Resumable uploads
+UPLOAD_PART_SIZE = int(os.getenv("UPLOAD_PART_SIZE", 8 * 1024 * 1024))  # Default multipart part size
+UPLOAD_SESSION_TTL_SECONDS = int(os.getenv("UPLOAD_SESSION_TTL_SECONDS", 24 * 3600))
 UPLOAD_DIRECTORY = Path(os.getenv("UPLOAD_DIRECTORY", "./uploads"))
-STORAGE_DIRECTORY = Path(os.getenv("STORAGE_DIRECTORY", "./storage"))
+STORAGE_DIRECTORY = Path(os.getenv("STORAGE_DIRECTORY", "./data/storage"))  # Not the storage package
 ALLOWED_CONTENT_TYPES = os.getenv(
     "ALLOWED_CONTENT_TYPES", 
     "application/pdf,application/msword,application/vnd.openxmlformats-officedocument.wordprocessingml.document,text/plain,image/jpeg,image/png,image/tiff"
@@ -67,6 +144,24 @@ ALLOWED_CONTENT_TYPES = os.getenv(
 UPLOAD_DIRECTORY.mkdir(parents=True, exist_ok=True)
 STORAGE_DIRECTORY.mkdir(parents=True, exist_ok=True)
 
+# Document file storage (deduplicates identical uploads when content addressed)
+file_storage = LocalFileStorage({
+    "base_path": str(STORAGE_DIRECTORY),
+    "content_addressed": CONTENT_ADDRESSED_STORAGE,
+    "chunk_size": TRANSFER_CHUNK_SIZE,
+    "quota_bytes": STORAGE_QUOTA_BYTES,
+    "organization_quota_bytes": ORGANIZATION_QUOTA_BYTES
+})
+
+# Resumable uploads write their parts straight into file_storage
+multipart_uploads = MultipartUploadManager(
+    file_storage,
+    max_size=MAX_MULTIPART_UPLOAD_SIZE_MB * 1024 * 1024,
+    part_size=UPLOAD_PART_SIZE,
+    session_ttl_seconds=UPLOAD_SESSION_TTL_SECONDS,
+    chunk_size=UPLOAD_CHUNK_SIZE
+)
+
 start_time = time.time()
 
 # Connection tracking
@@ -75,6 +170,44 @@ _active_connections = 0
 # JWT Authentication setup
 security = HTTPBearer()
 
+# Shared token validation: local verification, TTL cache, pooled Identity client
+token_validator = TokenValidator(
+    IDENTITY_SERVICE_URL,
+    verification_key=JWT_SECRET_KEY,
+    algorithms=JWT_ALGORITHMS,
+    cache_ttl_seconds=TOKEN_CACHE_TTL_SECONDS,
+    cache_max_entries=TOKEN_CACHE_MAX_ENTRIES,
+    max_connections=IDENTITY_SERVICE_MAX_CONNECTIONS
+)
+
+# Read-path audit events are batched; destructive actions stay synchronous
+audit_writer = AuditWriter(
+    batch_size=AUDIT_BATCH_SIZE,
+    flush_interval_seconds=AUDIT_FLUSH_INTERVAL_MS / 1000,
+    max_buffer_size=AUDIT_MAX_BUFFER_SIZE,
+    synchronous_actions=AUDIT_SYNC_ACTIONS,
+    enabled=AUDIT_ASYNC_WRITES
+)
+
+# Grants per (principal, document), shared through Redis and invalidated on every ACL change
+acl_cache = AclCache(
+    redis_url=os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+    redis_password=os.getenv("REDIS_PASSWORD"),
+    ttl_seconds=ACL_CACHE_TTL_SECONDS,
+    local_ttl_seconds=ACL_LOCAL_CACHE_TTL_SECONDS,
+    local_max_entries=ACL_LOCAL_CACHE_MAX_ENTRIES,
+    channel=ACL_INVALIDATION_CHANNEL
+)
+
+# Embedded inverted index (SEARCH_BACKEND=embedded, default on SQLite); None searches Postgres
+search_backend = search_backend_from_env()
+
+# Chunk embeddings for semantic search (SEMANTIC_SEARCH_ENABLED); None disables it
+semantic_index = semantic_index_from_env()
+
+# Prefix completions from titles, tags, keywords and past queries, refreshed from the database
+autocomplete_index = AutocompleteIndex(min_query_users=AUTOCOMPLETE_MIN_QUERY_USERS)
+
 
 # Application lifespan management
 @asynccontextmanager
@@ -90,10 +223,45 @@ async def lifespan(app: FastAPI):
         logger.error(f"Database initialization failed: {e}")
         raise
     
+    # Periodically correct storage usage ledger drift
+    shutdown_event = asyncio.Event()
+    reconcile_task = asyncio.create_task(
+        reconcile_usage_periodically(file_storage, USAGE_RECONCILE_INTERVAL_SECONDS, shutdown_event)
+    )
+    
+    # Write queued audit events in batches
+    audit_task = asyncio.create_task(audit_writer.run(shutdown_event))
+    
+    # Drop cached grants changed by other instances
+    acl_invalidation_task = asyncio.create_task(acl_cache.listen_for_invalidations(shutdown_event))
+    
+    # Load the autocomplete snapshot and keep it current
+    autocomplete_task = asyncio.create_task(
+        refresh_autocomplete_periodically(
+            autocomplete_index,
+            db.get_session_context,
+            AUTOCOMPLETE_REFRESH_INTERVAL_SECONDS,
+            shutdown_event,
+            snapshot_path=Path(AUTOCOMPLETE_SNAPSHOT_PATH),
+            snapshot_interval_seconds=AUTOCOMPLETE_SNAPSHOT_INTERVAL_SECONDS
+        )
+    )
+    
     yield
     
     # Cleanup
     logger.info("Shutting down service")
+    shutdown_event.set()
+    await reconcile_task
+    await audit_task
+    await acl_invalidation_task
+    await autocomplete_task
+    await token_validator.close()
+    await acl_cache.close()
+    if search_backend is not None:
+        await search_backend.close()
+    if semantic_index is not None:
+        await semantic_index.close()
     await close_database()
 
 
@@ -160,7 +328,11 @@ async def health_check():
         "metrics": {
             "uptime_seconds": get_uptime(),
             "active_connections": get_active_connections(),
-            "memory_usage_mb": get_memory_usage()
+            "memory_usage_mb": get_memory_usage(),
+            **transfer_metrics.snapshot(),
+            **token_validator.cache_info(),
+            **audit_writer.snapshot(),
+            **acl_cache.cache_info()
         }
     }
 
@@ -215,7 +387,7 @@ async def health_check():
 
 async def validate_jwt_token(token: HTTPBearer = Depends(security)):
     """
-    Validate JWT token with Identity Service.
+    Validate JWT token, from cache or with the Identity Service.
     
     Args:
         token: Bearer token from Authorization header
@@ -227,42 +399,31 @@ async def validate_jwt_token(token: HTTPBearer = Depends(security)):
         HTTPException: 401 if token is invalid or expired
     """
     try:
-        # Call Identity Service to validate token
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.post(
-                f"{IDENTITY_SERVICE_URL}/auth/validate",
-                headers={"Authorization": f"Bearer {token.credentials}"},
-                timeout=5.0
-            )
-            
-            if response.status_code == 200:
-                user_data = response.json()
-                logger.info(f"Token validated for user: {user_data.get('user_id', 'unknown')}")
-                return user_data
-            
-            elif response.status_code == 401:
-                logger.warning("Invalid or expired token provided")
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Invalid or expired token",
-                    headers={"WWW-Authenticate": "Bearer"},
-                )
-            
-            else:
-                logger.error(f"Identity service returned unexpected status: {response.status_code}")
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Token validation failed",
-                    headers={"WWW-Authenticate": "Bearer"},
-                )
-                
-    except httpx.TimeoutException:
-        logger.error("Timeout calling Identity Service for token validation")
+        user_data = await token_validator.validate(token.credentials)
+        logger.debug(f"Token validated for user: {user_data.get('user_id', 'unknown')}")
+        return user_data
+    
+    except InvalidTokenError as e:
+        logger.warning(f"Invalid or expired token provided: {e}")
         raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Authentication service temporarily unavailable"
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token",
+            headers={"WWW-Authenticate": "Bearer"},
         )
-    except httpx.RequestError as e:
+    except IdentityServiceError as e:
+        logger.error(str(e))
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token validation failed",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    except IdentityServiceUnavailableError as e:
+        if e.timed_out:
+            logger.error("Timeout calling Identity Service for token validation")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service temporarily unavailable"
+            )
         logger.error(f"Network error calling Identity Service: {e}")
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -291,43 +452,41 @@ async def get_current_user(current_user: dict = Depends(validate_jwt_token)):
 # PERMISSION HELPER FUNCTIONS
 # =============================================================================
 
-async def _get_user_permissions(document: Document, current_user: dict, session: AsyncSession) -> dict:
-    """Get user's effective permissions for a document."""
+def get_permission_resolver(session: AsyncSession = Depends(get_db_session)) -> PermissionResolver:
+    """Per-request permission resolver; memoizes ACL lookups for the request."""
+    return PermissionResolver(session, cache=acl_cache if ACL_CACHE_ENABLED else None)
+
+
+async def _get_user_permissions_batch(
+    documents: List[Document],
+    current_user: dict,
+    resolver: PermissionResolver
+) -> dict:
+    """Get user's effective permissions for several documents with one query."""
+    # Owner has all permissions
+    owned = {doc.id for doc in documents if doc.created_by == current_user["id"]}
+    permissions = {doc_id: {perm: True for perm in PERMISSION_TYPES} for doc_id in owned}
+    
     try:
-        perm_repo = PermissionRepository(session)
-        
-        # Owner has all permissions
-        if document.created_by == current_user["id"]:
-            return {
-                "read": True,
-                "write": True,
-                "delete": True,
-                "share": True,
-                "admin": True
-            }
-        
-        # Get user roles
-        user_roles = current_user.get("roles", [])
-        
-        # Get effective permissions from database
-        effective_perms = await perm_repo.get_user_effective_permissions(
-            document_id=document.id,
-            user_id=current_user["id"],
-            user_roles=user_roles
+        resolved = await resolver.resolve(
+            [doc.id for doc in documents if doc.id not in owned],
+            current_user["id"],
+            current_user.get("roles", [])
         )
-        
-        return effective_perms
-        
+        for doc_id, effective in resolved.items():
+            permissions[doc_id] = dict(effective.permissions)
     except Exception as e:
         logger.error(f"Error getting user permissions: {e}")
         # Default to minimal permissions on error
-        return {
-            "read": False,
-            "write": False,
-            "delete": False,
-            "share": False,
-            "admin": False
-        }
+        for doc in documents:
+            permissions.setdefault(doc.id, {perm: False for perm in PERMISSION_TYPES})
+    
+    return permissions
+
+
+async def _get_user_permissions(document: Document, current_user: dict, resolver: PermissionResolver) -> dict:
+    """Get user's effective permissions for a document."""
+    return (await _get_user_permissions_batch([document], current_user, resolver))[document.id]
 
 
 # =============================================================================
@@ -337,35 +496,45 @@ async def _get_user_permissions(document: Document, current_user: dict, session:
 async def list_documents(
     pagination: PaginationParams = Depends(),
     current_user: dict = Depends(get_current_user),
-    session: AsyncSession = Depends(get_db_session)
+    session: AsyncSession = Depends(get_db_session),
+    permission_resolver: PermissionResolver = Depends(get_permission_resolver)
 ):
     """List documents with pagination and filtering."""
     try:
         doc_repo = DocumentRepository(session)
         audit_repo = AuditRepository(session)
         
-        # Get documents for the user's organization
-        documents = await doc_repo.find_by_organization(
+        # Get one page of documents for the user's organization
+        page = await doc_repo.find_page_by_organization(
             organization_id=current_user["organization_id"],
             limit=pagination.limit,
+            cursor=pagination.cursor,
             offset=pagination.offset,
             status="active"
         )
+        documents = page.items
         
-        # Get total count for pagination
-        total_count = await doc_repo.count(
-            organization_id=current_user["organization_id"],
-            status="active"
-        )
+        # Bounded count so deep organizations don't pay for a full scan
+        total_count = None
+        if pagination.include_total:
+            total_count = await doc_repo.count_up_to(
+                PAGINATION_COUNT_LIMIT,
+                organization_id=current_user["organization_id"],
+                status="active"
+            )
         
         # Log the access
-        await audit_repo.log_action(
+        await audit_writer.log_action(
+            audit_repo,
             action="read",
             user_id=current_user["id"],
             organization_id=current_user["organization_id"],
             details={"endpoint": "/api/v1/documents", "count": len(documents)}
         )
         
+        # Annotate every document with the caller's permissions in one query
+        permissions = await _get_user_permissions_batch(documents, current_user, permission_resolver)
+        
         # Convert to response format
         document_items = []
         for doc in documents:
@@ -383,22 +552,27 @@ async def list_documents(
                 "classification": doc.classification,
                 "processing_complete": doc.is_processing_complete(),
                 "has_thumbnail": doc.thumbnail_generated,
-                "thumbnail_url": f"/api/v1/documents/{doc.id}/thumbnail" if doc.thumbnail_generated else None
+                "thumbnail_url": f"/api/v1/documents/{doc.id}/thumbnail" if doc.thumbnail_generated else None,
+                "permissions": permissions[doc.id]
             })
         
         return DocumentListResponse(
             documents=document_items,
             pagination={
                 "limit": pagination.limit,
-                "offset": pagination.offset,
+                "offset": 0 if pagination.cursor else pagination.offset,
                 "total": total_count,
-                "has_next": (pagination.offset + pagination.limit) < total_count,
-                "has_prev": pagination.offset > 0
+                "total_is_estimate": total_count == PAGINATION_COUNT_LIMIT,
+                "has_next": page.has_next,
+                "has_prev": bool(pagination.cursor) or pagination.offset > 0,
+                "next_cursor": page.next_cursor
             },
             filters_applied={"status": "active"},
             total_size=sum(doc["file_size"] for doc in document_items)
         )
         
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f"Error listing documents: {e}")
         raise HTTPException(
@@ -411,7 +585,8 @@ async def list_documents(
 async def get_document(
     document_id: UUID,
     current_user: dict = Depends(get_current_user),
-    session: AsyncSession = Depends(get_db_session)
+    session: AsyncSession = Depends(get_db_session),
+    permission_resolver: PermissionResolver = Depends(get_permission_resolver)
 ):
     """Get detailed document information."""
     try:
@@ -435,7 +610,8 @@ async def get_document(
             )
         
         # Log the access
-        await audit_repo.log_action(
+        await audit_writer.log_action(
+            audit_repo,
             action="read",
             user_id=current_user["id"],
             organization_id=current_user["organization_id"],
@@ -486,7 +662,7 @@ async def get_document(
             text_preview=document.extracted_text[:500] + "..." if document.extracted_text and len(document.extracted_text) > 500 else document.extracted_text,
             current_version=document.current_version,
             version_count=len(document.versions),
-            permissions=await _get_user_permissions(document, current_user, session)
+            permissions=await _get_user_permissions(document, current_user, permission_resolver)
         )
         
     except HTTPException:
@@ -535,8 +711,21 @@ async def delete_document(
                 detail="Failed to delete document"
             )
         
+        # Deleted documents no longer match searches
+        if search_backend is not None:
+            try:
+                await search_backend.delete_document(document.id)
+            except Exception as e:
+                logger.error(f"Failed to remove document {document_id} from search index: {e}")
+        if semantic_index is not None:
+            try:
+                await semantic_index.delete_document(document.id)
+            except Exception as e:
+                logger.error(f"Failed to remove document {document_id} from semantic index: {e}")
+        
         # Log the deletion
-        await audit_repo.log_action(
+        await audit_writer.log_action(
+            audit_repo,
             action="delete",
             user_id=current_user["id"],
             organization_id=current_user["organization_id"],
@@ -630,6 +819,66 @@ async def get_document_audit_trail(
         )
 
 
+@app.get("/api/v1/audit/activity")
+async def get_organization_activity(
+    limit: int = Query(default=100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    actions: Optional[List[str]] = Query(default=None),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    current_user: dict = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db_session)
+):
+    """Get organization-wide audit activity, newest first, paged by cursor; admins and auditors only."""
+    if not AUDIT_ACTIVITY_ROLES.intersection(current_user.get("roles", [])):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    
+    try:
+        audit_repo = AuditRepository(session)
+        
+        page = await audit_repo.get_organization_activity_page(
+            organization_id=current_user["organization_id"],
+            start_date=start_date,
+            end_date=end_date,
+            actions=actions,
+            limit=limit,
+            cursor=cursor
+        )
+        
+        return {
+            "audit_entries": [
+                {
+                    "id": entry.id,
+                    "document_id": entry.document_id,
+                    "action": entry.action,
+                    "user_id": entry.user_id,
+                    "created_at": entry.created_at,
+                    "details": entry.details,
+                    "ip_address": str(entry.ip_address) if entry.ip_address else None,
+                    "execution_time_ms": entry.execution_time_ms
+                }
+                for entry in page.items
+            ],
+            "pagination": {
+                "limit": limit,
+                "has_next": page.has_next,
+                "next_cursor": page.next_cursor
+            }
+        }
+        
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error retrieving organization activity: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve organization activity"
+        )
+
+
 @app.get("/api/v1/documents/stats")
 async def get_document_statistics(
     current_user: dict = Depends(get_current_user),
@@ -642,6 +891,10 @@ async def get_document_statistics(
         # Get organization statistics
         stats = await doc_repo.get_organization_stats(current_user["organization_id"])
         
+        # Storage usage and quota from the usage ledger
+        storage_stats = await file_storage.get_storage_stats(str(current_user["organization_id"]))
+        stats["storage_usage"] = storage_stats.get("organization")
+        
         # Get recent documents
         recent_documents = await doc_repo.get_recent_documents(
             organization_id=current_user["organization_id"],
@@ -681,8 +934,8 @@ async def get_document_statistics(
 
 
 # File validation utilities
-async def validate_file(file: UploadFile) -> str:
-    """Validate uploaded file for security and compliance"""
+def validate_upload_headers(file: UploadFile) -> None:
+    """Validate declared size and filename without reading file content"""
     # Check file size
     if file.size and file.size > MAX_FILE_SIZE_BYTES:
         raise HTTPException(
@@ -690,6 +943,25 @@ async def validate_file(file: UploadFile) -> str:
             detail=f"File size ({file.size} bytes) exceeds maximum allowed size ({MAX_FILE_SIZE_MB}MB)"
         )
     
+    # Basic security checks
+    if file.filename:
+        validate_upload_filename(file.filename)
+
+
+def validate_upload_filename(filename: str) -> None:
+    """Reject path traversal and dangerous extensions in a client filename"""
+    # Prevent path traversal
+    if ".." in filename or "/" in filename or "\\" in filename:
+        raise HTTPException(status_code=400, detail="Invalid filename")
+    
+    # Check for dangerous extensions
+    dangerous_extensions = [".exe", ".bat", ".cmd", ".scr", ".vbs", ".js"]
+    if any(filename.lower().endswith(ext) for ext in dangerous_extensions):
+        raise HTTPException(status_code=400, detail="Dangerous file type not allowed")
+
+
+async def validate_file(file: UploadFile) -> str:
+    """Validate uploaded file for security and compliance"""
     # Read file content for validation (without loading entire file)
     content_start = await file.read(1024)  # Read first 1KB
     await file.seek(0)  # Reset file pointer
@@ -702,41 +974,119 @@ async def validate_file(file: UploadFile) -> str:
             detail=f"File type '{mime_type}' not allowed. Allowed types: {', '.join(ALLOWED_CONTENT_TYPES)}"
         )
     
-    # Basic security checks
-    if file.filename:
-        # Prevent path traversal
-        if ".." in file.filename or "/" in file.filename or "\\" in file.filename:
-            raise HTTPException(status_code=400, detail="Invalid filename")
-        
-        # Check for dangerous extensions
-        dangerous_extensions = [".exe", ".bat", ".cmd", ".scr", ".vbs", ".js"]
-        if any(file.filename.lower().endswith(ext) for ext in dangerous_extensions):
-            raise HTTPException(status_code=400, detail="Dangerous file type not allowed")
+    validate_upload_headers(file)
     
     return mime_type
 
 
-async def save_uploaded_file(file: UploadFile, document_id: UUID) -> tuple[Path, int]:
-    """Save uploaded file to storage and return file path and size"""
-    # Generate unique filename
+async def ingest_uploaded_file(
+    file: UploadFile,
+    document_id: UUID,
+    allowed_content_types: Optional[List[str]] = ALLOWED_CONTENT_TYPES,
+    organization_id: Optional[str] = None
+) -> IngestResult:
+    """Stream upload to storage, hashing and sniffing it in a single read pass"""
+    # Generate unique filename, grouped per organization for usage accounting
     file_extension = Path(file.filename or "unknown").suffix.lower()
     unique_filename = f"{document_id}{file_extension}"
-    file_path = STORAGE_DIRECTORY / unique_filename
+    if organization_id:
+        unique_filename = f"{organization_id}/{unique_filename}"
     
-    # Save file
-    total_size = 0
-    async with aiofiles.open(file_path, 'wb') as f:
-        while chunk := await file.read(8192):  # Read in 8KB chunks
-            total_size += len(chunk)
-            if total_size > MAX_FILE_SIZE_BYTES:
-                await aiofiles.os.remove(file_path)  # Clean up partial file
-                raise HTTPException(
-                    status_code=413, 
-                    detail=f"File size exceeds maximum allowed size ({MAX_FILE_SIZE_MB}MB)"
-                )
-            await f.write(chunk)
+    try:
+        # Reject over-quota tenants before writing anything to storage
+        await file_storage.check_quota(file.size or 0, unique_filename)
+        
+        temp_path = file_storage.new_temp_path()
+        ingested = await ingest_upload(
+            file,
+            temp_path,
+            max_size=MAX_FILE_SIZE_BYTES,
+            allowed_content_types=allowed_content_types,
+            chunk_size=UPLOAD_CHUNK_SIZE
+        )
+        
+        # Link or rename into place; re-uploads of stored content write nothing
+        await file_storage.store_ingested(
+            temp_path, unique_filename, ingested.sha256, content_type=ingested.content_type
+        )
+    except UploadTooLargeError:
+        raise HTTPException(
+            status_code=413, 
+            detail=f"File size exceeds maximum allowed size ({MAX_FILE_SIZE_MB}MB)"
+        )
+    except ContentTypeNotAllowedError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File type '{e.content_type}' not allowed. Allowed types: {', '.join(ALLOWED_CONTENT_TYPES)}"
+        )
+    except StorageQuotaExceededError:
+        raise HTTPException(
+            status_code=status.HTTP_507_INSUFFICIENT_STORAGE,
+            detail="Storage quota exceeded"
+        )
     
-    return file_path, total_size
+    ingested.path = STORAGE_DIRECTORY / unique_filename
+    return ingested
+
+
+async def save_uploaded_file(file: UploadFile, document_id: UUID) -> tuple[Path, int]:
+    """Save uploaded file to storage and return file path and size"""
+    result = await ingest_uploaded_file(file, document_id, allowed_content_types=None)
+    return result.path, result.size
+
+
+async def register_uploaded_document(
+    db: AsyncSession,
+    current_user: dict,
+    ingested: IngestResult,
+    filename: Optional[str],
+    metadata: dict
+) -> dict:
+    """Create the document record and audit entry for a stored upload"""
+    # Save to database using repository method
+    doc_repo = DocumentRepository(db)
+    document = await doc_repo.create_document(
+        filename=filename or "unknown",
+        original_filename=filename or "unknown", 
+        content_type=ingested.content_type,
+        file_size=ingested.size,
+        file_hash=ingested.sha256,
+        storage_path=str(ingested.path),
+        created_by=current_user["id"],
+        organization_id=current_user["organization_id"],
+        metadata=metadata
+    )
+    
+    # Log audit trail
+    audit_repo = AuditRepository(db)
+    await audit_writer.log_action(
+        audit_repo,
+        action="uploaded",
+        user_id=current_user["id"],
+        organization_id=current_user["organization_id"],
+        document_id=document.id,
+        details={
+            "filename": filename,
+            "content_type": ingested.content_type,
+            "file_size": ingested.size,
+            "upload_source": metadata.get("upload_source")
+        }
+    )
+    
+    return {
+        "id": str(document.id),
+        "filename": document.filename,
+        "original_filename": document.original_filename,
+        "content_type": document.content_type,
+        "file_size": document.file_size,
+        "file_hash": document.file_hash,
+        "status": document.status,
+        "document_type": document.document_type,
+        "metadata": document.metadata or {},
+        "created_at": document.created_at.isoformat(),
+        "updated_at": document.updated_at.isoformat(),
+        "organization_id": str(document.organization_id)
+    }
 
 
 # Document upload and download endpoints
@@ -751,36 +1101,23 @@ async def upload_document(
 ):
     """Upload a new document with validation and metadata extraction"""
     try:
-        # Validate file
-        mime_type = await validate_file(file)
+        # Validate declared size and filename before reading any content
+        validate_upload_headers(file)
         
         # Generate document ID
         document_id = uuid_lib.uuid4()
         
-        # Save file to storage
-        file_path, file_size = await save_uploaded_file(file, document_id)
-        
-        # Generate file hash for duplicate detection
-        import hashlib
-        file_hash = hashlib.sha256()
-        await file.seek(0)  # Reset file pointer
-        while chunk := await file.read(8192):
-            file_hash.update(chunk)
-        await file.seek(0)  # Reset again for saving
-        
-        file_hash_hex = file_hash.hexdigest()
+        # Sniff, size-check, hash and save the file in one streaming pass
+        ingested = await ingest_uploaded_file(
+            file, document_id, organization_id=str(current_user["organization_id"])
+        )
+        file_path = ingested.path
         
-        # Save to database using repository method
-        doc_repo = DocumentRepository(db)
-        document = await doc_repo.create_document(
-            filename=file.filename or "unknown",
-            original_filename=file.filename or "unknown", 
-            content_type=mime_type,
-            file_size=file_size,
-            file_hash=file_hash_hex,
-            storage_path=str(file_path),
-            created_by=current_user["user_id"],
-            organization_id=current_user["organization_id"],
+        response = await register_uploaded_document(
+            db,
+            current_user,
+            ingested,
+            filename=file.filename,
             metadata={
                 "description": description,
                 "tags": [tag.strip() for tag in tags.split(",")] if tags else [],
@@ -789,36 +1126,9 @@ async def upload_document(
             }
         )
         
-        # Log audit trail
-        audit_repo = AuditRepository(db)
-        await audit_repo.log_action(
-            action="uploaded",
-            user_id=current_user["user_id"],
-            organization_id=current_user["organization_id"],
-            document_id=document.id,
-            details={
-                "filename": file.filename,
-                "content_type": mime_type,
-                "file_size": file_size
-            }
-        )
-        
-        logger.info(f"Document {document.id} uploaded successfully by user {current_user['user_id']}")
+        logger.info(f"Document {response['id']} uploaded successfully by user {current_user['id']}")
         
-        return {
-            "id": str(document.id),
-            "filename": document.filename,
-            "original_filename": document.original_filename,
-            "content_type": document.content_type,
-            "file_size": document.file_size,
-            "file_hash": document.file_hash,
-            "status": document.status,
-            "document_type": document.document_type,
-            "metadata": document.metadata or {},
-            "created_at": document.created_at.isoformat(),
-            "updated_at": document.updated_at.isoformat(),
-            "organization_id": str(document.organization_id)
-        }
+        return response
         
     except HTTPException:
         raise
@@ -827,15 +1137,176 @@ async def upload_document(
         # Clean up file if it was created
         if 'file_path' in locals():
             try:
-                await aiofiles.os.remove(file_path)
+                await file_storage.delete(str(file_path.relative_to(STORAGE_DIRECTORY)))
             except:
                 pass
         raise HTTPException(status_code=500, detail="Failed to upload document")
 
 
+# Resumable multipart upload endpoints
+async def get_upload_session(upload_id: str, current_user: dict) -> UploadSession:
+    """Load an upload session owned by the current user"""
+    try:
+        session = await multipart_uploads.get_session(upload_id)
+    except UploadSessionNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    
+    if session.user_id != str(current_user["id"]):
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return session
+
+
+@app.post("/api/v1/uploads", response_model=MultipartUploadStatus, status_code=201)
+async def initiate_multipart_upload(
+    request: MultipartUploadCreate,
+    current_user: dict = Depends(get_current_user)
+):
+    """Start a resumable upload; parts are then sent with PUT in any order"""
+    filename = request.filename
+    validate_upload_filename(filename)
+    
+    document_id = uuid_lib.uuid4()
+    organization_id = str(current_user["organization_id"])
+    storage_key = f"{organization_id}/{document_id}{Path(filename).suffix.lower()}"
+    
+    try:
+        session = await multipart_uploads.initiate(
+            storage_key,
+            request.file_size,
+            part_size=request.part_size,
+            upload_id=str(document_id),
+            filename=filename,
+            organization_id=organization_id,
+            user_id=str(current_user["id"]),
+            metadata={
+                "description": request.description,
+                "tags": [tag.strip() for tag in request.tags.split(",")] if request.tags else [],
+                "category": request.category,
+                "upload_source": "multipart"
+            }
+        )
+    except UploadTooLargeError:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File size exceeds maximum allowed size ({MAX_MULTIPART_UPLOAD_SIZE_MB}MB)"
+        )
+    except StorageQuotaExceededError:
+        raise HTTPException(
+            status_code=status.HTTP_507_INSUFFICIENT_STORAGE,
+            detail="Storage quota exceeded"
+        )
+    
+    return session.to_dict()
+
+
+@app.get("/api/v1/uploads/{upload_id}", response_model=MultipartUploadStatus)
+async def get_multipart_upload(
+    upload_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """Report received and missing parts so an interrupted upload can resume"""
+    session = await get_upload_session(upload_id, current_user)
+    return session.to_dict()
+
+
+@app.put("/api/v1/uploads/{upload_id}/parts/{part_number}", response_model=MultipartUploadStatus)
+async def upload_part(
+    upload_id: str,
+    part_number: int,
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
+    """Write one part (raw request body) at its offset in the upload"""
+    await get_upload_session(upload_id, current_user)
+    
+    try:
+        session = await multipart_uploads.write_part(upload_id, part_number, request.stream())
+    except UploadSessionNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    except InvalidUploadPartError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UploadConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    return session.to_dict()
+
+
+@app.post("/api/v1/uploads/{upload_id}/complete")
+async def complete_multipart_upload(
+    upload_id: str,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db_session)
+):
+    """Assemble the uploaded parts into a stored document"""
+    await get_upload_session(upload_id, current_user)
+    
+    try:
+        session, ingested = await multipart_uploads.complete(
+            upload_id, allowed_content_types=ALLOWED_CONTENT_TYPES
+        )
+    except UploadSessionNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    except IncompleteUploadError as e:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Upload is missing parts", "missing_parts": e.missing_parts}
+        )
+    except UploadConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ContentTypeNotAllowedError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File type '{e.content_type}' not allowed. Allowed types: {', '.join(ALLOWED_CONTENT_TYPES)}"
+        )
+    except StorageQuotaExceededError:
+        raise HTTPException(
+            status_code=status.HTTP_507_INSUFFICIENT_STORAGE,
+            detail="Storage quota exceeded"
+        )
+    
+    ingested.path = STORAGE_DIRECTORY / ingested.path
+    try:
+        response = await register_uploaded_document(
+            db, current_user, ingested, filename=session.filename, metadata=session.metadata
+        )
+    except Exception as e:
+        logger.error(f"Failed to register multipart upload {upload_id}: {e}")
+        try:
+            await file_storage.delete(session.path)
+        except Exception:
+            pass
+        raise HTTPException(status_code=500, detail="Failed to upload document")
+    
+    logger.info(f"Document {response['id']} uploaded in {session.part_count} parts by user {current_user['id']}")
+    return response
+
+
+@app.delete("/api/v1/uploads/{upload_id}")
+async def abort_multipart_upload(
+    upload_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """Discard an unfinished upload and its received parts"""
+    await get_upload_session(upload_id, current_user)
+    await multipart_uploads.abort(upload_id)
+    return {"message": "Upload aborted", "upload_id": upload_id}
+
+
+def is_initial_transfer(response) -> bool:
+    """Whether a file response starts a transfer worth auditing.
+    
+    Range requests from viewers seeking through a file and 304 revalidations
+    are not audited individually; full transfers and reads from byte 0 are.
+    """
+    if response.status_code == 200:
+        return True
+    return response.status_code == 206 and response.headers.get("content-range", "").startswith("bytes 0-")
+
+
 @app.get("/api/v1/documents/{document_id}/download")
 async def download_document(
     document_id: UUID,
+    request: Request,
     current_user: dict = Depends(get_current_user),
     db: AsyncSession = Depends(get_db_session)
 ):
@@ -850,37 +1321,44 @@ async def download_document(
             raise HTTPException(status_code=404, detail="Document not found")
         
         # Check file exists on disk
-        file_path = Path(document.file_path)
+        file_path = Path(document.storage_path)
         if not file_path.exists():
             logger.error(f"Document file missing: {file_path}")
             raise HTTPException(status_code=404, detail="Document file not found")
         
-        # Log audit trail
-        audit_repo = AuditRepository(db)
-        await audit_repo.log_action(
-            action="downloaded",
-            user_id=current_user["user_id"],
-            organization_id=current_user["organization_id"],
-            document_id=document.id,
-            details={
-                "filename": document.filename,
-                "file_size": document.file_size
-            }
-        )
-        
-        # Return file response with proper headers
-        return FileResponse(
-            path=str(file_path),
-            filename=document.original_filename or document.filename,
+        # Build file response honouring Range and conditional headers
+        response = build_file_response(
+            request.headers,
+            file_path,
+            etag=make_etag(document.file_hash),
             media_type=document.content_type,
+            chunk_size=TRANSFER_CHUNK_SIZE,
+            zero_copy=ZERO_COPY_TRANSFERS,
             headers={
                 "Content-Disposition": f"attachment; filename=\"{document.original_filename or document.filename}\"",
-                "Content-Length": str(document.file_size),
+                "Cache-Control": "private, no-cache",
                 "X-Content-Type-Options": "nosniff",
                 "X-Frame-Options": "DENY"
             }
         )
         
+        # Log audit trail
+        if is_initial_transfer(response):
+            audit_repo = AuditRepository(db)
+            await audit_writer.log_action(
+                audit_repo,
+                action="downloaded",
+                user_id=current_user["id"],
+                organization_id=current_user["organization_id"],
+                document_id=document.id,
+                details={
+                    "filename": document.filename,
+                    "file_size": document.file_size
+                }
+            )
+        
+        return response
+        
     except HTTPException:
         raise
     except Exception as e:
@@ -891,6 +1369,7 @@ async def download_document(
 @app.get("/api/v1/documents/{document_id}/stream")
 async def stream_document(
     document_id: UUID,
+    request: Request,
     current_user: dict = Depends(get_current_user),
     db: AsyncSession = Depends(get_db_session)
 ):
@@ -904,7 +1383,7 @@ async def stream_document(
         if not document:
             raise HTTPException(status_code=404, detail="Document not found")
         
-        file_path = Path(document.file_path)
+        file_path = Path(document.storage_path)
         if not file_path.exists():
             raise HTTPException(status_code=404, detail="Document file not found")
         
@@ -921,36 +1400,38 @@ async def stream_document(
                 detail="Document type not suitable for streaming. Use download instead."
             )
         
-        # Create streaming response
-        async def file_streamer():
-            async with aiofiles.open(file_path, 'rb') as file:
-                while chunk := await file.read(8192):
-                    yield chunk
-        
-        # Log audit trail
-        audit_repo = AuditRepository(db)
-        await audit_repo.log_action(
-            action="viewed",
-            user_id=current_user["user_id"],
-            organization_id=current_user["organization_id"],
-            document_id=document.id,
-            details={
-                "filename": document.filename,
-                "view_type": "stream"
-            }
-        )
-        
-        return StreamingResponse(
-            file_streamer(),
+        # Create streaming response; viewers fetch only the ranges they need
+        response = build_file_response(
+            request.headers,
+            file_path,
+            etag=make_etag(document.file_hash),
             media_type=document.content_type,
+            chunk_size=TRANSFER_CHUNK_SIZE,
+            zero_copy=ZERO_COPY_TRANSFERS,
             headers={
-                "Content-Length": str(document.file_size),
                 "Content-Disposition": f"inline; filename=\"{document.filename}\"",
                 "Cache-Control": "private, no-cache",
                 "X-Content-Type-Options": "nosniff"
             }
         )
         
+        # Log audit trail
+        if is_initial_transfer(response):
+            audit_repo = AuditRepository(db)
+            await audit_writer.log_action(
+                audit_repo,
+                action="viewed",
+                user_id=current_user["id"],
+                organization_id=current_user["organization_id"],
+                document_id=document.id,
+                details={
+                    "filename": document.filename,
+                    "view_type": "stream"
+                }
+            )
+        
+        return response
+        
     except HTTPException:
         raise
     except Exception as e:
@@ -1009,7 +1490,7 @@ async def process_document(
                 id=str(uuid_lib.uuid4()),
                 document_id=str(document_id),
                 organization_id=str(current_user["organization_id"]),
-                user_id=str(current_user["user_id"]),
+                user_id=str(current_user["id"]),
                 task_type=processing_type,
                 priority=max(1, min(10, priority)),  # Clamp priority between 1-10
                 file_path=str(file_path),
@@ -1017,7 +1498,8 @@ async def process_document(
                 parameters={
                     "filename": document.filename,
                     "original_filename": document.original_filename,
-                    "file_size": document.file_size
+                    "file_size": document.file_size,
+                    "file_hash": document.file_hash
                 }
             )
             
@@ -1032,9 +1514,10 @@ async def process_document(
             
             # Log audit trail
             audit_repo = AuditRepository(db)
-            await audit_repo.log_action(
+            await audit_writer.log_action(
+                audit_repo,
                 action="processing_queued",
-                user_id=current_user["user_id"],
+                user_id=current_user["id"],
                 organization_id=current_user["organization_id"],
                 document_id=document_id,
                 details={
@@ -1192,7 +1675,8 @@ async def grant_user_permission(
         )
         
         # Log the action
-        await audit_repo.log_action(
+        await audit_writer.log_action(
+            audit_repo,
             action="grant_user_permission",
             user_id=current_user["id"],
             organization_id=current_user["organization_id"],
@@ -1205,6 +1689,7 @@ async def grant_user_permission(
         )
         
         await session.commit()
+        await acl_cache.invalidate_pending(session)
         
         return {
             "success": True,
@@ -1259,7 +1744,8 @@ async def grant_role_permission(
         )
         
         # Log the action
-        await audit_repo.log_action(
+        await audit_writer.log_action(
+            audit_repo,
             action="grant_role_permission",
             user_id=current_user["id"],
             organization_id=current_user["organization_id"],
@@ -1272,6 +1758,7 @@ async def grant_role_permission(
         )
         
         await session.commit()
+        await acl_cache.invalidate_pending(session)
         
         return {
             "success": True,
@@ -1325,12 +1812,12 @@ async def get_document_permissions(
 async def get_effective_permissions(
     document_id: UUID,
     current_user: dict = Depends(get_current_user),
-    session: AsyncSession = Depends(get_db_session)
+    session: AsyncSession = Depends(get_db_session),
+    permission_resolver: PermissionResolver = Depends(get_permission_resolver)
 ) -> EffectivePermissionsResponse:
     """Get effective permissions for the current user."""
     try:
         doc_repo = DocumentRepository(session)
-        perm_repo = PermissionRepository(session)
         
         # Verify document exists and user has access
         document = await doc_repo.get_by_id_and_organization(
@@ -1343,35 +1830,18 @@ async def get_effective_permissions(
         # Get user roles from current_user context
         user_roles = current_user.get("roles", [])
         
-        # Get effective permissions
-        effective_perms = await perm_repo.get_user_effective_permissions(
-            document_id=document_id,
-            user_id=current_user["id"],
-            user_roles=user_roles
+        # Get effective permissions and their sources (direct, role:<name>)
+        effective = await permission_resolver.resolve_one(
+            document_id, current_user["id"], user_roles
         )
-        
-        # Determine sources
-        sources = []
         if document.created_by == current_user["id"]:
-            sources.append("owner")
-            effective_perms = {perm: True for perm in effective_perms}  # Owner has all permissions
-        
-        # Check for direct user permissions
-        user_perm = await perm_repo.get_user_permissions(document_id, current_user["id"])
-        if user_perm and not user_perm.is_expired:
-            sources.append("direct")
-        
-        # Check role permissions
-        for role in user_roles:
-            role_perm = await perm_repo.get_role_permissions(document_id, role)
-            if role_perm and not role_perm.is_expired:
-                sources.append(f"role:{role}")
+            effective = effective.as_owner()  # Owner has all permissions
         
         return EffectivePermissionsResponse(
             user_id=current_user["id"],
             document_id=document_id,
-            permissions=effective_perms,
-            sources=sources
+            permissions=effective.permissions,
+            sources=effective.sources
         )
         
     except HTTPException:
@@ -1386,7 +1856,8 @@ async def share_document(
     document_id: UUID,
     request: ShareDocumentRequest,
     current_user: dict = Depends(get_current_user),
-    session: AsyncSession = Depends(get_db_session)
+    session: AsyncSession = Depends(get_db_session),
+    permission_resolver: PermissionResolver = Depends(get_permission_resolver)
 ) -> ShareDocumentResponse:
     """Share a document with a user or role."""
     try:
@@ -1406,7 +1877,7 @@ async def share_document(
         can_share = document.created_by == current_user["id"]
         if not can_share:
             user_roles = current_user.get("roles", [])
-            can_share = await perm_repo.check_user_permission(
+            can_share = await permission_resolver.check(
                 document_id, current_user["id"], user_roles, "share"
             )
         
@@ -1432,7 +1903,8 @@ async def share_document(
             )
         
         # Log the share action
-        await audit_repo.log_action(
+        await audit_writer.log_action(
+            audit_repo,
             action="share_document",
             user_id=current_user["id"],
             organization_id=current_user["organization_id"],
@@ -1447,6 +1919,7 @@ async def share_document(
         )
         
         await session.commit()
+        await acl_cache.invalidate_pending(session)
         
         return ShareDocumentResponse(
             success=True,
@@ -1498,7 +1971,8 @@ async def revoke_user_permission(
             raise HTTPException(status_code=404, detail="Permission not found")
         
         # Log the action
-        await audit_repo.log_action(
+        await audit_writer.log_action(
+            audit_repo,
             action="revoke_user_permission",
             user_id=current_user["id"],
             organization_id=current_user["organization_id"],
@@ -1507,6 +1981,7 @@ async def revoke_user_permission(
         )
         
         await session.commit()
+        await acl_cache.invalidate_pending(session)
         
         return {"success": True, "message": "User permission revoked successfully"}
         
@@ -1551,7 +2026,8 @@ async def revoke_role_permission(
             raise HTTPException(status_code=404, detail="Permission not found")
         
         # Log the action
-        await audit_repo.log_action(
+        await audit_writer.log_action(
+            audit_repo,
             action="revoke_role_permission",
             user_id=current_user["id"],
             organization_id=current_user["organization_id"],
@@ -1560,6 +2036,7 @@ async def revoke_role_permission(
         )
         
         await session.commit()
+        await acl_cache.invalidate_pending(session)
         
         return {"success": True, "message": "Role permission revoked successfully"}
         
@@ -1576,12 +2053,12 @@ async def check_document_access(
     document_id: UUID,
     request: DocumentAccessCheckRequest,
     current_user: dict = Depends(get_current_user),
-    session: AsyncSession = Depends(get_db_session)
+    session: AsyncSession = Depends(get_db_session),
+    permission_resolver: PermissionResolver = Depends(get_permission_resolver)
 ) -> DocumentAccessCheckResponse:
     """Check if a user has access to a document."""
     try:
         doc_repo = DocumentRepository(session)
-        perm_repo = PermissionRepository(session)
         
         # Verify document exists
         document = await doc_repo.get_by_id_and_organization(
@@ -1591,42 +2068,24 @@ async def check_document_access(
         if not document:
             raise HTTPException(status_code=404, detail="Document not found")
         
-        # Check access
-        has_access = await perm_repo.check_user_permission(
-            document_id=document_id,
-            user_id=request.user_id,
-            user_roles=request.user_roles,
-            permission_type=request.permission_type
+        # Resolve direct and role permissions in one query
+        effective = await permission_resolver.resolve_one(
+            document_id, request.user_id, request.user_roles
         )
+        has_access = effective.allows(request.permission_type)
         
         # Determine access source
         access_source = None
         if has_access:
             if document.created_by == request.user_id:
                 access_source = "owner"
-            else:
-                # Check for direct permission
-                user_perm = await perm_repo.get_user_permissions(document_id, request.user_id)
-                if user_perm and not user_perm.is_expired:
-                    access_source = "direct"
-                else:
-                    # Check role permissions
-                    for role in request.user_roles:
-                        role_perm = await perm_repo.get_role_permissions(document_id, role)
-                        if role_perm and not role_perm.is_expired:
-                            access_source = f"role:{role}"
-                            break
-        
-        # Get effective permissions
-        effective_perms = await perm_repo.get_user_effective_permissions(
-            document_id=document_id,
-            user_id=request.user_id,
-            user_roles=request.user_roles
-        )
+            elif effective.sources:
+                access_source = effective.sources[0]
         
         # Owner has all permissions
+        effective_perms = effective.permissions
         if document.created_by == request.user_id:
-            effective_perms = {perm: True for perm in effective_perms}
+            effective_perms = effective.as_owner().permissions
         
         return DocumentAccessCheckResponse(
             user_id=request.user_id,
@@ -1650,6 +2109,7 @@ async def get_user_accessible_documents(
     user_roles: List[str] = [],
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[str] = None,
     current_user: dict = Depends(get_current_user),
     session: AsyncSession = Depends(get_db_session)
 ):
@@ -1657,14 +2117,16 @@ async def get_user_accessible_documents(
     try:
         perm_repo = PermissionRepository(session)
         
-        # Get accessible documents
-        documents = await perm_repo.get_user_accessible_documents(
+        # Get one page of accessible documents
+        page = await perm_repo.get_user_accessible_documents_page(
             user_id=user_id,
             user_roles=user_roles,
             organization_id=current_user["organization_id"],
             limit=limit,
+            cursor=cursor,
             offset=offset
         )
+        documents = page.items
         
         # Convert to response format
         document_list = []
@@ -1682,21 +2144,350 @@ async def get_user_accessible_documents(
         return {
             "total_count": len(document_list),
             "documents": document_list,
-            "page": offset // limit + 1,
+            "page": offset // limit + 1 if not cursor else None,
             "limit": limit,
-            "has_more": len(documents) == limit
+            "has_more": page.has_next,
+            "next_cursor": page.next_cursor
         }
         
     except HTTPException:
         raise
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting accessible documents: {e}")
         raise HTTPException(status_code=500, detail="Failed to get accessible documents")
 
 
-@app.get("/api/v1/search")
-async def search_documents(q: str):
-    return {"message": f"Search '{q}' - will be implemented in Week 3"}
+# =============================================================================
+# SEARCH ENDPOINTS
+# =============================================================================
+
+def _search_result_item(hit: SearchHit) -> SearchResultItem:
+    """Convert a repository search hit to its API representation."""
+    doc = hit.document
+    highlights = []
+    for fragment in hit.fragments:
+        start, end = fragment_offsets(fragment, hit.text_prefix)
+        highlights.append(SearchHighlight(
+            field="content", fragment=fragment, start_offset=start, end_offset=end
+        ))
+    
+    return SearchResultItem(
+        document_id=doc.id,
+        filename=doc.filename,
+        title=doc.get_metadata_value("title"),
+        content_type=doc.content_type,
+        file_size=doc.file_size,
+        relevance_score=hit.rank,
+        snippet=hit.fragments[0] if hit.fragments else None,
+        highlights=highlights,
+        tags=doc.get_metadata_value("tags", []),
+        classification=doc.classification,
+        author=doc.get_metadata_value("author"),
+        created_at=doc.created_at,
+        download_url=f"/api/v1/documents/{doc.id}/download",
+        thumbnail_url=f"/api/v1/documents/{doc.id}/thumbnail" if doc.thumbnail_generated else None
+    )
+
+
+@app.post("/api/v1/search", response_model=SearchResponse)
+async def search_documents(
+    request: SearchRequest,
+    current_user: dict = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db_session)
+):
+    """Full-text search over documents the caller can read."""
+    if request.search_type != SearchType.FULL_TEXT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Search type '{request.search_type.value}' is not supported"
+        )
+    if request.sort_by != "relevance" and request.sort_by not in SORT_COLUMNS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid sort field. Must be one of: relevance, {', '.join(SORT_COLUMNS)}"
+        )
+    
+    try:
+        started = time.perf_counter()
+        doc_repo = DocumentRepository(session)
+        
+        filters = {
+            "user_id": current_user["id"],
+            "user_roles": current_user.get("roles", []),
+            "limit": request.limit,
+            "offset": request.offset,
+            "document_types": request.document_types,
+            "classifications": request.classifications,
+            "tags": request.tags,
+            "created_after": request.created_after,
+            "created_before": request.created_before,
+            "file_size_min": request.file_size_min,
+            "file_size_max": request.file_size_max,
+            "snippet_length": request.snippet_length,
+            "sort_by": request.sort_by,
+            "sort_order": request.sort_order.value
+        }
+        
+        if search_backend is not None:
+            # Backend scores candidates; the database applies permissions and filters
+            matches = await search_backend.search(
+                current_user["organization_id"],
+                request.query,
+                limit=SEARCH_CANDIDATE_LIMIT,
+                prefix=request.fuzzy
+            )
+            results = await doc_repo.rank_search_candidates(
+                {match.document_id: match.score for match in matches},
+                current_user["organization_id"],
+                highlight_terms=set(tokenize(request.query)) if request.highlight else None,
+                candidates_truncated=len(matches) >= SEARCH_CANDIDATE_LIMIT,
+                **filters
+            )
+        else:
+            results = await doc_repo.search_documents(
+                current_user["organization_id"],
+                request.query,
+                exact_phrase=request.exact_phrase,
+                prefix=request.fuzzy,
+                include_content=request.include_content,
+                include_metadata=request.include_metadata,
+                highlight=request.highlight,
+                count_limit=SEARCH_COUNT_LIMIT,
+                **filters
+            )
+        search_time_ms = int((time.perf_counter() - started) * 1000)
+        
+        audit_repo = AuditRepository(session)
+        await audit_writer.log_action(
+            audit_repo,
+            action="search",
+            user_id=current_user["id"],
+            organization_id=current_user["organization_id"],
+            details={
+                "endpoint": "/api/v1/search",
+                "query": request.query,
+                "result_count": results.total,
+                "search_time_ms": search_time_ms
+            }
+        )
+        
+        filters_applied = request.model_dump(
+            include={
+                "document_types", "classifications", "tags", "created_after",
+                "created_before", "file_size_min", "file_size_max"
+            },
+            exclude_none=True
+        )
+        
+        return SearchResponse(
+            query=request.query,
+            search_type=request.search_type,
+            results=[_search_result_item(hit) for hit in results.hits],
+            total_results=results.total,
+            search_time_ms=search_time_ms,
+            max_score=max((hit.rank for hit in results.hits), default=0.0),
+            pagination={
+                "limit": request.limit,
+                "offset": request.offset,
+                "total": results.total,
+                "total_is_estimate": results.total_is_estimate,
+                "has_next": results.has_next,
+                "has_prev": request.offset > 0
+            },
+            facets=results.facets,
+            filters_applied=filters_applied
+        )
+        
+    except Exception as e:
+        logger.error(f"Error searching documents: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to search documents"
+        )
+
+
+@app.get("/api/v1/search", response_model=SearchResponse)
+async def search_documents_by_query(
+    q: str = Query(min_length=1, max_length=1000, description="Search query"),
+    document_types: Optional[List[str]] = Query(default=None),
+    classifications: Optional[List[str]] = Query(default=None),
+    tags: Optional[List[str]] = Query(default=None),
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+    sort_by: str = "relevance",
+    current_user: dict = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db_session)
+):
+    """Full-text search with the common options as query parameters."""
+    request = SearchRequest(
+        query=q,
+        document_types=document_types,
+        classifications=classifications,
+        tags=tags,
+        limit=limit,
+        offset=offset,
+        sort_by=sort_by
+    )
+    return await search_documents(request, current_user=current_user, session=session)
+
+
+@app.post("/api/v1/search/semantic", response_model=SearchResponse)
+async def semantic_search_documents(
+    request: SemanticSearchRequest,
+    current_user: dict = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db_session)
+):
+    """Find readable documents whose text is similar in meaning to the query."""
+    if semantic_index is None:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Semantic search is not enabled"
+        )
+    
+    try:
+        started = time.perf_counter()
+        doc_repo = DocumentRepository(session)
+        
+        # The index ranks the organization's chunks; the database applies permissions
+        matches = await semantic_index.search(
+            current_user["organization_id"],
+            request.query,
+            limit=SEMANTIC_CANDIDATE_LIMIT,
+            min_similarity=request.similarity_threshold
+        )
+        results = await doc_repo.rank_search_candidates(
+            {match.document_id: match.score for match in matches},
+            current_user["organization_id"],
+            user_id=current_user["id"],
+            user_roles=current_user.get("roles", []),
+            limit=request.limit,
+            candidates_truncated=len(matches) >= SEMANTIC_CANDIDATE_LIMIT
+        )
+        
+        spans = {}
+        if request.include_snippets:
+            chunks = {match.document_id: match for match in matches}
+            for hit in results.hits:
+                chunk = chunks[hit.document.id]
+                end = min(chunk.end_offset, chunk.start_offset + SEMANTIC_SNIPPET_CHARS)
+                spans[hit.document.id] = (chunk.start_offset, end)
+        snippets = await doc_repo.get_text_spans(spans)
+        
+        items = []
+        for hit in results.hits:
+            item = _search_result_item(hit)
+            item.similarity_score = hit.rank
+            snippet = snippets.get(hit.document.id)
+            if snippet:
+                start, end = spans[hit.document.id]
+                item.snippet = snippet
+                item.highlights = [SearchHighlight(
+                    field="content", fragment=snippet, start_offset=start, end_offset=end
+                )]
+            items.append(item)
+        search_time_ms = int((time.perf_counter() - started) * 1000)
+        
+        audit_repo = AuditRepository(session)
+        await audit_writer.log_action(
+            audit_repo,
+            action="search",
+            user_id=current_user["id"],
+            organization_id=current_user["organization_id"],
+            details={
+                "endpoint": "/api/v1/search/semantic",
+                "query": request.query,
+                "result_count": results.total,
+                "search_time_ms": search_time_ms
+            }
+        )
+        
+        return SearchResponse(
+            query=request.query,
+            search_type=SearchType.SEMANTIC,
+            results=items,
+            total_results=results.total,
+            search_time_ms=search_time_ms,
+            max_score=max((hit.rank for hit in results.hits), default=0.0),
+            pagination={
+                "limit": request.limit,
+                "offset": 0,
+                "total": results.total,
+                "total_is_estimate": results.total_is_estimate,
+                "has_next": results.has_next,
+                "has_prev": False
+            },
+            facets=results.facets,
+            filters_applied={"similarity_threshold": request.similarity_threshold}
+        )
+        
+    except Exception as e:
+        logger.error(f"Error in semantic search: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to search documents"
+        )
+
+
+@app.get("/api/v1/search/suggestions", response_model=SuggestionResponse)
+async def get_search_suggestions(
+    prefix: str = Query(min_length=1, max_length=100, description="Search prefix"),
+    limit: int = Query(default=10, ge=1, le=20),
+    current_user: dict = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db_session)
+):
+    """
+    Complete a search prefix.
+    
+    Titles, tags, keywords and past queries come from the in-memory
+    autocomplete index; with the embedded search backend the remaining
+    slots complete the last word from indexed terms. Only phrases from
+    documents the user can read are suggested, and only queries the user
+    searched or enough other users did.
+    """
+    try:
+        started = time.perf_counter()
+        organization_id = current_user["organization_id"]
+        doc_repo = DocumentRepository(session)
+        
+        async def readable(document_ids: List[UUID]) -> Set[UUID]:
+            return await doc_repo.filter_readable(
+                document_ids, organization_id, current_user["id"], current_user.get("roles", [])
+            )
+        
+        suggestions = [
+            SuggestionItem(text=s.text, frequency=s.frequency, type=s.type)
+            for s in await suggest_for_user(
+                autocomplete_index, organization_id, current_user["id"], prefix, limit, readable
+            )
+        ]
+        
+        if search_backend is not None and len(suggestions) < limit:
+            seen = {item.text.lower() for item in suggestions}
+            terms = [
+                (term, documents) for term, _, documents in await search_backend.suggest(organization_id, prefix, limit)
+                if term.lower() not in seen
+            ]
+            allowed = await readable(list({doc_id for _, documents in terms for doc_id in documents}))
+            for term, documents in terms:
+                # Frequency among the sampled documents, so unreadable ones are not counted
+                frequency = sum(1 for doc_id in documents if doc_id in allowed)
+                if len(suggestions) < limit and frequency:
+                    suggestions.append(SuggestionItem(text=term, frequency=frequency, type="term"))
+        
+        return SuggestionResponse(
+            prefix=prefix,
+            suggestions=suggestions,
+            response_time_ms=int((time.perf_counter() - started) * 1000)
+        )
+        
+    except Exception as e:
+        logger.error(f"Error getting search suggestions: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get search suggestions"
+        )
 
 if __name__ == "__main__":
     import uvicorn
@@ -122,8 +122,8 @@ class DocumentAudit(Base):
         # Indexes for common query patterns
         Index("idx_audit_document", "document_id", "created_at"),
         Index("idx_audit_user", "user_id", "created_at"),
-        Index("idx_audit_org", "organization_id", "created_at"),
-        Index("idx_audit_action", "action", "created_at"),
+        Index("idx_audit_org", "organization_id", "created_at", "id"),
+        Index("idx_audit_action", "action", "created_at", "id"),
         Index("idx_audit_session", "session_id"),
         Index("idx_audit_request", "request_id"),
         Index("idx_audit_details", "details", postgresql_using="gin"),
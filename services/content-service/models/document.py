@@ -8,9 +8,9 @@ from uuid import UUID, uuid4
 
 from sqlalchemy import (
     Column, String, Integer, BigInteger, DateTime, Boolean, Text,
-    ForeignKey, CheckConstraint, Index, event
+    ForeignKey, CheckConstraint, Index, event, text
 )
-from sqlalchemy.dialects.postgresql import UUID as PG_UUID, JSONB
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, JSONB, TSVECTOR
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
@@ -54,8 +54,7 @@ class Document(Base):
     file_hash: Mapped[str] = mapped_column(
         String(64), 
         nullable=False, 
-        unique=True,
-        doc="SHA-256 hash of the file content"
+        doc="SHA-256 hash of the file content (shared by deduplicated uploads)"
     )
     storage_path: Mapped[str] = mapped_column(
         Text, 
@@ -115,9 +114,16 @@ class Document(Base):
         nullable=True,
         doc="Full extracted text content from the document"
     )
+    search_vector: Mapped[Optional[Any]] = mapped_column(
+        TSVECTOR,
+        nullable=True,
+        deferred=True,
+        doc="Weighted full-text vector, maintained by a trigger from text and metadata"
+    )
     
     # Metadata storage
     file_metadata: Mapped[Dict[str, Any]] = mapped_column(
+        "metadata",
         JSONB, 
         nullable=False, 
         default=dict,
@@ -204,13 +210,17 @@ class Document(Base):
             name="valid_processing_status"
         ),
         # Indexes for performance
-        Index("idx_documents_org_created", "organization_id", "created_at"),
+        Index("idx_documents_org_created", "organization_id", "created_at", "id"),
+        Index("idx_documents_updated", "updated_at", "id"),
         Index("idx_documents_created_by", "created_by"),
         Index("idx_documents_type", "document_type"),
         Index("idx_documents_status", "status"),
         Index("idx_documents_hash", "file_hash"),
-        Index("idx_documents_metadata", "file_metadata", postgresql_using="gin"),
-        Index("idx_documents_text", "extracted_text"),
+        Index("idx_documents_metadata", "metadata", postgresql_using="gin"),
+        Index(
+            "idx_documents_search", "organization_id", "search_vector",
+            postgresql_using="gin", postgresql_where=text("status = 'active'")
+        ),
     )
     
     def __repr__(self) -> str:
@@ -6,13 +6,15 @@ import asyncio
 import logging
 import signal
 import sys
-from typing import Dict, Any, Optional, Callable, List
+from collections import deque
+from typing import Deque, Dict, Any, Optional, Callable, List, Set
 import time
 import traceback
 from datetime import datetime
 
 from .queue_manager import ProcessingQueueManager, ProcessingTask
 from .metadata_processor import metadata_processor
+from extractors.factory import metadata_factory
 
 logger = logging.getLogger(__name__)
 
@@ -26,18 +28,28 @@ class BackgroundWorker:
         worker_id: str = None,
         max_concurrent_tasks: int = 3,
         polling_interval: int = 5,
-        health_check_interval: int = 60
+        health_check_interval: int = 60,
+        prefetch_count: int = 0
     ):
         self.queue_manager = queue_manager
         self.worker_id = worker_id or f"worker-{int(time.time())}"
         self.max_concurrent_tasks = max_concurrent_tasks
+        # Tasks leased beyond the free slots, so a finished task is replaced
+        # without waiting on Redis
+        self.prefetch_count = prefetch_count
         self.polling_interval = polling_interval
         self.health_check_interval = health_check_interval
         
         # Worker state
         self.is_running = False
         self.shutdown_event = asyncio.Event()
-        self.current_tasks: List[asyncio.Task] = []
+        self.current_tasks: Set[asyncio.Task] = set()
+        # One slot per running task; finished tasks release theirs
+        self.task_slots = asyncio.Semaphore(max_concurrent_tasks)
+        # Dequeued tasks waiting for a slot
+        self.prefetched: Deque[ProcessingTask] = deque()
+        # Dequeued tasks whose leases this worker keeps alive, by task id
+        self.leased_tasks: Dict[str, ProcessingTask] = {}
         
         # Statistics
         self.stats = {
@@ -88,6 +100,9 @@ class BackgroundWorker:
         # Start delayed task processor
         delayed_task = asyncio.create_task(self._delayed_task_loop())
         
+        # Start lease heartbeats
+        heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        
         try:
             # Wait for shutdown event
             await self.shutdown_event.wait()
@@ -99,6 +114,9 @@ class BackgroundWorker:
             health_task.cancel()
             delayed_task.cancel()
             
+            # Hand tasks that never started back to other workers
+            await self._release_prefetched()
+            
             # Wait for current tasks to complete (with timeout)
             if self.current_tasks:
                 logger.info(f"Waiting for {len(self.current_tasks)} active tasks to complete...")
@@ -112,6 +130,9 @@ class BackgroundWorker:
                     for task in self.current_tasks:
                         task.cancel()
             
+            # Running tasks have finished or been cancelled; stop extending their leases
+            heartbeat_task.cancel()
+            
             logger.info(f"Worker {self.worker_id} stopped")
             
         except asyncio.CancelledError:
@@ -132,25 +153,19 @@ class BackgroundWorker:
         
         while not self.shutdown_event.is_set():
             try:
-                # Check if we can handle more tasks
-                if len(self.current_tasks) >= self.max_concurrent_tasks:
-                    # Clean up completed tasks
-                    self.current_tasks = [task for task in self.current_tasks if not task.done()]
-                    
-                    if len(self.current_tasks) >= self.max_concurrent_tasks:
-                        # Wait a bit before checking again
-                        await asyncio.sleep(1)
-                        continue
+                # Wait for a free slot
+                await self.task_slots.acquire()
+                task = await self._next_task()
+                if not task:
+                    self.task_slots.release()
+                    continue
                 
-                # Try to get a task from the queue
-                task = await self.queue_manager.dequeue_task(timeout=self.polling_interval)
+                # Process task in background
+                processing_task = asyncio.create_task(self._process_task(task))
+                self.current_tasks.add(processing_task)
+                processing_task.add_done_callback(self._on_task_done)
                 
-                if task:
-                    # Process task in background
-                    processing_task = asyncio.create_task(self._process_task(task))
-                    self.current_tasks.append(processing_task)
-                    
-                    logger.debug(f"Started processing task {task.id}, active tasks: {len(self.current_tasks)}")
+                logger.debug(f"Started processing task {task.id}, active tasks: {len(self.current_tasks)}")
                 
             except asyncio.CancelledError:
                 break
@@ -160,6 +175,38 @@ class BackgroundWorker:
         
         logger.info(f"Processing loop stopped for worker {self.worker_id}")
     
+    async def _next_task(self) -> Optional[ProcessingTask]:
+        """Next task to run, refilling the prefetch buffer from the queue when it is empty"""
+        if not self.prefetched:
+            # One round trip fetches work for every free slot plus the prefetch buffer
+            free_slots = self.max_concurrent_tasks - len(self.current_tasks)
+            tasks = await self.queue_manager.dequeue_tasks(
+                free_slots + self.prefetch_count, timeout=self.polling_interval
+            )
+            for task in tasks:
+                self.leased_tasks[task.id] = task
+            self.prefetched.extend(tasks)
+        
+        while self.prefetched:
+            task = self.prefetched.popleft()
+            # Skip tasks whose lease was lost while they waited
+            if task.id in self.leased_tasks:
+                return task
+        return None
+    
+    def _on_task_done(self, processing_task: asyncio.Task):
+        self.current_tasks.discard(processing_task)
+        self.task_slots.release()
+    
+    async def _release_prefetched(self):
+        tasks = list(self.prefetched)
+        self.prefetched.clear()
+        for task in tasks:
+            self.leased_tasks.pop(task.id, None)
+        if tasks:
+            released = await self.queue_manager.release_tasks(tasks)
+            logger.info(f"Worker {self.worker_id} released {released} prefetched tasks")
+    
     async def _process_task(self, task: ProcessingTask):
         """Process a single task"""
         start_time = time.time()
@@ -214,6 +261,8 @@ class BackgroundWorker:
             self.stats["tasks_failed"] += 1
         
         finally:
+            self.leased_tasks.pop(task.id, None)
+            
             # Update current load
             self.stats["current_load"] = len(self.current_tasks) - 1
     
@@ -223,23 +272,24 @@ class BackgroundWorker:
         
         while not self.shutdown_event.is_set():
             try:
-                # Clean up completed tasks
-                before_cleanup = len(self.current_tasks)
-                self.current_tasks = [task for task in self.current_tasks if not task.done()]
-                after_cleanup = len(self.current_tasks)
-                
-                if before_cleanup != after_cleanup:
-                    logger.debug(f"Cleaned up {before_cleanup - after_cleanup} completed tasks")
-                
                 # Update current load
                 self.stats["current_load"] = len(self.current_tasks)
                 
                 # Log health status
                 logger.info(f"Worker {self.worker_id} health: "
                           f"active_tasks={len(self.current_tasks)}, "
+                          f"prefetched={len(self.prefetched)}, "
                           f"processed={self.stats['tasks_processed']}, "
                           f"successful={self.stats['tasks_successful']}, "
                           f"failed={self.stats['tasks_failed']}")
+                if metadata_factory.cache is not None:
+                    cache_stats = metadata_factory.cache.stats
+                    logger.info(f"Worker {self.worker_id} extraction cache: "
+                              f"hits={cache_stats.hits}, misses={cache_stats.misses}, "
+                              f"hit_rate={cache_stats.hit_rate}")
+                
+                # Drop finished tasks past their retention from the indexes
+                await self.queue_manager.cleanup_old_tasks()
                 
                 # Wait for next health check
                 try:
@@ -260,7 +310,7 @@ class BackgroundWorker:
         logger.info(f"Health check loop stopped for worker {self.worker_id}")
     
     async def _delayed_task_loop(self):
-        """Process delayed tasks loop"""
+        """Process delayed tasks and expired leases loop"""
         logger.info(f"Started delayed task processor for worker {self.worker_id}")
         
         while not self.shutdown_event.is_set():
@@ -268,6 +318,12 @@ class BackgroundWorker:
                 # Process delayed tasks that are ready
                 await self.queue_manager.process_delayed_tasks()
                 
+                # Re-queue tasks of workers that died mid-task
+                await self.queue_manager.requeue_expired_tasks()
+                
+                # Let low priority tasks that waited too long run ahead of newer work
+                await self.queue_manager.age_waiting_tasks()
+                
                 # Wait before next check (shorter interval for delayed tasks)
                 try:
                     await asyncio.wait_for(
@@ -286,6 +342,24 @@ class BackgroundWorker:
         
         logger.info(f"Delayed task processor stopped for worker {self.worker_id}")
     
+    async def _heartbeat_loop(self):
+        """Extend the leases of running tasks well before they expire"""
+        interval = self.queue_manager.lease_timeout / 3
+        
+        while True:
+            try:
+                await asyncio.sleep(interval)
+                lost = await self.queue_manager.extend_leases(list(self.leased_tasks.values()))
+                for task_id in lost:
+                    # Another worker may already be running it; our outcome will be ignored
+                    logger.warning(f"Worker {self.worker_id} lost the lease on task {task_id}")
+                    self.leased_tasks.pop(task_id, None)
+                
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in heartbeat loop: {e}")
+    
     def get_worker_stats(self) -> Dict[str, Any]:
         """Get worker statistics"""
         return {
@@ -293,7 +367,9 @@ class BackgroundWorker:
             "is_running": self.is_running,
             "max_concurrent_tasks": self.max_concurrent_tasks,
             "current_tasks": len(self.current_tasks),
-            **self.stats
+            "prefetched_tasks": len(self.prefetched),
+            **self.stats,
+            "extraction_cache": metadata_factory.cache.get_stats() if metadata_factory.cache else None
         }
     
     def get_processor_info(self) -> Dict[str, Any]:
@@ -317,7 +393,8 @@ class BackgroundWorker:
 async def start_worker(
     redis_url: str = "redis://localhost:6379/0",
     worker_id: str = None,
-    max_concurrent_tasks: int = 3
+    max_concurrent_tasks: int = 3,
+    prefetch_count: int = 0
 ) -> BackgroundWorker:
     """Convenience function to start a background worker"""
     
@@ -329,7 +406,8 @@ async def start_worker(
     worker = BackgroundWorker(
         queue_manager=queue_manager,
         worker_id=worker_id,
-        max_concurrent_tasks=max_concurrent_tasks
+        max_concurrent_tasks=max_concurrent_tasks,
+        prefetch_count=prefetch_count
     )
     
     # Start worker (this will run until shutdown)
@@ -337,6 +415,7 @@ async def start_worker(
     
     # Cleanup
     await queue_manager.disconnect()
+    await metadata_factory.close()
     
     return worker
 
@@ -355,6 +434,7 @@ if __name__ == "__main__":
     redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
     worker_id = os.getenv("WORKER_ID", None)
     max_concurrent_tasks = int(os.getenv("MAX_CONCURRENT_TASKS", "3"))
+    prefetch_count = int(os.getenv("WORKER_PREFETCH_COUNT", "0"))
     
     logger.info(f"Starting background worker with Redis: {redis_url}")
     
@@ -362,7 +442,8 @@ if __name__ == "__main__":
         asyncio.run(start_worker(
             redis_url=redis_url,
             worker_id=worker_id,
-            max_concurrent_tasks=max_concurrent_tasks
+            max_concurrent_tasks=max_concurrent_tasks,
+            prefetch_count=prefetch_count
         ))
     except KeyboardInterrupt:
         logger.info("Worker stopped by user")
@@ -8,11 +8,15 @@ from pathlib import Path
 from typing import Dict, Any, Optional
 from uuid import uuid4
 import time
+from uuid import UUID
 
 from extractors.factory import metadata_factory
 from repositories.document_repository import DocumentRepository
 from repositories.audit_repository import AuditRepository
 from database.connection import get_db_session
+from search import (
+    IndexedDocument, SearchBackend, SemanticIndex, search_backend_from_env, semantic_index_from_env
+)
 from .queue_manager import ProcessingTask
 
 logger = logging.getLogger(__name__)
@@ -21,10 +25,18 @@ logger = logging.getLogger(__name__)
 class MetadataProcessor:
     """Processes metadata extraction tasks"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        search_backend: Optional[SearchBackend] = None,
+        semantic_index: Optional[SemanticIndex] = None
+    ):
         self.name = "MetadataProcessor"
         self.version = "1.0.0"
         self.supported_task_types = ["metadata_extraction", "ocr", "content_analysis"]
+        # Fed with extracted text when search doesn't run on the database
+        self.search_backend = search_backend
+        # Chunk embeddings for semantic search, when enabled
+        self.semantic_index = semantic_index
     
     async def can_process(self, task: ProcessingTask) -> bool:
         """Check if this processor can handle the task"""
@@ -49,11 +61,18 @@ class MetadataProcessor:
                 raise FileNotFoundError(f"File not found: {file_path}")
             
             # Extract metadata using factory
-            extracted_metadata = await metadata_factory.extract_metadata(file_path, task.mime_type)
+            extracted_metadata = await metadata_factory.extract_metadata(
+                file_path, task.mime_type,
+                file_hash=task.parameters.get("file_hash"),
+                ocr=task.task_type == "ocr"
+            )
             
             # Update document in database
             await self._update_document_metadata(task, extracted_metadata)
             
+            # Make the extracted text searchable
+            await self._index_document(task, extracted_metadata)
+            
             # Create audit log
             await self._log_processing_audit(task, extracted_metadata, success=True)
             
@@ -163,6 +182,31 @@ class MetadataProcessor:
             logger.error(f"Failed to update document metadata: {e}")
             raise
     
+    async def _index_document(self, task: ProcessingTask, metadata):
+        """Add the document's extracted text and keywords to the search indexes"""
+        if self.search_backend is None and self.semantic_index is None:
+            return
+        
+        document = IndexedDocument.from_metadata(
+            UUID(task.document_id),
+            UUID(task.organization_id),
+            metadata,
+            filename=task.parameters.get("original_filename")
+        )
+        
+        # The document stays searchable by its previous content until reprocessed
+        if self.search_backend is not None:
+            try:
+                await self.search_backend.index_document(document)
+            except Exception as e:
+                logger.error(f"Failed to index document {task.document_id} for search: {e}")
+        
+        if self.semantic_index is not None:
+            try:
+                await self.semantic_index.index_document(document)
+            except Exception as e:
+                logger.error(f"Failed to embed document {task.document_id} for semantic search: {e}")
+    
     async def _log_processing_audit(self, task: ProcessingTask, metadata, success: bool, error_message: str = None):
         """Log processing audit trail"""
         try:
@@ -311,4 +355,7 @@ class MetadataProcessor:
 
 
 # Global processor instance
-metadata_processor = MetadataProcessor()
\ No newline at end of file
+metadata_processor = MetadataProcessor(
+    search_backend=search_backend_from_env(),
+    semantic_index=semantic_index_from_env()
+)
\ No newline at end of file
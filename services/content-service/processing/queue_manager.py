@@ -5,17 +5,378 @@ Redis-based processing queue manager for async document processing
 import json
 import asyncio
 import logging
+import math
+import os
 from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Callable
 from uuid import UUID, uuid4
 import time
 
-import aioredis
+from redis import asyncio as aioredis
 from redis.exceptions import RedisError
 
 logger = logging.getLogger(__name__)
 
+# Each queue operation is one atomic round trip: a Lua script when it has to
+# read before it writes, a MULTI/EXEC pipeline otherwise. Each task is stored
+# under its own key, the task key prefix plus its id, so finished tasks can
+# expire on their own.
+#
+# Pending tasks are scheduled in three priority classes, served strictly in
+# order so interactive work is never stuck behind bulk work. Within a class
+# each organization has its own sub-queue, and organizations take turns by
+# weighted deficit round robin, so one organization's backlog cannot starve
+# the others. Low priority tasks that wait too long age into the normal class.
+# Scheduler keys are built in Lua from the scheduler key prefix:
+#   queue:{class}:{organization}  sub-queue, oldest task at the tail
+#   tenants:{class}               organizations with queued tasks, next turn at the tail
+#   deficits:{class}              unused share of each organization's turn
+#   waiting:{class}               queued task ids scored by when they were queued
+
+SCHEDULER_LUA = """
+local CLASSES = {'high', 'normal', 'low'}
+
+-- Mirrors ProcessingQueueManager._get_class_for_priority
+local function class_for_priority(priority)
+    if priority <= 3 then
+        return 1
+    elseif priority <= 6 then
+        return 2
+    end
+    return 3
+end
+
+local function class_keys(prefix, class)
+    local name = CLASSES[class]
+    return prefix .. 'queue:' .. name .. ':', prefix .. 'tenants:' .. name,
+        prefix .. 'deficits:' .. name, prefix .. 'waiting:' .. name
+end
+
+-- Queues a task at the back of its organization's sub-queue, or at the front
+-- for tasks handed back, and gives the organization a turn if it had none
+local function schedule(prefix, class, task_id, task, now, front)
+    local queues, tenants, _, waiting = class_keys(prefix, class)
+    local tenant = tostring(task.organization_id)
+    if front then
+        if redis.call('RPUSH', queues .. tenant, task_id) == 1 then
+            redis.call('RPUSH', tenants, tenant)
+        end
+    elseif redis.call('LPUSH', queues .. tenant, task_id) == 1 then
+        redis.call('LPUSH', tenants, tenant)
+    end
+    redis.call('ZADD', waiting, now, task_id)
+end
+
+-- Takes a queued task out of a class, dropping its organization's turn when
+-- the sub-queue empties. Returns false if the task was not queued there.
+local function unschedule(prefix, class, task_id, tenant)
+    local queues, tenants, deficits, waiting = class_keys(prefix, class)
+    if redis.call('ZREM', waiting, task_id) == 0 then
+        return false
+    end
+    redis.call('LREM', queues .. tenant, -1, task_id)
+    if redis.call('EXISTS', queues .. tenant) == 0 then
+        redis.call('LREM', tenants, 0, tenant)
+        redis.call('HDEL', deficits, tenant)
+    end
+    return true
+end
+"""
+
+# KEYS: task key prefix, scheduler key prefix, ready flag, stats, daily stats
+# ARGV: task json, now, daily stats TTL, stat names...
+ENQUEUE_SCRIPT = SCHEDULER_LUA + """
+local task = cjson.decode(ARGV[1])
+redis.call('SET', KEYS[1] .. task.id, ARGV[1])
+schedule(KEYS[2], class_for_priority(task.priority), task.id, task, ARGV[2], false)
+redis.call('LPUSH', KEYS[3], 1)
+redis.call('LTRIM', KEYS[3], 0, 0)
+for i = 4, #ARGV do
+    redis.call('HINCRBY', KEYS[4], ARGV[i], 1)
+    redis.call('HINCRBY', KEYS[5], ARGV[i], 1)
+end
+redis.call('EXPIRE', KEYS[5], ARGV[3])
+return 1
+"""
+
+# Each turn the organization at the tail of a class's round robin adds its
+# weight to its deficit and is served one task per whole unit of deficit,
+# then moves to the head. A turn cut short by a full batch carries over to
+# the next call.
+# KEYS: task key prefix, leases, ready flag, scheduler key prefix, organization weights
+# ARGV: started_at, lease id prefix, lease deadline, maximum number of tasks
+DEQUEUE_SCRIPT = SCHEDULER_LUA + """
+local claimed = {}
+local wanted = tonumber(ARGV[4])
+for class = 1, #CLASSES do
+    local queues, tenants, deficits, waiting = class_keys(KEYS[4], class)
+    while #claimed < wanted do
+        local tenant = redis.call('LINDEX', tenants, -1)
+        if not tenant then
+            break
+        end
+        local queue = queues .. tenant
+        local deficit = tonumber(redis.call('HGET', deficits, tenant)) or 0
+        if deficit < 1 then
+            local weight = tonumber(redis.call('HGET', KEYS[5], tenant)) or 1
+            deficit = deficit + (weight > 0 and weight or 1)
+        end
+        while deficit >= 1 and #claimed < wanted do
+            local task_id = redis.call('RPOP', queue)
+            if not task_id then
+                break
+            end
+            redis.call('ZREM', waiting, task_id)
+            local task_json = redis.call('GET', KEYS[1] .. task_id)
+            if task_json then
+                local task = cjson.decode(task_json)
+                task.status = 'processing'
+                task.started_at = ARGV[1]
+                task.attempts = task.attempts + 1
+                task.lease_id = ARGV[2] .. ':' .. (#claimed + 1)
+                task_json = cjson.encode(task)
+                redis.call('SET', KEYS[1] .. task_id, task_json)
+                redis.call('ZADD', KEYS[2], ARGV[3], task_id)
+                claimed[#claimed + 1] = task_json
+                deficit = deficit - 1
+            else
+                redis.log(redis.LOG_WARNING, 'Task ' .. task_id .. ' not found in task data')
+            end
+        end
+        if redis.call('EXISTS', queue) == 0 then
+            redis.call('RPOP', tenants)
+            redis.call('HDEL', deficits, tenant)
+        else
+            if deficit < 1 then
+                redis.call('RPOPLPUSH', tenants, tenants)
+            end
+            redis.call('HSET', deficits, tenant, deficit)
+        end
+    end
+end
+if #claimed < wanted then
+    -- Every queue is drained, so waiting consumers should block again
+    redis.call('DEL', KEYS[3])
+end
+return claimed
+"""
+
+# Hands leased tasks that were never started back to the front of their
+# queue, without counting the attempt
+# KEYS: task key prefix, leases, ready flag, scheduler key prefix
+# ARGV: now, then task id and lease id pairs
+RELEASE_SCRIPT = SCHEDULER_LUA + """
+local released = 0
+-- Last task first, so the batch keeps its order at the head of the queue
+for i = #ARGV - 1, 2, -2 do
+    local task_json = redis.call('GET', KEYS[1] .. ARGV[i])
+    if task_json then
+        local task = cjson.decode(task_json)
+        if task.lease_id == ARGV[i + 1] and redis.call('ZREM', KEYS[2], ARGV[i]) == 1 then
+            task.status = 'pending'
+            task.attempts = task.attempts - 1
+            task.lease_id = cjson.null
+            redis.call('SET', KEYS[1] .. ARGV[i], cjson.encode(task))
+            schedule(KEYS[4], class_for_priority(task.priority), ARGV[i], task, ARGV[1], true)
+            released = released + 1
+        end
+    end
+end
+if released > 0 then
+    redis.call('LPUSH', KEYS[3], 1)
+    redis.call('LTRIM', KEYS[3], 0, 0)
+end
+return released
+"""
+
+# Records the outcome of a leased task, only for the current lease holder, so
+# a task is completed or failed exactly once even if its lease expired and
+# another worker picked it up.
+# KEYS: task key prefix, leases, destination sorted set, stats, daily stats
+# ARGV: task id, lease id, task json, destination score, seconds the task is
+#       kept or 0 to keep it, daily stats TTL, stat names...
+FINISH_SCRIPT = """
+local task_key = KEYS[1] .. ARGV[1]
+local current = redis.call('GET', task_key)
+if not current or cjson.decode(current).lease_id ~= ARGV[2] then
+    return 0
+end
+redis.call('ZREM', KEYS[2], ARGV[1])
+redis.call('ZADD', KEYS[3], ARGV[4], ARGV[1])
+redis.call('SET', task_key, ARGV[3])
+if tonumber(ARGV[5]) > 0 then
+    redis.call('EXPIRE', task_key, ARGV[5])
+end
+for i = 7, #ARGV do
+    redis.call('HINCRBY', KEYS[4], ARGV[i], 1)
+    redis.call('HINCRBY', KEYS[5], ARGV[i], 1)
+end
+redis.call('EXPIRE', KEYS[5], ARGV[6])
+return 1
+"""
+
+# KEYS: task key prefix, leases
+# ARGV: new deadline, then task id and lease id pairs
+# Returns the ids whose lease is no longer held
+EXTEND_LEASES_SCRIPT = """
+local lost = {}
+for i = 2, #ARGV, 2 do
+    local task_json = redis.call('GET', KEYS[1] .. ARGV[i])
+    local held = task_json and cjson.decode(task_json).lease_id == ARGV[i + 1]
+        and redis.call('ZSCORE', KEYS[2], ARGV[i])
+    if held then
+        redis.call('ZADD', KEYS[2], ARGV[1], ARGV[i])
+    else
+        lost[#lost + 1] = ARGV[i]
+    end
+end
+return lost
+"""
+
+# KEYS: leases, task key prefix, failed index, ready flag, stats, scheduler key prefix
+# ARGV: now, batch size, failed_at, seconds failed tasks are kept
+# Returns the number of expired leases examined, the re-queued ids and the ids
+# failed because they had no attempts left
+REQUEUE_EXPIRED_SCRIPT = SCHEDULER_LUA + """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+local requeued, failed = {}, {}
+for _, task_id in ipairs(expired) do
+    redis.call('ZREM', KEYS[1], task_id)
+    local task_json = redis.call('GET', KEYS[2] .. task_id)
+    if task_json then
+        local task = cjson.decode(task_json)
+        task.lease_id = cjson.null
+        if task.attempts >= task.max_attempts then
+            -- A task that keeps killing its workers must not loop forever
+            task.status = 'failed'
+            task.failed_at = ARGV[3]
+            task.error_message = 'Worker lease expired'
+            redis.call('ZADD', KEYS[3], ARGV[1], task_id)
+            failed[#failed + 1] = task_id
+        else
+            task.status = 'pending'
+            schedule(KEYS[6], class_for_priority(task.priority), task_id, task, ARGV[1], false)
+            requeued[#requeued + 1] = task_id
+        end
+        redis.call('SET', KEYS[2] .. task_id, cjson.encode(task))
+        if task.status == 'failed' then
+            redis.call('EXPIRE', KEYS[2] .. task_id, ARGV[4])
+        end
+        redis.call('HINCRBY', KEYS[5], 'tasks_lease_expired', 1)
+    end
+end
+if #requeued > 0 then
+    redis.call('LPUSH', KEYS[4], 1)
+    redis.call('LTRIM', KEYS[4], 0, 0)
+end
+return {#expired, requeued, failed}
+"""
+
+# KEYS: task key prefix, delayed set, scheduler key prefix
+# ARGV: task id, seconds cancelled tasks are kept
+CANCEL_SCRIPT = SCHEDULER_LUA + """
+local task_json = redis.call('GET', KEYS[1] .. ARGV[1])
+if not task_json then
+    return 'missing'
+end
+local task = cjson.decode(task_json)
+if task.status == 'completed' or task.status == 'cancelled' then
+    return task.status
+end
+if task.status == 'processing' then
+    return 'processing'
+end
+-- Aging may have moved the task out of the class its priority maps to
+for class = 1, #CLASSES do
+    unschedule(KEYS[3], class, ARGV[1], tostring(task.organization_id))
+end
+redis.call('ZREM', KEYS[2], ARGV[1])
+task.status = 'cancelled'
+redis.call('SET', KEYS[1] .. ARGV[1], cjson.encode(task), 'EX', ARGV[2])
+return 'cancelled'
+"""
+
+# KEYS: delayed set, task key prefix, ready flag, scheduler key prefix
+# ARGV: now, batch size
+# Returns the number of delayed entries examined, then the re-queued task ids
+PROMOTE_DELAYED_SCRIPT = SCHEDULER_LUA + """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+local requeued = {#due}
+for _, task_id in ipairs(due) do
+    redis.call('ZREM', KEYS[1], task_id)
+    local task_json = redis.call('GET', KEYS[2] .. task_id)
+    if task_json then
+        local task = cjson.decode(task_json)
+        schedule(KEYS[4], class_for_priority(task.priority), task_id, task, ARGV[1], false)
+        requeued[#requeued + 1] = task_id
+    end
+end
+if #requeued > 1 then
+    redis.call('LPUSH', KEYS[3], 1)
+    redis.call('LTRIM', KEYS[3], 0, 0)
+end
+return requeued
+"""
+
+# Moves low priority tasks queued before the cutoff to the front of their
+# organization's normal priority sub-queue, so a steady stream of normal work
+# cannot starve them. Nothing ages into the high class, which stays reserved
+# for interactive work.
+# KEYS: task key prefix, scheduler key prefix
+# ARGV: now, cutoff, batch size
+# Returns the number of waiting entries examined, then the moved task ids
+AGE_SCRIPT = SCHEDULER_LUA + """
+local _, _, _, waiting = class_keys(KEYS[2], 3)
+local due = redis.call('ZRANGEBYSCORE', waiting, '-inf', ARGV[2], 'LIMIT', 0, tonumber(ARGV[3]))
+local aged = {#due}
+-- Youngest first, so the oldest ends up at the very front
+for i = #due, 1, -1 do
+    local task_json = redis.call('GET', KEYS[1] .. due[i])
+    if not task_json then
+        redis.call('ZREM', waiting, due[i])
+    else
+        local task = cjson.decode(task_json)
+        if unschedule(KEYS[2], 3, due[i], tostring(task.organization_id)) then
+            schedule(KEYS[2], 2, due[i], task, ARGV[1], true)
+            aged[#aged + 1] = due[i]
+        end
+    end
+end
+return aged
+"""
+
+# Drops the oldest finished tasks up to a cutoff from a time index
+# KEYS: task key prefix, completed or failed index
+# ARGV: cutoff, batch size
+CLEANUP_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+for _, task_id in ipairs(expired) do
+    redis.call('DEL', KEYS[1] .. task_id)
+end
+if #expired > 0 then
+    -- The batch is the lowest scored entries, so trim them by rank
+    redis.call('ZREMRANGEBYRANK', KEYS[2], 0, #expired - 1)
+end
+return #expired
+"""
+
+# Delayed, aged, expired and old tasks handled per script call, so one
+# call never blocks Redis for long
+DELAYED_BATCH_SIZE = 500
+
+# Seconds a dequeued task stays leased to its worker without a heartbeat
+TASK_LEASE_SECONDS = int(os.getenv("TASK_LEASE_SECONDS", 300))
+
+# Low priority tasks waiting this long move up to the normal class
+TASK_AGING_SECONDS = int(os.getenv("TASK_AGING_SECONDS", 600))
+
+# Finished tasks are kept this long, both by key TTL and by cleanup_old_tasks
+TASK_RETENTION_DAYS = int(os.getenv("TASK_RETENTION_DAYS", 7))
+
+# Daily statistics are kept for 30 days
+DAILY_STATS_TTL = 30 * 24 * 3600
+
 
 @dataclass
 class ProcessingTask:
@@ -45,6 +406,9 @@ class ProcessingTask:
     error_message: Optional[str] = None
     retry_after: Optional[str] = None
     
+    # Set while a worker holds the task; completing or failing requires it
+    lease_id: Optional[str] = None
+    
     def __post_init__(self):
         if not self.created_at:
             self.created_at = datetime.utcnow().isoformat()
@@ -81,23 +445,43 @@ class ProcessingTask:
 class ProcessingQueueManager:
     """Redis-based queue manager for document processing tasks"""
     
-    def __init__(self, redis_url: str = "redis://localhost:6379/0", queue_prefix: str = "content_processing"):
+    def __init__(
+        self,
+        redis_url: str = "redis://localhost:6379/0",
+        queue_prefix: str = "content_processing",
+        lease_timeout: int = TASK_LEASE_SECONDS,
+        retention_days: int = TASK_RETENTION_DAYS,
+        aging_seconds: int = TASK_AGING_SECONDS
+    ):
         self.redis_url = redis_url
         self.queue_prefix = queue_prefix
+        self.lease_timeout = lease_timeout
+        self.retention_seconds = retention_days * 24 * 3600
+        self.aging_seconds = aging_seconds
         self.redis_client: Optional[aioredis.Redis] = None
         
-        # Queue names
-        self.priority_queues = [
-            f"{queue_prefix}:high",    # Priority 1-3
-            f"{queue_prefix}:normal",  # Priority 4-6  
-            f"{queue_prefix}:low"      # Priority 7-10
+        # Priority classes, served in this order
+        self.priority_classes = [
+            "high",    # Priority 1-3
+            "normal",  # Priority 4-6
+            "low"      # Priority 7-10
         ]
+        # Per-organization sub-queues and round robin state live under this prefix
+        self.scheduler_prefix = f"{queue_prefix}:"
+        # Share of each organization's turn, 1 unless set
+        self.weights_key = f"{queue_prefix}:weights"
         
-        self.processing_set = f"{queue_prefix}:processing"
-        self.completed_set = f"{queue_prefix}:completed"
-        self.failed_set = f"{queue_prefix}:failed"
-        self.task_data_key = f"{queue_prefix}:tasks"
+        # Tasks held by workers, scored by lease deadline
+        self.leases_key = f"{queue_prefix}:leases"
+        # Finished tasks, scored by when they finished
+        self.completed_set = f"{queue_prefix}:completed_at"
+        self.failed_set = f"{queue_prefix}:failed_at"
+        self.delayed_set = f"{queue_prefix}:delayed"
+        self.task_key_prefix = f"{queue_prefix}:task:"
         self.stats_key = f"{queue_prefix}:stats"
+        # Single-element list present while any queue may hold tasks; idle
+        # consumers block on it instead of on the queues themselves
+        self.ready_key = f"{queue_prefix}:ready"
         
         # Worker management
         self.workers: List['BackgroundWorker'] = []
@@ -125,6 +509,18 @@ class ProcessingQueueManager:
         except RedisError as e:
             logger.error(f"Failed to connect to Redis: {e}")
             raise
+        
+        # Scripts are sent once and then run by SHA
+        self._enqueue_script = self.redis_client.register_script(ENQUEUE_SCRIPT)
+        self._dequeue_script = self.redis_client.register_script(DEQUEUE_SCRIPT)
+        self._release_script = self.redis_client.register_script(RELEASE_SCRIPT)
+        self._finish_script = self.redis_client.register_script(FINISH_SCRIPT)
+        self._extend_leases_script = self.redis_client.register_script(EXTEND_LEASES_SCRIPT)
+        self._requeue_expired_script = self.redis_client.register_script(REQUEUE_EXPIRED_SCRIPT)
+        self._cancel_script = self.redis_client.register_script(CANCEL_SCRIPT)
+        self._promote_delayed_script = self.redis_client.register_script(PROMOTE_DELAYED_SCRIPT)
+        self._age_script = self.redis_client.register_script(AGE_SCRIPT)
+        self._cleanup_script = self.redis_client.register_script(CLEANUP_SCRIPT)
     
     async def disconnect(self):
         """Disconnect from Redis"""
@@ -141,18 +537,19 @@ class ProcessingQueueManager:
             # Serialize task
             task_json = json.dumps(task.to_dict())
             
-            # Store task data
-            await self.redis_client.hset(self.task_data_key, task.id, task_json)
-            
-            # Add to appropriate priority queue
-            queue_name = self._get_queue_for_priority(task.priority)
-            await self.redis_client.lpush(queue_name, task.id)
-            
-            # Update statistics
-            await self._increment_stat("tasks_enqueued")
-            await self._increment_stat(f"tasks_enqueued_{task.task_type}")
+            # Store task data, queue it on its organization's sub-queue and count it
+            await self._enqueue_script(
+                keys=[
+                    self.task_key_prefix, self.scheduler_prefix, self.ready_key, self.stats_key,
+                    self._daily_stats_key()
+                ],
+                args=[task_json, time.time(), DAILY_STATS_TTL, "tasks_enqueued", f"tasks_enqueued_{task.task_type}"]
+            )
             
-            logger.info(f"Enqueued task {task.id} of type {task.task_type} to queue {queue_name}")
+            logger.info(
+                f"Enqueued task {task.id} of type {task.task_type} to the "
+                f"{self._get_class_for_priority(task.priority)} priority queue of organization {task.organization_id}"
+            )
             return True
             
         except Exception as e:
@@ -161,48 +558,73 @@ class ProcessingQueueManager:
     
     async def dequeue_task(self, timeout: int = 10) -> Optional[ProcessingTask]:
         """Get next task from queues (blocking)"""
+        tasks = await self.dequeue_tasks(1, timeout=timeout)
+        return tasks[0] if tasks else None
+    
+    async def dequeue_tasks(self, max_tasks: int, timeout: int = 10) -> List[ProcessingTask]:
+        """
+        Get up to max_tasks tasks from queues in one round trip
+        
+        Blocks up to timeout seconds only while every queue is empty.
+        """
         if not self.redis_client:
             raise RuntimeError("Redis client not connected")
         
+        deadline = time.monotonic() + timeout if timeout else None
         try:
-            # Try to get task from priority queues (high to low)
-            result = await self.redis_client.brpop(self.priority_queues, timeout=timeout)
-            
-            if not result:
-                return None
-            
-            queue_name, task_id = result
-            
-            # Get task data
-            task_json = await self.redis_client.hget(self.task_data_key, task_id)
-            if not task_json:
-                logger.warning(f"Task {task_id} not found in task data")
-                return None
-            
-            # Deserialize task
-            task_data = json.loads(task_json)
-            task = ProcessingTask.from_dict(task_data)
-            
-            # Mark as processing
-            task.status = "processing"
-            task.started_at = datetime.utcnow().isoformat()
-            task.attempts += 1
-            
-            # Move to processing set
-            await self.redis_client.sadd(self.processing_set, task_id)
-            
-            # Update task data
-            await self._update_task(task)
-            
-            logger.debug(f"Dequeued task {task_id} from {queue_name}")
-            return task
-            
+            while True:
+                # Pop from the highest non-empty queues and lease the tasks to this caller
+                claimed = await self._dequeue_script(
+                    keys=[
+                        self.task_key_prefix, self.leases_key, self.ready_key, self.scheduler_prefix, self.weights_key
+                    ],
+                    args=[datetime.utcnow().isoformat(), uuid4().hex, time.time() + self.lease_timeout, max_tasks]
+                )
+                if claimed:
+                    tasks = [ProcessingTask.from_dict(json.loads(task_json)) for task_json in claimed]
+                    logger.debug(f"Dequeued tasks {[task.id for task in tasks]}")
+                    return tasks
+                
+                wait = 0
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return []
+                    wait = math.ceil(remaining)
+                
+                # Block until a producer raises the ready flag; the flag is rotated, not consumed
+                if not await self.redis_client.brpoplpush(self.ready_key, self.ready_key, timeout=wait):
+                    return []
+        
         except Exception as e:
             logger.error(f"Failed to dequeue task: {e}")
-            return None
+            return []
+    
+    async def release_tasks(self, tasks: List[ProcessingTask]) -> int:
+        """Return leased tasks that were never started to the front of their queue"""
+        if not self.redis_client:
+            raise RuntimeError("Redis client not connected")
+        if not tasks:
+            return 0
+        
+        args = [time.time()]
+        for task in tasks:
+            args += [task.id, task.lease_id or ""]
+        try:
+            return await self._release_script(
+                keys=[self.task_key_prefix, self.leases_key, self.ready_key, self.scheduler_prefix], args=args
+            )
+        except Exception as e:
+            logger.error(f"Failed to release tasks: {e}")
+            return 0
     
-    async def complete_task(self, task: ProcessingTask, result: Dict[str, Any] = None):
-        """Mark task as completed"""
+    async def complete_task(self, task: ProcessingTask, result: Dict[str, Any] = None) -> bool:
+        """
+        Mark task as completed
+        
+        Returns False when the caller no longer holds the task's lease, in
+        which case nothing is recorded.
+        """
         if not self.redis_client:
             raise RuntimeError("Redis client not connected")
         
@@ -213,26 +635,23 @@ class ProcessingQueueManager:
                 task.result = result
             
             # Move from processing to completed
-            await self.redis_client.srem(self.processing_set, task.id)
-            await self.redis_client.sadd(self.completed_set, task.id)
-            
-            # Update task data
-            await self._update_task(task)
-            
-            # Update statistics
-            await self._increment_stat("tasks_completed")
-            await self._increment_stat(f"tasks_completed_{task.task_type}")
-            
-            # Set TTL for completed tasks (cleanup after 7 days)
-            await self.redis_client.expire(f"{self.task_data_key}:{task.id}", 7 * 24 * 3600)
+            if not await self._finish(task, self.completed_set, time.time(), "tasks_completed"):
+                return False
             
             logger.info(f"Completed task {task.id}")
+            return True
             
         except Exception as e:
             logger.error(f"Failed to complete task {task.id}: {e}")
+            return False
     
-    async def fail_task(self, task: ProcessingTask, error_message: str, retry: bool = True):
-        """Mark task as failed and optionally retry"""
+    async def fail_task(self, task: ProcessingTask, error_message: str, retry: bool = True) -> bool:
+        """
+        Mark task as failed and optionally retry
+        
+        Returns False when the caller no longer holds the task's lease, in
+        which case nothing is recorded.
+        """
         if not self.redis_client:
             raise RuntimeError("Redis client not connected")
         
@@ -241,9 +660,6 @@ class ProcessingQueueManager:
             task.failed_at = datetime.utcnow().isoformat()
             task.error_message = error_message
             
-            # Remove from processing set
-            await self.redis_client.srem(self.processing_set, task.id)
-            
             if retry and task.should_retry():
                 # Schedule for retry
                 retry_delay = task.calculate_retry_delay()
@@ -251,24 +667,81 @@ class ProcessingQueueManager:
                 task.status = "pending"  # Reset to pending for retry
                 
                 # Re-queue with delay (using sorted set for scheduling)
-                score = time.time() + retry_delay
-                await self.redis_client.zadd(f"{self.queue_prefix}:delayed", {task.id: score})
-                
+                if not await self._finish(
+                    task, self.delayed_set, time.time() + retry_delay, "tasks_failed", keep=True
+                ):
+                    return False
                 logger.info(f"Scheduled task {task.id} for retry in {retry_delay} seconds (attempt {task.attempts})")
             else:
                 # Move to failed set
-                await self.redis_client.sadd(self.failed_set, task.id)
+                if not await self._finish(task, self.failed_set, time.time(), "tasks_failed"):
+                    return False
                 logger.error(f"Failed task {task.id} permanently: {error_message}")
-            
-            # Update task data
-            await self._update_task(task)
-            
-            # Update statistics
-            await self._increment_stat("tasks_failed")
-            await self._increment_stat(f"tasks_failed_{task.task_type}")
-            
+            return True
+        
         except Exception as e:
             logger.error(f"Failed to handle task failure {task.id}: {e}")
+            return False
+    
+    async def _finish(
+        self, task: ProcessingTask, destination: str, score: float, stat_name: str, keep: bool = False
+    ) -> bool:
+        """
+        Release the task's lease and record its outcome, if the lease is still held
+        
+        Unless keep is set the task's key expires after the retention period.
+        """
+        lease_id, task.lease_id = task.lease_id, None
+        recorded = await self._finish_script(
+            keys=[self.task_key_prefix, self.leases_key, destination, self.stats_key, self._daily_stats_key()],
+            args=[
+                task.id, lease_id or "", json.dumps(task.to_dict()), score,
+                0 if keep else self.retention_seconds, DAILY_STATS_TTL, stat_name, f"{stat_name}_{task.task_type}"
+            ]
+        )
+        if not recorded:
+            logger.warning(f"Ignoring outcome of task {task.id}: its lease expired and it was handed out again")
+        return bool(recorded)
+    
+    async def extend_leases(self, tasks: List[ProcessingTask]) -> List[str]:
+        """
+        Heartbeat: push back the lease deadline of tasks this worker holds
+        
+        Returns the ids of tasks whose lease was lost.
+        """
+        if not self.redis_client:
+            raise RuntimeError("Redis client not connected")
+        if not tasks:
+            return []
+        
+        args = [time.time() + self.lease_timeout]
+        for task in tasks:
+            args += [task.id, task.lease_id or ""]
+        return await self._extend_leases_script(keys=[self.task_key_prefix, self.leases_key], args=args)
+    
+    async def requeue_expired_tasks(self):
+        """Return tasks whose worker stopped heartbeating to their queue"""
+        if not self.redis_client:
+            return
+        
+        try:
+            while True:
+                examined, requeued, failed = await self._requeue_expired_script(
+                    keys=[
+                        self.leases_key, self.task_key_prefix, self.failed_set, self.ready_key, self.stats_key,
+                        self.scheduler_prefix
+                    ],
+                    args=[time.time(), DELAYED_BATCH_SIZE, datetime.utcnow().isoformat(), self.retention_seconds]
+                )
+                for task_id in requeued:
+                    logger.warning(f"Lease on task {task_id} expired, re-queued it")
+                for task_id in failed:
+                    logger.error(f"Lease on task {task_id} expired on its last attempt, failed it permanently")
+                if examined < DELAYED_BATCH_SIZE:
+                    break
+        
+        except Exception as e:
+            logger.error(f"Failed to requeue expired tasks: {e}")
     
     async def get_task(self, task_id: str) -> Optional[ProcessingTask]:
         """Get task by ID"""
@@ -276,7 +749,7 @@ class ProcessingQueueManager:
             raise RuntimeError("Redis client not connected")
         
         try:
-            task_json = await self.redis_client.hget(self.task_data_key, task_id)
+            task_json = await self.redis_client.get(self._task_key(task_id))
             if task_json:
                 task_data = json.loads(task_json)
                 return ProcessingTask.from_dict(task_data)
@@ -291,28 +764,20 @@ class ProcessingQueueManager:
             raise RuntimeError("Redis client not connected")
         
         try:
-            task = await self.get_task(task_id)
-            if not task:
+            # Status check, removal from the queues and the status change happen atomically
+            outcome = await self._cancel_script(
+                keys=[self.task_key_prefix, self.delayed_set, self.scheduler_prefix],
+                args=[task_id, self.retention_seconds]
+            )
+            if outcome == "missing":
                 return False
             
-            if task.status in ["completed", "cancelled"]:
-                return True
-            
-            if task.status == "processing":
+            if outcome == "processing":
                 logger.warning(f"Cannot cancel task {task_id} - already processing")
                 return False
             
-            # Remove from all queues
-            for queue in self.priority_queues:
-                await self.redis_client.lrem(queue, 0, task_id)
-            
-            await self.redis_client.zrem(f"{self.queue_prefix}:delayed", task_id)
-            
-            # Mark as cancelled
-            task.status = "cancelled"
-            await self._update_task(task)
-            
-            logger.info(f"Cancelled task {task_id}")
+            if outcome == "cancelled":
+                logger.info(f"Cancelled task {task_id}")
             return True
             
         except Exception as e:
@@ -325,24 +790,35 @@ class ProcessingQueueManager:
             raise RuntimeError("Redis client not connected")
         
         try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for priority_class in self.priority_classes:
+                    pipe.zcard(self._scheduler_key("waiting", priority_class))
+                    pipe.llen(self._scheduler_key("tenants", priority_class))
+                pipe.zcard(self.leases_key)
+                pipe.zcount(self.leases_key, "-inf", time.time())
+                pipe.zcard(self.completed_set)
+                pipe.zcard(self.failed_set)
+                pipe.zcard(self.delayed_set)
+                pipe.hgetall(self.stats_key)
+                *class_sizes, processing, expired, completed, failed, delayed, perf_stats = await pipe.execute()
+            
             stats = {}
             
-            # Queue lengths
-            for queue in self.priority_queues:
-                length = await self.redis_client.llen(queue)
-                queue_name = queue.split(':')[-1]
-                stats[f"queue_{queue_name}_length"] = length
+            # Queue lengths and organizations with queued tasks
+            for i, priority_class in enumerate(self.priority_classes):
+                stats[f"queue_{priority_class}_length"] = class_sizes[2 * i]
+                stats[f"queue_{priority_class}_organizations"] = class_sizes[2 * i + 1]
             
             # Set sizes
-            stats["processing_count"] = await self.redis_client.scard(self.processing_set)
-            stats["completed_count"] = await self.redis_client.scard(self.completed_set)
-            stats["failed_count"] = await self.redis_client.scard(self.failed_set)
+            stats["processing_count"] = processing
+            stats["expired_lease_count"] = expired
+            stats["completed_count"] = completed
+            stats["failed_count"] = failed
             
             # Delayed tasks
-            stats["delayed_count"] = await self.redis_client.zcard(f"{self.queue_prefix}:delayed")
+            stats["delayed_count"] = delayed
             
             # Performance stats
-            perf_stats = await self.redis_client.hgetall(self.stats_key)
             stats.update({k: int(v) for k, v in perf_stats.items() if v.isdigit()})
             
             return stats
@@ -357,84 +833,103 @@ class ProcessingQueueManager:
             return
         
         try:
-            current_time = time.time()
-            
-            # Get ready tasks from delayed queue
-            ready_tasks = await self.redis_client.zrangebyscore(
-                f"{self.queue_prefix}:delayed", 0, current_time
-            )
-            
-            for task_id in ready_tasks:
-                # Remove from delayed queue
-                await self.redis_client.zrem(f"{self.queue_prefix}:delayed", task_id)
-                
-                # Get task data
-                task = await self.get_task(task_id)
-                if task:
-                    # Re-queue task
-                    queue_name = self._get_queue_for_priority(task.priority)
-                    await self.redis_client.lpush(queue_name, task_id)
+            while True:
+                examined, *requeued = await self._promote_delayed_script(
+                    keys=[self.delayed_set, self.task_key_prefix, self.ready_key, self.scheduler_prefix],
+                    args=[time.time(), DELAYED_BATCH_SIZE]
+                )
+                for task_id in requeued:
                     logger.info(f"Re-queued delayed task {task_id}")
-                    
+                if examined < DELAYED_BATCH_SIZE:
+                    break
+        
         except Exception as e:
             logger.error(f"Failed to process delayed tasks: {e}")
     
-    def _get_queue_for_priority(self, priority: int) -> str:
-        """Get queue name for given priority"""
+    async def age_waiting_tasks(self):
+        """Move low priority tasks that waited longer than aging_seconds up to the normal class"""
+        if not self.redis_client:
+            return
+        
+        try:
+            while True:
+                examined, *aged = await self._age_script(
+                    keys=[self.task_key_prefix, self.scheduler_prefix],
+                    args=[time.time(), time.time() - self.aging_seconds, DELAYED_BATCH_SIZE]
+                )
+                if aged:
+                    logger.info(f"Moved {len(aged)} low priority tasks waiting over {self.aging_seconds}s to normal priority")
+                if examined < DELAYED_BATCH_SIZE:
+                    break
+        
+        except Exception as e:
+            logger.error(f"Failed to age waiting tasks: {e}")
+    
+    async def set_organization_weight(self, organization_id: str, weight: float):
+        """
+        Set an organization's share of each priority class
+        
+        An organization with weight 2 gets twice the tasks per round of one
+        with the default weight 1 while both have tasks queued.
+        """
+        if not self.redis_client:
+            raise RuntimeError("Redis client not connected")
+        if weight <= 0:
+            raise ValueError("Organization weight must be positive")
+        
+        if weight == 1:
+            await self.redis_client.hdel(self.weights_key, str(organization_id))
+        else:
+            await self.redis_client.hset(self.weights_key, str(organization_id), weight)
+    
+    def _get_class_for_priority(self, priority: int) -> str:
+        """Get priority class for given priority"""
         if priority <= 3:
-            return self.priority_queues[0]  # high
+            return self.priority_classes[0]  # high
         elif priority <= 6:
-            return self.priority_queues[1]  # normal
+            return self.priority_classes[1]  # normal
         else:
-            return self.priority_queues[2]  # low
+            return self.priority_classes[2]  # low
     
-    async def _update_task(self, task: ProcessingTask):
-        """Update task data in Redis"""
-        task_json = json.dumps(task.to_dict())
-        await self.redis_client.hset(self.task_data_key, task.id, task_json)
+    def _scheduler_key(self, kind: str, priority_class: str) -> str:
+        """Key of a class's tenants, deficits or waiting index, as built by SCHEDULER_LUA"""
+        return f"{self.scheduler_prefix}{kind}:{priority_class}"
     
-    async def _increment_stat(self, stat_name: str):
-        """Increment a statistic counter"""
-        await self.redis_client.hincrby(self.stats_key, stat_name, 1)
-        
-        # Also increment daily stat
-        today = datetime.utcnow().strftime('%Y-%m-%d')
-        await self.redis_client.hincrby(f"{self.stats_key}:daily:{today}", stat_name, 1)
-        
-        # Set TTL on daily stats (keep for 30 days)
-        await self.redis_client.expire(f"{self.stats_key}:daily:{today}", 30 * 24 * 3600)
+    def _task_key(self, task_id: str) -> str:
+        return f"{self.task_key_prefix}{task_id}"
     
-    async def cleanup_old_tasks(self, days_to_keep: int = 7):
-        """Clean up old completed and failed tasks"""
+    def _daily_stats_key(self) -> str:
+        return f"{self.stats_key}:daily:{datetime.utcnow().strftime('%Y-%m-%d')}"
+    
+    async def cleanup_old_tasks(self, days_to_keep: Optional[int] = None) -> int:
+        """
+        Clean up old completed and failed tasks
+        
+        Walks the completion-time indexes in batches, so the cost follows the
+        number of expired tasks rather than the size of the history. Task keys
+        also expire on their own; this drops their index entries.
+        """
         if not self.redis_client:
-            return
+            return 0
         
-        cutoff_date = datetime.utcnow() - timedelta(days=days_to_keep)
-        cutoff_timestamp = cutoff_date.isoformat()
+        keep_seconds = self.retention_seconds if days_to_keep is None else days_to_keep * 24 * 3600
+        cutoff = time.time() - keep_seconds
+        removed = 0
         
         try:
-            # Get all completed and failed task IDs
-            completed_tasks = await self.redis_client.smembers(self.completed_set)
-            failed_tasks = await self.redis_client.smembers(self.failed_set)
-            
-            tasks_to_cleanup = []
-            
-            for task_id in completed_tasks + failed_tasks:
-                task = await self.get_task(task_id)
-                if task and (
-                    (task.completed_at and task.completed_at < cutoff_timestamp) or
-                    (task.failed_at and task.failed_at < cutoff_timestamp)
-                ):
-                    tasks_to_cleanup.append(task_id)
-            
-            # Remove old tasks
-            for task_id in tasks_to_cleanup:
-                await self.redis_client.hdel(self.task_data_key, task_id)
-                await self.redis_client.srem(self.completed_set, task_id)
-                await self.redis_client.srem(self.failed_set, task_id)
-            
-            if tasks_to_cleanup:
-                logger.info(f"Cleaned up {len(tasks_to_cleanup)} old tasks")
+            for index in (self.completed_set, self.failed_set):
+                while True:
+                    batch = await self._cleanup_script(
+                        keys=[self.task_key_prefix, index], args=[cutoff, DELAYED_BATCH_SIZE]
+                    )
+                    removed += batch
+                    if batch < DELAYED_BATCH_SIZE:
+                        break
+            
+            if removed:
+                logger.info(f"Cleaned up {removed} old tasks")
                 
         except Exception as e:
-            logger.error(f"Failed to cleanup old tasks: {e}")
\ No newline at end of file
+            logger.error(f"Failed to cleanup old tasks: {e}")
+        
+        return removed
@@ -6,7 +6,11 @@ from .base import BaseRepository
 from .document_repository import DocumentRepository
 from .processing_repository import ProcessingJobRepository
 from .audit_repository import AuditRepository
-from .permission_repository import PermissionRepository
+from .audit_writer import AuditWriter
+from .permission_repository import PermissionRepository, EffectivePermissions
+from .permission_resolver import PermissionResolver
+from .acl_cache import AclCache
+from .pagination import Page, InvalidCursorError, encode_cursor, decode_cursor
 from .collaboration_repository import (
     CollaborationRepository, CommentRepository, 
     ActivityRepository, WorkspaceRepository
@@ -17,7 +21,15 @@ __all__ = [
     "DocumentRepository", 
     "ProcessingJobRepository",
     "AuditRepository",
+    "AuditWriter",
     "PermissionRepository",
+    "EffectivePermissions",
+    "PermissionResolver",
+    "AclCache",
+    "Page",
+    "InvalidCursorError",
+    "encode_cursor",
+    "decode_cursor",
     "CollaborationRepository",
     "CommentRepository",
     "ActivityRepository", 
@@ -0,0 +1,449 @@
+"""
+Two-tier cache of document grants (Redis shared tier + in-process tier).
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .permission_repository import CHANGED_DOCUMENTS_KEY, PrincipalGrant
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INVALIDATION_CHANNEL = "content.acl.invalidated"
+
+# Stored for principals that have no grant on a document
+_NO_GRANT = "-"
+
+GrantMap = Dict[str, Optional[PrincipalGrant]]
+
+
+@dataclass
+class AclCacheStats:
+    """Counters for cache effectiveness and staleness."""
+    local_hits: int = 0
+    redis_hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+    stale_fills_skipped: int = 0
+    redis_errors: int = 0
+    invalidation_lag_ms: float = 0.0
+    max_invalidation_lag_ms: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.local_hits + self.redis_hits + self.misses
+        return round((self.local_hits + self.redis_hits) / lookups, 4) if lookups else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**self.__dict__, "hit_rate": self.hit_rate}
+
+
+@dataclass
+class AclLookup:
+    """Result of AclCache.get_many()."""
+    entries: Dict[UUID, GrantMap] = field(default_factory=dict)
+    misses: List[UUID] = field(default_factory=list)
+    # Document versions observed before the misses are read from the database
+    versions: Dict[UUID, int] = field(default_factory=dict)
+    # Documents whose version was read from Redis; only these are written back
+    shared: Set[UUID] = field(default_factory=set)
+
+
+def _encode_grant(grant: Optional[PrincipalGrant]) -> str:
+    if grant is None:
+        return _NO_GRANT
+    return json.dumps({
+        "p": sorted(grant.permissions),
+        "e": grant.expires_at.isoformat() if grant.expires_at else None
+    })
+
+
+def _decode_grant(value: str) -> Optional[PrincipalGrant]:
+    if value == _NO_GRANT:
+        return None
+    data = json.loads(value)
+    return PrincipalGrant(
+        permissions=frozenset(data["p"]),
+        expires_at=datetime.fromisoformat(data["e"]) if data["e"] else None
+    )
+
+
+class AclCache:
+    """
+    Caches each principal's grant on each document, keyed by (principal, document).
+
+    The shared tier is a Redis hash per document version
+    (``acl:{document}:{version}``). Changing a document's grants increments
+    ``acl:ver:{document}``, so entries cached from an older read can never be
+    served again, and publishes the new version so every process drops its
+    in-process entries for that document. The in-process tier additionally
+    expires entries after ``local_ttl_seconds``, which bounds staleness if an
+    invalidation message is lost.
+
+    Grants keep their ``expires_at``; callers combine them with
+    combine_grants(), which ignores expired grants, so a cached grant never
+    outlives its expiry. Without Redis (or while it is unreachable) only the
+    in-process tier is used.
+
+    A version bump that fails is retried until it reaches Redis; until then
+    this process bypasses the Redis tier for that document, since Redis
+    still serves the entries cached before the change.
+    """
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        redis_password: Optional[str] = None,
+        redis_client: Any = None,
+        key_prefix: str = "acl",
+        ttl_seconds: int = 300,
+        local_ttl_seconds: float = 5.0,
+        local_max_entries: int = 50000,
+        channel: str = DEFAULT_INVALIDATION_CHANNEL,
+        retry_seconds: float = 5.0
+    ):
+        """
+        Args:
+            redis_url: Redis connection URL (None = in-process tier only)
+            redis_password: Optional Redis password
+            redis_client: Ready-made redis.asyncio client (overrides redis_url)
+            key_prefix: Prefix of all Redis keys
+            ttl_seconds: Lifetime of Redis entries
+            local_ttl_seconds: Lifetime of in-process entries
+            local_max_entries: In-process LRU capacity
+            channel: Pub/sub channel for invalidation messages
+            retry_seconds: How long Redis is bypassed after an error
+        """
+        self.redis_url = redis_url
+        self.redis_password = redis_password
+        self.key_prefix = key_prefix
+        self.ttl_seconds = ttl_seconds
+        self.local_ttl_seconds = local_ttl_seconds
+        self.local_max_entries = local_max_entries
+        self.channel = channel
+        self.retry_seconds = retry_seconds
+        self.stats = AclCacheStats()
+
+        self._fixed_client = redis_client
+        self._client = redis_client
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._redis_down_until = 0.0
+
+        # (document, principal) -> (version, grant, stored_at)
+        self._local: "OrderedDict[Tuple[UUID, str], Tuple[int, Optional[PrincipalGrant], float]]" = OrderedDict()
+        self._versions: Dict[UUID, int] = {}
+        # Documents invalidated since their Redis version was last bumped,
+        # with the number of invalidations not yet published
+        self._unpublished: Dict[UUID, int] = {}
+
+    @property
+    def uses_redis(self) -> bool:
+        return self._fixed_client is not None or self.redis_url is not None
+
+    async def get_many(self, document_ids: Iterable[UUID], principals: List[str]) -> AclLookup:
+        """
+        Look up the grants of the given principals on several documents.
+
+        A document is a hit only if every principal is cached for it.
+
+        Returns:
+            AclLookup with the cached entries, the documents to load from the
+            database and the versions to pass back to put_many()
+        """
+        lookup = AclLookup()
+        now = time.monotonic()
+        remaining = []
+        for document_id in dict.fromkeys(document_ids):
+            entry = self._get_local(document_id, principals, now)
+            if entry is None:
+                remaining.append(document_id)
+            else:
+                lookup.entries[document_id] = entry
+                self.stats.local_hits += 1
+
+        if remaining and self._redis_available():
+            await self._publish_invalidations()
+            bypassed = [document_id for document_id in remaining if document_id in self._unpublished]
+            shared = [document_id for document_id in remaining if document_id not in self._unpublished]
+            if shared and self._redis_available():
+                try:
+                    remaining = bypassed + await self._get_redis(shared, principals, lookup, now)
+                except Exception as e:
+                    self._redis_failed(e)
+
+        for document_id in remaining:
+            lookup.misses.append(document_id)
+            lookup.versions.setdefault(document_id, self._versions.get(document_id, 0))
+        self.stats.misses += len(remaining)
+        return lookup
+
+    async def put_many(self, lookup: AclLookup, grants: Dict[UUID, GrantMap]) -> None:
+        """
+        Cache grants loaded from the database for the misses of a lookup.
+
+        Entries are stored under the version observed by get_many(); if the
+        document changed meanwhile they are dropped instead of cached.
+        """
+        now = time.monotonic()
+        for document_id, document_grants in grants.items():
+            version = lookup.versions.get(document_id, 0)
+            if version < self._versions.get(document_id, 0):
+                self.stats.stale_fills_skipped += 1
+                continue
+            self._put_local(document_id, version, document_grants, now)
+
+        # Other versions are local counters or were invalidated since the read
+        shared = {
+            document_id: document_grants for document_id, document_grants in grants.items()
+            if document_id in lookup.shared and document_id not in self._unpublished
+        }
+        if not shared or not self._redis_available():
+            return
+        try:
+            client = await self._get_client()
+            pipe = client.pipeline(transaction=False)
+            for document_id, document_grants in shared.items():
+                key = self._entry_key(document_id, lookup.versions.get(document_id, 0))
+                pipe.hset(key, mapping={
+                    principal: _encode_grant(grant) for principal, grant in document_grants.items()
+                })
+                pipe.expire(key, self.ttl_seconds)
+            await pipe.execute()
+        except Exception as e:
+            self._redis_failed(e)
+
+    async def invalidate(self, document_ids: Iterable[UUID]) -> None:
+        """Invalidate every cached grant on the given documents, in all processes."""
+        document_ids = list(dict.fromkeys(document_ids))
+        if not document_ids:
+            return
+        self.stats.invalidations += len(document_ids)
+
+        for document_id in document_ids:
+            self._apply_version(document_id, self._versions.get(document_id, 0) + 1)
+            if self.uses_redis:
+                self._unpublished[document_id] = self._unpublished.get(document_id, 0) + 1
+        await self._publish_invalidations()
+
+    async def _publish_invalidations(self) -> None:
+        """Bump and publish the Redis versions of invalidated documents."""
+        if not self._unpublished or not self._redis_available():
+            return
+
+        pending = dict(self._unpublished)
+        try:
+            client = await self._get_client()
+            pipe = client.pipeline(transaction=False)
+            for document_id in pending:
+                pipe.incr(self._version_key(document_id))
+            results = await pipe.execute()
+            versions = {
+                document_id: max(int(version), self._versions.get(document_id, 0))
+                for document_id, version in zip(pending, results)
+            }
+            await client.publish(self.channel, json.dumps({
+                "versions": {str(document_id): version for document_id, version in versions.items()},
+                "published_at": time.time()
+            }))
+        except Exception as e:
+            self._redis_failed(e)
+            logger.warning(f"ACL invalidation of {len(pending)} documents not published, will retry")
+            return
+
+        for document_id, version in versions.items():
+            self._apply_version(document_id, version)
+            # Invalidated again meanwhile: that change still needs its own bump
+            if self._unpublished.get(document_id) == pending[document_id]:
+                del self._unpublished[document_id]
+
+    async def invalidate_pending(self, session: AsyncSession) -> None:
+        """Invalidate documents whose grants the session's committed transaction changed."""
+        changed = session.info.pop(CHANGED_DOCUMENTS_KEY, None)
+        if changed:
+            await self.invalidate(changed)
+
+    def handle_invalidation_message(self, message: Dict[str, Any]) -> None:
+        """Apply an invalidation published by any process."""
+        for document_id, version in message.get("versions", {}).items():
+            self._apply_version(UUID(document_id), int(version))
+
+        published_at = message.get("published_at")
+        if isinstance(published_at, (int, float)):
+            lag_ms = max(0.0, (time.time() - published_at) * 1000)
+            self.stats.invalidation_lag_ms = round(lag_ms, 3)
+            self.stats.max_invalidation_lag_ms = max(self.stats.max_invalidation_lag_ms, round(lag_ms, 3))
+
+    async def listen_for_invalidations(self, shutdown_event: asyncio.Event) -> None:
+        """Apply invalidations published by other processes until shutdown."""
+        if not self.uses_redis:
+            return
+
+        logger.info(f"Listening for ACL invalidations on {self.channel}")
+        while not shutdown_event.is_set():
+            pubsub = None
+            try:
+                client = await self._get_client()
+                pubsub = client.pubsub()
+                await pubsub.subscribe(self.channel)
+
+                while not shutdown_event.is_set():
+                    await self._publish_invalidations()
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is None:
+                        continue
+                    try:
+                        self.handle_invalidation_message(json.loads(message["data"]))
+                    except (ValueError, TypeError, KeyError) as e:
+                        logger.warning(f"Malformed ACL invalidation: {e}")
+
+                await pubsub.unsubscribe(self.channel)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"ACL invalidation listener error: {e}")
+                # Messages may have been missed; only trust Redis from here on
+                self._local.clear()
+                try:
+                    await asyncio.wait_for(shutdown_event.wait(), timeout=self.retry_seconds)
+                except asyncio.TimeoutError:
+                    pass
+            finally:
+                if pubsub is not None:
+                    await pubsub.close()
+
+        logger.info("ACL invalidation listener stopped")
+
+    def cache_info(self) -> Dict[str, Any]:
+        """Cache size and counters for health reporting."""
+        return {
+            "acl_cache_local_entries": len(self._local),
+            "acl_cache_unpublished_invalidations": len(self._unpublished),
+            "acl_cache_redis": self.uses_redis and self._redis_available(),
+            **{f"acl_cache_{name}": value for name, value in self.stats.snapshot().items()}
+        }
+
+    def reset(self) -> None:
+        """Drop the in-process tier, counters and Redis connection."""
+        self._local.clear()
+        self._versions.clear()
+        self._unpublished.clear()
+        self.stats = AclCacheStats()
+        self._redis_down_until = 0.0
+        self._client = self._fixed_client
+        self._client_loop = None
+
+    async def close(self) -> None:
+        """Close the Redis connection."""
+        if self._client is not None and self._fixed_client is None:
+            try:
+                await self._client.close()
+            except Exception:
+                pass
+            self._client = None
+            self._client_loop = None
+
+    def _get_local(self, document_id: UUID, principals: List[str], now: float) -> Optional[GrantMap]:
+        min_version = self._versions.get(document_id, 0)
+        entry = {}
+        for principal in principals:
+            cached = self._local.get((document_id, principal))
+            if cached is None:
+                return None
+            version, grant, stored_at = cached
+            if version < min_version or now - stored_at > self.local_ttl_seconds:
+                del self._local[(document_id, principal)]
+                return None
+            entry[principal] = grant
+        for principal in principals:
+            self._local.move_to_end((document_id, principal))
+        return entry
+
+    def _put_local(self, document_id: UUID, version: int, grants: GrantMap, now: float) -> None:
+        for principal, grant in grants.items():
+            self._local[(document_id, principal)] = (version, grant, now)
+            self._local.move_to_end((document_id, principal))
+        while len(self._local) > self.local_max_entries:
+            self._local.popitem(last=False)
+
+    def _apply_version(self, document_id: UUID, version: int) -> None:
+        if version <= self._versions.get(document_id, 0):
+            return
+        self._versions[document_id] = version
+        for key in [key for key in self._local if key[0] == document_id]:
+            del self._local[key]
+
+    async def _get_redis(
+        self,
+        document_ids: List[UUID],
+        principals: List[str],
+        lookup: AclLookup,
+        now: float
+    ) -> List[UUID]:
+        client = await self._get_client()
+        versions = await client.mget([self._version_key(document_id) for document_id in document_ids])
+
+        pipe = client.pipeline(transaction=False)
+        for document_id, version in zip(document_ids, versions):
+            version = int(version or 0)
+            lookup.versions[document_id] = version
+            lookup.shared.add(document_id)
+            pipe.hmget(self._entry_key(document_id, version), principals)
+        rows = await pipe.execute()
+
+        remaining = []
+        for document_id, values in zip(document_ids, rows):
+            if any(value is None for value in values):
+                remaining.append(document_id)
+                continue
+            entry = {
+                principal: _decode_grant(value.decode() if isinstance(value, bytes) else value)
+                for principal, value in zip(principals, values)
+            }
+            lookup.entries[document_id] = entry
+            self.stats.redis_hits += 1
+            version = lookup.versions[document_id]
+            if version >= self._versions.get(document_id, 0):
+                self._put_local(document_id, version, entry, now)
+        return remaining
+
+    async def _get_client(self):
+        if self._fixed_client is not None:
+            return self._fixed_client
+
+        # Connections belong to the loop that opened them
+        loop = asyncio.get_running_loop()
+        if self._client is not None and self._client_loop is not loop:
+            self._client = None
+        if self._client is None:
+            import redis.asyncio as redis
+            self._client = redis.from_url(
+                self.redis_url,
+                password=self.redis_password,
+                socket_connect_timeout=1.0,
+                socket_timeout=1.0
+            )
+            self._client_loop = loop
+        return self._client
+
+    def _redis_available(self) -> bool:
+        return self.uses_redis and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, error: Exception) -> None:
+        self.stats.redis_errors += 1
+        self._redis_down_until = time.monotonic() + self.retry_seconds
+        logger.warning(f"ACL cache Redis unavailable, using database for {self.retry_seconds}s: {error}")
+
+    def _version_key(self, document_id: UUID) -> str:
+        return f"{self.key_prefix}:ver:{document_id}"
+
+    def _entry_key(self, document_id: UUID, version: int) -> str:
+        return f"{self.key_prefix}:{document_id}:{version}"
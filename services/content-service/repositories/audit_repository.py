@@ -6,11 +6,12 @@ from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
 from uuid import UUID
 
-from sqlalchemy import select, func, and_, desc
+from sqlalchemy import select, func, and_, or_, desc
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from .base import BaseRepository
+from .pagination import Page
 from models.audit import DocumentAudit
 
 
@@ -56,6 +57,42 @@ class AuditRepository(BaseRepository[DocumentAudit]):
         await self.session.refresh(audit_entry)
         return audit_entry
     
+    async def get_search_queries_since(
+        self,
+        created_after: Optional[datetime] = None,
+        after_id: Optional[UUID] = None,
+        limit: int = 1000
+    ) -> List[Any]:
+        """
+        Audited search queries since a (created_at, id) position, oldest first.
+    
+        Args:
+            created_after: Queries at or after this time when after_id is None,
+                else after the (created_after, after_id) position
+            after_id: Id of the last row already read
+            limit: Page size
+        """
+        stmt = select(
+            DocumentAudit.id,
+            DocumentAudit.organization_id,
+            DocumentAudit.user_id,
+            DocumentAudit.created_at,
+            DocumentAudit.details["query"].astext.label("query"),
+            DocumentAudit.details["result_count"].as_integer().label("result_count")
+        ).where(DocumentAudit.action == "search")
+    
+        if created_after is not None:
+            if after_id is None:
+                stmt = stmt.where(DocumentAudit.created_at >= created_after)
+            else:
+                stmt = stmt.where(or_(
+                    DocumentAudit.created_at > created_after,
+                    and_(DocumentAudit.created_at == created_after, DocumentAudit.id > after_id)
+                ))
+    
+        stmt = stmt.order_by(DocumentAudit.created_at, DocumentAudit.id).limit(limit)
+        return list((await self.session.execute(stmt)).all())
+    
     async def get_document_audit_trail(
         self,
         document_id: UUID,
@@ -110,6 +147,36 @@ class AuditRepository(BaseRepository[DocumentAudit]):
         offset: int = 0
     ) -> List[DocumentAudit]:
         """Get organization-wide activity."""
+        filters = self._activity_filters(organization_id, start_date, end_date, actions)
+        
+        return await self.find_many(
+            **filters,
+            limit=limit,
+            offset=offset,
+            order_by="created_at",
+            order_dir="desc"
+        )
+    
+    async def get_organization_activity_page(
+        self,
+        organization_id: UUID,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        actions: Optional[List[str]] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Page[DocumentAudit]:
+        """Get organization-wide activity, newest first, one keyset page at a time."""
+        filters = self._activity_filters(organization_id, start_date, end_date, actions)
+        return await self.list_page(limit, cursor=cursor, **filters)
+    
+    @staticmethod
+    def _activity_filters(
+        organization_id: UUID,
+        start_date: Optional[datetime],
+        end_date: Optional[datetime],
+        actions: Optional[List[str]]
+    ) -> Dict[str, Any]:
         filters = {"organization_id": organization_id}
         
         if start_date:
@@ -121,13 +188,7 @@ class AuditRepository(BaseRepository[DocumentAudit]):
         if actions:
             filters["action__in"] = actions
         
-        return await self.find_many(
-            **filters,
-            limit=limit,
-            offset=offset,
-            order_by="created_at",
-            order_dir="desc"
-        )
+        return filters
     
     async def get_security_events(
         self,
@@ -0,0 +1,226 @@
+"""
+Batched audit writer that takes audit inserts off the request path.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, AsyncContextManager, Callable, Dict, Iterable, List, Optional
+from uuid import uuid4
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.audit import DocumentAudit
+from .audit_repository import AuditRepository
+
+logger = logging.getLogger(__name__)
+
+# Actions whose audit record must be durable before the response is returned
+DEFAULT_SYNCHRONOUS_ACTIONS = frozenset({
+    "uploaded",
+    "delete",
+    "share_document",
+    "grant_user_permission",
+    "grant_role_permission",
+    "revoke_user_permission",
+    "revoke_role_permission",
+})
+
+_AUDIT_COLUMNS = tuple(column.name for column in DocumentAudit.__table__.columns)
+
+
+class AuditWriter:
+    """
+    Buffers audit events in memory and bulk-inserts them in batches.
+
+    Actions listed in ``synchronous_actions`` are written inline through the
+    request's AuditRepository, exactly as before. Every other action is queued
+    and written by ``run()`` as a single multi-row INSERT per batch, either
+    once ``batch_size`` events are pending or every ``flush_interval_seconds``.
+
+    Queued events live only in process memory: a crash loses at most one flush
+    interval of asynchronous events, which is why destructive and
+    permission-changing actions default to the synchronous path. Whenever the
+    writer is not running or the buffer is full, events are written inline.
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], AsyncContextManager[AsyncSession]]] = None,
+        batch_size: int = 500,
+        flush_interval_seconds: float = 1.0,
+        max_buffer_size: int = 10000,
+        synchronous_actions: Iterable[str] = DEFAULT_SYNCHRONOUS_ACTIONS,
+        enabled: bool = True
+    ):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        self._session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_buffer_size = max(max_buffer_size, batch_size)
+        self.synchronous_actions = frozenset(synchronous_actions)
+        self.enabled = enabled
+
+        self._buffer: List[Dict[str, Any]] = []
+        self._batch_ready = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._running = False
+
+        self.queued_events = 0
+        self.written_events = 0
+        self.synchronous_events = 0
+        self.batches_written = 0
+        self.failed_flushes = 0
+        self.dropped_events = 0
+
+    @property
+    def running(self) -> bool:
+        """Whether the background flush loop is active."""
+        return self._running
+
+    @property
+    def pending(self) -> int:
+        """Number of queued events not yet written."""
+        return len(self._buffer)
+
+    def is_synchronous(self, action: str) -> bool:
+        """Return True if events for this action are written inline."""
+        return (
+            not self.enabled
+            or not self._running
+            or action in self.synchronous_actions
+            or len(self._buffer) >= self.max_buffer_size
+        )
+
+    async def log_action(self, repository: AuditRepository, **kwargs) -> DocumentAudit:
+        """
+        Record an audit action, inline or via the batch buffer.
+
+        Args:
+            repository: Request-scoped repository used for synchronous writes
+            **kwargs: Arguments accepted by AuditRepository.log_action
+
+        Returns:
+            The audit entry; for queued events it is transient but has its
+            id and created_at already assigned.
+        """
+        if self.is_synchronous(kwargs["action"]):
+            self.synchronous_events += 1
+            return await repository.log_action(**kwargs)
+
+        audit_entry = DocumentAudit.create_audit_entry(**kwargs)
+        audit_entry.id = uuid4()
+        audit_entry.created_at = datetime.now(timezone.utc)
+
+        self._buffer.append({name: getattr(audit_entry, name) for name in _AUDIT_COLUMNS})
+        self.queued_events += 1
+        if len(self._buffer) >= self.batch_size:
+            self._batch_ready.set()
+        return audit_entry
+
+    async def flush(self) -> int:
+        """
+        Write all queued events in batches of at most ``batch_size``.
+
+        Returns:
+            Number of events written. Events stay queued if the database is
+            unavailable and are retried on the next flush.
+        """
+        written = 0
+        async with self._flush_lock:
+            while self._buffer:
+                batch = self._buffer[:self.batch_size]
+                try:
+                    dropped = await self._write_batch(batch)
+                except Exception as e:
+                    self.failed_flushes += 1
+                    logger.error(f"Audit flush failed, {len(self._buffer)} events pending: {e}")
+                    break
+
+                # Only flush() removes events and new ones are appended at the end
+                del self._buffer[:len(batch)]
+                written += len(batch) - dropped
+                self.written_events += len(batch) - dropped
+                self.dropped_events += dropped
+                self.batches_written += 1
+        return written
+
+    async def _write_batch(self, batch: List[Dict[str, Any]]) -> int:
+        """
+        Insert a batch as one multi-row INSERT, isolating rows on integrity errors.
+
+        Returns:
+            Number of rows dropped because they can never be inserted
+        """
+        try:
+            async with self._session() as session:
+                await session.execute(insert(DocumentAudit), batch)
+            return 0
+        except IntegrityError as e:
+            logger.warning(f"Audit batch rejected, retrying {len(batch)} events individually: {e}")
+
+        dropped = 0
+        for row in batch:
+            try:
+                async with self._session() as session:
+                    await session.execute(insert(DocumentAudit), [row])
+                continue
+            except IntegrityError:
+                pass
+
+            try:
+                # The document was deleted before the flush; mirror ON DELETE SET NULL
+                async with self._session() as session:
+                    await session.execute(insert(DocumentAudit), [{**row, "document_id": None}])
+            except IntegrityError as e:
+                # E.g. a duplicate id; retrying can't succeed and would block the buffer
+                dropped += 1
+                logger.error(
+                    f"Dropping audit event {row['id']} ({row['action']} on "
+                    f"{row['resource_id']}): {e}"
+                )
+        return dropped
+
+    def _session(self) -> AsyncContextManager[AsyncSession]:
+        if self._session_factory is None:
+            from database import db
+            self._session_factory = db.get_session_context
+        return self._session_factory()
+
+    async def run(self, shutdown_event: asyncio.Event) -> None:
+        """Flush queued events until shutdown, then drain the buffer."""
+        self._running = True
+        logger.info(
+            f"Audit writer started (batch_size={self.batch_size}, "
+            f"interval={self.flush_interval_seconds}s)"
+        )
+        try:
+            while not shutdown_event.is_set():
+                try:
+                    await asyncio.wait_for(self._batch_ready.wait(), timeout=self.flush_interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                self._batch_ready.clear()
+                await self.flush()
+        finally:
+            # New events go inline from here on; write whatever is still queued
+            self._running = False
+            await self.flush()
+            if self._buffer:
+                logger.error(f"Audit writer stopped with {len(self._buffer)} unwritten events")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return writer counters for health metrics."""
+        return {
+            "audit_events_pending": len(self._buffer),
+            "audit_events_queued": self.queued_events,
+            "audit_events_written": self.written_events,
+            "audit_events_synchronous": self.synchronous_events,
+            "audit_batches_written": self.batches_written,
+            "audit_failed_flushes": self.failed_flushes,
+            "audit_events_dropped": self.dropped_events
+        }
@@ -12,6 +12,7 @@ from sqlalchemy.orm import selectinload, joinedload
 from sqlalchemy.sql import Select
 
 from database.connection import Base
+from .pagination import Page, apply_keyset, build_page
 
 T = TypeVar('T', bound=Base)
 
@@ -80,6 +81,44 @@ class BaseRepository(Generic[T], ABC):
         result = await self.session.execute(stmt)
         return result.scalar()
     
+    async def count_up_to(self, max_count: int, **filters) -> int:
+        """
+        Count entities, stopping at max_count.
+
+        Cost is bounded by max_count rather than the table size; a result
+        equal to max_count means "at least that many".
+        """
+        matching = select(self.model_class.id)
+        matching = self._apply_filters(matching, **filters).limit(max_count).subquery()
+        result = await self.session.execute(select(func.count()).select_from(matching))
+        return result.scalar()
+    
+    async def list_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        offset: int = 0,
+        **filters
+    ) -> Page[T]:
+        """List entities newest first using keyset pagination."""
+        stmt = select(self.model_class)
+        stmt = self._apply_filters(stmt, **filters)
+        return await self._fetch_page(stmt, limit, cursor, offset)
+    
+    async def _fetch_page(
+        self,
+        stmt: Select,
+        limit: int,
+        cursor: Optional[str] = None,
+        offset: int = 0
+    ) -> Page[T]:
+        """Execute a query as one (created_at, id) keyset page."""
+        stmt = apply_keyset(
+            stmt, self.model_class.created_at, self.model_class.id, limit, cursor, offset
+        )
+        result = await self.session.execute(stmt)
+        return build_page(list(result.scalars().all()), limit)
+    
     async def list_all(
         self,
         limit: Optional[int] = None,
@@ -3,15 +3,24 @@ Document repository for advanced document operations.
 """
 
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple
 from uuid import UUID
 
-from sqlalchemy import select, func, and_, or_, desc, text
+from sqlalchemy import select, func, and_, or_, asc, desc, text, case
+from sqlalchemy.dialects.postgresql import ts_headline
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy.orm import defer, selectinload, joinedload
 
 from .base import BaseRepository
+from .full_text import (
+    FACET_FIELDS, HEADLINE_MAX_FRAGMENTS, HEADLINE_TEXT_LIMIT, HIGHLIGHT_START, HIGHLIGHT_STOP,
+    SORT_COLUMNS, TEXT_SEARCH_CONFIG, SearchHit, SearchResults, build_tsquery, headline_options,
+    split_headline
+)
+from .pagination import Page
+from .permission_repository import readable_document_ids
 from models.document import Document, DocumentVersion
+from search.analysis import highlight_fragments
 from schemas.document import DocumentListItem, DocumentStatsResponse
 
 
@@ -89,68 +98,391 @@ class DocumentRepository(BaseRepository[Document]):
             order_dir=order_dir
         )
     
+    async def find_page_by_organization(
+        self,
+        organization_id: UUID,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        offset: int = 0,
+        status: str = "active"
+    ) -> Page[Document]:
+        """Find documents by organization, newest first, one keyset page at a time."""
+        return await self.list_page(
+            limit,
+            cursor=cursor,
+            offset=offset,
+            organization_id=organization_id,
+            status=status
+        )
+    
     async def search_documents(
         self,
         organization_id: UUID,
         query: str,
+        user_id: Optional[UUID] = None,
+        user_roles: Optional[List[str]] = None,
         limit: int = 20,
         offset: int = 0,
         document_types: Optional[List[str]] = None,
         classifications: Optional[List[str]] = None,
+        tags: Optional[List[str]] = None,
         created_after: Optional[datetime] = None,
-        created_before: Optional[datetime] = None
-    ) -> Tuple[List[Document], int]:
-        """Full-text search documents with filtering."""
-        # Build the base query
-        stmt = select(Document).where(Document.organization_id == organization_id)
-        count_stmt = select(func.count(Document.id)).where(Document.organization_id == organization_id)
-        
-        # Add text search
-        if query.strip():
-            search_condition = Document.search_vector.match(query)
-            stmt = stmt.where(search_condition)
-            count_stmt = count_stmt.where(search_condition)
-        
-        # Add filters
-        filters = []
+        created_before: Optional[datetime] = None,
+        file_size_min: Optional[int] = None,
+        file_size_max: Optional[int] = None,
+        exact_phrase: bool = False,
+        prefix: bool = False,
+        include_content: bool = True,
+        include_metadata: bool = True,
+        highlight: bool = True,
+        snippet_length: int = 200,
+        sort_by: str = "relevance",
+        sort_order: str = "desc",
+        count_limit: int = 10000
+    ) -> SearchResults:
+        """
+        Full-text search active organization documents with filtering.
+        
+        Matches are served by the (organization_id, search_vector) GIN index.
+        When user_id is given only documents the user created or can read
+        through an unexpired grant are returned. Highlights are computed for
+        the returned page only; totals and facets stop at count_limit matches.
+        """
+        weights = ""
+        if not include_metadata:
+            weights = "C"
+        elif not include_content:
+            weights = "AB"
+        
+        tsquery = build_tsquery(query, exact_phrase=exact_phrase, prefix=prefix, weights=weights)
+        if tsquery is None:
+            return SearchResults(hits=[], total=0)
+        
+        conditions = self._search_conditions(
+            organization_id, user_id, user_roles, document_types, classifications,
+            created_after, created_before, file_size_min, file_size_max
+        )
+        conditions.append(Document.search_vector.bool_op("@@")(tsquery))
+        
+        if tags:
+            conditions.append(or_(*(Document.file_metadata.contains({"tags": [tag]}) for tag in tags)))
+        
+        matches = and_(*conditions)
+        rank = func.ts_rank(Document.search_vector, tsquery)
+        if sort_by == "relevance":
+            sort_key = rank
+        elif sort_by in SORT_COLUMNS:
+            sort_key = SORT_COLUMNS[sort_by]
+        else:
+            raise ValueError(f"Unsupported sort field: {sort_by}")
+        
+        # Rank and order ids first so only the page's rows are loaded and highlighted
+        direction = desc if sort_order == "desc" else asc
+        page = (
+            select(
+                Document.id.label("id"),
+                rank.label("rank"),
+                sort_key.label("sort_key"),
+                Document.created_at.label("created_at")
+            )
+            .where(matches)
+            .order_by(direction(sort_key), Document.created_at.desc(), Document.id.desc())
+            .offset(offset)
+            .limit(limit + 1)
+            .subquery()
+        )
+        ordering = [direction(page.c.sort_key), desc(page.c.created_at), desc(page.c.id)]
+        
+        text_prefix = func.left(Document.extracted_text, HEADLINE_TEXT_LIMIT)
+        columns = [Document, page.c.rank]
+        if highlight:
+            words = max(5, snippet_length // 6)
+            columns += [
+                ts_headline(
+                    TEXT_SEARCH_CONFIG, text_prefix, tsquery,
+                    headline_options(words, HEADLINE_MAX_FRAGMENTS)
+                ).label("headline"),
+                text_prefix.label("text_prefix")
+            ]
+        
+        stmt = (
+            select(*columns)
+            .join(page, Document.id == page.c.id)
+            .options(defer(Document.extracted_text))
+            .order_by(*ordering)
+        )
+        rows = (await self.session.execute(stmt)).all()
+        
+        hits = []
+        for row in rows[:limit]:
+            hit = SearchHit(document=row[0], rank=float(row.rank or 0.0))
+            if highlight:
+                hit.fragments = split_headline(row.headline)
+                hit.text_prefix = row.text_prefix
+            hits.append(hit)
+        
+        total, facets = await self._count_matches(matches, count_limit)
+        return SearchResults(
+            hits=hits,
+            total=total,
+            total_is_estimate=total >= count_limit,
+            has_next=len(rows) > limit,
+            facets=facets
+        )
+    
+    async def rank_search_candidates(
+        self,
+        candidates: Dict[UUID, float],
+        organization_id: UUID,
+        user_id: Optional[UUID] = None,
+        user_roles: Optional[List[str]] = None,
+        limit: int = 20,
+        offset: int = 0,
+        document_types: Optional[List[str]] = None,
+        classifications: Optional[List[str]] = None,
+        tags: Optional[List[str]] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        file_size_min: Optional[int] = None,
+        file_size_max: Optional[int] = None,
+        highlight_terms: Optional[Set[str]] = None,
+        snippet_length: int = 200,
+        sort_by: str = "relevance",
+        sort_order: str = "desc",
+        candidates_truncated: bool = False
+    ) -> SearchResults:
+        """
+        Turn scored candidates from an external search backend into results.
+        
+        Applies the same organization, status, permission and attribute
+        filters as search_documents, then orders, pages, counts facets and
+        highlights in memory. Works on any database dialect.
+        
+        Args:
+            candidates: Document id to backend score
+            highlight_terms: Analyzed query terms to mark, or None for no highlights
+            candidates_truncated: The backend stopped at its candidate limit,
+                so totals are lower bounds
+        """
+        if sort_by != "relevance" and sort_by not in SORT_COLUMNS:
+            raise ValueError(f"Unsupported sort field: {sort_by}")
+        if not candidates:
+            return SearchResults(hits=[], total=0)
+        
+        conditions = self._search_conditions(
+            organization_id, user_id, user_roles, document_types, classifications,
+            created_after, created_before, file_size_min, file_size_max
+        )
+        conditions.append(Document.id.in_(list(candidates)))
+        stmt = select(Document).where(and_(*conditions)).options(defer(Document.extracted_text))
+        documents = list((await self.session.execute(stmt)).scalars().all())
+        
+        if tags:
+            wanted = set(tags)
+            documents = [
+                doc for doc in documents if wanted.intersection(doc.get_metadata_value("tags", []))
+            ]
+        
+        reverse = sort_order == "desc"
+        if sort_by == "relevance":
+            documents.sort(key=lambda doc: (candidates[doc.id], doc.created_at), reverse=reverse)
+        else:
+            attribute = SORT_COLUMNS[sort_by].key
+            documents.sort(key=lambda doc: (getattr(doc, attribute), doc.created_at), reverse=reverse)
+        
+        facets = {facet: {} for facet in FACET_FIELDS}
+        for doc in documents:
+            for facet in FACET_FIELDS:
+                key = getattr(doc, facet) or "unknown"
+                facets[facet][key] = facets[facet].get(key, 0) + 1
+        
+        page = documents[offset:offset + limit]
+        hits = [SearchHit(document=doc, rank=candidates[doc.id]) for doc in page]
+        
+        if highlight_terms and hits:
+            text_prefix = func.substr(Document.extracted_text, 1, HEADLINE_TEXT_LIMIT)
+            prefix_stmt = select(Document.id, text_prefix).where(
+                Document.id.in_([hit.document.id for hit in hits])
+            )
+            prefixes = dict((await self.session.execute(prefix_stmt)).all())
+            for hit in hits:
+                hit.text_prefix = prefixes.get(hit.document.id)
+                hit.fragments = [
+                    fragment for fragment, _, _ in highlight_fragments(
+                        hit.text_prefix, highlight_terms, HIGHLIGHT_START, HIGHLIGHT_STOP,
+                        fragment_chars=snippet_length, max_fragments=HEADLINE_MAX_FRAGMENTS
+                    )
+                ]
+        
+        return SearchResults(
+            hits=hits,
+            total=len(documents),
+            total_is_estimate=candidates_truncated,
+            has_next=len(documents) > offset + limit,
+            facets=facets
+        )
+    
+    async def get_text_spans(self, spans: Dict[UUID, Tuple[int, int]]) -> Dict[UUID, str]:
+        """
+        Cut one span out of the extracted text of each document.
+        
+        Args:
+            spans: Document id to (start, end) character offsets
+        
+        Returns:
+            Document id to text; documents without text are omitted
+        """
+        if not spans:
+            return {}
+        
+        start = case({doc_id: span[0] + 1 for doc_id, span in spans.items()}, value=Document.id)
+        length = case({doc_id: span[1] - span[0] for doc_id, span in spans.items()}, value=Document.id)
+        stmt = select(Document.id, func.substr(Document.extracted_text, start, length)).where(
+            Document.id.in_(list(spans)),
+            Document.extracted_text.isnot(None)
+        )
+        return dict((await self.session.execute(stmt)).all())
+    
+    async def filter_readable(
+        self,
+        document_ids: List[UUID],
+        organization_id: UUID,
+        user_id: UUID,
+        user_roles: Optional[List[str]] = None
+    ) -> Set[UUID]:
+        """
+        The documents among document_ids that search would show the user.
+        
+        Active documents of the organization that the user created or may
+        read through a permission.
+        """
+        if not document_ids:
+            return set()
+        
+        conditions = self._search_conditions(
+            organization_id, user_id, user_roles, None, None, None, None, None, None
+        )
+        stmt = select(Document.id).where(Document.id.in_(document_ids), *conditions)
+        return set((await self.session.execute(stmt)).scalars().all())
+    
+    async def get_changed_since(
+        self,
+        updated_after: Optional[datetime] = None,
+        after_id: Optional[UUID] = None,
+        limit: int = 1000
+    ) -> List[Any]:
+        """
+        Documents changed since a (updated_at, id) position, oldest first.
+    
+        Only the fields the autocomplete index needs are read; title and
+        keywords fall back to the nested extraction metadata.
+    
+        Args:
+            updated_after: Changes at or after this time when after_id is None,
+                else after the (updated_after, after_id) position
+            after_id: Id of the last row already read
+            limit: Page size
+        """
+        metadata = Document.file_metadata
+        stmt = select(
+            Document.id,
+            Document.organization_id,
+            Document.status,
+            Document.filename,
+            Document.updated_at,
+            func.coalesce(
+                metadata["title"].astext, metadata["extraction_metadata"]["title"].astext
+            ).label("title"),
+            metadata["tags"].label("tags"),
+            func.coalesce(
+                metadata["keywords"], metadata["extraction_metadata"]["keywords"]
+            ).label("keywords")
+        )
+    
+        if updated_after is not None:
+            if after_id is None:
+                stmt = stmt.where(Document.updated_at >= updated_after)
+            else:
+                stmt = stmt.where(or_(
+                    Document.updated_at > updated_after,
+                    and_(Document.updated_at == updated_after, Document.id > after_id)
+                ))
+    
+        stmt = stmt.order_by(Document.updated_at, Document.id).limit(limit)
+        return list((await self.session.execute(stmt)).all())
+    
+    @staticmethod
+    def _search_conditions(
+        organization_id: UUID,
+        user_id: Optional[UUID],
+        user_roles: Optional[List[str]],
+        document_types: Optional[List[str]],
+        classifications: Optional[List[str]],
+        created_after: Optional[datetime],
+        created_before: Optional[datetime],
+        file_size_min: Optional[int],
+        file_size_max: Optional[int]
+    ) -> List[Any]:
+        """Dialect-independent conditions shared by the search paths."""
+        conditions = [
+            Document.organization_id == organization_id,
+            Document.status == "active"
+        ]
+        
+        if user_id is not None:
+            conditions.append(or_(
+                Document.created_by == user_id,
+                Document.id.in_(readable_document_ids(user_id, user_roles or []))
+            ))
         
         if document_types:
-            filters.append(Document.document_type.in_(document_types))
+            conditions.append(Document.document_type.in_(document_types))
         
         if classifications:
-            filters.append(Document.classification.in_(classifications))
+            conditions.append(Document.classification.in_(classifications))
         
         if created_after:
-            filters.append(Document.created_at >= created_after)
+            conditions.append(Document.created_at >= created_after)
         
         if created_before:
-            filters.append(Document.created_at <= created_before)
-        
-        if filters:
-            combined_filter = and_(*filters)
-            stmt = stmt.where(combined_filter)
-            count_stmt = count_stmt.where(combined_filter)
-        
-        # Add ordering and pagination
-        if query.strip():
-            # Order by relevance when searching
-            stmt = stmt.order_by(
-                func.ts_rank(Document.search_vector, func.plainto_tsquery(query)).desc(),
-                Document.created_at.desc()
-            )
-        else:
-            stmt = stmt.order_by(Document.created_at.desc())
+            conditions.append(Document.created_at <= created_before)
         
-        stmt = stmt.offset(offset).limit(limit)
+        if file_size_min is not None:
+            conditions.append(Document.file_size >= file_size_min)
         
-        # Execute queries
-        result = await self.session.execute(stmt)
-        documents = list(result.scalars().all())
+        if file_size_max is not None:
+            conditions.append(Document.file_size <= file_size_max)
+        
+        return conditions
+    
+    async def _count_matches(
+        self,
+        matches: Any,
+        count_limit: int
+    ) -> Tuple[int, Dict[str, Dict[str, int]]]:
+        """Count matches and their facet values, stopping at count_limit matches."""
+        matched = (
+            select(Document.document_type, Document.classification, Document.content_type)
+            .where(matches)
+            .limit(count_limit)
+            .subquery()
+        )
+        stmt = select(
+            matched.c.document_type,
+            matched.c.classification,
+            matched.c.content_type,
+            func.count()
+        ).group_by(matched.c.document_type, matched.c.classification, matched.c.content_type)
         
-        count_result = await self.session.execute(count_stmt)
-        total_count = count_result.scalar()
+        total = 0
+        facets = {facet: {} for facet in FACET_FIELDS}
+        for document_type, classification, content_type, count in await self.session.execute(stmt):
+            total += count
+            for facet, value in zip(FACET_FIELDS, (document_type, classification, content_type)):
+                key = value or "unknown"
+                facets[facet][key] = facets[facet].get(key, 0) + count
         
-        return documents, total_count
+        return total, facets
     
     async def get_document_with_versions(self, document_id: UUID) -> Optional[Document]:
         """Get document with all versions loaded."""
@@ -0,0 +1,120 @@
+"""
+PostgreSQL full-text search helpers: query building and highlight parsing.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.dialects.postgresql import phraseto_tsquery, to_tsquery, websearch_to_tsquery
+
+from models.document import Document
+
+TEXT_SEARCH_CONFIG = "english"
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+FRAGMENT_DELIMITER = " ... "
+
+# Highlights are cut from this much leading text so ts_headline cost stays bounded
+HEADLINE_TEXT_LIMIT = 50000
+HEADLINE_MAX_FRAGMENTS = 3
+
+FACET_FIELDS = ("document_type", "classification", "content_type")
+
+SORT_COLUMNS = {
+    "created_at": Document.created_at,
+    "filename": Document.filename,
+    "file_size": Document.file_size,
+}
+
+_TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass
+class SearchHit:
+    """One matching document with its rank and highlighted fragments."""
+    document: Document
+    rank: float
+    fragments: List[str] = field(default_factory=list)
+    # Leading part of the extracted text the fragments were cut from
+    text_prefix: Optional[str] = None
+
+
+@dataclass
+class SearchResults:
+    """A page of search hits with counts over all matches."""
+    hits: List[SearchHit]
+    total: int
+    total_is_estimate: bool = False
+    has_next: bool = False
+    facets: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+
+def build_tsquery(
+    query: str,
+    exact_phrase: bool = False,
+    prefix: bool = False,
+    weights: str = ""
+) -> Optional[Any]:
+    """
+    Build the tsquery expression for a user query.
+
+    Plain queries use websearch syntax (quoted phrases, OR, -term). Prefix
+    matching and field restriction need per-term operators, so those
+    queries are rebuilt from their word characters only.
+
+    Args:
+        query: User query text
+        exact_phrase: Match the words as one phrase
+        prefix: Match words starting with each term
+        weights: Restrict matches to these vector weights ("AB" = metadata, "C" = content)
+
+    Returns:
+        tsquery expression, or None if the query has no searchable terms
+    """
+    if exact_phrase and not prefix and not weights:
+        return phraseto_tsquery(TEXT_SEARCH_CONFIG, query)
+    if not prefix and not weights:
+        return websearch_to_tsquery(TEXT_SEARCH_CONFIG, query)
+
+    terms = _TERM_PATTERN.findall(query.lower())
+    if not terms:
+        return None
+
+    suffix = ":" + ("*" if prefix else "") + weights
+    operator = " <-> " if exact_phrase else " & "
+    return to_tsquery(TEXT_SEARCH_CONFIG, operator.join(f"'{term}'{suffix}" for term in terms))
+
+
+def headline_options(max_words: int, max_fragments: int) -> str:
+    """ts_headline options producing up to max_fragments marked fragments."""
+    return (
+        f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, "
+        f"MaxWords={max_words}, MinWords={max(1, max_words // 3)}, "
+        f"MaxFragments={max_fragments}, FragmentDelimiter=\"{FRAGMENT_DELIMITER}\""
+    )
+
+
+def split_headline(headline: Optional[str]) -> List[str]:
+    """Split ts_headline output into fragments, keeping only those with a match."""
+    if not headline:
+        return []
+    return [
+        fragment.strip() for fragment in headline.split(FRAGMENT_DELIMITER)
+        if HIGHLIGHT_START in fragment
+    ]
+
+
+def fragment_offsets(fragment: str, text: Optional[str]) -> Tuple[int, int]:
+    """
+    Locate a highlighted fragment in the text it was cut from.
+
+    Returns:
+        (start, end) character offsets, or (-1, -1) if it can't be located
+    """
+    plain = fragment.replace(HIGHLIGHT_START, "").replace(HIGHLIGHT_STOP, "")
+    start = text.find(plain) if text and plain else -1
+    if start < 0:
+        return -1, -1
+    return start, start + len(plain)
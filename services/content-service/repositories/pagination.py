@@ -0,0 +1,95 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Pages are ordered newest first on ``(created_at, id)`` and each page starts
+strictly after the last row of the previous one, so the database seeks
+straight to the page through the ``(organization_id, created_at, id)``
+indexes instead of scanning and discarding OFFSET rows.
+"""
+
+import base64
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Generic, List, Optional, Tuple, TypeVar
+from uuid import UUID
+
+from sqlalchemy import desc, tuple_
+from sqlalchemy.sql import Select
+
+T = TypeVar("T")
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+    pass
+
+
+@dataclass
+class Page(Generic[T]):
+    """One page of a keyset-paginated listing."""
+    items: List[T] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+
+def encode_cursor(created_at: datetime, entity_id: UUID) -> str:
+    """Encode the sort key of a row as an opaque URL-safe cursor."""
+    payload = json.dumps([created_at.isoformat(), str(entity_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """
+    Decode a cursor produced by encode_cursor().
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, entity_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), UUID(entity_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError(f"Invalid pagination cursor: {cursor!r}") from e
+
+
+def apply_keyset(
+    stmt: Select,
+    created_at_column,
+    id_column,
+    limit: int,
+    cursor: Optional[str] = None,
+    offset: int = 0
+) -> Select:
+    """
+    Order a query by (created_at, id) descending and seek past the cursor.
+
+    One extra row is fetched so build_page() can tell whether another page
+    exists without a separate count. ``offset`` is only honoured without a
+    cursor, for clients still paging by offset.
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed
+    """
+    if cursor:
+        created_at, entity_id = decode_cursor(cursor)
+        # Row comparison so the planner seeks the (created_at, id) index range
+        stmt = stmt.where(tuple_(created_at_column, id_column) < tuple_(created_at, entity_id))
+    elif offset > 0:
+        stmt = stmt.offset(offset)
+
+    return stmt.order_by(desc(created_at_column), desc(id_column)).limit(limit + 1)
+
+
+def build_page(rows: List[T], limit: int) -> Page[T]:
+    """Trim the look-ahead row and derive the next cursor."""
+    if len(rows) <= limit:
+        return Page(items=list(rows))
+
+    items = list(rows[:limit])
+    last = items[-1]
+    return Page(items=items, next_cursor=encode_cursor(last.created_at, last.id))
@@ -2,18 +2,115 @@
 Permission repository for document access control operations.
 """
 
-from datetime import datetime
-from typing import List, Optional, Dict, Any
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional
 from uuid import UUID
 
 from sqlalchemy import select, and_, or_, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
+from sqlalchemy.sql import Select
 
 from .base import BaseRepository
+from .pagination import Page, apply_keyset, build_page
 from models.permission import DocumentPermission
 from models.document import Document
 
+PERMISSION_TYPES = ("read", "write", "delete", "share", "admin")
+
+# session.info key collecting documents whose grants changed in the transaction
+CHANGED_DOCUMENTS_KEY = "acl_changed_documents"
+
+
+@dataclass
+class EffectivePermissions:
+    """Combined direct and role permissions of one principal on one document."""
+    document_id: UUID
+    permissions: Dict[str, bool] = field(
+        default_factory=lambda: {perm: False for perm in PERMISSION_TYPES}
+    )
+    sources: List[str] = field(default_factory=list)
+    
+    def allows(self, permission_type: str) -> bool:
+        """Check if a specific permission is granted."""
+        return self.permissions.get(permission_type.lower(), False)
+    
+    def as_owner(self) -> "EffectivePermissions":
+        """Copy with every permission granted, for the document's creator."""
+        return EffectivePermissions(
+            self.document_id,
+            {perm: True for perm in PERMISSION_TYPES},
+            ["owner", *self.sources]
+        )
+
+
+@dataclass(frozen=True)
+class PrincipalGrant:
+    """Permissions granted to one user or role on one document."""
+    permissions: FrozenSet[str]
+    expires_at: Optional[datetime] = None
+    
+    def is_active(self, now: Optional[datetime] = None) -> bool:
+        """Check the grant hasn't expired (naive datetimes are UTC)."""
+        if self.expires_at is None:
+            return True
+        expires_at = self.expires_at
+        if expires_at.tzinfo is not None:
+            expires_at = expires_at.astimezone(timezone.utc).replace(tzinfo=None)
+        return expires_at > (now or datetime.utcnow())
+
+
+def user_principal(user_id: UUID) -> str:
+    return f"user:{user_id}"
+
+
+def role_principal(role_name: str) -> str:
+    return f"role:{role_name}"
+
+
+def principal_keys(user_id: UUID, user_roles: List[str]) -> List[str]:
+    """Principal keys for a user and their roles, direct grant first."""
+    return [user_principal(user_id), *(role_principal(role) for role in dict.fromkeys(user_roles or ()))]
+
+
+def combine_grants(
+    document_id: UUID,
+    grants: Dict[str, Optional[PrincipalGrant]],
+    principals: List[str],
+    now: Optional[datetime] = None
+) -> EffectivePermissions:
+    """Combine the active grants of the given principals, in principal order."""
+    effective = EffectivePermissions(document_id)
+    for principal in principals:
+        grant = grants.get(principal)
+        if grant is None or not grant.is_active(now):
+            continue
+        effective.sources.append("direct" if principal.startswith("user:") else principal)
+        for perm in grant.permissions:
+            effective.permissions[perm] = True
+    return effective
+
+
+def readable_document_ids(user_id: UUID, user_roles: List[str]) -> Select:
+    """Select ids of documents with an unexpired read grant for the user or their roles."""
+    principal_condition = DocumentPermission.user_id == user_id
+    if user_roles:
+        principal_condition = or_(
+            principal_condition, DocumentPermission.role_name.in_(list(user_roles))
+        )
+    
+    return select(DocumentPermission.document_id).where(
+        and_(
+            principal_condition,
+            DocumentPermission.can_read == True,
+            or_(
+                DocumentPermission.expires_at.is_(None),
+                DocumentPermission.expires_at > func.now()
+            )
+        )
+    )
+
 
 class PermissionRepository(BaseRepository[DocumentPermission]):
     """Repository for document permission operations."""
@@ -172,6 +269,78 @@ class PermissionRepository(BaseRepository[DocumentPermission]):
         
         return effective_permissions
     
+    async def get_principal_grants(
+        self,
+        document_ids: Iterable[UUID],
+        user_id: UUID,
+        user_roles: List[str]
+    ) -> Dict[UUID, Dict[str, PrincipalGrant]]:
+        """
+        Fetch the unexpired grants of a user and their roles on many documents.
+
+        One query covers every document and principal, instead of one
+        lookup per document and principal.
+
+        Returns:
+            Mapping from document id to {principal key: grant}; principals
+            without a grant are absent
+        """
+        document_ids = list(dict.fromkeys(document_ids))
+        grants: Dict[UUID, Dict[str, PrincipalGrant]] = {document_id: {} for document_id in document_ids}
+        if not document_ids:
+            return grants
+        
+        principal_condition = DocumentPermission.user_id == user_id
+        if user_roles:
+            principal_condition = or_(
+                principal_condition, DocumentPermission.role_name.in_(user_roles)
+            )
+        
+        stmt = select(
+            DocumentPermission.document_id,
+            DocumentPermission.role_name,
+            DocumentPermission.expires_at,
+            *(getattr(DocumentPermission, f"can_{perm}") for perm in PERMISSION_TYPES)
+        ).where(
+            and_(
+                DocumentPermission.document_id.in_(document_ids),
+                principal_condition,
+                or_(
+                    DocumentPermission.expires_at.is_(None),
+                    DocumentPermission.expires_at > func.now()
+                )
+            )
+        )
+        result = await self.session.execute(stmt)
+        
+        for row in result.all():
+            principal = user_principal(user_id) if row.role_name is None else role_principal(row.role_name)
+            grants[row.document_id][principal] = PrincipalGrant(
+                permissions=frozenset(perm for perm in PERMISSION_TYPES if getattr(row, f"can_{perm}")),
+                expires_at=row.expires_at
+            )
+        
+        return grants
+    
+    async def get_effective_permissions_batch(
+        self,
+        document_ids: Iterable[UUID],
+        user_id: UUID,
+        user_roles: List[str]
+    ) -> Dict[UUID, EffectivePermissions]:
+        """
+        Resolve effective permissions for many documents in one query.
+
+        Returns:
+            Mapping with an entry for every requested document id
+        """
+        principals = principal_keys(user_id, user_roles)
+        grants = await self.get_principal_grants(document_ids, user_id, user_roles)
+        return {
+            document_id: combine_grants(document_id, document_grants, principals)
+            for document_id, document_grants in grants.items()
+        }
+    
     async def revoke_user_permission(
         self,
         document_id: UUID,
@@ -181,6 +350,7 @@ class PermissionRepository(BaseRepository[DocumentPermission]):
         permission = await self.get_user_permissions(document_id, user_id)
         if permission:
             await self.delete_by_id(permission.id)
+            self._mark_changed(document_id)
             return True
         return False
     
@@ -193,6 +363,7 @@ class PermissionRepository(BaseRepository[DocumentPermission]):
         permission = await self.get_role_permissions(document_id, role_name)
         if permission:
             await self.delete_by_id(permission.id)
+            self._mark_changed(document_id)
             return True
         return False
     
@@ -206,45 +377,8 @@ class PermissionRepository(BaseRepository[DocumentPermission]):
         offset: int = 0
     ) -> List[Document]:
         """Get documents accessible to a user based on permissions."""
-        # Build conditions for user and role permissions
-        user_condition = and_(
-            DocumentPermission.user_id == user_id,
-            DocumentPermission.can_read == True
-        )
-        
-        role_conditions = []
-        for role in user_roles:
-            role_conditions.append(
-                and_(
-                    DocumentPermission.role_name == role,
-                    DocumentPermission.can_read == True
-                )
-            )
-        
-        permission_condition = user_condition
-        if role_conditions:
-            permission_condition = or_(user_condition, *role_conditions)
-        
-        # Add expiration check
-        permission_condition = and_(
-            permission_condition,
-            or_(
-                DocumentPermission.expires_at.is_(None),
-                DocumentPermission.expires_at > func.now()
-            )
-        )
-        
         stmt = (
-            select(Document)
-            .join(DocumentPermission, Document.id == DocumentPermission.document_id)
-            .where(
-                and_(
-                    Document.organization_id == organization_id,
-                    Document.status == "active",
-                    permission_condition
-                )
-            )
-            .distinct()
+            self._accessible_documents_query(user_id, user_roles, organization_id)
             .offset(offset)
             .limit(limit)
             .order_by(Document.created_at.desc())
@@ -253,6 +387,40 @@ class PermissionRepository(BaseRepository[DocumentPermission]):
         result = await self.session.execute(stmt)
         return list(result.scalars().all())
     
+    async def get_user_accessible_documents_page(
+        self,
+        user_id: UUID,
+        user_roles: List[str],
+        organization_id: UUID,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        offset: int = 0
+    ) -> Page[Document]:
+        """Get documents accessible to a user, newest first, one keyset page at a time."""
+        stmt = apply_keyset(
+            self._accessible_documents_query(user_id, user_roles, organization_id),
+            Document.created_at, Document.id, limit, cursor, offset
+        )
+        result = await self.session.execute(stmt)
+        return build_page(list(result.scalars().all()), limit)
+    
+    def _accessible_documents_query(
+        self,
+        user_id: UUID,
+        user_roles: List[str],
+        organization_id: UUID
+    ) -> Select:
+        """Select active organization documents readable by the user or their roles."""
+        # Semi-join instead of JOIN + DISTINCT so pages can seek on (created_at, id)
+        readable = readable_document_ids(user_id, user_roles)
+        return select(Document).where(
+            and_(
+                Document.organization_id == organization_id,
+                Document.status == "active",
+                Document.id.in_(readable)
+            )
+        )
+    
     async def get_documents_shared_with_user(
         self,
         user_id: UUID,
@@ -366,12 +534,18 @@ class PermissionRepository(BaseRepository[DocumentPermission]):
         for perm in expired_permissions:
             await self.session.delete(perm)
         
+        self._mark_changed(*(perm.document_id for perm in expired_permissions))
         await self.session.flush()
         return count
     
+    def _mark_changed(self, *document_ids: UUID) -> None:
+        """Record documents whose grants changed, for cache invalidation after commit."""
+        self.session.info.setdefault(CHANGED_DOCUMENTS_KEY, set()).update(document_ids)
+    
     async def create_instance(self, permission: DocumentPermission) -> DocumentPermission:
         """Helper method to create a permission instance."""
         self.session.add(permission)
+        self._mark_changed(permission.document_id)
         await self.session.flush()
         await self.session.refresh(permission)
         return permission
\ No newline at end of file
@@ -0,0 +1,131 @@
+"""
+Request-scoped resolver for document ACL checks.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .acl_cache import AclCache
+from .permission_repository import (
+    EffectivePermissions, PermissionRepository, combine_grants, principal_keys
+)
+
+# Keeps IN lists well below driver parameter limits
+MAX_BATCH_SIZE = 1000
+
+
+class PermissionResolver:
+    """
+    Resolves effective permissions for many documents with set-based queries.
+
+    Results are memoized per (document, user, roles) for the lifetime of the
+    resolver, so one instance should live for a single request: repeated
+    checks on the same documents cost no further queries, and grants made by
+    other requests are seen by the next one.
+
+    With an AclCache, grants are read from the cache first and only the
+    documents it misses are queried.
+    """
+
+    def __init__(self, session: AsyncSession, cache: Optional[AclCache] = None):
+        self.repository = PermissionRepository(session)
+        self.cache = cache
+        self._memo: Dict[Tuple[UUID, UUID, Tuple[str, ...]], EffectivePermissions] = {}
+        self.queries = 0
+
+    async def resolve(
+        self,
+        document_ids: Iterable[UUID],
+        user_id: UUID,
+        roles: List[str]
+    ) -> Dict[UUID, EffectivePermissions]:
+        """
+        Resolve a user's effective permissions on several documents.
+
+        Args:
+            document_ids: Documents to resolve
+            user_id: User whose direct grants apply
+            roles: Roles whose grants apply
+
+        Returns:
+            Mapping from every requested document id to its permissions
+        """
+        roles_key = tuple(roles or ())
+        document_ids = list(dict.fromkeys(document_ids))
+        missing = [
+            document_id for document_id in document_ids
+            if (document_id, user_id, roles_key) not in self._memo
+        ]
+
+        if self.cache is not None and missing:
+            resolved = await self._resolve_cached(missing, user_id, list(roles_key))
+        else:
+            resolved = {}
+            for start in range(0, len(missing), MAX_BATCH_SIZE):
+                resolved.update(await self.repository.get_effective_permissions_batch(
+                    missing[start:start + MAX_BATCH_SIZE], user_id, list(roles_key)
+                ))
+                self.queries += 1
+        for document_id, effective in resolved.items():
+            self._memo[(document_id, user_id, roles_key)] = effective
+
+        return {
+            document_id: self._memo[(document_id, user_id, roles_key)]
+            for document_id in document_ids
+        }
+
+    async def _resolve_cached(
+        self,
+        document_ids: List[UUID],
+        user_id: UUID,
+        roles: List[str]
+    ) -> Dict[UUID, EffectivePermissions]:
+        principals = principal_keys(user_id, roles)
+        lookup = await self.cache.get_many(document_ids, principals)
+
+        for start in range(0, len(lookup.misses), MAX_BATCH_SIZE):
+            batch = await self.repository.get_principal_grants(
+                lookup.misses[start:start + MAX_BATCH_SIZE], user_id, roles
+            )
+            self.queries += 1
+            # Cache absent grants too, so documents without one stay hits
+            loaded = {
+                document_id: {principal: grants.get(principal) for principal in principals}
+                for document_id, grants in batch.items()
+            }
+            await self.cache.put_many(lookup, loaded)
+            lookup.entries.update(loaded)
+
+        return {
+            document_id: combine_grants(document_id, lookup.entries[document_id], principals)
+            for document_id in document_ids
+        }
+
+    async def resolve_one(
+        self,
+        document_id: UUID,
+        user_id: UUID,
+        roles: List[str]
+    ) -> EffectivePermissions:
+        """Resolve a user's effective permissions on one document."""
+        return (await self.resolve([document_id], user_id, roles))[document_id]
+
+    async def check(
+        self,
+        document_id: UUID,
+        user_id: UUID,
+        roles: List[str],
+        permission_type: str
+    ) -> bool:
+        """Check if a user has a specific permission on a document."""
+        return (await self.resolve_one(document_id, user_id, roles)).allows(permission_type)
+
+    def invalidate(self, document_id: UUID = None) -> None:
+        """Forget memoized results, for one document or all of them."""
+        if document_id is None:
+            self._memo.clear()
+            return
+        for key in [key for key in self._memo if key[0] == document_id]:
+            del self._memo[key]
@@ -33,6 +33,10 @@ from .permission import (
     DocumentAccessCheckRequest,
     DocumentAccessCheckResponse
 )
+from .upload import (
+    MultipartUploadCreate,
+    MultipartUploadStatus
+)
 from .common import (
     PaginationParams,
     ErrorResponse,
@@ -60,6 +64,8 @@ __all__ = [
     "EffectivePermissionsResponse",
     "DocumentAccessCheckRequest",
     "DocumentAccessCheckResponse",
+    "MultipartUploadCreate",
+    "MultipartUploadStatus",
     "PaginationParams",
     "ErrorResponse",
     "SuccessResponse"
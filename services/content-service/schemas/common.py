@@ -21,16 +21,20 @@ class BaseResponse(BaseModel):
 class PaginationParams(BaseModel):
     """Pagination parameters for list endpoints."""
     limit: int = Field(default=20, ge=1, le=100, description="Number of items per page")
-    offset: int = Field(default=0, ge=0, description="Number of items to skip")
+    offset: int = Field(default=0, ge=0, description="Number of items to skip (ignored with cursor)")
+    cursor: Optional[str] = Field(default=None, description="Opaque cursor from a previous page's next_cursor")
+    include_total: bool = Field(default=True, description="Whether to count matching items")
     
 
 class PaginationInfo(BaseModel):
     """Pagination information in responses."""
     limit: int = Field(description="Items per page")
     offset: int = Field(description="Items skipped")
-    total: int = Field(description="Total number of items")
+    total: Optional[int] = Field(default=None, description="Total number of items (None when not requested)")
+    total_is_estimate: bool = Field(default=False, description="Whether total is a lower bound")
     has_next: bool = Field(description="Whether there are more items")
     has_prev: bool = Field(description="Whether there are previous items")
+    next_cursor: Optional[str] = Field(default=None, description="Cursor for the next page")
 
 
 class SuccessResponse(BaseResponse):
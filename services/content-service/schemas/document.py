@@ -97,6 +97,9 @@ class DocumentListItem(BaseResponse):
     
     # Quick access URLs
     thumbnail_url: Optional[str] = Field(default=None, description="Thumbnail URL")
+    
+    # Caller's effective permissions on the document
+    permissions: Optional[Dict[str, bool]] = Field(default=None, description="Effective permissions of the requesting user")
 
 
 class DocumentListResponse(BaseResponse):
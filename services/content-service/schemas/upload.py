@@ -0,0 +1,33 @@
+"""
+Resumable upload schemas for the content service API.
+"""
+
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class MultipartUploadCreate(BaseModel):
+    """Schema for starting a resumable multipart upload."""
+    filename: str = Field(..., min_length=1, max_length=255, description="Client filename")
+    file_size: int = Field(..., gt=0, description="Total size of the file in bytes")
+    part_size: Optional[int] = Field(None, gt=0, description="Preferred part size in bytes")
+    description: Optional[str] = Field(None, description="Document description")
+    tags: Optional[str] = Field(None, description="Comma-separated tags")
+    category: Optional[str] = Field(None, description="Document category")
+
+
+class MultipartUploadStatus(BaseModel):
+    """State of a resumable upload."""
+    upload_id: str = Field(..., description="Upload session identifier")
+    filename: Optional[str] = Field(None, description="Client filename")
+    status: str = Field(..., description="open or completing")
+    total_size: int = Field(..., description="Total size of the file in bytes")
+    part_size: int = Field(..., description="Size of every part except the last")
+    part_count: int = Field(..., description="Number of parts")
+    received_parts: List[int] = Field(..., description="1-based numbers of received parts")
+    missing_parts: List[int] = Field(..., description="1-based numbers of parts still to send")
+    received_bytes: int = Field(..., description="Bytes received across all parts")
+    offset: int = Field(..., description="Bytes received contiguously from the start")
+    hashed_bytes: int = Field(..., description="Bytes already folded into the running hash")
+    expires_at: float = Field(..., description="Unix time after which the upload is discarded")
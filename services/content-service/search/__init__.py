@@ -0,0 +1,36 @@
+"""
+Search backends for document search.
+"""
+
+from .base import (
+    SearchBackend, SearchBackendError, CorruptIndexError, IndexedDocument, SearchMatch, ChunkMatch
+)
+from .inverted_index import EmbeddedSearchBackend, InvertedIndex
+from .embeddings import EmbeddingProvider, HashingEmbeddingProvider, SentenceTransformerProvider
+from .vector_index import VectorIndex
+from .semantic import SemanticIndex
+from .autocomplete import AutocompleteIndex, Suggestion, refresh_autocomplete_periodically, suggest_for_user
+from .factory import search_backend_from_env, embedding_provider_from_env, semantic_index_from_env
+
+__all__ = [
+    "SearchBackend",
+    "SearchBackendError",
+    "CorruptIndexError",
+    "IndexedDocument",
+    "SearchMatch",
+    "ChunkMatch",
+    "EmbeddedSearchBackend",
+    "InvertedIndex",
+    "EmbeddingProvider",
+    "HashingEmbeddingProvider",
+    "SentenceTransformerProvider",
+    "VectorIndex",
+    "SemanticIndex",
+    "AutocompleteIndex",
+    "Suggestion",
+    "refresh_autocomplete_periodically",
+    "suggest_for_user",
+    "search_backend_from_env",
+    "embedding_provider_from_env",
+    "semantic_index_from_env"
+]
@@ -0,0 +1,108 @@
+"""
+Text analysis shared by indexing, querying and highlighting.
+"""
+
+import re
+from collections import Counter
+from typing import Iterable, List, Set
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+MIN_TOKEN_LENGTH = 2
+MAX_TOKEN_LENGTH = 40
+
+STOPWORDS = frozenset("""
+    a an and are as at be but by for from has have he in is it its of on or she
+    that the their there they this to was were will with we you your not no
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without stopwords or very short and long tokens."""
+    if not text:
+        return []
+    return [
+        token for token in _TOKEN_PATTERN.findall(text.lower())
+        if MIN_TOKEN_LENGTH <= len(token) <= MAX_TOKEN_LENGTH and token not in STOPWORDS
+    ]
+
+
+def term_frequencies(text: str, weighted: Iterable[str] = (), boost: int = 1) -> Counter:
+    """
+    Count the terms of a document.
+
+    Args:
+        text: Body text, each occurrence counts once
+        weighted: Title and keyword strings, each occurrence counts boost times
+        boost: Weight of title and keyword terms
+
+    Returns:
+        Counter of term frequencies
+    """
+    frequencies = Counter(tokenize(text))
+    for value in weighted:
+        for token in tokenize(value):
+            frequencies[token] += boost
+    return frequencies
+
+
+def highlight_fragments(
+    text: str,
+    terms: Set[str],
+    start_sel: str,
+    stop_sel: str,
+    fragment_chars: int = 200,
+    max_fragments: int = 3
+) -> List[tuple]:
+    """
+    Cut fragments around matching words and mark the matches.
+
+    Args:
+        text: Text to highlight
+        terms: Analyzed query terms; words starting with a term also match
+        start_sel: Marker inserted before each match
+        stop_sel: Marker inserted after each match
+        fragment_chars: Approximate fragment length
+        max_fragments: Maximum number of fragments
+
+    Returns:
+        (fragment, start_offset, end_offset) tuples in text order
+    """
+    if not text or not terms:
+        return []
+
+    matches = [
+        match for match in _TOKEN_PATTERN.finditer(text)
+        if any(match.group().lower().startswith(term) for term in terms)
+    ]
+
+    fragments = []
+    covered_until = -1
+    for match in matches:
+        if len(fragments) >= max_fragments:
+            break
+        if match.start() < covered_until:
+            continue
+
+        start = max(0, match.start() - fragment_chars // 3)
+        end = min(len(text), start + fragment_chars)
+        # Widen to word boundaries
+        while start > 0 and not text[start - 1].isspace():
+            start -= 1
+        while end < len(text) and not text[end].isspace():
+            end += 1
+
+        pieces = []
+        cursor = start
+        for inner in matches:
+            if inner.start() < start or inner.end() > end:
+                continue
+            pieces.append(text[cursor:inner.start()])
+            pieces.append(f"{start_sel}{inner.group()}{stop_sel}")
+            cursor = inner.end()
+        pieces.append(text[cursor:end])
+
+        fragments.append(("".join(pieces).strip(), start, end))
+        covered_until = end
+
+    return fragments
@@ -0,0 +1,737 @@
+"""
+Per-organization search autocomplete over titles, tags, keywords and past queries.
+
+Each organization keeps its phrases in a sorted list, so the phrases
+starting with a prefix are one bisected range. Narrow ranges are ranked
+by scanning them; broad ones, the first few keystrokes, are served from
+a top-k cache per prefix that is maintained as frequencies change.
+
+Users only see what they could find themselves: a document phrase is
+suggested if one of the documents it came from is readable by the user,
+and a query if the user searched it before or enough distinct users did.
+
+The index is fed incrementally: documents changed by processing and
+audited search queries are polled from the database, and the whole
+state is snapshotted to disk so a restart loads it instead of
+rescanning every document.
+"""
+
+import asyncio
+import bisect
+import gc
+import gzip
+import heapq
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from itertools import islice
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+logger = logging.getLogger(__name__)
+
+SOURCES = ("title", "tag", "keyword", "query")
+TITLE, TAG, KEYWORD, QUERY = range(len(SOURCES))
+# API suggestion type of each source
+SUGGESTION_TYPES = ("document", "term", "term", "phrase")
+
+SNAPSHOT_VERSION = 2
+MAX_PHRASE_CHARS = 100
+# Documents checked per phrase; suggestion frequencies count at most this many
+MAX_DOCUMENT_REFS = 8
+# Past queries remembered per user for their own suggestions
+MAX_HISTORY_QUERIES = 100
+# Sorts after any character a normalized phrase can contain
+_RANGE_END = "\U0010ffff"
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_phrase(text: Optional[str]) -> str:
+    """Case-folded phrase with collapsed whitespace; empty when unusable."""
+    if not text:
+        return ""
+    phrase = _WHITESPACE.sub(" ", str(text)).strip().lower()
+    return phrase if len(phrase) <= MAX_PHRASE_CHARS else ""
+
+
+@dataclass
+class Suggestion:
+    """A completion and how often it occurs."""
+    text: str
+    frequency: int
+    type: str
+
+
+@dataclass
+class SuggestionCandidate:
+    """A completion whose documents have yet to be checked for the user."""
+    text: str
+    # Searches of the phrase the user may see
+    queries: int
+    # Documents the phrase came from, at most MAX_DOCUMENT_REFS
+    documents: Tuple[UUID, ...]
+    # Suggestion type when documents are shown
+    document_type: Optional[str]
+
+
+class _Phrase:
+    """Display text and per-source counts of one normalized phrase."""
+
+    __slots__ = ("text", "counts")
+
+    def __init__(self, text: str, counts: Optional[List[int]] = None):
+        self.text = text
+        self.counts = counts or [0, 0, 0, 0]
+
+
+class _OrganizationSuggestions:
+    """Sorted phrases of one organization with cached top completions of broad prefixes."""
+
+    def __init__(self, min_query_users: int, scan_limit: int, cache_size: int):
+        self.min_query_users = min_query_users
+        self.scan_limit = scan_limit
+        self.cache_size = cache_size
+        self.phrases: Dict[str, _Phrase] = {}
+        # Documents each phrase came from
+        self.documents: Dict[str, Set[UUID]] = {}
+        # Distinct users who searched each query, up to min_query_users
+        self.query_users: Dict[str, Set[UUID]] = {}
+        # Sorted keys; new keys wait in _pending and removed ones stay listed
+        # until the next read, so bulk updates don't shift the list per phrase
+        self.keys: List[str] = []
+        self._pending: set = set()
+        self._removed = 0
+        self._top: Dict[str, List[str]] = {}
+
+    def public_query(self, key: str) -> bool:
+        """Whether enough distinct users searched key to suggest it to everyone."""
+        return len(self.query_users.get(key, ())) >= self.min_query_users
+
+    def weight(self, key: str) -> int:
+        phrase = self.phrases.get(key)
+        if phrase is None:
+            return 0
+        counts = phrase.counts
+        documents = counts[TITLE] + counts[TAG] + counts[KEYWORD]
+        # A query is not shown to other users until enough of them searched it
+        return documents + (counts[QUERY] if self.public_query(key) else 0)
+
+    def _rank(self, key: str) -> Tuple[int, int, str]:
+        return (-self.weight(key), len(key), key)
+
+    def _listed(self, key: str) -> bool:
+        i = bisect.bisect_left(self.keys, key)
+        return i < len(self.keys) and self.keys[i] == key
+
+    def adjust(self, key: str, text: str, source: int, delta: int, user_id: Optional[UUID] = None) -> None:
+        phrase = self.phrases.get(key)
+        if phrase is None:
+            if delta <= 0:
+                return
+            phrase = self.phrases[key] = _Phrase(text)
+            if self._listed(key):
+                self._removed -= 1
+            else:
+                self._pending.add(key)
+
+        before = self.weight(key)
+        phrase.counts[source] = max(0, phrase.counts[source] + delta)
+        if user_id is not None:
+            users = self.query_users.setdefault(key, set())
+            if len(users) < self.min_query_users:
+                users.add(user_id)
+        after = self.weight(key)
+
+        if not any(phrase.counts):
+            del self.phrases[key]
+            self.query_users.pop(key, None)
+            if key in self._pending:
+                self._pending.discard(key)
+            else:
+                self._removed += 1
+        if after != before:
+            self._update_top(key, before, after)
+
+    def _update_top(self, key: str, before: int, after: int) -> None:
+        if not self._top:
+            return
+        rank = self._rank(key) if after else None
+        for end in range(1, len(key) + 1):
+            top = self._top.get(key[:end])
+            if top is not None:
+                top.update(key, rank, self._rank)
+
+    def flush(self) -> None:
+        """Merge pending keys into the sorted list and drop removed ones."""
+        if len(self._pending) <= 32:
+            for key in self._pending:
+                bisect.insort(self.keys, key)
+        else:
+            # One sorted run plus the new keys: close to linear for timsort
+            self.keys.extend(self._pending)
+            self.keys.sort()
+        self._pending.clear()
+        if self._removed > len(self.keys) // 4:
+            self.keys = [key for key in self.keys if key in self.phrases]
+            self._removed = 0
+
+    def complete(self, prefix: str, limit: int) -> List[str]:
+        if self._pending or self._removed:
+            self.flush()
+        low = bisect.bisect_left(self.keys, prefix)
+        high = bisect.bisect_left(self.keys, prefix + _RANGE_END, low)
+        if high - low <= self.scan_limit or limit > self.cache_size:
+            candidates = (key for key in self.keys[low:high] if self.weight(key))
+            return heapq.nsmallest(limit, candidates, key=self._rank)
+
+        top = self._top.get(prefix)
+        if top is None or not top.covers(limit, self._rank):
+            # Twice the served size, so most removals leave the cache usable
+            candidates = heapq.nsmallest(
+                2 * self.cache_size + 1, (key for key in self.keys[low:high] if self.weight(key)), key=self._rank
+            )
+            top = self._top[prefix] = _TopCompletions(candidates, 2 * self.cache_size, self._rank)
+        return top.keys[:limit]
+
+
+class _TopCompletions:
+    """
+    Best completions of one broad prefix.
+
+    Every phrase of the range that isn't cached ranks at or after bound
+    (None when all eligible phrases are cached), so the first cached keys
+    are the true top as long as they rank before it.
+    """
+
+    __slots__ = ("keys", "capacity", "bound")
+
+    def __init__(self, ranked: List[str], capacity: int, rank):
+        self.keys = ranked[:capacity]
+        self.capacity = capacity
+        self.bound = rank(ranked[capacity]) if len(ranked) > capacity else None
+
+    def covers(self, limit: int, rank) -> bool:
+        if self.bound is None:
+            return True
+        return len(self.keys) >= limit and rank(self.keys[limit - 1]) < self.bound
+
+    def _exclude(self, rank: Tuple[int, int, str]) -> None:
+        if self.bound is None or rank < self.bound:
+            self.bound = rank
+
+    def update(self, key: str, new_rank: Optional[Tuple[int, int, str]], rank) -> None:
+        """Account for a changed weight; new_rank is None once the phrase is no longer eligible."""
+        if key in self.keys:
+            if new_rank is None:
+                self.keys.remove(key)
+            else:
+                self.keys.sort(key=rank)
+        elif new_rank is not None:
+            if len(self.keys) < self.capacity or new_rank < rank(self.keys[-1]):
+                self.keys.append(key)
+                self.keys.sort(key=rank)
+                if len(self.keys) > self.capacity:
+                    self._exclude(rank(self.keys.pop()))
+            else:
+                self._exclude(new_rank)
+
+
+class AutocompleteIndex:
+    """
+    In-memory autocomplete for all organizations.
+
+    Reads and updates take a lock, so snapshots can be written from an
+    executor while requests are served.
+    """
+
+    def __init__(self, min_query_users: int = 3, scan_limit: int = 256, cache_size: int = 20):
+        self.min_query_users = min_query_users
+        self.scan_limit = scan_limit
+        self.cache_size = cache_size
+        self._lock = threading.RLock()
+        self._organizations: Dict[UUID, _OrganizationSuggestions] = {}
+        # Document id -> (organization id, (phrase key, source) pairs it contributed)
+        self._documents: Dict[UUID, Tuple[UUID, Tuple[Tuple[str, int], ...]]] = {}
+        # (organization id, user id) -> the user's recent query keys and counts, oldest first
+        self._histories: Dict[Tuple[UUID, UUID], "OrderedDict[str, int]"] = {}
+        # Feed positions: (timestamp, id) of the last document change and audited query applied
+        self.document_cursor: Optional[Tuple[datetime, UUID]] = None
+        self.query_cursor: Optional[Tuple[datetime, UUID]] = None
+        # Audit ids already counted inside the re-read window
+        self.seen_queries: Dict[UUID, datetime] = {}
+
+    def _organization(self, organization_id: UUID) -> _OrganizationSuggestions:
+        organization = self._organizations.get(organization_id)
+        if organization is None:
+            organization = self._organizations[organization_id] = _OrganizationSuggestions(
+                self.min_query_users, self.scan_limit, self.cache_size
+            )
+        return organization
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def set_document(
+        self,
+        document_id: UUID,
+        organization_id: UUID,
+        title: Optional[str] = None,
+        tags: Iterable[str] = (),
+        keywords: Iterable[str] = ()
+    ) -> None:
+        """Replace the phrases a document contributes."""
+        contributions = {}
+        for source, values in ((TITLE, [title]), (TAG, tags), (KEYWORD, keywords)):
+            for value in values or ():
+                key = normalize_phrase(value)
+                if key and (key, source) not in contributions:
+                    contributions[(key, source)] = _WHITESPACE.sub(" ", str(value)).strip()
+
+        with self._lock:
+            self.remove_document(document_id)
+            if not contributions:
+                return
+            organization = self._organization(organization_id)
+            for (key, source), text in contributions.items():
+                organization.adjust(key, text, source, 1)
+                organization.documents.setdefault(key, set()).add(document_id)
+            self._documents[document_id] = (organization_id, tuple(contributions))
+
+    def remove_document(self, document_id: UUID) -> None:
+        """Withdraw the phrases of a deleted or changed document."""
+        with self._lock:
+            previous = self._documents.pop(document_id, None)
+            if previous is None:
+                return
+            organization_id, contributions = previous
+            organization = self._organizations[organization_id]
+            for key, source in contributions:
+                organization.adjust(key, "", source, -1)
+                documents = organization.documents.get(key)
+                if documents is not None:
+                    documents.discard(document_id)
+                    if not documents:
+                        del organization.documents[key]
+
+    def record_query(
+        self,
+        organization_id: UUID,
+        query: str,
+        user_id: Optional[UUID] = None,
+        count: int = 1
+    ) -> None:
+        """Count a search query of the organization by user_id."""
+        key = normalize_phrase(query)
+        if not key:
+            return
+        with self._lock:
+            self._organization(organization_id).adjust(
+                key, _WHITESPACE.sub(" ", query).strip(), QUERY, count, user_id
+            )
+            if user_id is not None:
+                history = self._histories.setdefault((organization_id, user_id), OrderedDict())
+                history[key] = history.pop(key, 0) + count
+                if len(history) > MAX_HISTORY_QUERIES:
+                    history.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def suggest(self, organization_id: UUID, prefix: str, limit: int = 10) -> List[Suggestion]:
+        """
+        Most frequent phrases of the organization starting with prefix.
+
+        Counts every document and only queries enough users searched, i.e.
+        what a user who can read everything sees; requests are served with
+        suggest_for_user().
+        """
+        key = normalize_phrase(prefix)
+        if not key:
+            return []
+        with self._lock:
+            organization = self._organizations.get(organization_id)
+            if organization is None:
+                return []
+            suggestions = []
+            for completion in organization.complete(key, limit):
+                phrase = organization.phrases[completion]
+                source = max(range(len(SOURCES)), key=lambda i: (phrase.counts[i], -i))
+                suggestions.append(Suggestion(
+                    text=phrase.text,
+                    frequency=organization.weight(completion),
+                    type=SUGGESTION_TYPES[source]
+                ))
+            return suggestions
+
+    def candidates(
+        self,
+        organization_id: UUID,
+        prefix: str,
+        count: int,
+        user_id: Optional[UUID] = None
+    ) -> List[SuggestionCandidate]:
+        """
+        Up to count best completions of prefix, plus matches from the user's own queries.
+
+        Returns:
+            Candidates in ranking order; callers check their documents
+        """
+        key = normalize_phrase(prefix)
+        if not key:
+            return []
+        with self._lock:
+            organization = self._organizations.get(organization_id)
+            if organization is None:
+                return []
+            completions = organization.complete(key, count)
+            history = self._histories.get((organization_id, user_id), {})
+            listed = set(completions)
+            completions += [
+                completion for completion in history
+                if completion.startswith(key) and completion not in listed
+            ]
+
+            candidates = []
+            for completion in completions:
+                phrase = organization.phrases[completion]
+                if organization.public_query(completion):
+                    queries = phrase.counts[QUERY]
+                else:
+                    queries = history.get(completion, 0)
+                documents = tuple(islice(organization.documents.get(completion, ()), MAX_DOCUMENT_REFS))
+                document_type = None
+                if documents:
+                    source = max((TITLE, TAG, KEYWORD), key=lambda i: (phrase.counts[i], -i))
+                    document_type = SUGGESTION_TYPES[source]
+                candidates.append(SuggestionCandidate(
+                    text=phrase.text,
+                    queries=queries,
+                    documents=documents,
+                    document_type=document_type
+                ))
+            return candidates
+
+    def phrase_count(self) -> int:
+        with self._lock:
+            return sum(len(organization.phrases) for organization in self._organizations.values())
+
+    # ------------------------------------------------------------------
+    # Snapshots
+    # ------------------------------------------------------------------
+
+    def save(self, path: Path) -> None:
+        """
+        Write a snapshot atomically.
+
+        Only copying the key lists holds the lock, so suggestions keep being
+        served; updates must not run concurrently, which the refresher ensures.
+        """
+        path = Path(path)
+        with self._lock:
+            listed = {}
+            for organization_id, organization in self._organizations.items():
+                organization.flush()
+                listed[organization_id] = [key for key in organization.keys if key in organization.phrases]
+            document_items = list(self._documents.items())
+            query_users = {
+                organization_id: {key: list(users) for key, users in organization.query_users.items()}
+                for organization_id, organization in self._organizations.items()
+            }
+            histories = [
+                (organization_id, user_id, list(history.items()))
+                for (organization_id, user_id), history in self._histories.items()
+            ]
+
+        organizations = {}
+        positions = {}
+        for organization_id, keys in listed.items():
+            phrases = self._organizations[organization_id].phrases
+            positions[organization_id] = {key: i for i, key in enumerate(keys)}
+            organizations[organization_id] = {
+                "phrases": [[key, phrases[key].text] + phrases[key].counts for key in keys],
+                "documents": {},
+                "query_users": {
+                    key: [user_id.hex for user_id in users]
+                    for key, users in query_users[organization_id].items()
+                },
+                "histories": {}
+            }
+        # A contribution is stored as phrase position and source packed into one integer
+        for document_id, (organization_id, contributions) in document_items:
+            position = positions[organization_id]
+            organizations[organization_id]["documents"][document_id.hex] = [
+                position[key] << 2 | source for key, source in contributions
+            ]
+        for organization_id, user_id, history in histories:
+            organizations[organization_id]["histories"][user_id.hex] = history
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            "document_cursor": _encode_cursor(self.document_cursor),
+            "query_cursor": _encode_cursor(self.query_cursor),
+            "seen_queries": {str(k): v.isoformat() for k, v in self.seen_queries.items()},
+            "organizations": {str(k): v for k, v in organizations.items()}
+        }
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(gzip.compress(json.dumps(snapshot, separators=(",", ":")).encode(), compresslevel=1))
+        os.replace(tmp_path, path)
+
+    def load(self, path: Path) -> bool:
+        """
+        Replace the contents with a snapshot.
+
+        Returns:
+            False if there is no usable snapshot at path
+        """
+        # Millions of small acyclic objects; collection passes would dominate the load
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return self._load(path)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    def _load(self, path: Path) -> bool:
+        try:
+            snapshot = json.loads(gzip.decompress(Path(path).read_bytes()))
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable autocomplete snapshot {path}: {e}")
+            return False
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            return False
+
+        organizations = {}
+        documents = {}
+        histories = {}
+        for organization_id, saved in snapshot["organizations"].items():
+            organization_id = UUID(organization_id)
+            organization = _OrganizationSuggestions(self.min_query_users, self.scan_limit, self.cache_size)
+            # Phrases are saved in key order
+            keys = organization.keys = [row[0] for row in saved["phrases"]]
+            organization.phrases = {row[0]: _Phrase(row[1], row[2:]) for row in saved["phrases"]}
+            organization.query_users = {
+                key: {UUID(user_id) for user_id in users} for key, users in saved["query_users"].items()
+            }
+            organizations[organization_id] = organization
+            for document_id, encoded in saved["documents"].items():
+                document_id = UUID(document_id)
+                contributions = tuple([(keys[value >> 2], value & 3) for value in encoded])
+                documents[document_id] = (organization_id, contributions)
+                for key, _ in contributions:
+                    organization.documents.setdefault(key, set()).add(document_id)
+            for user_id, history in saved["histories"].items():
+                histories[(organization_id, UUID(user_id))] = OrderedDict(
+                    (key, count) for key, count in history
+                )
+
+        with self._lock:
+            self._organizations = organizations
+            self._documents = documents
+            self._histories = histories
+            self.document_cursor = _decode_cursor(snapshot["document_cursor"])
+            self.query_cursor = _decode_cursor(snapshot["query_cursor"])
+            self.seen_queries = {
+                UUID(k): datetime.fromisoformat(v) for k, v in snapshot["seen_queries"].items()
+            }
+        return True
+
+
+def _encode_cursor(cursor: Optional[Tuple[datetime, UUID]]) -> Optional[List[str]]:
+    return [cursor[0].isoformat(), str(cursor[1])] if cursor else None
+
+
+def _decode_cursor(value: Optional[List[str]]) -> Optional[Tuple[datetime, UUID]]:
+    return (datetime.fromisoformat(value[0]), UUID(value[1])) if value else None
+
+
+# ----------------------------------------------------------------------
+# Serving
+# ----------------------------------------------------------------------
+
+# Candidates per requested suggestion when permissions filter out the first pass
+WIDE_CANDIDATE_FACTOR = 10
+
+
+async def suggest_for_user(
+    index: AutocompleteIndex,
+    organization_id: UUID,
+    user_id: UUID,
+    prefix: str,
+    limit: int,
+    readable: Callable[[List[UUID]], Awaitable[Set[UUID]]]
+) -> List[Suggestion]:
+    """
+    Completions of prefix that user_id may see.
+
+    A document phrase counts only the documents readable() returns; queries count if the user searched them or enough
+    distinct users did. Phrases left with nothing visible are dropped, and
+    if that leaves too few, a wider set of candidates is checked.
+
+    Args:
+        readable: Given document ids, returns those the user can read
+
+    Returns:
+        Up to limit suggestions, most frequent first
+    """
+    suggestions: List[Suggestion] = []
+    for count in (max(limit, index.cache_size), limit * WIDE_CANDIDATE_FACTOR):
+        candidates = index.candidates(organization_id, prefix, count, user_id)
+        referenced = list(dict.fromkeys(
+            document_id for candidate in candidates for document_id in candidate.documents
+        ))
+        allowed = await readable(referenced) if referenced else set()
+
+        suggestions = []
+        for candidate in candidates:
+            documents = sum(1 for document_id in candidate.documents if document_id in allowed)
+            if not documents and not candidate.queries:
+                continue
+            suggestions.append(Suggestion(
+                text=candidate.text,
+                frequency=documents + candidate.queries,
+                type=candidate.document_type if documents >= candidate.queries else SUGGESTION_TYPES[QUERY]
+            ))
+        if len(suggestions) >= limit or len(candidates) < count:
+            break
+
+    # Ranked by what the user can see; sort is stable for equal frequencies
+    suggestions.sort(key=lambda suggestion: -suggestion.frequency)
+    return suggestions[:limit]
+
+
+# ----------------------------------------------------------------------
+# Database feed
+# ----------------------------------------------------------------------
+
+def _document_phrases(row) -> Tuple[Optional[str], List[str], List[str]]:
+    title = row.title or (Path(row.filename).stem if row.filename else None)
+    tags = row.tags if isinstance(row.tags, list) else []
+    keywords = row.keywords if isinstance(row.keywords, list) else []
+    return title, tags, keywords
+
+
+async def refresh_autocomplete(
+    index: AutocompleteIndex,
+    session_factory,
+    batch_size: int = 1000,
+    lag: timedelta = timedelta(seconds=30)
+) -> Tuple[int, int]:
+    """
+    Apply document changes and search queries recorded since the last refresh.
+
+    Changes of the last lag interval are read again, because transactions
+    can commit after rows with later timestamps; re-applying a document is
+    idempotent and queries already counted are skipped.
+
+    Returns:
+        Number of document changes and queries applied
+    """
+    # Imported here because the repositories themselves import this package
+    from repositories.audit_repository import AuditRepository
+    from repositories.document_repository import DocumentRepository
+
+    documents = queries = 0
+    async with session_factory() as session:
+        doc_repo = DocumentRepository(session)
+        start = (index.document_cursor[0] - lag, None) if index.document_cursor else (None, None)
+        while True:
+            rows = await doc_repo.get_changed_since(*start, limit=batch_size)
+            for row in rows:
+                if row.status == "active":
+                    title, tags, keywords = _document_phrases(row)
+                    index.set_document(row.id, row.organization_id, title=title, tags=tags, keywords=keywords)
+                else:
+                    index.remove_document(row.id)
+            documents += len(rows)
+            if rows:
+                start = (rows[-1].updated_at, rows[-1].id)
+                if index.document_cursor is None or start[0] >= index.document_cursor[0]:
+                    index.document_cursor = start
+            if len(rows) < batch_size:
+                break
+
+        audit_repo = AuditRepository(session)
+        start = (index.query_cursor[0] - lag, None) if index.query_cursor else (None, None)
+        while True:
+            rows = await audit_repo.get_search_queries_since(*start, limit=batch_size)
+            for row in rows:
+                if row.id in index.seen_queries:
+                    continue
+                index.seen_queries[row.id] = row.created_at
+                # Queries nobody found anything with aren't worth completing to
+                if row.query and row.result_count:
+                    index.record_query(row.organization_id, row.query, row.user_id)
+                    queries += 1
+            if rows:
+                start = (rows[-1].created_at, rows[-1].id)
+                if index.query_cursor is None or start[0] >= index.query_cursor[0]:
+                    index.query_cursor = start
+            if len(rows) < batch_size:
+                break
+
+        if index.query_cursor:
+            horizon = index.query_cursor[0] - lag
+            index.seen_queries = {k: v for k, v in index.seen_queries.items() if v >= horizon}
+
+    return documents, queries
+
+
+async def refresh_autocomplete_periodically(
+    index: AutocompleteIndex,
+    session_factory,
+    interval_seconds: float,
+    shutdown_event: asyncio.Event,
+    snapshot_path: Optional[Path] = None,
+    snapshot_interval_seconds: float = 300
+) -> None:
+    """
+    Keep the index current until shutdown_event is set.
+
+    Loads the snapshot first, catches up from its cursors and saves a new
+    snapshot every snapshot_interval_seconds and on shutdown.
+    """
+    loop = asyncio.get_running_loop()
+    if snapshot_path is not None:
+        if await loop.run_in_executor(None, index.load, snapshot_path):
+            logger.info(f"Loaded autocomplete snapshot with {index.phrase_count()} phrases")
+    logger.info(f"Started autocomplete refresher (every {interval_seconds}s)")
+
+    last_snapshot = loop.time()
+    while True:
+        try:
+            documents, queries = await refresh_autocomplete(index, session_factory)
+            if documents or queries:
+                logger.debug(f"Autocomplete applied {documents} document changes and {queries} queries")
+        except asyncio.CancelledError:
+            break
+        except Exception as e:
+            logger.error(f"Autocomplete refresh failed: {e}")
+
+        stopping = shutdown_event.is_set()
+        if snapshot_path is not None and (stopping or loop.time() - last_snapshot >= snapshot_interval_seconds):
+            try:
+                await loop.run_in_executor(None, index.save, snapshot_path)
+                last_snapshot = loop.time()
+            except Exception as e:
+                logger.error(f"Failed to save autocomplete snapshot: {e}")
+        if stopping:
+            break
+
+        try:
+            await asyncio.wait_for(shutdown_event.wait(), timeout=interval_seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    logger.info("Autocomplete refresher stopped")
@@ -0,0 +1,126 @@
+"""
+Base search backend interface for document search.
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, List, Optional, Tuple
+from uuid import UUID
+
+if TYPE_CHECKING:
+    from extractors.base_extractor import ExtractedMetadata
+
+
+class SearchBackendError(Exception):
+    """Base exception for search backend operations."""
+    pass
+
+
+class CorruptIndexError(SearchBackendError):
+    """An index file could not be read."""
+    pass
+
+
+@dataclass
+class IndexedDocument:
+    """Searchable content of one document."""
+    document_id: UUID
+    organization_id: UUID
+    text: Optional[str] = None
+    title: Optional[str] = None
+    keywords: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_metadata(
+        cls,
+        document_id: UUID,
+        organization_id: UUID,
+        metadata: "ExtractedMetadata",
+        filename: Optional[str] = None
+    ) -> "IndexedDocument":
+        """Build from extractor output; the filename is indexed along with the title."""
+        return cls(
+            document_id=document_id,
+            organization_id=organization_id,
+            text=metadata.text_content if metadata.has_text_content() else None,
+            title=" ".join(part for part in (metadata.title, filename) if part) or None,
+            keywords=list(metadata.keywords) + list(metadata.suggested_tags)
+        )
+
+
+@dataclass
+class SearchMatch:
+    """A matching document and its relevance score."""
+    document_id: UUID
+    score: float
+
+
+@dataclass
+class ChunkMatch:
+    """A document matched through one chunk of its text."""
+    document_id: UUID
+    score: float
+    start_offset: int
+    end_offset: int
+
+
+class SearchBackend(ABC):
+    """Abstract base class for document search backends."""
+
+    @abstractmethod
+    async def index_document(self, document: IndexedDocument) -> None:
+        """
+        Add or replace a document in the index.
+
+        Args:
+            document: Searchable content; replaces any earlier version
+        """
+        pass
+
+    @abstractmethod
+    async def delete_document(self, document_id: UUID) -> None:
+        """Remove a document from the index; unknown ids are ignored."""
+        pass
+
+    @abstractmethod
+    async def search(
+        self,
+        organization_id: UUID,
+        query: str,
+        limit: int = 20,
+        prefix: bool = False
+    ) -> List[SearchMatch]:
+        """
+        Find the best matching documents of an organization.
+
+        Args:
+            organization_id: Organization whose documents are searched
+            query: User query text
+            limit: Maximum number of matches
+            prefix: Also match terms starting with the query words
+
+        Returns:
+            Matches ordered by descending score
+        """
+        pass
+
+    @abstractmethod
+    async def suggest(
+        self,
+        organization_id: UUID,
+        prefix: str,
+        limit: int = 10,
+        sample_size: int = 8
+    ) -> List[Tuple[str, int, List[UUID]]]:
+        """
+        Complete a search prefix from indexed terms.
+
+        Returns:
+            (term, document frequency, up to sample_size documents containing
+            the term) triples, most frequent first
+        """
+        pass
+
+    async def close(self) -> None:
+        """Release resources held by the backend."""
+        pass
@@ -0,0 +1,126 @@
+"""
+Text embedding providers for semantic search.
+"""
+
+import hashlib
+import math
+import re
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import List, Tuple
+
+import numpy as np
+
+from .analysis import tokenize
+from .base import SearchBackendError
+
+_BREAK_PATTERN = re.compile(r"\s+")
+
+
+def chunk_text(
+    text: str,
+    chunk_chars: int = 1000,
+    overlap_chars: int = 150,
+    max_chunks: int = 256
+) -> List[Tuple[int, int]]:
+    """
+    Split text into overlapping chunks that end on whitespace.
+
+    Args:
+        text: Text to split
+        chunk_chars: Approximate chunk length
+        overlap_chars: Characters shared by consecutive chunks
+        max_chunks: Chunks past this many are not produced
+
+    Returns:
+        (start, end) character offsets of each chunk
+    """
+    if not text or not text.strip():
+        return []
+
+    spans = []
+    start = 0
+    while start < len(text) and len(spans) < max_chunks:
+        end = min(len(text), start + chunk_chars)
+        if end < len(text):
+            # Prefer ending at the last whitespace inside the chunk
+            cut = text.rfind(" ", start + chunk_chars // 2, end)
+            if cut == -1:
+                match = _BREAK_PATTERN.search(text, end)
+                cut = match.start() if match else len(text)
+            end = cut
+        if text[start:end].strip():
+            spans.append((start, end))
+        if end >= len(text):
+            break
+        start = max(end - overlap_chars, start + 1)
+        # Start the next chunk at a word boundary
+        while start < end and not text[start - 1].isspace():
+            start += 1
+    return spans
+
+
+class EmbeddingProvider(ABC):
+    """Maps texts to unit-length vectors whose dot product measures similarity."""
+
+    dimension: int
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts; CPU-bound, so callers run it off the event loop.
+
+        Returns:
+            float32 array of shape (len(texts), dimension) with unit-length rows
+        """
+        pass
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """
+    Model-free embeddings from hashed word and word-pair features.
+
+    Captures lexical rather than semantic similarity, but needs no model
+    download and is deterministic, which suits development and tests.
+    """
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+
+    def _features(self, text: str) -> Counter:
+        tokens = tokenize(text)
+        features = Counter(tokens)
+        features.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+        return features
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, count in self._features(text).items():
+                digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+                sign = 1.0 if digest & 1 else -1.0
+                vectors[row, (digest >> 1) % self.dimension] += sign * (1.0 + math.log(count))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+class SentenceTransformerProvider(EmbeddingProvider):
+    """Local sentence-transformers model; small models such as MiniLM run well on CPU."""
+
+    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2", batch_size: int = 32):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise SearchBackendError(
+                "sentence-transformers is not installed; use the hashing embedding provider instead"
+            )
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dimension = self.model.get_sentence_embedding_dimension()
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = self.model.encode(
+            texts, batch_size=self.batch_size, normalize_embeddings=True, convert_to_numpy=True
+        )
+        return vectors.astype(np.float32, copy=False)
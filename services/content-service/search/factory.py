@@ -0,0 +1,70 @@
+"""
+Search backend selection from environment configuration.
+"""
+
+import os
+from typing import Optional
+
+from .base import SearchBackend
+from .embeddings import EmbeddingProvider, HashingEmbeddingProvider, SentenceTransformerProvider
+from .inverted_index import EmbeddedSearchBackend
+from .semantic import SemanticIndex
+
+
+def search_backend_from_env() -> Optional[SearchBackend]:
+    """
+    Create the configured search backend.
+
+    SEARCH_BACKEND is "postgres" or "embedded"; it defaults to embedded on
+    SQLite, which has no full-text search.
+
+    Returns:
+        The embedded backend, or None when search runs on Postgres
+    """
+    default = "embedded" if os.getenv("DATABASE_URL", "").startswith("sqlite") else "postgres"
+    backend = os.getenv("SEARCH_BACKEND", default).lower()
+
+    if backend == "postgres":
+        return None
+    if backend == "embedded":
+        return EmbeddedSearchBackend({
+            "directory": os.getenv("SEARCH_INDEX_DIRECTORY", "./search_index"),
+            "merge_factor": int(os.getenv("SEARCH_INDEX_MERGE_FACTOR", 8))
+        })
+    raise ValueError(f"Unknown SEARCH_BACKEND '{backend}', expected 'postgres' or 'embedded'")
+
+
+def embedding_provider_from_env() -> EmbeddingProvider:
+    """
+    Create the configured embedding provider.
+
+    SEMANTIC_EMBEDDING_PROVIDER is "sentence-transformers" (a local CPU
+    model named by SEMANTIC_EMBEDDING_MODEL) or "hashing".
+    """
+    provider = os.getenv("SEMANTIC_EMBEDDING_PROVIDER", "sentence-transformers").lower()
+
+    if provider == "sentence-transformers":
+        return SentenceTransformerProvider(
+            os.getenv("SEMANTIC_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+        )
+    if provider == "hashing":
+        return HashingEmbeddingProvider(int(os.getenv("SEMANTIC_EMBEDDING_DIMENSION", 384)))
+    raise ValueError(
+        f"Unknown SEMANTIC_EMBEDDING_PROVIDER '{provider}', expected 'sentence-transformers' or 'hashing'"
+    )
+
+
+def semantic_index_from_env() -> Optional[SemanticIndex]:
+    """
+    Create the semantic index when SEMANTIC_SEARCH_ENABLED is set.
+
+    Returns:
+        The index, or None when semantic search is disabled
+    """
+    if os.getenv("SEMANTIC_SEARCH_ENABLED", "false").lower() not in ("1", "true", "yes"):
+        return None
+    return SemanticIndex(embedding_provider_from_env(), {
+        "directory": os.getenv("SEMANTIC_INDEX_DIRECTORY", "./semantic_index"),
+        "nprobe": int(os.getenv("SEMANTIC_INDEX_NPROBE", 16)),
+        "chunk_chars": int(os.getenv("SEMANTIC_CHUNK_CHARS", 1000))
+    })
@@ -0,0 +1,697 @@
+"""
+Embedded segment-based inverted index with BM25 scoring.
+
+Documents are buffered in memory and written to immutable segment files on
+commit. A manifest names the live segments and the deleted documents of
+each; it is replaced atomically under an exclusive file lock, so the API
+and processing workers can share one index directory. Small segments are
+merged in the background, dropping deleted documents.
+
+Terms are keyed by organization, so every posting list, document count and
+prefix range belongs to one tenant.
+"""
+
+import asyncio
+import bisect
+import fcntl
+import heapq
+import json
+import logging
+import math
+import os
+import struct
+import sys
+import threading
+import uuid as uuid_lib
+from array import array
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from uuid import UUID
+
+from .analysis import term_frequencies, tokenize
+from .base import CorruptIndexError, IndexedDocument, SearchBackend, SearchMatch
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_MAGIC = b"CSSEG\x00\x01\x00"
+MANIFEST_NAME = "manifest.json"
+LOCK_NAME = "index.lock"
+
+# Title and keyword terms count this many times a body occurrence
+FIELD_BOOST = 3
+# Upper bound on the terms a prefix query expands to
+MAX_PREFIX_EXPANSIONS = 64
+
+
+def _term_key(organization_id: str, term: str) -> str:
+    return f"{organization_id}:{term}"
+
+
+def _encode_postings(pairs: List[Tuple[int, int]]) -> bytes:
+    flat = array("I")
+    for local_id, frequency in pairs:
+        flat.append(local_id)
+        flat.append(frequency)
+    if sys.byteorder == "big":
+        flat.byteswap()
+    return flat.tobytes()
+
+
+def _decode_postings(data: bytes) -> array:
+    flat = array("I")
+    flat.frombytes(data)
+    if sys.byteorder == "big":
+        flat.byteswap()
+    return flat
+
+
+class Segment:
+    """
+    Immutable segment loaded from disk.
+
+    Layout: magic, header length, JSON header (documents, their
+    organizations and lengths, term offsets), then little-endian uint32
+    (local id, term frequency) pairs for every term in sorted order.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        document_ids: List[str],
+        organization_ids: List[str],
+        lengths: array,
+        terms: Dict[str, Tuple[int, int]],
+        postings: bytes
+    ):
+        self.name = name
+        self.document_ids = document_ids
+        self.organization_ids = organization_ids
+        self.lengths = lengths
+        self.organization_stats: Dict[str, List[int]] = {}
+        for organization_id, length in zip(organization_ids, lengths):
+            stats = self.organization_stats.setdefault(organization_id, [0, 0])
+            stats[0] += 1
+            stats[1] += length
+        self.local_ids = {document_id: local for local, document_id in enumerate(document_ids)}
+        self._terms = terms
+        self._sorted_terms = sorted(terms)
+        self._postings = postings
+
+    def __len__(self) -> int:
+        return len(self.document_ids)
+
+    @classmethod
+    def write(
+        cls,
+        path: Path,
+        documents: List[Tuple[str, str, int]],
+        postings: Dict[str, List[Tuple[int, int]]]
+    ) -> "Segment":
+        """
+        Write a segment file and return it loaded.
+
+        Args:
+            path: Destination file, written via a temporary file
+            documents: (document_id, organization_id, length) by local id
+            postings: Term key to (local id, frequency) pairs in local id order
+        """
+        terms = {}
+        blobs = []
+        offset = 0
+        for term in sorted(postings):
+            blob = _encode_postings(postings[term])
+            terms[term] = (offset, len(postings[term]))
+            blobs.append(blob)
+            offset += len(blob)
+
+        document_ids = [document_id for document_id, _, _ in documents]
+        organization_ids = [organization_id for _, organization_id, _ in documents]
+        lengths = [length for _, _, length in documents]
+        header = json.dumps({
+            "documents": document_ids,
+            "organizations": organization_ids,
+            "lengths": lengths,
+            "terms": terms
+        }, separators=(",", ":")).encode("utf-8")
+
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(SEGMENT_MAGIC)
+            f.write(struct.pack("<Q", len(header)))
+            f.write(header)
+            for blob in blobs:
+                f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+        return cls(path.stem, document_ids, organization_ids, array("I", lengths), terms, b"".join(blobs))
+
+    @classmethod
+    def load(cls, path: Path) -> "Segment":
+        """Read a segment file fully into memory."""
+        data = path.read_bytes()
+        if data[:len(SEGMENT_MAGIC)] != SEGMENT_MAGIC:
+            raise CorruptIndexError(f"Not a segment file: {path}")
+
+        start = len(SEGMENT_MAGIC) + 8
+        (header_length,) = struct.unpack("<Q", data[len(SEGMENT_MAGIC):start])
+        try:
+            header = json.loads(data[start:start + header_length])
+        except ValueError as e:
+            raise CorruptIndexError(f"Unreadable segment header in {path}: {e}")
+
+        return cls(
+            path.stem,
+            header["documents"],
+            header["organizations"],
+            array("I", header["lengths"]),
+            {term: tuple(entry) for term, entry in header["terms"].items()},
+            data[start + header_length:]
+        )
+
+    def doc_freq(self, term_key: str) -> int:
+        entry = self._terms.get(term_key)
+        return entry[1] if entry else 0
+
+    def postings(self, term_key: str) -> Optional[array]:
+        """Interleaved (local id, frequency) pairs for a term, if present."""
+        entry = self._terms.get(term_key)
+        if not entry:
+            return None
+        offset, count = entry
+        return _decode_postings(self._postings[offset:offset + count * 8])
+
+    def terms_with_prefix(self, key_prefix: str) -> Iterator[str]:
+        """Term keys starting with key_prefix, in sorted order."""
+        index = bisect.bisect_left(self._sorted_terms, key_prefix)
+        while index < len(self._sorted_terms) and self._sorted_terms[index].startswith(key_prefix):
+            yield self._sorted_terms[index]
+            index += 1
+
+    def iter_terms(self) -> Iterator[str]:
+        return iter(self._sorted_terms)
+
+
+class _SegmentBuffer:
+    """Documents added since the last commit."""
+
+    def __init__(self):
+        self.documents: Dict[str, Tuple[str, Dict[str, int], int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def add(self, document: IndexedDocument) -> None:
+        weighted = [document.title or ""] + list(document.keywords)
+        frequencies = term_frequencies(document.text or "", weighted, boost=FIELD_BOOST)
+        self.documents[str(document.document_id)] = (
+            str(document.organization_id), dict(frequencies), sum(frequencies.values())
+        )
+
+    def remove(self, document_id: str) -> None:
+        self.documents.pop(document_id, None)
+
+    def flush(self, path: Path) -> Segment:
+        documents = []
+        postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        for local_id, (document_id, (organization_id, frequencies, length)) in enumerate(
+            self.documents.items()
+        ):
+            documents.append((document_id, organization_id, length))
+            for term, frequency in frequencies.items():
+                postings[_term_key(organization_id, term)].append((local_id, frequency))
+        self.documents = {}
+        return Segment.write(path, documents, postings)
+
+
+class InvertedIndex:
+    """
+    On-disk inverted index over organization documents.
+
+    Writes become visible to searches, in this and other processes, once
+    committed. Each commit adds at most one segment; merges keep the
+    segment count logarithmic in the number of documents.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        k1: float = 1.2,
+        b: float = 0.75,
+        merge_factor: int = 8,
+        max_buffered_documents: int = 1000,
+        background_merge: bool = True
+    ):
+        self.directory = Path(directory)
+        self.k1 = k1
+        self.b = b
+        self.merge_factor = merge_factor
+        self.max_buffered_documents = max_buffered_documents
+        self.background_merge = background_merge
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._segments: Dict[str, Segment] = {}
+        self._order: List[str] = []
+        self._deleted: Dict[str, Set[int]] = {}
+        self._manifest_stamp: Optional[Tuple[int, int, int]] = None
+        self._buffer = _SegmentBuffer()
+        self._pending_deletes: Set[str] = set()
+        self._merge_thread: Optional[threading.Thread] = None
+
+        self.refresh()
+
+    # ------------------------------------------------------------------
+    # Manifest and segment bookkeeping
+    # ------------------------------------------------------------------
+
+    @property
+    def _manifest_path(self) -> Path:
+        return self.directory / MANIFEST_NAME
+
+    @contextmanager
+    def _exclusive(self):
+        """In-process and cross-process writer lock."""
+        with self._lock:
+            with open(self.directory / LOCK_NAME, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_manifest(self) -> Dict:
+        try:
+            with open(self._manifest_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"generation": 0, "segments": []}
+        except ValueError as e:
+            raise CorruptIndexError(f"Unreadable index manifest: {e}")
+
+    def _write_manifest(self, manifest: Dict) -> None:
+        tmp_path = self._manifest_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._manifest_path)
+        self._apply_manifest(manifest)
+
+    def _stamp(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = self._manifest_path.stat()
+        except FileNotFoundError:
+            return None
+        # The manifest is replaced, never rewritten in place, so a new inode means a new version
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _apply_manifest(self, manifest: Dict) -> None:
+        """Load new segments and deletions named by the manifest."""
+        segments = {}
+        deleted = {}
+        for entry in manifest["segments"]:
+            name = entry["name"]
+            segment = self._segments.get(name) or Segment.load(self.directory / f"{name}.seg")
+            segments[name] = segment
+            deleted[name] = {
+                segment.local_ids[document_id] for document_id in entry["deleted"]
+                if document_id in segment.local_ids
+            }
+        self._segments = segments
+        self._order = [entry["name"] for entry in manifest["segments"]]
+        self._deleted = deleted
+        self._manifest_stamp = self._stamp()
+
+    def refresh(self) -> None:
+        """Pick up commits and merges made since the last refresh."""
+        if self._stamp() == self._manifest_stamp and self._manifest_stamp is not None:
+            return
+        with self._lock:
+            for attempt in range(3):
+                try:
+                    self._apply_manifest(self._read_manifest())
+                    return
+                except FileNotFoundError:
+                    # A merge removed a segment between reading the manifest and loading it
+                    if attempt == 2:
+                        raise
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def add(self, document: IndexedDocument) -> None:
+        """Add or replace a document; visible after the next commit."""
+        with self._lock:
+            document_id = str(document.document_id)
+            self._pending_deletes.add(document_id)
+            self._buffer.add(document)
+            if len(self._buffer) >= self.max_buffered_documents:
+                self.commit()
+
+    def delete(self, document_id: UUID) -> None:
+        """Delete a document; effective after the next commit."""
+        with self._lock:
+            self._buffer.remove(str(document_id))
+            self._pending_deletes.add(str(document_id))
+
+    def commit(self) -> None:
+        """Write buffered documents and deletions and publish them."""
+        with self._exclusive():
+            if not self._buffer and not self._pending_deletes:
+                return
+
+            manifest = self._read_manifest()
+            self._apply_manifest(manifest)
+
+            for entry in manifest["segments"]:
+                segment = self._segments[entry["name"]]
+                newly_deleted = [
+                    document_id for document_id in self._pending_deletes
+                    if document_id in segment.local_ids
+                ]
+                if newly_deleted:
+                    entry["deleted"] = sorted(set(entry["deleted"]).union(newly_deleted))
+
+            if self._buffer:
+                name = f"seg_{uuid_lib.uuid4().hex}"
+                segment = self._buffer.flush(self.directory / f"{name}.seg")
+                self._segments[name] = segment
+                manifest["segments"].append({"name": name, "deleted": []})
+
+            manifest["generation"] += 1
+            self._write_manifest(manifest)
+            self._pending_deletes = set()
+
+        if self.background_merge:
+            self._schedule_merge()
+
+    # ------------------------------------------------------------------
+    # Merging
+    # ------------------------------------------------------------------
+
+    def _live_count(self, name: str) -> int:
+        return len(self._segments[name]) - len(self._deleted.get(name, ()))
+
+    def merge_candidates(self) -> List[str]:
+        """
+        Segments the merge policy would merge next.
+
+        Segments are grouped into tiers of similar live size (powers of
+        merge_factor); a tier holding merge_factor segments is merged.
+        A segment with more than half its documents deleted is rewritten
+        on its own.
+        """
+        with self._lock:
+            tiers: Dict[int, List[str]] = defaultdict(list)
+            for name in self._order:
+                live = self._live_count(name)
+                if live * 2 < len(self._segments[name]):
+                    return [name]
+                tier = int(math.log(max(live, 1), self.merge_factor))
+                tiers[tier].append(name)
+            for tier in sorted(tiers):
+                if len(tiers[tier]) >= self.merge_factor:
+                    return tiers[tier][:self.merge_factor]
+            return []
+
+    def _schedule_merge(self) -> None:
+        with self._lock:
+            if self._merge_thread and self._merge_thread.is_alive():
+                return
+            if not self.merge_candidates():
+                return
+            self._merge_thread = threading.Thread(
+                target=self._merge_until_done, name="search-index-merge", daemon=True
+            )
+            self._merge_thread.start()
+
+    def _merge_until_done(self) -> None:
+        try:
+            while True:
+                names = self.merge_candidates()
+                if not names or not self.merge(names):
+                    return
+        except Exception as e:
+            logger.error(f"Search index merge failed: {e}")
+
+    def merge(self, names: List[str]) -> bool:
+        """
+        Merge segments into one, dropping deleted documents.
+
+        The merged segment is built without holding the writer lock;
+        deletions committed meanwhile are carried over when it is published.
+
+        Returns:
+            False if another writer already merged or removed a source segment
+        """
+        self.refresh()
+        with self._lock:
+            if any(name not in self._segments for name in names):
+                return False
+            sources = [(self._segments[name], set(self._deleted.get(name, ()))) for name in names]
+
+        documents = []
+        remap: List[Dict[int, int]] = []
+        for segment, deleted in sources:
+            mapping = {}
+            for local_id, document_id in enumerate(segment.document_ids):
+                if local_id not in deleted:
+                    mapping[local_id] = len(documents)
+                    documents.append((
+                        document_id, segment.organization_ids[local_id], segment.lengths[local_id]
+                    ))
+            remap.append(mapping)
+
+        postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        for (segment, _), mapping in zip(sources, remap):
+            for term in segment.iter_terms():
+                flat = segment.postings(term)
+                for i in range(0, len(flat), 2):
+                    merged_id = mapping.get(flat[i])
+                    if merged_id is not None:
+                        postings[term].append((merged_id, flat[i + 1]))
+
+        merged = None
+        merged_name = f"seg_{uuid_lib.uuid4().hex}"
+        merged_path = self.directory / f"{merged_name}.seg"
+        if documents:
+            merged = Segment.write(merged_path, documents, postings)
+
+        with self._exclusive():
+            manifest = self._read_manifest()
+            current = [entry["name"] for entry in manifest["segments"]]
+            if any(name not in current for name in names):
+                merged_path.unlink(missing_ok=True)
+                return False
+
+            position = min(current.index(name) for name in names)
+            remaining = [entry for entry in manifest["segments"] if entry["name"] not in names]
+            if merged is not None:
+                carried = sorted({
+                    document_id
+                    for entry in manifest["segments"] if entry["name"] in names
+                    for document_id in entry["deleted"]
+                    if document_id in merged.local_ids
+                })
+                remaining.insert(position, {"name": merged_name, "deleted": carried})
+                self._segments[merged_name] = merged
+            manifest["segments"] = remaining
+            manifest["generation"] += 1
+            self._write_manifest(manifest)
+
+        for name in names:
+            (self.directory / f"{name}.seg").unlink(missing_ok=True)
+
+        logger.debug(f"Merged {len(names)} search segments into {merged_name} ({len(documents)} documents)")
+        return True
+
+    def wait_for_merges(self, timeout: Optional[float] = None) -> None:
+        """Block until a running background merge finishes."""
+        thread = self._merge_thread
+        if thread:
+            thread.join(timeout)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def _snapshot(self) -> List[Tuple[Segment, Set[int]]]:
+        self.refresh()
+        with self._lock:
+            return [(self._segments[name], self._deleted.get(name, set())) for name in self._order]
+
+    def _expand(self, snapshot, organization_id: str, term: str) -> List[str]:
+        """Indexed terms of the organization starting with term, most frequent first."""
+        frequencies: Dict[str, int] = defaultdict(int)
+        key_prefix = _term_key(organization_id, term)
+        for segment, _ in snapshot:
+            for key in segment.terms_with_prefix(key_prefix):
+                frequencies[key] += segment.doc_freq(key)
+        return heapq.nlargest(MAX_PREFIX_EXPANSIONS, frequencies, key=frequencies.get)
+
+    def search(
+        self,
+        organization_id: UUID,
+        query: str,
+        limit: int = 20,
+        prefix: bool = False
+    ) -> List[SearchMatch]:
+        """Top documents of the organization by BM25 score over the query terms."""
+        organization_id = str(organization_id)
+        snapshot = self._snapshot()
+
+        document_count = 0
+        total_length = 0
+        for segment, _ in snapshot:
+            stats = segment.organization_stats.get(organization_id)
+            if stats:
+                document_count += stats[0]
+                total_length += stats[1]
+        if not document_count:
+            return []
+        average_length = total_length / document_count
+
+        term_keys: Set[str] = set()
+        for term in dict.fromkeys(tokenize(query)):
+            if prefix:
+                term_keys.update(self._expand(snapshot, organization_id, term))
+            else:
+                term_keys.add(_term_key(organization_id, term))
+
+        scores: Dict[Tuple[int, int], float] = defaultdict(float)
+        for key in term_keys:
+            doc_freq = sum(segment.doc_freq(key) for segment, _ in snapshot)
+            if not doc_freq:
+                continue
+            idf = math.log(1 + (document_count - doc_freq + 0.5) / (doc_freq + 0.5))
+
+            for index, (segment, deleted) in enumerate(snapshot):
+                flat = segment.postings(key)
+                if flat is None:
+                    continue
+                lengths = segment.lengths
+                for i in range(0, len(flat), 2):
+                    local_id = flat[i]
+                    if local_id in deleted:
+                        continue
+                    frequency = flat[i + 1]
+                    norm = self.k1 * (1 - self.b + self.b * lengths[local_id] / average_length)
+                    scores[(index, local_id)] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [
+            SearchMatch(document_id=UUID(snapshot[index][0].document_ids[local_id]), score=score)
+            for (index, local_id), score in best
+        ]
+
+    def suggest(
+        self,
+        organization_id: UUID,
+        prefix: str,
+        limit: int = 10,
+        sample_size: int = 8
+    ) -> List[Tuple[str, int, List[UUID]]]:
+        """
+        Indexed terms starting with the last word of prefix, by document frequency.
+
+        Each term comes with up to sample_size live documents containing it,
+        so callers can check that the user may read where it came from.
+        """
+        words = tokenize(prefix)
+        if not words:
+            return []
+        organization_id = str(organization_id)
+        snapshot = self._snapshot()
+
+        frequencies: Dict[str, int] = defaultdict(int)
+        key_prefix = _term_key(organization_id, words[-1])
+        for segment, _ in snapshot:
+            for key in segment.terms_with_prefix(key_prefix):
+                frequencies[key] += segment.doc_freq(key)
+
+        best = heapq.nsmallest(limit, frequencies.items(), key=lambda item: (-item[1], item[0]))
+        suggestions = []
+        for key, frequency in best:
+            documents: List[UUID] = []
+            for segment, deleted in snapshot:
+                flat = segment.postings(key)
+                if flat is None:
+                    continue
+                for i in range(0, len(flat), 2):
+                    if len(documents) == sample_size:
+                        break
+                    if flat[i] not in deleted:
+                        documents.append(UUID(segment.document_ids[flat[i]]))
+            suggestions.append((key.split(":", 1)[1], frequency, documents))
+        return suggestions
+
+    def document_count(self) -> int:
+        """Number of live committed documents."""
+        self.refresh()
+        with self._lock:
+            return sum(self._live_count(name) for name in self._order)
+
+    def segment_count(self) -> int:
+        self.refresh()
+        with self._lock:
+            return len(self._order)
+
+
+class EmbeddedSearchBackend(SearchBackend):
+    """
+    Search backend over an embedded InvertedIndex.
+
+    Index work runs in the default executor; every write is committed
+    immediately so other processes see it on their next search.
+    """
+
+    def __init__(self, config: Dict = None):
+        self.config = config or {}
+        self.index = InvertedIndex(
+            Path(self.config.get("directory", "./search_index")),
+            merge_factor=self.config.get("merge_factor", 8),
+            background_merge=self.config.get("background_merge", True)
+        )
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    def _index_and_commit(self, document: IndexedDocument) -> None:
+        self.index.add(document)
+        self.index.commit()
+
+    def _delete_and_commit(self, document_id: UUID) -> None:
+        self.index.delete(document_id)
+        self.index.commit()
+
+    async def index_document(self, document: IndexedDocument) -> None:
+        await self._run(self._index_and_commit, document)
+
+    async def delete_document(self, document_id: UUID) -> None:
+        await self._run(self._delete_and_commit, document_id)
+
+    async def search(
+        self,
+        organization_id: UUID,
+        query: str,
+        limit: int = 20,
+        prefix: bool = False
+    ) -> List[SearchMatch]:
+        return await self._run(self.index.search, organization_id, query, limit, prefix)
+
+    async def suggest(
+        self,
+        organization_id: UUID,
+        prefix: str,
+        limit: int = 10,
+        sample_size: int = 8
+    ) -> List[Tuple[str, int, List[UUID]]]:
+        return await self._run(self.index.suggest, organization_id, prefix, limit, sample_size)
+
+    async def close(self) -> None:
+        await self._run(self.index.wait_for_merges)
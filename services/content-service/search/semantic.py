@@ -0,0 +1,73 @@
+"""
+Semantic search over chunk embeddings of extracted document text.
+"""
+
+import asyncio
+from pathlib import Path
+from typing import Dict, List
+from uuid import UUID
+
+from .base import ChunkMatch, IndexedDocument
+from .embeddings import EmbeddingProvider, chunk_text
+from .vector_index import VectorIndex
+
+
+class SemanticIndex:
+    """
+    Embeds document text chunk by chunk and finds similar chunks.
+
+    Embedding and index work run in the default executor. Results are
+    restricted to one organization; callers apply document permissions.
+    """
+
+    def __init__(self, provider: EmbeddingProvider, config: Dict = None):
+        self.config = config or {}
+        self.provider = provider
+        self.chunk_chars = self.config.get("chunk_chars", 1000)
+        self.overlap_chars = self.config.get("overlap_chars", 150)
+        self.max_chunks = self.config.get("max_chunks", 256)
+        self.index = VectorIndex(
+            Path(self.config.get("directory", "./semantic_index")),
+            dimension=provider.dimension,
+            nprobe=self.config.get("nprobe", 16),
+            train_threshold=self.config.get("train_threshold", 20000)
+        )
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    def _embed_document(self, document: IndexedDocument) -> None:
+        text = document.text or ""
+        spans = chunk_text(text, self.chunk_chars, self.overlap_chars, self.max_chunks)
+        vectors = self.provider.embed([text[start:end] for start, end in spans]) if spans else []
+        self.index.add(document.document_id, document.organization_id, vectors, spans)
+
+    def _search(self, organization_id: UUID, query: str, limit: int, min_similarity: float) -> List[ChunkMatch]:
+        vector = self.provider.embed([query])[0]
+        return self.index.search(organization_id, vector, limit=limit, min_score=min_similarity)
+
+    async def index_document(self, document: IndexedDocument) -> None:
+        """Replace the chunk embeddings of a document; documents without text are removed."""
+        await self._run(self._embed_document, document)
+
+    async def delete_document(self, document_id: UUID) -> None:
+        await self._run(self.index.delete, document_id)
+
+    async def search(
+        self,
+        organization_id: UUID,
+        query: str,
+        limit: int = 10,
+        min_similarity: float = 0.0
+    ) -> List[ChunkMatch]:
+        """
+        Documents whose text is most similar to the query.
+
+        Returns:
+            The best matching chunk of each document, by descending cosine similarity
+        """
+        return await self._run(self._search, organization_id, query, limit, min_similarity)
+
+    async def close(self) -> None:
+        """Release resources held by the index."""
+        pass
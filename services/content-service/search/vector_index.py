@@ -0,0 +1,554 @@
+"""
+Approximate nearest-neighbour index over int8-quantized chunk embeddings.
+
+Each chunk vector is stored as int8 codes with one float32 scale, so a
+chunk costs about dimension + 24 bytes. Once the index holds
+train_threshold chunks, rows are partitioned into inverted lists around
+k-means centroids (IVF) and a search scores only the rows of the nprobe
+lists closest to the query. Organizations small enough to scan are
+searched exactly, which keeps their recall at 100%.
+
+Data lives in row-aligned append-only files inside a generation
+directory. A writer appends under an exclusive file lock and then
+publishes the new counts in state.json, so processing workers and API
+instances can share one index; readers load the appended rows on their
+next search. Training writes a new generation without deleted rows.
+"""
+
+import fcntl
+import json
+import logging
+import math
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from .base import ChunkMatch, CorruptIndexError, SearchBackendError
+
+logger = logging.getLogger(__name__)
+
+STATE_NAME = "state.json"
+LOCK_NAME = "index.lock"
+
+# Chunks ranked per requested document, so documents with several strong chunks don't crowd the page
+CHUNK_OVERSAMPLE = 4
+# Rows scored per matrix multiplication when training and assigning lists
+BATCH_ROWS = 65536
+
+# Row-aligned data files: name -> (dtype, values per row)
+_ROW_FILES = {
+    "codes": (np.int8, None),
+    "scales": (np.float32, 1),
+    "rows": (np.int32, 4),       # document, organization, start offset, end offset
+    "lists": (np.int32, 1)       # inverted list, -1 before training
+}
+_DOCUMENT_COLUMN, _ORGANIZATION_COLUMN, _START_COLUMN, _END_COLUMN = range(4)
+
+_EMPTY_STATE = {
+    "generation": 0, "dimension": None, "rows": 0, "documents": 0,
+    "organizations": 0, "deleted": 0, "lists": 0, "trained_rows": 0
+}
+
+
+def quantize(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-vector int8 quantization; returns codes and scales."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _nearest_centroid(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    assignment = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), BATCH_ROWS):
+        block = vectors[start:start + BATCH_ROWS]
+        assignment[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignment
+
+
+def spherical_kmeans(sample: np.ndarray, k: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Unit-length centroids maximizing cosine similarity to their members."""
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(len(sample), k, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = _nearest_centroid(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, sample)
+        empty = np.bincount(assignment, minlength=k) == 0
+        if empty.any():
+            # Reseed empty lists so every centroid stays useful
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()), replace=False)]
+        centroids = _normalize(sums)
+    return centroids.astype(np.float32)
+
+
+class _Column:
+    """Growable array with amortized appends."""
+
+    def __init__(self, dtype, width: Optional[int] = None):
+        self.dtype = np.dtype(dtype)
+        self.width = width
+        self.size = 0
+        self.data = np.empty((0, width) if width else (0,), dtype=self.dtype)
+
+    def extend(self, values: np.ndarray) -> None:
+        needed = self.size + len(values)
+        if needed > len(self.data):
+            grown = np.empty((max(needed, 2 * len(self.data), 1024),) + self.data.shape[1:], dtype=self.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:needed] = values
+        self.size = needed
+
+    def view(self) -> np.ndarray:
+        return self.data[:self.size]
+
+
+class VectorIndex:
+    """
+    Chunk embeddings of organization documents with cosine-similarity search.
+
+    Vectors must be unit length. Adding a document replaces the chunks it
+    had; deletes mark rows until the next training drops them.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        dimension: int,
+        nprobe: int = 16,
+        train_threshold: int = 20000,
+        retrain_factor: float = 4.0,
+        auto_train: bool = True
+    ):
+        self.directory = Path(directory)
+        self.dimension = dimension
+        self.nprobe = nprobe
+        self.train_threshold = train_threshold
+        self.retrain_factor = retrain_factor
+        self.auto_train = auto_train
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._state = dict(_EMPTY_STATE)
+        self._reset()
+
+        stored_dimension = self._read_state()["dimension"]
+        if stored_dimension is not None and stored_dimension != dimension:
+            raise SearchBackendError(
+                f"Vector index at {self.directory} holds {stored_dimension}-dimensional vectors, "
+                f"not {dimension}; rebuild it after changing the embedding model"
+            )
+        self.refresh()
+
+    def _reset(self) -> None:
+        self._codes = _Column(np.int8, self.dimension)
+        self._scales = _Column(np.float32)
+        self._rows = _Column(np.int32, 4)
+        self._lists = _Column(np.int32)
+        self._deleted = _Column(np.bool_)
+        self._documents: List[UUID] = []
+        self._organizations: List[UUID] = []
+        self._organization_ids: Dict[UUID, int] = {}
+        # Document id -> (first row, end row) ranges, one per time it was added
+        self._document_rows: Dict[UUID, List[Tuple[int, int]]] = {}
+        self._organization_rows: Dict[int, _Column] = {}
+        self._list_rows: Dict[int, _Column] = {}
+        self._centroids: Optional[np.ndarray] = None
+
+    # ------------------------------------------------------------------
+    # Files and state
+    # ------------------------------------------------------------------
+
+    def _generation_dir(self, generation: int) -> Path:
+        return self.directory / f"gen_{generation:06d}"
+
+    def _path(self, generation: int, name: str) -> Path:
+        return self._generation_dir(generation) / f"{name}.bin"
+
+    @contextmanager
+    def _exclusive(self):
+        """In-process and cross-process writer lock."""
+        with self._lock:
+            with open(self.directory / LOCK_NAME, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_state(self) -> Dict:
+        try:
+            with open(self.directory / STATE_NAME) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return dict(_EMPTY_STATE)
+        except ValueError as e:
+            raise CorruptIndexError(f"Unreadable vector index state: {e}")
+
+    def _write_state(self, state: Dict) -> None:
+        path = self.directory / STATE_NAME
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _read_rows(self, generation: int, name: str, dtype, width: Optional[int], start: int, end: int):
+        width = width or self.dimension
+        values = np.fromfile(
+            self._path(generation, name), dtype=dtype,
+            count=(end - start) * width, offset=start * width * np.dtype(dtype).itemsize
+        )
+        if len(values) != (end - start) * width:
+            raise CorruptIndexError(f"Vector index file {name} is shorter than its published state")
+        return values.reshape(end - start, width) if width > 1 else values
+
+    def _read_uuids(self, generation: int, name: str, start: int, end: int) -> List[UUID]:
+        with open(self._path(generation, name), "rb") as f:
+            f.seek(start * 16)
+            data = f.read((end - start) * 16)
+        return [UUID(bytes=data[i:i + 16]) for i in range(0, len(data), 16)]
+
+    def refresh(self) -> None:
+        """Load rows, documents and deletions published since the last refresh."""
+        for attempt in range(3):
+            state = self._read_state()
+            if state == self._state:
+                return
+            try:
+                with self._lock:
+                    self._load(state)
+                return
+            except FileNotFoundError:
+                # Training replaced the generation between reading state and its files
+                if attempt == 2:
+                    raise
+
+    def _load(self, state: Dict) -> None:
+        generation = state["generation"]
+        if generation != self._state["generation"]:
+            self._reset()
+            self._state = dict(_EMPTY_STATE, generation=generation)
+            if state["lists"]:
+                self._centroids = np.fromfile(
+                    self._path(generation, "centroids"), dtype=np.float32
+                ).reshape(state["lists"], self.dimension)
+        previous = self._state
+
+        for uuid in self._read_uuids(generation, "organizations", previous["organizations"], state["organizations"]):
+            self._organization_ids[uuid] = len(self._organizations)
+            self._organizations.append(uuid)
+        self._documents.extend(
+            self._read_uuids(generation, "documents", previous["documents"], state["documents"])
+        )
+
+        first, end = previous["rows"], state["rows"]
+        if end > first:
+            columns = {
+                name: self._read_rows(generation, name, dtype, width, first, end)
+                for name, (dtype, width) in _ROW_FILES.items()
+            }
+            self._append_rows(first, columns["codes"], columns["scales"], columns["rows"], columns["lists"])
+
+        deleted = np.fromfile(
+            self._path(generation, "deleted"), dtype=np.int32,
+            count=state["deleted"] - previous["deleted"], offset=previous["deleted"] * 4
+        )
+        self._deleted.data[deleted] = True
+
+        self._state = dict(state)
+
+    def _append_rows(self, first: int, codes, scales, rows, lists) -> None:
+        self._codes.extend(codes)
+        self._scales.extend(scales)
+        self._rows.extend(rows)
+        self._lists.extend(lists)
+        self._deleted.extend(np.zeros(len(codes), dtype=np.bool_))
+
+        row_ids = np.arange(first, first + len(codes), dtype=np.int32)
+        for column, groups in (
+            (rows[:, _ORGANIZATION_COLUMN], self._organization_rows),
+            (lists, self._list_rows)
+        ):
+            order = np.argsort(column, kind="stable")
+            keys, starts = np.unique(column[order], return_index=True)
+            for key, block in zip(keys, np.split(row_ids[order], starts[1:])):
+                if key >= 0:
+                    groups.setdefault(int(key), _Column(np.int32)).extend(block)
+
+        # Chunks of one add are contiguous rows
+        documents = rows[:, _DOCUMENT_COLUMN]
+        boundaries = np.flatnonzero(np.diff(documents)) + 1
+        for start, stop in zip(np.r_[0, boundaries], np.r_[boundaries, len(documents)]):
+            document_id = self._documents[documents[start]]
+            self._document_rows.setdefault(document_id, []).append((first + int(start), first + int(stop)))
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def _live_rows(self, document_id: UUID) -> List[int]:
+        deleted = self._deleted.view()
+        return [
+            row for start, end in self._document_rows.get(document_id, ())
+            for row in range(start, end) if not deleted[row]
+        ]
+
+    def add(
+        self,
+        document_id: UUID,
+        organization_id: UUID,
+        vectors: np.ndarray,
+        spans: List[Tuple[int, int]]
+    ) -> None:
+        """Replace the chunks of a document; spans are their offsets in the document text."""
+        self.add_batch([(document_id, organization_id, vectors, spans)])
+
+    def add_batch(self, entries: Iterable[Tuple[UUID, UUID, np.ndarray, List[Tuple[int, int]]]]) -> None:
+        """Add or replace several documents in one published write."""
+        with self._exclusive():
+            self.refresh()
+            state = dict(self._state)
+            generation = state["generation"]
+            self._generation_dir(generation).mkdir(exist_ok=True)
+
+            # The last entry for a document wins
+            entries = list({entry[0]: entry for entry in entries}.values())
+            replaced: List[int] = []
+            new_documents: List[UUID] = []
+            new_organizations: List[UUID] = []
+            organization_ids = dict(self._organization_ids)
+            blocks = []
+            for document_id, organization_id, vectors, spans in entries:
+                vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dimension)
+                if len(vectors) != len(spans):
+                    raise ValueError("Every chunk vector needs its text span")
+                replaced.extend(self._live_rows(document_id))
+                if not len(vectors):
+                    continue
+                if organization_id not in organization_ids:
+                    organization_ids[organization_id] = len(organization_ids)
+                    new_organizations.append(organization_id)
+                document_local = state["documents"] + len(new_documents)
+                new_documents.append(document_id)
+
+                meta = np.empty((len(vectors), 4), dtype=np.int32)
+                meta[:, _DOCUMENT_COLUMN] = document_local
+                meta[:, _ORGANIZATION_COLUMN] = organization_ids[organization_id]
+                meta[:, _START_COLUMN:] = np.asarray(spans, dtype=np.int32)
+                blocks.append((vectors, meta))
+
+            if blocks:
+                vectors = np.concatenate([vectors for vectors, _ in blocks])
+                codes, scales = quantize(vectors)
+                lists = (
+                    _nearest_centroid(vectors, self._centroids) if self._centroids is not None
+                    else np.full(len(vectors), -1, dtype=np.int32)
+                )
+                self._write_columns(generation, state, {
+                    "codes": codes, "scales": scales,
+                    "rows": np.concatenate([meta for _, meta in blocks]), "lists": lists
+                })
+                state["rows"] += len(codes)
+
+            self._append_uuids(generation, "documents", state["documents"], new_documents)
+            self._append_uuids(generation, "organizations", state["organizations"], new_organizations)
+            self._append_values(generation, "deleted", state["deleted"] * 4, np.asarray(replaced, dtype=np.int32))
+            state["documents"] += len(new_documents)
+            state["organizations"] += len(new_organizations)
+            state["deleted"] += len(replaced)
+            state["dimension"] = self.dimension
+
+            self._write_state(state)
+            self.refresh()
+
+            if self.auto_train and self._needs_training():
+                self._train()
+
+    def delete(self, document_id: UUID) -> None:
+        """Remove all chunks of a document; unknown ids are ignored."""
+        with self._exclusive():
+            self.refresh()
+            rows = self._live_rows(document_id)
+            if not rows:
+                return
+            state = dict(self._state)
+            self._append_values(state["generation"], "deleted", state["deleted"] * 4, np.asarray(rows, dtype=np.int32))
+            state["deleted"] += len(rows)
+            self._write_state(state)
+            self.refresh()
+
+    def _append_values(self, generation: int, name: str, offset: int, values: np.ndarray) -> None:
+        # Truncating to the published size drops anything a crashed writer left behind
+        path = self._path(generation, name)
+        with open(path, "r+b" if path.exists() else "w+b") as f:
+            f.truncate(offset)
+            f.seek(offset)
+            f.write(values.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _append_uuids(self, generation: int, name: str, count: int, uuids: List[UUID]) -> None:
+        data = b"".join(uuid.bytes for uuid in uuids)
+        self._append_values(generation, name, count * 16, np.frombuffer(data, dtype=np.uint8))
+
+    def _write_columns(self, generation: int, state: Dict, columns: Dict[str, np.ndarray]) -> None:
+        for name, (dtype, width) in _ROW_FILES.items():
+            row_bytes = (width or self.dimension) * np.dtype(dtype).itemsize
+            self._append_values(
+                generation, name, state["rows"] * row_bytes, np.ascontiguousarray(columns[name], dtype=dtype)
+            )
+
+    # ------------------------------------------------------------------
+    # Training
+    # ------------------------------------------------------------------
+
+    def _live_count(self) -> int:
+        return self._deleted.size - int(self._deleted.view().sum())
+
+    def _needs_training(self) -> bool:
+        live = self._live_count()
+        trained = self._state["trained_rows"]
+        if not trained:
+            return live >= self.train_threshold
+        return live >= trained * self.retrain_factor
+
+    def train(self, seed: int = 0) -> None:
+        """
+        Cluster the live rows into about sqrt(rows) inverted lists.
+
+        Writes a new generation without deleted rows; searches keep using
+        the current one until it is published.
+        """
+        with self._exclusive():
+            self.refresh()
+            self._train(seed)
+
+    def _train(self, seed: int = 0) -> None:
+        """Train with the writer lock held."""
+        live = np.flatnonzero(~self._deleted.view())
+        if len(live) == 0:
+            return
+        state = self._state
+        list_count = min(len(live), max(1, int(math.sqrt(len(live)))))
+
+        if len(live) == self._deleted.size:
+            # Nothing to drop, so avoid copying the codes
+            codes, scales, rows = self._codes.view(), self._scales.view(), self._rows.view()
+        else:
+            codes, scales, rows = self._codes.view()[live], self._scales.view()[live], self._rows.view()[live]
+        rng = np.random.default_rng(seed)
+        sample_rows = rng.choice(len(live), min(len(live), max(list_count * 64, 10000), 262144), replace=False)
+        sample = _normalize(codes[sample_rows].astype(np.float32) * scales[sample_rows, None])
+        centroids = spherical_kmeans(sample, list_count, seed=seed)
+
+        lists = np.empty(len(live), dtype=np.int32)
+        for start in range(0, len(live), BATCH_ROWS):
+            block = codes[start:start + BATCH_ROWS].astype(np.float32)
+            lists[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+
+        generation = state["generation"] + 1
+        directory = self._generation_dir(generation)
+        shutil.rmtree(directory, ignore_errors=True)
+        directory.mkdir()
+        new_state = dict(
+            state, generation=generation, rows=0, deleted=0, lists=list_count, trained_rows=len(live)
+        )
+        self._write_columns(generation, new_state, {
+            "codes": codes, "scales": scales, "rows": rows, "lists": lists
+        })
+        new_state["rows"] = len(live)
+        self._append_uuids(generation, "documents", 0, self._documents)
+        self._append_uuids(generation, "organizations", 0, self._organizations)
+        self._append_values(generation, "deleted", 0, np.empty(0, dtype=np.int32))
+        self._append_values(generation, "centroids", 0, centroids)
+
+        self._write_state(new_state)
+        self.refresh()
+        shutil.rmtree(self._generation_dir(state["generation"]), ignore_errors=True)
+
+        logger.info(f"Trained vector index: {len(live)} chunks in {list_count} lists")
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def search(
+        self,
+        organization_id: UUID,
+        vector: np.ndarray,
+        limit: int = 10,
+        min_score: float = -1.0,
+        nprobe: Optional[int] = None
+    ) -> List[ChunkMatch]:
+        """
+        Documents of the organization with the chunks most similar to vector.
+
+        Returns:
+            The best chunk of each of up to limit documents, by descending score
+        """
+        self.refresh()
+        query = np.asarray(vector, dtype=np.float32).reshape(self.dimension)
+        with self._lock:
+            organization = self._organization_ids.get(organization_id)
+            if organization is None:
+                return []
+            if organization not in self._organization_rows:
+                return []
+            organization_rows = self._organization_rows[organization].view()
+
+            candidates = organization_rows
+            if self._centroids is not None and len(organization_rows) > self.train_threshold:
+                probes = np.argsort(self._centroids @ query)[::-1][:nprobe or self.nprobe]
+                probed = [self._list_rows[p].view() for p in probes if p in self._list_rows]
+                probed = np.concatenate(probed) if probed else np.empty(0, dtype=np.int32)
+                probed = probed[self._rows.data[probed, _ORGANIZATION_COLUMN] == organization]
+                if len(probed) >= limit * CHUNK_OVERSAMPLE:
+                    candidates = probed
+
+            candidates = candidates[~self._deleted.data[candidates]]
+            if not len(candidates):
+                return []
+            scores = (self._codes.data[candidates].astype(np.float32) @ query) * self._scales.data[candidates]
+
+            keep = min(len(candidates), limit * CHUNK_OVERSAMPLE)
+            top = np.argpartition(-scores, keep - 1)[:keep]
+            top = top[np.argsort(-scores[top])]
+
+            matches: List[ChunkMatch] = []
+            seen = set()
+            for position in top:
+                score = float(scores[position])
+                if score < min_score or len(matches) >= limit:
+                    break
+                document, _, start, end = self._rows.data[candidates[position]]
+                document_id = self._documents[document]
+                if document_id in seen:
+                    continue
+                seen.add(document_id)
+                matches.append(ChunkMatch(document_id, score, int(start), int(end)))
+            return matches
+
+    def chunk_count(self) -> int:
+        """Number of live chunks."""
+        self.refresh()
+        with self._lock:
+            return self._live_count()
+
+    @property
+    def list_count(self) -> int:
+        return self._state["lists"]
@@ -4,10 +4,19 @@ Storage layer for document management.
 
 from .base import StorageBackend
 from .local_storage import LocalFileStorage
-from .manager import StorageManager
+from .ingest import IngestResult, ingest_upload
+from .metadata_index import MetadataIndex
+from .multipart import MultipartUploadManager, UploadSession
+from .usage_ledger import UsageLedger, reconcile_usage_periodically
 
 __all__ = [
     "StorageBackend",
     "LocalFileStorage", 
-    "StorageManager"
+    "IngestResult",
+    "ingest_upload",
+    "MetadataIndex",
+    "MultipartUploadManager",
+    "UploadSession",
+    "UsageLedger",
+    "reconcile_usage_periodically"
 ]
\ No newline at end of file
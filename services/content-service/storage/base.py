@@ -3,7 +3,7 @@ Base storage interface for document storage backends.
 """
 
 from abc import ABC, abstractmethod
-from typing import BinaryIO, Dict, Optional, AsyncIterator, Any
+from typing import BinaryIO, Dict, List, Optional, AsyncIterator, Any
 from pathlib import Path
 import hashlib
 import magic
@@ -0,0 +1,145 @@
+"""
+Single-pass streaming ingest for uploaded files.
+
+Hashes, sniffs, size-checks and writes an upload while reading each byte
+exactly once, instead of separate validation, save and hashing passes.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Iterable, Optional
+
+import magic
+
+from .base import FileValidationError
+
+logger = logging.getLogger(__name__)
+
+# Large buffers keep the number of executor hops per upload low
+DEFAULT_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+# Number of leading bytes handed to libmagic for content type detection
+SNIFF_BYTES = 2048
+
+
+class UploadTooLargeError(FileValidationError):
+    """Upload exceeds the configured size limit."""
+
+    def __init__(self, size: int, max_size: int):
+        super().__init__(f"File size {size} exceeds maximum allowed size {max_size}")
+        self.size = size
+        self.max_size = max_size
+
+
+class ContentTypeNotAllowedError(FileValidationError):
+    """Detected content type is not in the allowed list."""
+
+    def __init__(self, content_type: str):
+        super().__init__(f"Content type {content_type} is not allowed")
+        self.content_type = content_type
+
+
+@dataclass
+class IngestResult:
+    """Outcome of a streaming ingest."""
+    path: Path
+    size: int
+    sha256: str
+    content_type: str
+
+
+def _write_and_hash(file_handle: BinaryIO, hasher: Any, chunk: bytes) -> None:
+    """Write a chunk and feed it to the hasher (runs in thread pool)."""
+    file_handle.write(chunk)
+    hasher.update(chunk)
+
+
+async def ingest_upload(
+    source: Any,
+    destination: Path,
+    max_size: int,
+    allowed_content_types: Optional[Iterable[str]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> IngestResult:
+    """
+    Stream an upload to disk, computing its hash and content type on the way.
+
+    The content type is sniffed from the first chunk before anything is
+    written, so rejected uploads never touch the disk. Writing and hashing of
+    a chunk run in the thread pool while the next chunk is being read.
+
+    Args:
+        source: Object with an async ``read(size)`` method (e.g. UploadFile)
+        destination: Filesystem path to write the upload to
+        max_size: Maximum allowed size in bytes
+        allowed_content_types: Allowed MIME types (None = no restriction)
+        chunk_size: Read buffer size in bytes
+
+    Returns:
+        IngestResult with size, SHA-256 hex digest and detected content type
+
+    Raises:
+        UploadTooLargeError: If the upload exceeds max_size
+        ContentTypeNotAllowedError: If the detected type is not allowed
+    """
+    first_chunk = await source.read(chunk_size)
+
+    content_type = magic.from_buffer(first_chunk[:SNIFF_BYTES], mime=True)
+    if allowed_content_types is not None and content_type not in allowed_content_types:
+        raise ContentTypeNotAllowedError(content_type)
+
+    if len(first_chunk) > max_size:
+        raise UploadTooLargeError(len(first_chunk), max_size)
+
+    loop = asyncio.get_running_loop()
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    file_handle = await loop.run_in_executor(None, open, destination, 'wb')
+
+    hasher = hashlib.sha256()
+    total_size = 0
+    pending_write = None
+
+    try:
+        chunk = first_chunk
+        while chunk:
+            total_size += len(chunk)
+            if total_size > max_size:
+                raise UploadTooLargeError(total_size, max_size)
+
+            # Overlap the write/hash of this chunk with the read of the next
+            pending_write = loop.run_in_executor(
+                None, _write_and_hash, file_handle, hasher, chunk
+            )
+            chunk = await source.read(chunk_size)
+            await pending_write
+            pending_write = None
+
+    except BaseException:
+        try:
+            if pending_write is not None:
+                await pending_write
+        except Exception:
+            pass
+        finally:
+            # Also when cancelled while waiting for the last write
+            file_handle.close()
+            try:
+                os.remove(destination)  # Clean up partial file
+            except OSError:
+                pass
+        raise
+
+    await loop.run_in_executor(None, file_handle.close)
+
+    logger.debug(f"Ingested {total_size} bytes to {destination}")
+
+    return IngestResult(
+        path=destination,
+        size=total_size,
+        sha256=hasher.hexdigest(),
+        content_type=content_type
+    )
@@ -3,10 +3,13 @@ Local filesystem storage backend.
 """
 
 import os
+import errno
+import asyncio
+import uuid
 import aiofiles
 import aiofiles.os
 from pathlib import Path
-from typing import BinaryIO, Dict, Optional, AsyncIterator, Any, List
+from typing import BinaryIO, Dict, Optional, AsyncIterator, Any, List, Tuple
 from datetime import datetime
 import logging
 
@@ -14,9 +17,26 @@ from .base import (
     StorageBackend, StorageError, FileNotFoundError, 
     StorageQuotaExceededError, FileInfo
 )
+from .metadata_index import MetadataIndex
+from .usage_ledger import UsageLedger, organization_for_path
 
 logger = logging.getLogger(__name__)
 
+# Directory (under base_path) holding content-addressed blobs
+BLOB_DIRECTORY = ".blobs"
+
+# Directory (under base_path) holding storage bookkeeping databases
+INDEX_DIRECTORY = ".index"
+
+# Storage-internal directories skipped when walking stored files
+INTERNAL_DIRECTORIES = {BLOB_DIRECTORY, INDEX_DIRECTORY}
+
+# Sidecar metadata key recording which blob a logical path references
+CONTENT_HASH_KEY = "_content_hash"
+
+# Hard link failures that mean the filesystem can't deduplicate this file
+_LINK_UNSUPPORTED_ERRNOS = {errno.EPERM, errno.EMLINK, errno.EXDEV, errno.ENOTSUP}
+
 
 class LocalFileStorage(StorageBackend):
     """Local filesystem storage implementation."""
@@ -27,35 +47,358 @@ class LocalFileStorage(StorageBackend):
         self.base_path = Path(self.config.get("base_path", "/app/storage"))
         self.create_directories = self.config.get("create_directories", True)
         self.quota_bytes = self.config.get("quota_bytes", None)  # None = no quota
+        self.chunk_size = self.config.get("chunk_size", 64 * 1024)  # Read size for retrieve()
+        
+        # Content-addressed mode: logical paths are hard links to blobs stored
+        # under their SHA-256, so identical uploads share one copy on disk and
+        # the blob's link count is its reference count.
+        self.content_addressed = self.config.get("content_addressed", False)
+        self.blob_path = self.base_path / BLOB_DIRECTORY
+        
+        # Quota for organizations without their own (None = no quota)
+        self.organization_quota_bytes = self.config.get("organization_quota_bytes", None)
         
         # Ensure base directory exists
         if self.create_directories:
             self.base_path.mkdir(parents=True, exist_ok=True)
         
-        logger.info(f"LocalFileStorage initialized with base_path: {self.base_path}")
+        # Running usage totals so quota checks and stats don't walk the tree.
+        # An empty ledger is filled by the first reconcile_usage() run, which
+        # reconcile_usage_periodically starts right away.
+        self.usage_ledger = None
+        self.usage_scan_pending = False
+        if self.config.get("track_usage", True):
+            self.usage_ledger = UsageLedger(self.base_path / INDEX_DIRECTORY / "usage.sqlite")
+            self.usage_scan_pending = self.usage_ledger.is_empty()
+        
+        # Persistent FileInfo records so listings don't hash and sniff files
+        self.metadata_index = None
+        if self.config.get("index_metadata", True):
+            self.metadata_index = MetadataIndex(self.base_path / INDEX_DIRECTORY / "metadata.sqlite")
+            if self.metadata_index.is_new:
+                if self._has_stored_files_sync():
+                    logger.warning(
+                        f"Metadata index for {self.base_path} is empty; listings walk the "
+                        f"tree until it is rebuilt (python -m storage.manage rebuild-index)"
+                    )
+                else:
+                    self.metadata_index.mark_complete()
+        
+        logger.info(
+            f"LocalFileStorage initialized with base_path: {self.base_path} "
+            f"(content_addressed={self.content_addressed})"
+        )
     
     def _get_full_path(self, path: str) -> Path:
         """Get full filesystem path from storage path."""
         return self.base_path / path.lstrip('/')
     
-    async def _check_quota(self, file_size: int) -> None:
-        """Check if adding file would exceed quota."""
-        if not self.quota_bytes:
+    def _get_blob_path(self, file_hash: str) -> Path:
+        """Get blob path for a SHA-256 hex digest (fanned out as ab/cd/<hash>)."""
+        return self.blob_path / file_hash[:2] / file_hash[2:4] / file_hash
+    
+    def new_temp_path(self) -> Path:
+        """
+        Get a fresh temporary path on the same filesystem as stored files.
+        
+        Uploads are ingested here and then committed with store_ingested(),
+        which renames or links them into place without copying.
+        """
+        temp_directory = self.blob_path / "tmp"
+        temp_directory.mkdir(parents=True, exist_ok=True)
+        return temp_directory / uuid.uuid4().hex
+    
+    async def get_reference_count(self, file_hash: str) -> int:
+        """Get the number of logical paths referencing a blob."""
+        try:
+            stat = await aiofiles.os.stat(self._get_blob_path(file_hash))
+        except OSError:
+            return 0
+        return max(stat.st_nlink - 1, 0)
+    
+    def _unlink_blob_if_unreferenced(self, blob: Path) -> bool:
+        """Remove a blob whose only remaining link is the blob store entry."""
+        try:
+            if os.stat(blob).st_nlink <= 1:
+                os.remove(blob)
+                logger.debug(f"Removed unreferenced blob: {blob.name}")
+                return True
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
+        return False
+    
+    def _link_to_blob_sync(self, temp_path: Optional[Path], full_path: Path, file_hash: str) -> bool:
+        """
+        Reference the blob for file_hash from full_path (runs in thread pool).
+        
+        If the blob doesn't exist yet it is created from temp_path. Any
+        temporary file is always consumed.
+        
+        Returns:
+            True if an existing blob was reused, False if new content was added
+        """
+        blob = self._get_blob_path(file_hash)
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        try:
+            while True:
+                deduplicated = True
+                if temp_path is not None:
+                    try:
+                        os.link(temp_path, blob)
+                        deduplicated = False
+                    except FileExistsError:
+                        pass
+                
+                try:
+                    os.link(blob, full_path)
+                    return deduplicated
+                except OSError as e:
+                    # Blob was released by a concurrent delete; recreate it
+                    if e.errno != errno.ENOENT or temp_path is None:
+                        raise
+        except OSError as e:
+            if e.errno not in _LINK_UNSUPPORTED_ERRNOS or temp_path is None:
+                raise
+            # Filesystem can't link this file; store a private copy instead
+            logger.warning(f"Hard links unavailable for {full_path}, storing without dedup: {e}")
+            self._unlink_blob_if_unreferenced(blob)
+            os.replace(temp_path, full_path)
+            temp_path = None
+            return False
+        finally:
+            if temp_path is not None:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+    
+    async def _release_existing(self, path: str) -> None:
+        """Drop whatever is currently stored at path before overwriting it."""
+        if await aiofiles.os.path.exists(self._get_full_path(path)):
+            await self.delete(path)
+    
+    async def store_ingested(
+        self,
+        temp_path: Path,
+        path: str,
+        file_hash: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        content_type: str = "application/octet-stream"
+    ) -> FileInfo:
+        """
+        Commit an already written and hashed temporary file to path.
+        
+        In content-addressed mode a re-upload of existing content costs only
+        a hard link; the temporary file is discarded. Otherwise the temporary
+        file is renamed into place.
+        
+        Args:
+            temp_path: File obtained from new_temp_path() holding the content
+            path: Storage path for the file
+            file_hash: SHA-256 hex digest of the content
+            metadata: Optional metadata to store with the file
+            content_type: Detected MIME type of the content
+            
+        Returns:
+            FileInfo object with storage details
+            
+        Raises:
+            StorageQuotaExceededError: If new content would exceed the quota
+            StorageError: If storage operation fails
+        """
+        full_path = self._get_full_path(path)
+        loop = asyncio.get_running_loop()
+        reservation = None
+        
+        try:
+            size = (await aiofiles.os.stat(temp_path)).st_size
+            
+            known_content = self.content_addressed and await self.get_reference_count(file_hash)
+            reservation = await self._reserve_quota(size, path, new_content=not known_content)
+            
+            await self._release_existing(path)
+            
+            deduplicated = False
+            if self.content_addressed:
+                deduplicated = await loop.run_in_executor(
+                    None, self._link_to_blob_sync, temp_path, full_path, file_hash
+                )
+                if deduplicated:
+                    logger.info(f"Deduplicated {path} against blob {file_hash}")
+            else:
+                full_path.parent.mkdir(parents=True, exist_ok=True)
+                await aiofiles.os.replace(temp_path, full_path)
+            
+            await self._record_usage(path, size, new_content=not deduplicated, reservation=reservation)
+            reservation = None
+            await self._store_metadata(path, metadata, file_hash)
+            
+            stat = await aiofiles.os.stat(full_path)
+
+            file_info = FileInfo(
+                path=path,
+                size=size,
+                content_type=content_type,
+                hash=file_hash,
+                metadata=metadata or {},
+                created_at=datetime.fromtimestamp(stat.st_ctime).isoformat(),
+                modified_at=datetime.fromtimestamp(stat.st_mtime).isoformat()
+            )
+            await self._index_file(file_info, stat.st_mtime_ns)
+
+            return file_info
+
+        except Exception as e:
+            logger.error(f"Failed to store ingested file at {path}: {e}")
+            await self._release_reservation(reservation)
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            if isinstance(e, (StorageError, StorageQuotaExceededError)):
+                raise
+            raise StorageError(f"Storage operation failed: {e}")
+    
+    async def _check_quota(self, file_size: int, path: str = "", new_content: bool = True) -> None:
+        """Check if adding file would exceed the global or organization quota."""
+        if not self.usage_ledger:
+            await self._check_scanned_quota(file_size, new_content)
+            return
+        
+        organization = organization_for_path(path)
+        if organization is None:
             return
         
         try:
-            stats = await self.get_storage_stats()
+            await asyncio.get_running_loop().run_in_executor(
+                None,
+                self.usage_ledger.check_quota,
+                organization,
+                file_size,
+                file_size if new_content else 0,
+                self.quota_bytes,
+                self.organization_quota_bytes
+            )
+        except Exception as e:
+            if isinstance(e, StorageQuotaExceededError):
+                raise
+            logger.warning(f"Could not check storage quota: {e}")
+    
+    async def _check_scanned_quota(self, file_size: int, new_content: bool) -> None:
+        """Check the global quota against a walk of the tree (no ledger)."""
+        if self.quota_bytes and new_content:
+            stats = await self._scan_storage_stats()
             current_usage = stats.get("used_bytes", 0)
-            
             if current_usage + file_size > self.quota_bytes:
                 raise StorageQuotaExceededError(
                     f"Adding file would exceed quota. "
                     f"Current: {current_usage}, Adding: {file_size}, Limit: {self.quota_bytes}"
                 )
+    
+    async def _reserve_quota(
+        self,
+        file_size: int,
+        path: str,
+        new_content: bool = True
+    ) -> Optional[int]:
+        """
+        Hold file_size bytes against the quotas for a store to path.
+        
+        Pass the returned reservation to _record_usage() once the file is in
+        place, or to _release_reservation() if the store fails.
+        
+        Returns:
+            Reservation id, or None if usage isn't tracked for path
+            
+        Raises:
+            StorageQuotaExceededError: If a quota would be exceeded
+        """
+        if not self.usage_ledger:
+            await self._check_scanned_quota(file_size, new_content)
+            return None
+        
+        organization = organization_for_path(path)
+        if organization is None:
+            return None
+        
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                None,
+                self.usage_ledger.reserve,
+                organization,
+                file_size,
+                file_size if new_content else 0,
+                self.quota_bytes,
+                self.organization_quota_bytes
+            )
         except Exception as e:
             if isinstance(e, StorageQuotaExceededError):
                 raise
-            logger.warning(f"Could not check storage quota: {e}")
+            logger.warning(f"Could not reserve storage quota: {e}")
+            return None
+    
+    async def _release_reservation(self, reservation: Optional[int]) -> None:
+        """Give back a reservation whose store failed."""
+        if reservation is None:
+            return
+        
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.usage_ledger.release, reservation
+            )
+        except Exception as e:
+            # Dropped as stale by the next reconcile
+            logger.error(f"Failed to release storage quota reservation {reservation}: {e}")
+    
+    async def check_quota(self, file_size: int, path: str) -> None:
+        """
+        Check that a file of file_size bytes could be stored at path.
+        
+        Lets callers reject over-quota uploads before receiving them.
+        
+        Raises:
+            StorageQuotaExceededError: If a quota would be exceeded
+        """
+        await self._check_quota(file_size, path)
+    
+    async def _record_usage(
+        self, 
+        path: str, 
+        size: int, 
+        new_content: bool = True, 
+        removed: bool = False,
+        reservation: Optional[int] = None
+    ) -> None:
+        """
+        Apply a store (or, with removed=True, a delete) of path to the ledger.
+        
+        A reservation from _reserve_quota() is turned into the recorded usage.
+        """
+        if not self.usage_ledger:
+            return
+        
+        organization = organization_for_path(path)
+        if organization is None:
+            return
+        
+        sign = -1 if removed else 1
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                None,
+                self.usage_ledger.apply,
+                organization,
+                sign * size,
+                sign,
+                sign * size if new_content else 0,
+                sign if new_content else 0,
+                reservation
+            )
+        except Exception as e:
+            # Drift and the leftover reservation are corrected by the next reconcile
+            logger.error(f"Failed to record storage usage for {path}: {e}")
     
     async def store(
         self, 
@@ -64,47 +407,94 @@ class LocalFileStorage(StorageBackend):
         metadata: Optional[Dict[str, Any]] = None
     ) -> FileInfo:
         """Store file data in local filesystem."""
+        reservation = None
         try:
             full_path = self._get_full_path(path)
             
             # Validate file
             validation_info = self.validate_file(file_data, path)
             
-            # Check quota
-            await self._check_quota(validation_info["size"])
+            file_hash = validation_info["hash"]
+            size = validation_info["size"]
+            
+            if self.content_addressed and await self.get_reference_count(file_hash):
+                # Content already stored: link it without writing any bytes
+                reservation = await self._reserve_quota(size, path, new_content=False)
+                await self._release_existing(path)
+                try:
+                    await asyncio.get_running_loop().run_in_executor(
+                        None, self._link_to_blob_sync, None, full_path, file_hash
+                    )
+                    await self._record_usage(path, size, new_content=False, reservation=reservation)
+                    reservation = None
+                    await self._store_metadata(path, metadata, file_hash)
+                    logger.info(f"Deduplicated {path} against blob {file_hash}")
+                    return await self._build_file_info(path, validation_info, metadata)
+                except OSError as e:
+                    # Blob released concurrently; write it out below
+                    if e.errno != errno.ENOENT:
+                        raise
+                    await self._release_reservation(reservation)
+                    reservation = None
+            
+            # Reserve quota for the new content
+            reservation = await self._reserve_quota(size, path)
+            
+            await self._release_existing(path)
             
-            # Create directory if it doesn't exist
-            full_path.parent.mkdir(parents=True, exist_ok=True)
+            # Write file (via a temporary file in content-addressed mode)
+            write_path = self.new_temp_path() if self.content_addressed else full_path
+            write_path.parent.mkdir(parents=True, exist_ok=True)
             
-            # Write file
-            async with aiofiles.open(full_path, 'wb') as f:
+            async with aiofiles.open(write_path, 'wb') as f:
                 file_data.seek(0)
                 while chunk := file_data.read(8192):
                     await f.write(chunk)
             
-            # Store metadata if provided
-            if metadata:
-                await self._store_metadata(path, metadata)
+            deduplicated = False
+            if self.content_addressed:
+                deduplicated = await asyncio.get_running_loop().run_in_executor(
+                    None, self._link_to_blob_sync, write_path, full_path, file_hash
+                )
             
-            # Get file stats
-            stat = await aiofiles.os.stat(full_path)
+            await self._record_usage(path, size, new_content=not deduplicated, reservation=reservation)
+            reservation = None
             
-            return FileInfo(
-                path=path,
-                size=validation_info["size"],
-                content_type=validation_info["content_type"],
-                hash=validation_info["hash"],
-                metadata=metadata or {},
-                created_at=datetime.fromtimestamp(stat.st_ctime).isoformat(),
-                modified_at=datetime.fromtimestamp(stat.st_mtime).isoformat()
-            )
+            # Store metadata if provided
+            await self._store_metadata(path, metadata, file_hash)
+            
+            return await self._build_file_info(path, validation_info, metadata)
             
         except Exception as e:
             logger.error(f"Failed to store file at {path}: {e}")
+            await self._release_reservation(reservation)
             if isinstance(e, (StorageError, StorageQuotaExceededError)):
                 raise
             raise StorageError(f"Storage operation failed: {e}")
     
+    async def _build_file_info(
+        self, 
+        path: str, 
+        validation_info: Dict[str, Any], 
+        metadata: Optional[Dict[str, Any]]
+    ) -> FileInfo:
+        """Build and index FileInfo for a freshly stored file."""
+        # Get file stats
+        stat = await aiofiles.os.stat(self._get_full_path(path))
+
+        file_info = FileInfo(
+            path=path,
+            size=validation_info["size"],
+            content_type=validation_info["content_type"],
+            hash=validation_info["hash"],
+            metadata=metadata or {},
+            created_at=datetime.fromtimestamp(stat.st_ctime).isoformat(),
+            modified_at=datetime.fromtimestamp(stat.st_mtime).isoformat()
+        )
+        await self._index_file(file_info, stat.st_mtime_ns)
+
+        return file_info
+
     async def retrieve(self, path: str) -> AsyncIterator[bytes]:
         """Retrieve file data from local filesystem."""
         full_path = self._get_full_path(path)
@@ -114,7 +504,7 @@ class LocalFileStorage(StorageBackend):
         
         try:
             async with aiofiles.open(full_path, 'rb') as f:
-                while chunk := await f.read(8192):
+                while chunk := await f.read(self.chunk_size):
                     yield chunk
         except Exception as e:
             logger.error(f"Failed to retrieve file {path}: {e}")
@@ -128,8 +518,24 @@ class LocalFileStorage(StorageBackend):
             return False
         
         try:
+            # Find the referenced blob before the sidecar goes away
+            content_hash = None
+            if self.content_addressed:
+                content_hash = (await self._load_sidecar(path)).get(CONTENT_HASH_KEY)
+            
+            size = (await aiofiles.os.stat(full_path)).st_size
             await aiofiles.os.remove(full_path)
             
+            # Drop the blob once its last reference is gone
+            content_removed = True
+            if content_hash:
+                content_removed = await asyncio.get_running_loop().run_in_executor(
+                    None, self._unlink_blob_if_unreferenced, self._get_blob_path(content_hash)
+                )
+            
+            await self._record_usage(path, size, new_content=content_removed, removed=True)
+            await self._unindex_file(path)
+
             # Also delete metadata file if it exists
             await self._delete_metadata(path)
             
@@ -149,50 +555,128 @@ class LocalFileStorage(StorageBackend):
         return await aiofiles.os.path.exists(full_path)
     
     async def get_info(self, path: str) -> Optional[FileInfo]:
-        """Get file information from local filesystem."""
+        """Get file information, from the metadata index when it is current."""
         full_path = self._get_full_path(path)
         
-        if not await aiofiles.os.path.exists(full_path):
+        try:
+            stat = await aiofiles.os.stat(full_path)
+        except OSError:
             return None
         
         try:
-            stat = await aiofiles.os.stat(full_path)
+            if self.metadata_index:
+                entry = await asyncio.get_running_loop().run_in_executor(
+                    None, self.metadata_index.get_with_mtime, path.lstrip('/')
+                )
+                # Trust the entry unless the file changed behind our back
+                if entry and entry[0].size == stat.st_size and entry[1] == stat.st_mtime_ns:
+                    entry[0].path = path
+                    return entry[0]
             
-            # Try to detect content type from file
-            content_type = "application/octet-stream"
-            try:
-                import magic
-                content_type = magic.from_file(str(full_path), mime=True)
-            except Exception:
-                pass
+            file_info = await self._read_file_info(path, stat)
+            await self._index_file(file_info, stat.st_mtime_ns)
+            return file_info
             
-            # Calculate file hash
+        except Exception as e:
+            logger.error(f"Failed to get file info for {path}: {e}")
+            return None
+    
+    async def _read_file_info(self, path: str, stat: os.stat_result) -> FileInfo:
+        """Build FileInfo from the file itself (sniffing and, if needed, hashing it)."""
+        full_path = self._get_full_path(path)
+        
+        # Try to detect content type from file
+        content_type = "application/octet-stream"
+        try:
+            import magic
+            content_type = magic.from_file(str(full_path), mime=True)
+        except Exception:
+            pass
+        
+        # Load metadata if exists
+        metadata = await self._load_sidecar(path)
+        
+        # Content-addressed files record their hash; others are re-hashed
+        file_hash = metadata.pop(CONTENT_HASH_KEY, None)
+        if not file_hash:
             import hashlib
             hasher = hashlib.sha256()
             async with aiofiles.open(full_path, 'rb') as f:
-                while chunk := await f.read(8192):
+                while chunk := await f.read(self.chunk_size):
                     hasher.update(chunk)
             file_hash = hasher.hexdigest()
-            
-            # Load metadata if exists
-            metadata = await self._load_metadata(path)
-            
-            return FileInfo(
-                path=path,
-                size=stat.st_size,
-                content_type=content_type,
-                hash=file_hash,
-                metadata=metadata,
-                created_at=datetime.fromtimestamp(stat.st_ctime).isoformat(),
-                modified_at=datetime.fromtimestamp(stat.st_mtime).isoformat()
+        
+        return FileInfo(
+            path=path,
+            size=stat.st_size,
+            content_type=content_type,
+            hash=file_hash,
+            metadata=metadata,
+            created_at=datetime.fromtimestamp(stat.st_ctime).isoformat(),
+            modified_at=datetime.fromtimestamp(stat.st_mtime).isoformat()
+        )
+    
+    async def _index_file(self, file_info: FileInfo, mtime_ns: int) -> None:
+        """Record file_info in the metadata index."""
+        if not self.metadata_index:
+            return
+        
+        entry = FileInfo(
+            path=file_info.path.lstrip('/'),
+            size=file_info.size,
+            content_type=file_info.content_type,
+            hash=file_info.hash,
+            metadata=file_info.metadata,
+            created_at=file_info.created_at,
+            modified_at=file_info.modified_at
+        )
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.metadata_index.put, entry, mtime_ns
             )
-            
         except Exception as e:
-            logger.error(f"Failed to get file info for {path}: {e}")
-            return None
+            # get_info falls back to the file and re-indexes it
+            logger.error(f"Failed to index metadata for {file_info.path}: {e}")
+    
+    async def _unindex_file(self, path: str) -> None:
+        """Drop path from the metadata index."""
+        if not self.metadata_index:
+            return
+        
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.metadata_index.delete, path.lstrip('/')
+            )
+        except Exception as e:
+            logger.error(f"Failed to unindex metadata for {path}: {e}")
+    
+    def _iter_stored_paths_sync(self, search_path: Path):
+        """Yield storage paths of stored files under search_path."""
+        for root, dirs, filenames in os.walk(search_path):
+            # Skip the blob store and bookkeeping databases
+            dirs[:] = sorted(d for d in dirs if d not in INTERNAL_DIRECTORIES)
+            
+            root_path = Path(root)
+            for filename in sorted(filenames):
+                # Skip metadata files
+                if filename.endswith('.metadata'):
+                    continue
+                yield str((root_path / filename).relative_to(self.base_path))
+    
+    def _has_stored_files_sync(self) -> bool:
+        """Whether any file is stored under base_path."""
+        return next(self._iter_stored_paths_sync(self.base_path), None) is not None
     
     async def list_files(self, prefix: str = "", limit: int = 1000) -> List[FileInfo]:
         """List files in local filesystem with optional prefix filter."""
+        if self.metadata_index and self.metadata_index.complete:
+            try:
+                return await asyncio.get_running_loop().run_in_executor(
+                    None, self.metadata_index.list, prefix, limit
+                )
+            except Exception as e:
+                logger.error(f"Metadata index listing failed, walking storage: {e}")
+        
         files = []
         search_path = self.base_path
         
@@ -203,28 +687,13 @@ class LocalFileStorage(StorageBackend):
             if not await aiofiles.os.path.exists(search_path):
                 return files
             
-            count = 0
-            for root, dirs, filenames in os.walk(search_path):
-                if count >= limit:
+            for relative_path in self._iter_stored_paths_sync(search_path):
+                if len(files) >= limit:
                     break
                 
-                root_path = Path(root)
-                
-                for filename in filenames:
-                    if count >= limit:
-                        break
-                    
-                    # Skip metadata files
-                    if filename.endswith('.metadata'):
-                        continue
-                    
-                    file_path = root_path / filename
-                    relative_path = file_path.relative_to(self.base_path)
-                    
-                    file_info = await self.get_info(str(relative_path))
-                    if file_info:
-                        files.append(file_info)
-                        count += 1
+                file_info = await self.get_info(relative_path)
+                if file_info:
+                    files.append(file_info)
             
             return files
             
@@ -232,42 +701,175 @@ class LocalFileStorage(StorageBackend):
             logger.error(f"Failed to list files with prefix {prefix}: {e}")
             return files
     
-    async def get_storage_stats(self) -> Dict[str, Any]:
-        """Get storage usage statistics."""
+    async def rebuild_index(self) -> int:
+        """
+        Rebuild the metadata index from the files on disk.
+        
+        Used for recovery when the index is missing or out of date. Every
+        file is read once; the index is swapped in a single transaction.
+        
+        Returns:
+            Number of files indexed
+            
+        Raises:
+            StorageError: If metadata indexing is disabled
+        """
+        if not self.metadata_index:
+            raise StorageError("Metadata index is disabled for this storage")
+        
+        loop = asyncio.get_running_loop()
+        paths = await loop.run_in_executor(
+            None, lambda: list(self._iter_stored_paths_sync(self.base_path))
+        )
+        
+        entries = []
+        for path in paths:
+            try:
+                stat = await aiofiles.os.stat(self._get_full_path(path))
+                entries.append((await self._read_file_info(path, stat), stat.st_mtime_ns))
+            except OSError as e:
+                # Removed while rebuilding
+                logger.debug(f"Skipping {path} during index rebuild: {e}")
+        
+        count = await loop.run_in_executor(None, self.metadata_index.replace_all, entries)
+        logger.info(f"Rebuilt metadata index for {self.base_path}: {count} files")
+        return count
+    
+    def _scan_usage_sync(self) -> Tuple[Dict[str, Tuple[int, int]], Tuple[int, int]]:
+        """
+        Walk the storage tree and total usage (runs in thread pool).
+        
+        Returns:
+            ((bytes, files) per organization, (bytes, files) on disk)
+        """
+        organizations: Dict[str, Tuple[int, int]] = {}
+        physical_size = 0
+        seen_inodes = set()
+        
+        for root, dirs, files in os.walk(self.base_path):
+            # Blobs are counted through the logical paths linking them
+            if Path(root) == self.base_path:
+                dirs[:] = [d for d in dirs if d not in INTERNAL_DIRECTORIES]
+            
+            for file in files:
+                # Skip metadata files in counting
+                if file.endswith('.metadata'):
+                    continue
+                
+                file_path = os.path.join(root, file)
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    continue
+                
+                # Only the {organization_id}/... upload layout is tracked
+                organization = organization_for_path(
+                    os.path.relpath(file_path, self.base_path)
+                )
+                if organization is None:
+                    continue
+                
+                used_bytes, file_count = organizations.get(organization, (0, 0))
+                organizations[organization] = (used_bytes + stat.st_size, file_count + 1)
+                
+                # Deduplicated files share an inode; count its bytes once
+                inode = (stat.st_dev, stat.st_ino)
+                if inode not in seen_inodes:
+                    seen_inodes.add(inode)
+                    physical_size += stat.st_size
+        
+        return organizations, (physical_size, len(seen_inodes))
+    
+    async def reconcile_usage(self) -> Dict[str, Dict[str, int]]:
+        """
+        Correct usage ledger drift against a walk of the storage tree.
+        
+        Returns:
+            Corrections applied, keyed by ledger scope
+        """
+        if not self.usage_ledger:
+            return {}
+        
+        loop = asyncio.get_running_loop()
+        before = await loop.run_in_executor(None, self.usage_ledger.snapshot)
+        organizations, physical = await loop.run_in_executor(None, self._scan_usage_sync)
+        corrections = await loop.run_in_executor(
+            None, self.usage_ledger.reconcile, before, organizations, physical
+        )
+        self.usage_scan_pending = False
+        return corrections
+    
+    async def _scan_storage_stats(self) -> Dict[str, int]:
+        """Usage totals from a full walk (used when the ledger is disabled)."""
+        organizations, (physical_size, blob_count) = await asyncio.get_running_loop().run_in_executor(
+            None, self._scan_usage_sync
+        )
+        return {
+            "used_bytes": physical_size,
+            "logical_bytes": sum(usage[0] for usage in organizations.values()),
+            "file_count": sum(usage[1] for usage in organizations.values()),
+            "unique_blob_count": blob_count
+        }
+    
+    async def get_storage_stats(self, organization_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get storage usage statistics.
+        
+        Args:
+            organization_id: Also report usage and quota for this organization
+        """
         try:
-            total_size = 0
-            file_count = 0
-            
-            for root, dirs, files in os.walk(self.base_path):
-                for file in files:
-                    # Skip metadata files in counting
-                    if file.endswith('.metadata'):
-                        continue
-                    
-                    file_path = os.path.join(root, file)
-                    try:
-                        stat = os.stat(file_path)
-                        total_size += stat.st_size
-                        file_count += 1
-                    except OSError:
-                        continue
+            if self.usage_ledger:
+                loop = asyncio.get_running_loop()
+                logical = await loop.run_in_executor(None, self.usage_ledger.get_usage)
+                physical = await loop.run_in_executor(None, self.usage_ledger.get_physical_usage)
+                usage = {
+                    "used_bytes": physical["bytes"],
+                    "logical_bytes": logical["bytes"],
+                    "file_count": logical["files"],
+                    "unique_blob_count": physical["files"]
+                }
+            else:
+                usage = await self._scan_storage_stats()
+            
+            total_size = usage["used_bytes"]
             
             # Get filesystem stats
             statvfs = os.statvfs(self.base_path)
             total_space = statvfs.f_frsize * statvfs.f_blocks
-            free_space = statvfs.f_frsize * statvfs.f_available
+            free_space = statvfs.f_frsize * statvfs.f_bavail
             
-            return {
+            stats = {
                 "backend_type": "local_filesystem",
                 "base_path": str(self.base_path),
-                "used_bytes": total_size,
-                "file_count": file_count,
+                **usage,
+                "deduplicated_bytes": usage["logical_bytes"] - total_size,
+                "content_addressed": self.content_addressed,
                 "total_space_bytes": total_space,
                 "free_space_bytes": free_space,
                 "quota_bytes": self.quota_bytes,
                 "quota_used_percent": (total_size / self.quota_bytes * 100) if self.quota_bytes else None
             }
             
+            if organization_id is not None and self.usage_ledger:
+                org_usage = await loop.run_in_executor(
+                    None, self.usage_ledger.get_usage, organization_id
+                )
+                org_quota = await loop.run_in_executor(
+                    None, self.usage_ledger.get_quota, organization_id
+                )
+                if org_quota is None:
+                    org_quota = self.organization_quota_bytes
+                stats["organization"] = {
+                    "organization_id": organization_id,
+                    "used_bytes": org_usage["bytes"],
+                    "file_count": org_usage["files"],
+                    "quota_bytes": org_quota,
+                    "quota_used_percent": (org_usage["bytes"] / org_quota * 100) if org_quota else None
+                }
+            
+            return stats
+            
         except Exception as e:
             logger.error(f"Failed to get storage stats: {e}")
             return {
@@ -276,9 +878,18 @@ class LocalFileStorage(StorageBackend):
                 "error": str(e)
             }
     
-    async def _store_metadata(self, path: str, metadata: Dict[str, Any]) -> None:
-        """Store metadata alongside file."""
-        if not metadata:
+    async def _store_metadata(
+        self, 
+        path: str, 
+        metadata: Optional[Dict[str, Any]], 
+        content_hash: Optional[str] = None
+    ) -> None:
+        """Store metadata alongside file (and the blob hash in content-addressed mode)."""
+        sidecar = dict(metadata or {})
+        if self.content_addressed and content_hash:
+            sidecar[CONTENT_HASH_KEY] = content_hash
+        
+        if not sidecar:
             return
         
         metadata_path = self._get_full_path(f"{path}.metadata")
@@ -288,13 +899,19 @@ class LocalFileStorage(StorageBackend):
             metadata_path.parent.mkdir(parents=True, exist_ok=True)
             
             async with aiofiles.open(metadata_path, 'w') as f:
-                await f.write(json.dumps(metadata, indent=2))
+                await f.write(json.dumps(sidecar, indent=2))
                 
         except Exception as e:
             logger.warning(f"Failed to store metadata for {path}: {e}")
     
     async def _load_metadata(self, path: str) -> Dict[str, Any]:
         """Load metadata for a file."""
+        metadata = await self._load_sidecar(path)
+        metadata.pop(CONTENT_HASH_KEY, None)
+        return metadata
+    
+    async def _load_sidecar(self, path: str) -> Dict[str, Any]:
+        """Load the raw sidecar for a file, including storage-internal keys."""
         metadata_path = self._get_full_path(f"{path}.metadata")
         
         if not await aiofiles.os.path.exists(metadata_path):
@@ -344,6 +961,39 @@ class LocalFileStorage(StorageBackend):
         """
         return None
     
+    async def copy_file(self, source_path: str, destination_path: str) -> FileInfo:
+        """Copy file; in content-addressed mode this only adds a blob reference."""
+        if not self.content_addressed:
+            return await super().copy_file(source_path, destination_path)
+        
+        if not await self.exists(source_path):
+            raise FileNotFoundError(f"Source file not found: {source_path}")
+        
+        sidecar = await self._load_sidecar(source_path)
+        content_hash = sidecar.pop(CONTENT_HASH_KEY, None)
+        if not content_hash:
+            return await super().copy_file(source_path, destination_path)
+        
+        size = (await aiofiles.os.stat(self._get_full_path(source_path))).st_size
+        reservation = await self._reserve_quota(size, destination_path, new_content=False)
+        
+        try:
+            await self._release_existing(destination_path)
+            destination = self._get_full_path(destination_path)
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            await asyncio.get_running_loop().run_in_executor(
+                None, os.link, self._get_blob_path(content_hash), destination
+            )
+        except Exception as e:
+            await self._release_reservation(reservation)
+            if isinstance(e, StorageError):
+                raise
+            raise StorageError(f"File copy failed: {e}")
+        
+        await self._record_usage(destination_path, size, new_content=False, reservation=reservation)
+        await self._store_metadata(destination_path, sidecar, content_hash)
+        return await self.get_info(destination_path)
+    
     async def create_backup(self, path: str, backup_path: str) -> FileInfo:
         """Create a backup copy of a file."""
         return await self.copy_file(path, backup_path)
\ No newline at end of file
@@ -0,0 +1,50 @@
+"""
+Storage maintenance commands for content service.
+"""
+
+import os
+import logging
+import asyncio
+
+from .local_storage import LocalFileStorage
+
+logger = logging.getLogger(__name__)
+
+
+def open_storage(base_path: str = None) -> LocalFileStorage:
+    """Open the local storage configured for the service (or at base_path)."""
+    return LocalFileStorage({
+        "base_path": base_path or os.getenv("STORAGE_DIRECTORY", "./data/storage"),
+        "content_addressed": os.getenv("CONTENT_ADDRESSED_STORAGE", "true").lower() == "true",
+        "create_directories": False
+    })
+
+
+async def main():
+    """CLI interface for storage maintenance."""
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python -m storage.manage [rebuild-index|reconcile-usage] [base_path]")
+        return
+
+    command = sys.argv[1]
+    storage = open_storage(sys.argv[2] if len(sys.argv) > 2 else None)
+
+    try:
+        if command == "rebuild-index":
+            count = await storage.rebuild_index()
+            print(f"Indexed {count} files under {storage.base_path}")
+        elif command == "reconcile-usage":
+            corrections = await storage.reconcile_usage()
+            print(f"Usage corrections: {corrections or 'none'}")
+        else:
+            print("Invalid command or missing arguments")
+    except Exception as e:
+        logger.error(f"Storage maintenance failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,182 @@
+"""
+Persistent metadata index for stored files.
+
+Records size, hash, content type and user metadata for every stored path in
+an embedded SQLite database, written when a file is stored. Listing and info
+lookups read the index instead of re-hashing and sniffing each file.
+"""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from .base import FileInfo
+
+
+class MetadataIndex:
+    """SQLite-backed index of FileInfo records keyed by storage path."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.is_new = not self.db_path.exists()
+        self._lock = threading.Lock()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            str(self.db_path), check_same_thread=False, isolation_level=None, timeout=30
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                content_type TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                metadata TEXT NOT NULL,
+                created_at TEXT,
+                modified_at TEXT
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS index_state (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+        """)
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _row(info: FileInfo, mtime_ns: int) -> tuple:
+        return (
+            info.path, info.size, mtime_ns, info.content_type, info.hash,
+            json.dumps(info.metadata or {}), info.created_at, info.modified_at
+        )
+
+    @staticmethod
+    def _info(row: tuple) -> FileInfo:
+        path, size, _, content_type, file_hash, metadata, created_at, modified_at = row
+        return FileInfo(
+            path=path,
+            size=size,
+            content_type=content_type,
+            hash=file_hash,
+            metadata=json.loads(metadata),
+            created_at=created_at,
+            modified_at=modified_at
+        )
+
+    def put(self, info: FileInfo, mtime_ns: int) -> None:
+        """
+        Insert or replace the entry for info.path.
+
+        Args:
+            info: File information to record
+            mtime_ns: Modification time of the file, used to detect changes
+                made behind the storage layer's back
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                self._row(info, mtime_ns)
+            )
+
+    def get(self, path: str) -> Optional[FileInfo]:
+        """Get the entry for path, if indexed."""
+        entry = self.get_with_mtime(path)
+        return entry[0] if entry else None
+
+    def get_with_mtime(self, path: str) -> Optional[tuple]:
+        """Get (FileInfo, mtime_ns) for path, if indexed."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM files WHERE path = ?", (path,)
+            ).fetchone()
+        return (self._info(row), row[2]) if row else None
+
+    def delete(self, path: str) -> None:
+        """Remove the entry for path."""
+        with self._lock:
+            self._conn.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    def list(self, prefix: str = "", limit: int = 1000) -> List[FileInfo]:
+        """
+        List entries in path order.
+
+        Args:
+            prefix: Only return paths under this directory prefix
+            limit: Maximum number of entries
+
+        Returns:
+            List of FileInfo records
+        """
+        prefix = prefix.strip('/')
+        with self._lock:
+            if prefix:
+                # Range scan on the primary key: paths starting with "prefix/"
+                rows = self._conn.execute(
+                    "SELECT * FROM files WHERE path = ? OR (path >= ? AND path < ?) "
+                    "ORDER BY path LIMIT ?",
+                    (prefix, f"{prefix}/", f"{prefix}0", limit)
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT * FROM files ORDER BY path LIMIT ?", (limit,)
+                ).fetchall()
+        return [self._info(row) for row in rows]
+
+    def count(self) -> int:
+        """Number of indexed paths."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    @property
+    def complete(self) -> bool:
+        """Whether every stored file is known to be indexed."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM index_state WHERE key = 'complete'"
+            ).fetchone()
+        return bool(row and row[0] == "1")
+
+    def mark_complete(self, complete: bool = True) -> None:
+        """Record whether the index covers every stored file."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO index_state VALUES ('complete', ?)",
+                ("1" if complete else "0",)
+            )
+
+    def replace_all(self, entries: Iterable[tuple]) -> int:
+        """
+        Atomically replace the whole index.
+
+        Args:
+            entries: (FileInfo, mtime_ns) pairs for every stored file
+
+        Returns:
+            Number of entries written
+        """
+        rows = [self._row(info, mtime_ns) for info, mtime_ns in entries]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM files")
+                self._conn.executemany(
+                    "INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO index_state VALUES ('complete', '1')"
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(rows)
@@ -0,0 +1,600 @@
+"""
+Resumable multipart uploads.
+
+An upload session preallocates a temporary file next to stored files and
+accepts fixed-size parts in any order and in parallel, each written at its
+own offset. Received parts are recorded in SQLite so a client whose
+connection dropped can ask which parts are missing and resend only those.
+The SHA-256 is advanced over the contiguous prefix of received parts as they
+arrive, so completion only hashes whatever tail is left, and the assembled
+file is committed with store_ingested() without being copied.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterable, Dict, List, Optional, Set, Tuple
+
+import magic
+
+from .base import StorageError
+from .ingest import (
+    DEFAULT_CHUNK_SIZE, SNIFF_BYTES, ContentTypeNotAllowedError,
+    IngestResult, UploadTooLargeError
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PART_SIZE = 8 * 1024 * 1024  # 8MB
+MIN_PART_SIZE = 1024 * 1024  # 1MB
+MAX_PART_SIZE = 512 * 1024 * 1024  # 512MB
+MAX_PARTS = 10000
+
+DEFAULT_SESSION_TTL_SECONDS = 24 * 3600
+
+
+class UploadSessionNotFoundError(StorageError):
+    """Upload session does not exist or has expired."""
+    pass
+
+
+class InvalidUploadPartError(StorageError):
+    """Part number out of range or part body of the wrong length."""
+    pass
+
+
+class UploadConflictError(StorageError):
+    """Operation conflicts with the session state (part already received,
+    upload already completing)."""
+    pass
+
+
+class IncompleteUploadError(UploadConflictError):
+    """Completion requested before every part was received."""
+
+    def __init__(self, missing_parts: List[int]):
+        super().__init__(f"Upload is missing {len(missing_parts)} parts")
+        self.missing_parts = missing_parts
+
+
+@dataclass
+class UploadSession:
+    """State of a resumable upload."""
+    upload_id: str
+    path: str
+    temp_path: Path
+    total_size: int
+    part_size: int
+    organization_id: Optional[str] = None
+    user_id: Optional[str] = None
+    filename: Optional[str] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    status: str = "open"
+    created_at: float = 0.0
+    expires_at: float = 0.0
+    received_parts: Set[int] = field(default_factory=set)
+    hashed_bytes: int = 0
+
+    @property
+    def part_count(self) -> int:
+        return max(1, -(-self.total_size // self.part_size))
+
+    def part_range(self, part_number: int) -> Tuple[int, int]:
+        """(offset, length) of a 1-based part number."""
+        if not 1 <= part_number <= self.part_count:
+            raise InvalidUploadPartError(
+                f"Part number {part_number} out of range 1-{self.part_count}"
+            )
+        offset = (part_number - 1) * self.part_size
+        return offset, min(self.part_size, self.total_size - offset)
+
+    @property
+    def missing_parts(self) -> List[int]:
+        return [n for n in range(1, self.part_count + 1) if n not in self.received_parts]
+
+    @property
+    def received_offset(self) -> int:
+        """Bytes received contiguously from the start of the file."""
+        part_number = 1
+        while part_number in self.received_parts:
+            part_number += 1
+        return min((part_number - 1) * self.part_size, self.total_size)
+
+    @property
+    def received_bytes(self) -> int:
+        return sum(self.part_range(n)[1] for n in self.received_parts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Client-facing view of the session."""
+        return {
+            "upload_id": self.upload_id,
+            "filename": self.filename,
+            "status": self.status,
+            "total_size": self.total_size,
+            "part_size": self.part_size,
+            "part_count": self.part_count,
+            "received_parts": sorted(self.received_parts),
+            "missing_parts": self.missing_parts,
+            "received_bytes": self.received_bytes,
+            "offset": self.received_offset,
+            "hashed_bytes": self.hashed_bytes,
+            "expires_at": self.expires_at
+        }
+
+
+class _HashState:
+    """Running SHA-256 over the contiguous received prefix of an upload."""
+
+    def __init__(self):
+        self.hasher = hashlib.sha256()
+        self.offset = 0
+        self.lock = asyncio.Lock()
+
+
+def _hash_file_range(path: Path, hasher: Any, start: int, end: int, chunk_size: int) -> None:
+    """Feed bytes [start, end) of a file to the hasher (runs in thread pool)."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        offset = start
+        while offset < end:
+            chunk = os.pread(fd, min(chunk_size, end - offset), offset)
+            if not chunk:
+                raise StorageError(f"Unexpected end of upload file at offset {offset}")
+            hasher.update(chunk)
+            offset += len(chunk)
+    finally:
+        os.close(fd)
+
+
+def _write_at(fd: int, data: bytes, offset: int) -> None:
+    """Write all of data at offset (runs in thread pool)."""
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+class MultipartUploadManager:
+    """Resumable, parallel-part uploads into a LocalFileStorage."""
+
+    def __init__(
+        self,
+        storage: Any,
+        db_path: Optional[Path] = None,
+        max_size: Optional[int] = None,
+        part_size: int = DEFAULT_PART_SIZE,
+        session_ttl_seconds: int = DEFAULT_SESSION_TTL_SECONDS,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ):
+        """
+        Args:
+            storage: Storage backend providing new_temp_path(), check_quota()
+                and store_ingested()
+            db_path: Session database (defaults to <base>/.index/uploads.sqlite)
+            max_size: Largest accepted upload in bytes (None = no limit)
+            part_size: Part size used when the client doesn't choose one
+            session_ttl_seconds: Lifetime of an unfinished upload
+            chunk_size: Buffer size for part writes and hashing reads
+        """
+        from .local_storage import INDEX_DIRECTORY
+
+        self.storage = storage
+        self.max_size = max_size
+        self.part_size = part_size
+        self.session_ttl_seconds = session_ttl_seconds
+        self.chunk_size = chunk_size
+        self._hash_states: Dict[str, _HashState] = {}
+        self._hash_tasks: Dict[str, asyncio.Task] = {}
+
+        self.db_path = Path(db_path or storage.base_path / INDEX_DIRECTORY / "uploads.sqlite")
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.db_path), check_same_thread=False, isolation_level=None, timeout=30
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS upload_sessions (
+                upload_id TEXT PRIMARY KEY,
+                path TEXT NOT NULL,
+                temp_path TEXT NOT NULL,
+                total_size INTEGER NOT NULL,
+                part_size INTEGER NOT NULL,
+                organization_id TEXT,
+                user_id TEXT,
+                filename TEXT,
+                metadata TEXT NOT NULL,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS upload_parts (
+                upload_id TEXT NOT NULL,
+                part_number INTEGER NOT NULL,
+                PRIMARY KEY (upload_id, part_number)
+            )
+        """)
+
+    def close(self) -> None:
+        """Close the session database."""
+        with self._lock:
+            self._conn.close()
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    def _choose_part_size(self, total_size: int, requested: Optional[int]) -> int:
+        part_size = min(max(requested or self.part_size, MIN_PART_SIZE), MAX_PART_SIZE)
+        # Keep the part count bounded for very large uploads
+        return max(part_size, -(-total_size // MAX_PARTS))
+
+    def _insert_sync(self, session: UploadSession) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO upload_sessions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    session.upload_id, session.path, str(session.temp_path),
+                    session.total_size, session.part_size, session.organization_id,
+                    session.user_id, session.filename, json.dumps(session.metadata),
+                    session.status, session.created_at
+                )
+            )
+
+    def _load_sync(self, upload_id: str) -> Optional[UploadSession]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM upload_sessions WHERE upload_id = ?", (upload_id,)
+            ).fetchone()
+            if not row:
+                return None
+            parts = self._conn.execute(
+                "SELECT part_number FROM upload_parts WHERE upload_id = ?", (upload_id,)
+            ).fetchall()
+
+        (upload_id, path, temp_path, total_size, part_size, organization_id,
+         user_id, filename, metadata, status, created_at) = row
+        return UploadSession(
+            upload_id=upload_id,
+            path=path,
+            temp_path=Path(temp_path),
+            total_size=total_size,
+            part_size=part_size,
+            organization_id=organization_id,
+            user_id=user_id,
+            filename=filename,
+            metadata=json.loads(metadata),
+            status=status,
+            created_at=created_at,
+            expires_at=created_at + self.session_ttl_seconds,
+            received_parts={part for (part,) in parts}
+        )
+
+    def _record_part_sync(self, upload_id: str, part_number: int) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO upload_parts VALUES (?, ?)", (upload_id, part_number)
+            )
+
+    def _set_status_sync(self, upload_id: str, status: str, expected: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE upload_sessions SET status = ? WHERE upload_id = ? AND status = ?",
+                (status, upload_id, expected)
+            )
+        return cursor.rowcount == 1
+
+    def _delete_sync(self, upload_id: str) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM upload_parts WHERE upload_id = ?", (upload_id,))
+                self._conn.execute("DELETE FROM upload_sessions WHERE upload_id = ?", (upload_id,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _expired_sync(self, now: float) -> List[Tuple[str, str]]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT upload_id, temp_path FROM upload_sessions WHERE created_at < ?",
+                (now - self.session_ttl_seconds,)
+            ).fetchall()
+
+    async def initiate(
+        self,
+        path: str,
+        total_size: int,
+        part_size: Optional[int] = None,
+        upload_id: Optional[str] = None,
+        filename: Optional[str] = None,
+        organization_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> UploadSession:
+        """
+        Start a resumable upload.
+
+        Args:
+            path: Storage path the completed file is committed to
+            total_size: Declared size of the whole file in bytes
+            part_size: Preferred part size (clamped to supported bounds)
+            upload_id: Session identifier (generated if not given)
+            filename: Client filename, kept for completion
+            organization_id: Owning organization
+            user_id: Uploading user; other users can't see the session
+            metadata: Arbitrary metadata kept until completion
+
+        Returns:
+            The new UploadSession
+
+        Raises:
+            InvalidUploadPartError: If total_size is not positive
+            UploadTooLargeError: If total_size exceeds max_size
+            StorageQuotaExceededError: If the file wouldn't fit the quota
+        """
+        if total_size <= 0:
+            raise InvalidUploadPartError("Upload size must be positive")
+        if self.max_size and total_size > self.max_size:
+            raise UploadTooLargeError(total_size, self.max_size)
+
+        await self.expire_sessions()
+
+        # Reject over-quota uploads before the client sends any part
+        await self.storage.check_quota(total_size, path)
+
+        now = time.time()
+        session = UploadSession(
+            upload_id=upload_id or uuid.uuid4().hex,
+            path=path,
+            temp_path=self.storage.new_temp_path(),
+            total_size=total_size,
+            part_size=self._choose_part_size(total_size, part_size),
+            organization_id=organization_id,
+            user_id=user_id,
+            filename=filename,
+            metadata=metadata or {},
+            created_at=now,
+            expires_at=now + self.session_ttl_seconds
+        )
+
+        # Preallocate so parts can be written at their offsets in any order
+        def _allocate():
+            with open(session.temp_path, "wb") as f:
+                f.truncate(total_size)
+
+        await self._run(_allocate)
+        try:
+            await self._run(self._insert_sync, session)
+        except Exception:
+            os.remove(session.temp_path)
+            raise
+
+        logger.info(
+            f"Initiated upload {session.upload_id} for {path}: "
+            f"{total_size} bytes in {session.part_count} parts"
+        )
+        return session
+
+    async def get_session(self, upload_id: str) -> UploadSession:
+        """
+        Get the current state of an upload.
+
+        Raises:
+            UploadSessionNotFoundError: If the upload doesn't exist or expired
+        """
+        session = await self._run(self._load_sync, upload_id)
+        if session is None or session.expires_at < time.time():
+            raise UploadSessionNotFoundError(f"Upload not found: {upload_id}")
+
+        state = self._hash_states.get(upload_id)
+        session.hashed_bytes = state.offset if state else 0
+        return session
+
+    async def write_part(
+        self,
+        upload_id: str,
+        part_number: int,
+        data: AsyncIterable[bytes]
+    ) -> UploadSession:
+        """
+        Write one part directly into the upload file.
+
+        Parts may be sent concurrently and in any order. A part is only
+        recorded once all of its bytes were written, so an interrupted part
+        is simply sent again.
+
+        Args:
+            upload_id: Upload session identifier
+            part_number: 1-based part number
+            data: Async iterable of the part's bytes
+
+        Returns:
+            Updated UploadSession
+
+        Raises:
+            UploadSessionNotFoundError: If the upload doesn't exist or expired
+            InvalidUploadPartError: If the part number or length is wrong
+            UploadConflictError: If the part was already received or the
+                upload is no longer accepting parts
+        """
+        session = await self.get_session(upload_id)
+        if session.status != "open":
+            raise UploadConflictError(f"Upload {upload_id} is {session.status}")
+
+        offset, length = session.part_range(part_number)
+        if part_number in session.received_parts:
+            raise UploadConflictError(f"Part {part_number} already received")
+
+        fd = await self._run(os.open, session.temp_path, os.O_WRONLY)
+        written = 0
+        try:
+            buffer = bytearray()
+            async for chunk in data:
+                if written + len(buffer) + len(chunk) > length:
+                    raise InvalidUploadPartError(
+                        f"Part {part_number} exceeds its length of {length} bytes"
+                    )
+                buffer += chunk
+                if len(buffer) >= self.chunk_size:
+                    await self._run(_write_at, fd, bytes(buffer), offset + written)
+                    written += len(buffer)
+                    buffer.clear()
+            if buffer:
+                await self._run(_write_at, fd, bytes(buffer), offset + written)
+                written += len(buffer)
+        finally:
+            os.close(fd)
+
+        if written != length:
+            raise InvalidUploadPartError(
+                f"Part {part_number} has {written} bytes, expected {length}"
+            )
+
+        await self._run(self._record_part_sync, upload_id, part_number)
+        session.received_parts.add(part_number)
+
+        # Advance the running hash in the background if the prefix grew
+        if part_number == 1 or (part_number - 1) in session.received_parts:
+            self._schedule_hash(upload_id)
+
+        return session
+
+    def _schedule_hash(self, upload_id: str) -> None:
+        task = self._hash_tasks.get(upload_id)
+        if task is None or task.done():
+            self._hash_tasks[upload_id] = asyncio.create_task(self._advance_hash(upload_id))
+
+    async def _advance_hash(self, upload_id: str) -> _HashState:
+        """Hash newly contiguous bytes; returns the (possibly complete) state."""
+        state = self._hash_states.setdefault(upload_id, _HashState())
+        async with state.lock:
+            while True:
+                session = await self._run(self._load_sync, upload_id)
+                if session is None:
+                    return state
+                target = session.received_offset
+                if state.offset >= target:
+                    return state
+                # Hash into a copy: if this task is cancelled the executor
+                # thread keeps running and must not touch the shared state
+                hasher = state.hasher.copy()
+                await self._run(
+                    _hash_file_range, session.temp_path, hasher,
+                    state.offset, target, self.chunk_size
+                )
+                state.hasher, state.offset = hasher, target
+
+    async def complete(
+        self,
+        upload_id: str,
+        allowed_content_types: Optional[List[str]] = None
+    ) -> Tuple[UploadSession, IngestResult]:
+        """
+        Assemble an upload and commit it to storage.
+
+        Finishes the running hash, sniffs the content type and hands the
+        file to store_ingested(). The session is removed whether or not the
+        commit succeeds, except when parts are still missing.
+
+        Args:
+            upload_id: Upload session identifier
+            allowed_content_types: Accepted MIME types (None = any)
+
+        Returns:
+            (session, IngestResult with the storage path, size, hash and type)
+
+        Raises:
+            UploadSessionNotFoundError: If the upload doesn't exist or expired
+            IncompleteUploadError: If parts are missing
+            UploadConflictError: If the upload is already being completed
+            ContentTypeNotAllowedError: If the content type is not allowed
+            StorageQuotaExceededError: If the file no longer fits the quota
+        """
+        session = await self.get_session(upload_id)
+        if session.missing_parts:
+            raise IncompleteUploadError(session.missing_parts)
+        if not await self._run(self._set_status_sync, upload_id, "completing", "open"):
+            raise UploadConflictError(f"Upload {upload_id} is already being completed")
+
+        try:
+            state = await self._advance_hash(upload_id)
+            if state.offset != session.total_size:
+                raise StorageError(f"Upload {upload_id} hash incomplete")
+            file_hash = state.hasher.hexdigest()
+
+            def _sniff():
+                with open(session.temp_path, "rb") as f:
+                    return magic.from_buffer(f.read(SNIFF_BYTES), mime=True)
+
+            content_type = await self._run(_sniff)
+            if allowed_content_types is not None and content_type not in allowed_content_types:
+                raise ContentTypeNotAllowedError(content_type)
+
+            # Renames or links the assembled file into place (consumes it)
+            await self.storage.store_ingested(
+                session.temp_path, session.path, file_hash, content_type=content_type
+            )
+        except BaseException:
+            await self.abort(upload_id)
+            raise
+
+        await self._forget(upload_id)
+        logger.info(f"Completed upload {upload_id} as {session.path} ({session.total_size} bytes)")
+        return session, IngestResult(
+            path=Path(session.path),
+            size=session.total_size,
+            sha256=file_hash,
+            content_type=content_type
+        )
+
+    async def _forget(self, upload_id: str) -> None:
+        await self._run(self._delete_sync, upload_id)
+        self._hash_states.pop(upload_id, None)
+        task = self._hash_tasks.pop(upload_id, None)
+        if task and not task.done():
+            task.cancel()
+
+    async def abort(self, upload_id: str) -> bool:
+        """
+        Discard an upload and its received parts.
+
+        Returns:
+            True if the upload existed
+        """
+        session = await self._run(self._load_sync, upload_id)
+        if session is None:
+            return False
+
+        await self._forget(upload_id)
+        try:
+            await self._run(os.remove, session.temp_path)
+        except OSError:
+            pass  # Already consumed or removed
+        logger.info(f"Aborted upload {upload_id}")
+        return True
+
+    async def expire_sessions(self) -> int:
+        """
+        Remove uploads older than the session TTL.
+
+        Returns:
+            Number of uploads removed
+        """
+        expired = await self._run(self._expired_sync, time.time())
+        for upload_id, _ in expired:
+            await self.abort(upload_id)
+        if expired:
+            logger.info(f"Expired {len(expired)} unfinished uploads")
+        return len(expired)
@@ -0,0 +1,436 @@
+"""
+Incrementally maintained storage usage ledger.
+
+Keeps running byte and file totals per organization (logical usage, counting
+every stored reference) and for the disk as a whole (physical usage, counting
+deduplicated content once), plus per-organization quotas, in an embedded
+SQLite database. Storage operations update the totals in one transaction, so
+quota checks are single-row lookups instead of a walk of the storage tree.
+
+Only files in the {organization_id}/... upload layout are tracked. Stores
+reserve their bytes against the quotas before writing and turn the
+reservation into usage once the file is in place, so concurrent uploads
+cannot together exceed a quota.
+"""
+
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from .base import StorageQuotaExceededError
+
+logger = logging.getLogger(__name__)
+
+# Ledger scope holding logical totals across all organizations
+TOTAL_SCOPE = "__total__"
+
+# Ledger scope holding bytes actually occupied on disk
+PHYSICAL_SCOPE = "__physical__"
+
+# Reservations older than this belong to stores that never finished (e.g. a
+# crashed process) and are dropped on reconcile
+STALE_RESERVATION_SECONDS = 3600
+
+Usage = Tuple[int, int]  # (bytes, files)
+
+
+def organization_for_path(path: str) -> Optional[str]:
+    """
+    Derive the owning organization from an org-prefixed storage path.
+
+    Returns None for paths outside the upload layout: top-level files and
+    hidden or private (".", "_") top-level directories.
+    """
+    parts = path.strip('/').split('/', 1)
+    if len(parts) < 2 or parts[0].startswith(('.', '_')):
+        return None
+    return parts[0]
+
+
+def _org_scope(organization_id: str) -> str:
+    return f"org:{organization_id}"
+
+
+class UsageLedger:
+    """SQLite-backed running totals of stored bytes and files."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            str(self.db_path), check_same_thread=False, isolation_level=None, timeout=30
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS usage (
+                scope TEXT PRIMARY KEY,
+                bytes INTEGER NOT NULL DEFAULT 0,
+                files INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS quotas (
+                organization_id TEXT PRIMARY KEY,
+                quota_bytes INTEGER NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS reservations (
+                id INTEGER PRIMARY KEY,
+                organization_id TEXT NOT NULL,
+                bytes INTEGER NOT NULL,
+                physical_bytes INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS reservations_organization ON reservations (organization_id)"
+        )
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def _add(self, scope: str, delta_bytes: int, delta_files: int) -> None:
+        self._conn.execute(
+            """
+            INSERT INTO usage (scope, bytes, files) VALUES (?, ?, ?)
+            ON CONFLICT(scope) DO UPDATE SET
+                bytes = bytes + excluded.bytes,
+                files = files + excluded.files
+            """,
+            (scope, delta_bytes, delta_files)
+        )
+
+    def _get(self, scope: str) -> Usage:
+        row = self._conn.execute(
+            "SELECT bytes, files FROM usage WHERE scope = ?", (scope,)
+        ).fetchone()
+        return (row[0], row[1]) if row else (0, 0)
+
+    def _reserved(self, organization_id: str) -> Usage:
+        row = self._conn.execute(
+            """
+            SELECT
+                COALESCE(SUM(CASE WHEN organization_id = ? THEN bytes END), 0),
+                COALESCE(SUM(physical_bytes), 0)
+            FROM reservations
+            """,
+            (organization_id,)
+        ).fetchone()
+        return row[0], row[1]
+
+    def is_empty(self) -> bool:
+        """Whether no usage has been recorded yet, e.g. before the first scan."""
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM usage LIMIT 1").fetchone() is None
+
+    def apply(
+        self,
+        organization_id: str,
+        logical_bytes: int,
+        files: int,
+        physical_bytes: int,
+        physical_files: int,
+        reservation_id: Optional[int] = None
+    ) -> None:
+        """
+        Apply a usage change atomically.
+
+        Args:
+            organization_id: Organization owning the changed path
+            logical_bytes: Change in referenced bytes (negative on delete)
+            files: Change in referenced file count
+            physical_bytes: Change in bytes occupied on disk
+            physical_files: Change in distinct files on disk
+            reservation_id: Reservation from reserve() that this change
+                replaces, removed in the same transaction
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if reservation_id is not None:
+                    self._conn.execute("DELETE FROM reservations WHERE id = ?", (reservation_id,))
+                self._add(_org_scope(organization_id), logical_bytes, files)
+                self._add(TOTAL_SCOPE, logical_bytes, files)
+                if physical_bytes or physical_files:
+                    self._add(PHYSICAL_SCOPE, physical_bytes, physical_files)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def get_usage(self, organization_id: Optional[str] = None) -> Dict[str, int]:
+        """Logical usage for one organization, or across all of them."""
+        scope = TOTAL_SCOPE if organization_id is None else _org_scope(organization_id)
+        with self._lock:
+            used_bytes, file_count = self._get(scope)
+        return {"bytes": used_bytes, "files": file_count}
+
+    def get_physical_usage(self) -> Dict[str, int]:
+        """Bytes and distinct files occupied on disk."""
+        with self._lock:
+            used_bytes, file_count = self._get(PHYSICAL_SCOPE)
+        return {"bytes": used_bytes, "files": file_count}
+
+    def set_quota(self, organization_id: str, quota_bytes: Optional[int]) -> None:
+        """Set (or with None, remove) an organization's quota."""
+        with self._lock:
+            if quota_bytes is None:
+                self._conn.execute(
+                    "DELETE FROM quotas WHERE organization_id = ?", (organization_id,)
+                )
+            else:
+                self._conn.execute(
+                    """
+                    INSERT INTO quotas (organization_id, quota_bytes) VALUES (?, ?)
+                    ON CONFLICT(organization_id) DO UPDATE SET quota_bytes = excluded.quota_bytes
+                    """,
+                    (organization_id, quota_bytes)
+                )
+
+    def get_quota(self, organization_id: str) -> Optional[int]:
+        """Get an organization's quota, if one is set."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT quota_bytes FROM quotas WHERE organization_id = ?", (organization_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _check(
+        self,
+        organization_id: str,
+        additional_bytes: int,
+        additional_physical_bytes: int,
+        global_quota_bytes: Optional[int],
+        default_quota_bytes: Optional[int]
+    ) -> None:
+        org_bytes, _ = self._get(_org_scope(organization_id))
+        physical_bytes, _ = self._get(PHYSICAL_SCOPE)
+        reserved_bytes, reserved_physical_bytes = self._reserved(organization_id)
+        org_bytes += reserved_bytes
+        physical_bytes += reserved_physical_bytes
+        row = self._conn.execute(
+            "SELECT quota_bytes FROM quotas WHERE organization_id = ?", (organization_id,)
+        ).fetchone()
+
+        org_quota = row[0] if row else default_quota_bytes
+        if org_quota is not None and org_bytes + additional_bytes > org_quota:
+            raise StorageQuotaExceededError(
+                f"Adding file would exceed quota for organization {organization_id}. "
+                f"Current: {org_bytes}, Adding: {additional_bytes}, Limit: {org_quota}"
+            )
+
+        if (global_quota_bytes and additional_physical_bytes
+                and physical_bytes + additional_physical_bytes > global_quota_bytes):
+            raise StorageQuotaExceededError(
+                f"Adding file would exceed quota. "
+                f"Current: {physical_bytes}, Adding: {additional_physical_bytes}, "
+                f"Limit: {global_quota_bytes}"
+            )
+
+    def check_quota(
+        self,
+        organization_id: str,
+        additional_bytes: int,
+        additional_physical_bytes: Optional[int] = None,
+        global_quota_bytes: Optional[int] = None,
+        default_quota_bytes: Optional[int] = None
+    ) -> None:
+        """
+        Check that adding bytes keeps usage within quotas.
+
+        The organization quota applies to its logical usage; the global quota
+        applies to physical usage on disk. Outstanding reservations count as
+        used. This is advisory; stores hold their bytes with reserve().
+
+        Args:
+            organization_id: Organization the bytes are stored for
+            additional_bytes: Logical bytes being added
+            additional_physical_bytes: Bytes added on disk (defaults to
+                additional_bytes; 0 for deduplicated content)
+            global_quota_bytes: Limit on physical usage (None = no limit)
+            default_quota_bytes: Quota for organizations without their own
+
+        Raises:
+            StorageQuotaExceededError: If either quota would be exceeded
+        """
+        if additional_physical_bytes is None:
+            additional_physical_bytes = additional_bytes
+
+        with self._lock:
+            self._check(
+                organization_id, additional_bytes, additional_physical_bytes,
+                global_quota_bytes, default_quota_bytes
+            )
+
+    def reserve(
+        self,
+        organization_id: str,
+        additional_bytes: int,
+        additional_physical_bytes: Optional[int] = None,
+        global_quota_bytes: Optional[int] = None,
+        default_quota_bytes: Optional[int] = None
+    ) -> int:
+        """
+        Check the quotas and hold the bytes against them in one transaction.
+
+        Takes the same arguments as check_quota(). The reservation counts as
+        used until apply() is called with its id or it is released.
+
+        Returns:
+            Reservation id
+
+        Raises:
+            StorageQuotaExceededError: If either quota would be exceeded
+        """
+        if additional_physical_bytes is None:
+            additional_physical_bytes = additional_bytes
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._check(
+                    organization_id, additional_bytes, additional_physical_bytes,
+                    global_quota_bytes, default_quota_bytes
+                )
+                reservation_id = self._conn.execute(
+                    """
+                    INSERT INTO reservations (organization_id, bytes, physical_bytes, created_at)
+                    VALUES (?, ?, ?, ?)
+                    """,
+                    (organization_id, additional_bytes, additional_physical_bytes, time.time())
+                ).lastrowid
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return reservation_id
+
+    def release(self, reservation_id: int) -> None:
+        """Drop a reservation whose store did not happen."""
+        with self._lock:
+            self._conn.execute("DELETE FROM reservations WHERE id = ?", (reservation_id,))
+
+    def snapshot(self) -> Dict[str, Usage]:
+        """All ledger rows keyed by scope."""
+        with self._lock:
+            rows = self._conn.execute("SELECT scope, bytes, files FROM usage").fetchall()
+        return {scope: (used_bytes, files) for scope, used_bytes, files in rows}
+
+    def reconcile(
+        self,
+        before: Dict[str, Usage],
+        organizations: Dict[str, Usage],
+        physical: Usage
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Correct drift against a fresh scan of the storage tree.
+
+        Scopes whose ledger rows changed while the scan ran are left alone,
+        since the scan may or may not have seen those changes; the next
+        reconcile picks them up. Stale reservations are dropped.
+
+        Args:
+            before: Ledger snapshot taken before the scan started
+            organizations: Scanned (bytes, files) per organization
+            physical: Scanned (bytes, files) on disk
+
+        Returns:
+            Corrections applied, keyed by scope
+        """
+        scanned = {_org_scope(org): usage for org, usage in organizations.items()}
+        scanned[TOTAL_SCOPE] = (
+            sum(usage[0] for usage in organizations.values()),
+            sum(usage[1] for usage in organizations.values())
+        )
+        scanned[PHYSICAL_SCOPE] = physical
+
+        corrections = {}
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "DELETE FROM reservations WHERE created_at < ?",
+                    (time.time() - STALE_RESERVATION_SECONDS,)
+                )
+                current = {
+                    scope: (used_bytes, files) for scope, used_bytes, files in
+                    self._conn.execute("SELECT scope, bytes, files FROM usage").fetchall()
+                }
+                for scope in set(scanned) | set(current):
+                    recorded = current.get(scope, (0, 0))
+                    actual = scanned.get(scope, (0, 0))
+                    if recorded == actual:
+                        continue
+                    if recorded != before.get(scope, (0, 0)):
+                        logger.debug(f"Skipping reconcile of {scope}: changed during scan")
+                        continue
+                    self._conn.execute(
+                        """
+                        INSERT INTO usage (scope, bytes, files) VALUES (?, ?, ?)
+                        ON CONFLICT(scope) DO UPDATE SET
+                            bytes = excluded.bytes, files = excluded.files
+                        """,
+                        (scope, actual[0], actual[1])
+                    )
+                    corrections[scope] = {
+                        "bytes": actual[0] - recorded[0],
+                        "files": actual[1] - recorded[1]
+                    }
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        return corrections
+
+
+async def reconcile_usage_periodically(
+    storage: Any,
+    interval_seconds: float,
+    shutdown_event: asyncio.Event
+) -> None:
+    """
+    Periodically correct ledger drift until shutdown_event is set.
+
+    When the storage reports usage_scan_pending (a new, empty ledger), the
+    first run starts right away so the ledger is filled from a scan.
+
+    Args:
+        storage: Storage backend with an async reconcile_usage() method
+        interval_seconds: Time between reconcile runs
+        shutdown_event: Event that stops the loop
+    """
+    logger.info(f"Started storage usage reconciler (every {interval_seconds}s)")
+
+    initial_scan = getattr(storage, "usage_scan_pending", False)
+    while not shutdown_event.is_set():
+        if not initial_scan:
+            try:
+                await asyncio.wait_for(shutdown_event.wait(), timeout=interval_seconds)
+                break  # Shutdown event was set
+            except asyncio.TimeoutError:
+                pass
+
+        try:
+            corrections = await storage.reconcile_usage()
+            if initial_scan:
+                logger.info("Storage usage ledger initialized from a scan")
+            elif corrections:
+                logger.warning(f"Storage usage ledger drift corrected: {corrections}")
+        except asyncio.CancelledError:
+            break
+        except Exception as e:
+            logger.error(f"Storage usage reconcile failed: {e}")
+        initial_scan = False
+
+    logger.info("Storage usage reconciler stopped")
@@ -570,6 +570,24 @@ async def cleanup_after_test(db_session):
         await db_session.rollback()
 
 
+@pytest.fixture(autouse=True)
+def reset_token_validator():
+    """Isolate tests from cached token validations and pooled clients."""
+    from main import token_validator
+    token_validator.reset()
+    yield
+    token_validator.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_acl_cache():
+    """Isolate tests from cached document grants."""
+    from main import acl_cache
+    acl_cache.reset()
+    yield
+    acl_cache.reset()
+
+
 # ============================================================================
 # ERROR SIMULATION FIXTURES
 # ============================================================================
@@ -0,0 +1 @@
+# Performance tests for Content Service
\ No newline at end of file
@@ -0,0 +1,65 @@
+"""
+Shared fixtures for content service performance benchmarks.
+
+Benchmarks assert wall-clock targets, so they are skipped in the default
+run; select them with ``-m performance`` or RUN_PERFORMANCE_TESTS=1.
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+
+import psutil
+import pytest
+
+
+def pytest_collection_modifyitems(config, items):
+    if os.getenv("RUN_PERFORMANCE_TESTS") == "1" or "performance" in (config.getoption("-m") or ""):
+        return
+    skip = pytest.mark.skip(reason="performance benchmark; run with -m performance or RUN_PERFORMANCE_TESTS=1")
+    directory = Path(__file__).parent
+    for item in items:
+        if "performance" in item.keywords and directory in item.path.parents:
+            item.add_marker(skip)
+
+
+class PeakRSSSampler:
+    """Samples process RSS on a background thread and records the peak."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.baseline = 0
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.process.memory_info().rss)
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self.baseline = self.process.memory_info().rss
+        self.peak = self.baseline
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.process.memory_info().rss)
+
+    @property
+    def peak_delta_mb(self) -> float:
+        """Peak RSS growth over the baseline, in MB."""
+        return (self.peak - self.baseline) / (1024 * 1024)
+
+
+@pytest.fixture
+def peak_rss():
+    """Factory for peak RSS samplers used as context managers."""
+    return PeakRSSSampler
@@ -0,0 +1,68 @@
+"""
+Synthetic documents in the binary formats the extractors parse.
+
+Writers for the benchmarks: a plain-text PDF, an XLSX workbook and a
+scanned-looking page image, each filled with words from a vocabulary.
+"""
+
+from pathlib import Path
+from random import Random
+from typing import Sequence
+
+
+def write_pdf(path: Path, rng: Random, vocabulary: Sequence[str], pages: int, lines_per_page: int = 60) -> None:
+    """Write a plain PDF with one Helvetica text block per page."""
+    offsets = []
+    with open(path, "wb") as out:
+        def add(body: bytes):
+            offsets.append(out.tell())
+            out.write(f"{len(offsets)} 0 obj\n".encode() + body + b"\nendobj\n")
+
+        out.write(b"%PDF-1.4\n")
+        kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(pages))
+        add(b"<< /Type /Catalog /Pages 2 0 R >>")
+        add(f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode())
+        add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+        for i in range(pages):
+            add((
+                "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>"
+            ).encode())
+            lines = " ".join(
+                f"({' '.join(rng.choices(vocabulary, k=12))}) '" for _ in range(lines_per_page)
+            )
+            stream = f"BT /F1 9 Tf 11 TL 40 770 Td {lines} ET".encode()
+            add(f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream")
+
+        xref = out.tell()
+        out.write(f"xref\n0 {len(offsets) + 1}\n0000000000 65535 f \n".encode())
+        out.write("".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode())
+        out.write(f"trailer\n<< /Size {len(offsets) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+
+
+def write_xlsx(path: Path, rng: Random, vocabulary: Sequence[str], rows: int, columns: int = 8) -> None:
+    """Write a workbook of two sheets of words and numbers."""
+    import openpyxl
+
+    workbook = openpyxl.Workbook()
+    for sheet_index in range(2):
+        sheet = workbook.active if sheet_index == 0 else workbook.create_sheet()
+        sheet.title = f"Sheet{sheet_index + 1}"
+        sheet.append([f"column {column}" for column in range(columns)])
+        for _ in range(rows // 2):
+            sheet.append([
+                rng.choice(vocabulary) if column % 2 == 0 else rng.randint(0, 100_000)
+                for column in range(columns)
+            ])
+    workbook.save(path)
+
+
+def write_scan(path: Path, rng: Random, vocabulary: Sequence[str], lines: int = 40) -> None:
+    """Write a grayscale A4 page at 150 dpi with lines of text, like a scan."""
+    from PIL import Image, ImageDraw
+
+    image = Image.new("L", (1240, 1754), 235)
+    draw = ImageDraw.Draw(image)
+    for line in range(lines):
+        draw.text((80, 80 + line * 40), " ".join(rng.choices(vocabulary, k=10)), fill=20)
+    image.save(path, dpi=(150, 150))
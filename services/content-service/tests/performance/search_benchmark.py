@@ -0,0 +1,360 @@
+"""
+Full-text search benchmark corpus and latency harness.
+
+Generates a synthetic corpus in a migrated content-service database and
+replays a mix of queries through DocumentRepository.search_documents,
+reporting latency percentiles. Bodies are drawn from a Zipf-like
+vocabulary so common terms match millions of rows and rare ones a few.
+
+    python -m tests.performance.search_benchmark generate --documents 10000000
+    python -m tests.performance.search_benchmark run --queries 1000
+
+Both commands read the database URL from SEARCH_BENCHMARK_DATABASE_URL.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from uuid import NAMESPACE_URL, UUID, uuid5
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from repositories import DocumentRepository
+
+VOCABULARY_SIZE = 50_000
+WORDS_PER_DOCUMENT = 300
+ORGANIZATION_COUNT = 20
+USERS_PER_ORGANIZATION = 200
+ROLES = ("viewer", "editor", "auditor")
+BATCH_SIZE = 50_000
+STORAGE_PREFIX = "benchmark/"
+
+_SYLLABLES = (
+    "ba", "ce", "di", "fo", "gu", "ha", "je", "ki", "lo", "mu", "na", "pe",
+    "qui", "ro", "sa", "te", "vi", "wo", "xa", "ze", "tor", "len", "mar", "sol"
+)
+
+
+def build_vocabulary(size: int = VOCABULARY_SIZE, seed: int = 7) -> List[str]:
+    """Deterministic pseudo-words; index 0 is the most frequent."""
+    rng = random.Random(seed)
+    words = []
+    seen = set()
+    while len(words) < size:
+        word = "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return words
+
+
+def organization_ids(count: int = ORGANIZATION_COUNT) -> List[UUID]:
+    return [uuid5(NAMESPACE_URL, f"search-benchmark/org/{i}") for i in range(count)]
+
+
+def user_ids(organization_index: int, count: int = USERS_PER_ORGANIZATION) -> List[UUID]:
+    return [
+        uuid5(NAMESPACE_URL, f"search-benchmark/org/{organization_index}/user/{i}")
+        for i in range(count)
+    ]
+
+
+# One batch of documents generated server-side. Word ranks follow random()^3,
+# which skews towards the head of the vocabulary. The correlated reference to
+# g.n keeps Postgres from evaluating the word subqueries only once.
+_INSERT_DOCUMENTS = text("""
+    INSERT INTO documents (
+        id, filename, original_filename, content_type, file_size, file_hash,
+        storage_path, created_by, organization_id, created_at, status,
+        document_type, classification, extracted_text, metadata
+    )
+    SELECT
+        doc.id,
+        doc.title || '.pdf',
+        doc.title || '.pdf',
+        'application/pdf',
+        1024 + (random() * 10000000)::bigint,
+        encode(sha256(doc.id::text::bytea), 'hex'),
+        :storage_prefix || doc.id::text,
+        (CAST(:users AS uuid[]))[1 + floor(random() * :user_count)::int],
+        :organization_id,
+        now() - random() * interval '730 days',
+        'active',
+        (ARRAY['report', 'invoice', 'contract', 'memo'])[1 + floor(random() * 4)::int],
+        (ARRAY['public', 'internal', 'confidential', 'restricted'])[1 + floor(random() * 4)::int],
+        doc.body,
+        jsonb_build_object(
+            'title', doc.title,
+            'tags', jsonb_build_array(
+                (CAST(:vocabulary AS text[]))[1 + floor(random() * 200)::int],
+                (CAST(:vocabulary AS text[]))[1 + floor(random() * 200)::int]
+            )
+        )
+    FROM (
+        SELECT
+            gen_random_uuid() AS id,
+            (
+                SELECT string_agg(
+                    (CAST(:vocabulary AS text[]))[1 + floor(power(random(), 3) * :vocabulary_size)::int], ' '
+                )
+                FROM generate_series(1, 6) AS w
+                WHERE g.n > 0
+            ) AS title,
+            (
+                SELECT string_agg(
+                    (CAST(:vocabulary AS text[]))[1 + floor(power(random(), 3) * :vocabulary_size)::int], ' '
+                )
+                FROM generate_series(1, :words_per_document) AS w
+                WHERE g.n > 0
+            ) AS body
+        FROM generate_series(1, :batch_size) AS g(n)
+    ) AS doc
+""")
+
+# Read grants on a share of the organization's documents, half to users, half to roles
+_INSERT_GRANTS = text("""
+    INSERT INTO document_permissions (document_id, user_id, role_name, can_read, granted_by)
+    SELECT
+        d.id,
+        CASE WHEN d.r < 0.5 THEN (CAST(:users AS uuid[]))[1 + floor(random() * :user_count)::int] END,
+        CASE WHEN d.r >= 0.5 THEN (CAST(:roles AS text[]))[1 + floor(random() * :role_count)::int] END,
+        true,
+        d.created_by
+    FROM (
+        SELECT id, created_by, random() AS r
+        FROM documents
+        WHERE organization_id = :organization_id
+          AND storage_path LIKE :storage_prefix || '%'
+    ) AS d
+    WHERE random() < :grant_ratio
+""")
+
+
+async def generate_corpus(
+    session_factory: async_sessionmaker,
+    documents: int,
+    organizations: int = ORGANIZATION_COUNT,
+    grant_ratio: float = 0.3,
+    progress: bool = False
+) -> int:
+    """
+    Insert a synthetic corpus of benchmark documents and read grants.
+
+    Documents are spread across organizations; the search_vector trigger
+    indexes them as they are inserted. Returns the number inserted.
+    """
+    vocabulary = build_vocabulary()
+    inserted = 0
+    per_organization = max(1, documents // organizations)
+
+    for index, organization_id in enumerate(organization_ids(organizations)):
+        users = user_ids(index)
+        remaining = per_organization
+        while remaining > 0:
+            batch = min(BATCH_SIZE, remaining)
+            async with session_factory() as session:
+                await session.execute(_INSERT_DOCUMENTS, {
+                    "storage_prefix": STORAGE_PREFIX,
+                    "users": users,
+                    "user_count": len(users),
+                    "organization_id": organization_id,
+                    "vocabulary": vocabulary,
+                    "vocabulary_size": len(vocabulary),
+                    "words_per_document": WORDS_PER_DOCUMENT,
+                    "batch_size": batch
+                })
+                await session.commit()
+            remaining -= batch
+            inserted += batch
+            if progress:
+                print(f"  {inserted:>12,} documents")
+
+        async with session_factory() as session:
+            await session.execute(_INSERT_GRANTS, {
+                "users": users,
+                "user_count": len(users),
+                "roles": list(ROLES),
+                "role_count": len(ROLES),
+                "organization_id": organization_id,
+                "storage_prefix": STORAGE_PREFIX,
+                "grant_ratio": grant_ratio
+            })
+            await session.commit()
+
+    async with session_factory() as session:
+        await session.execute(text("ANALYZE documents"))
+        await session.execute(text("ANALYZE document_permissions"))
+        await session.commit()
+
+    return inserted
+
+
+async def corpus_size(session_factory: async_sessionmaker) -> int:
+    """Number of benchmark documents already in the database."""
+    async with session_factory() as session:
+        result = await session.execute(
+            text("SELECT count(*) FROM documents WHERE storage_path LIKE :prefix || '%'"),
+            {"prefix": STORAGE_PREFIX}
+        )
+        return result.scalar()
+
+
+def query_mix(count: int, seed: int = 11) -> List[Tuple[str, Dict]]:
+    """
+    Representative queries with search_documents options.
+
+    Mixes head, torso and tail terms, multi-term and phrase queries, prefix
+    matching and metadata-only searches.
+    """
+    vocabulary = build_vocabulary()
+    rng = random.Random(seed)
+
+    def head():
+        return vocabulary[rng.randint(0, 50)]
+
+    def torso():
+        return vocabulary[rng.randint(500, 5000)]
+
+    def tail():
+        return vocabulary[rng.randint(20000, len(vocabulary) - 1)]
+
+    shapes = [
+        lambda: (head(), {}),
+        lambda: (torso(), {}),
+        lambda: (tail(), {}),
+        lambda: (f"{head()} {torso()}", {}),
+        lambda: (f"{torso()} {tail()}", {}),
+        lambda: (f"{head()} {head()}", {"exact_phrase": True}),
+        lambda: (torso()[:4], {"prefix": True}),
+        lambda: (torso(), {"include_content": False}),
+        lambda: (head(), {"classifications": ["internal", "confidential"]}),
+        lambda: (torso(), {"sort_by": "created_at"}),
+    ]
+    return [rng.choice(shapes)() for _ in range(count)]
+
+
+@dataclass
+class LatencyReport:
+    """Latency samples of one harness run, in milliseconds."""
+    samples: List[float] = field(default_factory=list)
+    result_counts: List[int] = field(default_factory=list)
+
+    def percentile(self, pct: float) -> float:
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    @property
+    def p50(self) -> float:
+        return self.percentile(50)
+
+    @property
+    def p95(self) -> float:
+        return self.percentile(95)
+
+    @property
+    def p99(self) -> float:
+        return self.percentile(99)
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.samples)} queries: "
+            f"p50 {self.p50:.1f}ms  p95 {self.p95:.1f}ms  p99 {self.p99:.1f}ms  "
+            f"max {max(self.samples):.1f}ms  mean {statistics.mean(self.samples):.1f}ms  "
+            f"median hits {statistics.median(self.result_counts):.0f}"
+        )
+
+
+async def run_latency_harness(
+    session_factory: async_sessionmaker,
+    queries: int = 500,
+    concurrency: int = 8,
+    organizations: int = ORGANIZATION_COUNT,
+    permission_filtered: bool = True,
+    warmup: int = 20
+) -> LatencyReport:
+    """
+    Replay the query mix through DocumentRepository.search_documents.
+
+    Each query runs as a random user of a random organization with that
+    organization's roles, measuring end-to-end repository latency including
+    highlighting and faceted counts.
+    """
+    rng = random.Random(3)
+    orgs = organization_ids(organizations)
+    mix = query_mix(queries + warmup)
+    report = LatencyReport()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index: int, query: str, options: Dict) -> None:
+        org_index = rng.randrange(len(orgs))
+        user_id: Optional[UUID] = None
+        roles: List[str] = []
+        if permission_filtered:
+            user_id = rng.choice(user_ids(org_index))
+            roles = [rng.choice(ROLES)]
+
+        async with semaphore:
+            async with session_factory() as session:
+                started = time.perf_counter()
+                results = await DocumentRepository(session).search_documents(
+                    orgs[org_index], query, user_id=user_id, user_roles=roles, **options
+                )
+                elapsed = (time.perf_counter() - started) * 1000
+
+        if index >= warmup:
+            report.samples.append(elapsed)
+            report.result_counts.append(results.total)
+
+    await asyncio.gather(*(one(i, query, options) for i, (query, options) in enumerate(mix)))
+    return report
+
+
+def session_factory_for(database_url: str) -> async_sessionmaker:
+    engine = create_async_engine(database_url, pool_size=20, max_overflow=0)
+    return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def _main(args: argparse.Namespace) -> None:
+    database_url = os.environ["SEARCH_BENCHMARK_DATABASE_URL"]
+    session_factory = session_factory_for(database_url)
+
+    if args.command == "generate":
+        started = time.perf_counter()
+        inserted = await generate_corpus(
+            session_factory, args.documents, organizations=args.organizations, progress=True
+        )
+        print(f"Inserted {inserted:,} documents in {time.perf_counter() - started:.0f}s")
+    else:
+        print(f"Corpus: {await corpus_size(session_factory):,} documents")
+        report = await run_latency_harness(
+            session_factory,
+            queries=args.queries,
+            concurrency=args.concurrency,
+            organizations=args.organizations,
+            permission_filtered=not args.no_permissions
+        )
+        print(report.summary())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Full-text search benchmark")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    generate = subparsers.add_parser("generate", help="Insert a synthetic corpus")
+    generate.add_argument("--documents", type=int, default=1_000_000)
+    generate.add_argument("--organizations", type=int, default=ORGANIZATION_COUNT)
+
+    run = subparsers.add_parser("run", help="Measure search latency")
+    run.add_argument("--queries", type=int, default=500)
+    run.add_argument("--concurrency", type=int, default=8)
+    run.add_argument("--organizations", type=int, default=ORGANIZATION_COUNT)
+    run.add_argument("--no-permissions", action="store_true")
+
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,89 @@
+"""
+Autocomplete latency benchmarks for Content Service.
+
+Fills one organization with AUTOCOMPLETE_BENCHMARK_DOCUMENTS synthetic
+documents (titles, tags and keywords) and times the candidates a request
+checks for short prefixes while documents and queries keep changing. The
+permission check is a database query and not included. The target is
+sub-millisecond candidate latency.
+"""
+
+import os
+import random
+import statistics
+import time
+from uuid import UUID, uuid4
+
+import pytest
+
+from search import AutocompleteIndex
+
+CORPUS_DOCUMENTS = int(os.getenv("AUTOCOMPLETE_BENCHMARK_DOCUMENTS", 100_000))
+P95_TARGET_MS = float(os.getenv("AUTOCOMPLETE_P95_TARGET_MS", 1))
+SNAPSHOT_LOAD_TARGET_S = float(os.getenv("AUTOCOMPLETE_SNAPSHOT_LOAD_TARGET_S", 10))
+
+
+def synthetic_words(rng, count):
+    return ["".join(rng.choice("abcdefghijklmnoprstu") for _ in range(rng.randint(3, 10))) for _ in range(count)]
+
+
+@pytest.fixture(scope="module")
+def autocomplete_corpus():
+    rng = random.Random(11)
+    words = synthetic_words(rng, 30_000)
+    index = AutocompleteIndex()
+    organization_id = uuid4()
+    for i in range(CORPUS_DOCUMENTS):
+        index.set_document(
+            UUID(int=i), organization_id,
+            title=" ".join(rng.sample(words, 4)),
+            tags=rng.sample(words[:1000], 2),
+            keywords=rng.sample(words, 3)
+        )
+    return index, organization_id, words
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestAutocompletePerformance:
+    """Suggestion latency and snapshot load time"""
+
+    def test_suggestion_latency_under_updates(self, autocomplete_corpus):
+        """Prefixes of one to four characters meet the p95 target while the index changes"""
+        index, organization_id, words = autocomplete_corpus
+        rng = random.Random(12)
+        users = [uuid4() for _ in range(50)]
+        index.suggest(organization_id, "a")
+
+        samples = []
+        for i in range(5000):
+            word = rng.choice(words)
+            prefix = word[:rng.randint(1, 4)]
+            started = time.perf_counter()
+            index.candidates(organization_id, prefix, index.cache_size, rng.choice(users))
+            samples.append((time.perf_counter() - started) * 1000)
+            if i % 10 == 0:
+                index.record_query(organization_id, f"{word} {rng.choice(words)}", rng.choice(users))
+                index.set_document(UUID(int=rng.randrange(CORPUS_DOCUMENTS)), organization_id, title=word)
+
+        samples.sort()
+        p95 = samples[int(len(samples) * 0.95)]
+        print(f"\nAutocomplete over {index.phrase_count():,} phrases: "
+              f"p50 {statistics.median(samples):.3f}ms  p95 {p95:.3f}ms  "
+              f"p99 {samples[int(len(samples) * 0.99)]:.3f}ms")
+        assert p95 < P95_TARGET_MS
+
+    def test_snapshot_load(self, autocomplete_corpus, tmp_path):
+        """A restart loads the snapshot instead of rebuilding from documents"""
+        index, organization_id, _ = autocomplete_corpus
+        path = tmp_path / "autocomplete.json.gz"
+        index.save(path)
+
+        restored = AutocompleteIndex()
+        started = time.perf_counter()
+        assert restored.load(path)
+        elapsed = time.perf_counter() - started
+
+        print(f"\nLoaded {restored.phrase_count():,} phrases ({path.stat().st_size / 1e6:.1f}MB) in {elapsed:.2f}s")
+        assert restored.suggest(organization_id, "ab") == index.suggest(organization_id, "ab")
+        assert elapsed < SNAPSHOT_LOAD_TARGET_S
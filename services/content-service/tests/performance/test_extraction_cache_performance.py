@@ -0,0 +1,59 @@
+"""
+Extraction cache benchmarks for Content Service.
+
+Replays EXTRACTION_CACHE_BENCHMARK_TASKS extractions drawn from a smaller
+set of distinct files, as duplicate uploads, retries and reprocessing
+requests produce, with and without the extraction cache.
+"""
+
+import os
+import random
+import time
+
+import pytest
+
+from extractors import ExtractionCache, MetadataExtractorFactory
+
+TASKS = int(os.getenv("EXTRACTION_CACHE_BENCHMARK_TASKS", 600))
+DISTINCT_FILES = int(os.getenv("EXTRACTION_CACHE_BENCHMARK_FILES", 150))
+MIN_SPEEDUP = float(os.getenv("EXTRACTION_CACHE_MIN_SPEEDUP", 2))
+
+
+@pytest.fixture(scope="module")
+def repeated_workload(tmp_path_factory):
+    rng = random.Random(21)
+    vocabulary = ["".join(rng.choice("abcdefghilmnoprstu") for _ in range(rng.randint(3, 9))) for _ in range(3000)]
+    directory = tmp_path_factory.mktemp("repeated")
+    files = []
+    for i in range(DISTINCT_FILES):
+        path = directory / f"upload-{i}.txt"
+        path.write_text(" ".join(rng.choices(vocabulary, k=rng.randint(5000, 20000))))
+        files.append(path)
+    return [rng.choice(files) for _ in range(TASKS)]
+
+
+async def run_workload(factory, workload):
+    started = time.perf_counter()
+    for path in workload:
+        await factory.extract_metadata(path, "text/plain")
+    return time.perf_counter() - started
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestExtractionCachePerformance:
+    """Repeated content with and without the cache"""
+
+    @pytest.mark.asyncio
+    async def test_cache_skips_repeated_extractions(self, repeated_workload, tmp_path):
+        uncached = await run_workload(MetadataExtractorFactory(), repeated_workload)
+
+        cache = ExtractionCache(str(tmp_path / "cache"), max_bytes=256 * 1024 * 1024)
+        cached = await run_workload(MetadataExtractorFactory(cache=cache), repeated_workload)
+
+        stats = cache.get_stats()
+        print(f"\n{TASKS} extractions of {DISTINCT_FILES} files: uncached {uncached:.2f}s, "
+              f"cached {cached:.2f}s ({uncached / cached:.1f}x), hits {stats['hits']}, "
+              f"misses {stats['misses']}, {stats['bytes'] / 1e6:.1f}MB stored")
+        assert stats["misses"] == len(set(repeated_workload))
+        assert uncached / cached >= MIN_SPEEDUP
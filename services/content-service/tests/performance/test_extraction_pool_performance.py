@@ -0,0 +1,110 @@
+"""
+Extraction throughput benchmarks for Content Service.
+
+Extracts EXTRACTION_BENCHMARK_DOCUMENTS mixed documents concurrently, once
+in the service process (the default thread pool) and once through the warm
+process pool. The mix has text, CSV, Markdown and HTML files plus PDFs
+(PyPDF2), XLSX workbooks (openpyxl) and scanned page images (Pillow and
+Tesseract). Parsing, OCR and text analysis hold the GIL, so the process
+pool should scale with cores where the thread pool cannot. Needs PyPDF2,
+openpyxl and Pillow; without the tesseract binary images are only decoded.
+"""
+
+import asyncio
+import os
+import random
+import time
+
+import pytest
+
+from extractors import ExtractionProcessPool, MetadataExtractorFactory
+
+from .sample_documents import write_pdf, write_scan, write_xlsx
+
+pytest.importorskip("PyPDF2")
+pytest.importorskip("openpyxl")
+pytest.importorskip("PIL")
+
+DOCUMENTS = int(os.getenv("EXTRACTION_BENCHMARK_DOCUMENTS", 1000))
+CONCURRENCY = int(os.getenv("EXTRACTION_BENCHMARK_CONCURRENCY", 32))
+MIN_SPEEDUP = float(os.getenv("EXTRACTION_MIN_SPEEDUP", 1.5))
+
+TEXT_FORMATS = {
+    "txt": lambda words: " ".join(words) + ".\n",
+    "csv": lambda words: "\n".join(",".join(words[i:i + 8]) for i in range(0, len(words), 8)),
+    "md": lambda words: "# " + " ".join(words[:6]) + "\n\n" + " ".join(words),
+    "html": lambda words: "<html><body><p>" + " ".join(words) + "</p></body></html>"
+}
+
+# (extension, MIME type) cycled through the documents
+FORMATS = [
+    ("txt", "text/plain"),
+    ("pdf", "application/pdf"),
+    ("csv", "text/csv"),
+    ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    ("md", "text/markdown"),
+    ("png", "image/png"),
+    ("html", "text/html"),
+    ("pdf", "application/pdf")
+]
+
+
+@pytest.fixture(scope="module")
+def mixed_documents(tmp_path_factory):
+    rng = random.Random(5)
+    vocabulary = ["".join(rng.choice("abcdefghilmnoprstu") for _ in range(rng.randint(3, 9))) for _ in range(4000)]
+    directory = tmp_path_factory.mktemp("extraction")
+    documents = []
+    for i in range(DOCUMENTS):
+        extension, mime_type = FORMATS[i % len(FORMATS)]
+        path = directory / f"document-{i}.{extension}"
+        if extension == "pdf":
+            write_pdf(path, rng, vocabulary, pages=rng.randint(3, 10))
+        elif extension == "xlsx":
+            write_xlsx(path, rng, vocabulary, rows=rng.randint(200, 600))
+        elif extension == "png":
+            write_scan(path, rng, vocabulary)
+        else:
+            path.write_text(TEXT_FORMATS[extension](rng.choices(vocabulary, k=rng.randint(2000, 6000))))
+        documents.append((path, mime_type))
+    return documents
+
+
+async def extract_all(factory, documents):
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def extract(path, mime_type):
+        async with semaphore:
+            return await factory.extract_metadata(path, mime_type)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(extract(path, mime_type) for path, mime_type in documents))
+    return time.perf_counter() - started, results
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestExtractionPoolPerformance:
+    """Thread pool versus process pool throughput"""
+
+    @pytest.mark.asyncio
+    async def test_process_pool_throughput(self, mixed_documents):
+        """Extraction through the process pool scales with the available cores"""
+        threaded, threaded_results = await extract_all(MetadataExtractorFactory(), mixed_documents)
+
+        factory = MetadataExtractorFactory(process_pool=ExtractionProcessPool())
+        try:
+            # Start the workers before timing
+            await extract_all(factory, mixed_documents[:factory.process_pool.max_workers * 2])
+            pooled, pooled_results = await extract_all(factory, mixed_documents)
+        finally:
+            await factory.close()
+
+        cores = os.cpu_count() or 1
+        print(f"\nExtracted {len(mixed_documents)} documents ({len(set(FORMATS))} formats) on {cores} cores: "
+              f"thread pool {len(mixed_documents) / threaded:.0f}/s, "
+              f"process pool {len(mixed_documents) / pooled:.0f}/s ({threaded / pooled:.2f}x)")
+        assert [m.word_count for m in pooled_results] == [m.word_count for m in threaded_results]
+        assert not any(m.errors for m in pooled_results)
+        if cores >= 2:
+            assert threaded / pooled >= min(MIN_SPEEDUP, cores * 0.6)
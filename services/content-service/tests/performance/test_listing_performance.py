@@ -0,0 +1,62 @@
+"""
+Listing benchmarks for Content Service.
+
+Lists 1000 stored 256KB files through the metadata index and through the
+legacy walk that re-hashes and sniffs every file.
+"""
+
+import hashlib
+import os
+import time
+
+import pytest
+
+from storage import LocalFileStorage
+
+FILE_COUNT = 1000
+FILE_SIZE = 256 * 1024
+
+
+@pytest.fixture(scope="module")
+def populated_storage(tmp_path_factory):
+    base_path = tmp_path_factory.mktemp("listing")
+    storage = LocalFileStorage({"base_path": str(base_path)})
+    block = os.urandom(FILE_SIZE)
+    for i in range(FILE_COUNT):
+        path = base_path / "org-a" / f"{i // 100:02d}" / f"doc-{i:04d}.pdf"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(i.to_bytes(4, "big") + block)
+    return storage
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestListingPerformance:
+    """Cost of listing stored files"""
+
+    @pytest.mark.asyncio
+    async def test_indexed_vs_walking_listing(self, populated_storage):
+        """Indexed listings don't read file contents"""
+        storage = populated_storage
+
+        storage.metadata_index.mark_complete(False)
+        start = time.perf_counter()
+        walked = await storage.list_files(limit=FILE_COUNT)
+        walk_seconds = time.perf_counter() - start
+
+        # The walk backfilled the index; rebuild anyway to time recovery
+        await storage.rebuild_index()
+
+        start = time.perf_counter()
+        indexed = await storage.list_files(limit=FILE_COUNT)
+        index_seconds = time.perf_counter() - start
+
+        print(f"\nList {FILE_COUNT} x {FILE_SIZE // 1024}KB files:")
+        print(f"  walk + hash    {walk_seconds * 1000:8.1f}ms")
+        print(f"  metadata index {index_seconds * 1000:8.1f}ms")
+
+        assert len(indexed) == len(walked) == FILE_COUNT
+        assert indexed[0].hash == hashlib.sha256(
+            (storage.base_path / indexed[0].path).read_bytes()
+        ).hexdigest()
+        assert index_seconds < walk_seconds
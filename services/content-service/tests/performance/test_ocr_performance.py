@@ -0,0 +1,70 @@
+"""
+OCR throughput benchmarks for Content Service.
+
+Renders OCR_BENCHMARK_PAGES scanned-looking pages and recognizes them with
+a single worker and with OCR_WORKERS concurrent tesseract processes. The
+benchmark needs the tesseract binary and is skipped without it.
+"""
+
+import os
+import random
+import time
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+ImageDraw = pytest.importorskip("PIL.ImageDraw")
+pytesseract = pytest.importorskip("pytesseract")
+
+from extractors import OCREngine
+from extractors.ocr_engine import OCR_WORKERS
+
+PAGES = int(os.getenv("OCR_BENCHMARK_PAGES", 12))
+MIN_SPEEDUP = float(os.getenv("OCR_MIN_SPEEDUP", 1.5))
+
+try:
+    pytesseract.get_tesseract_version()
+    HAVE_TESSERACT = True
+except Exception:
+    HAVE_TESSERACT = False
+
+
+@pytest.fixture(scope="module")
+def scanned_pages():
+    rng = random.Random(11)
+    vocabulary = ["".join(rng.choice("abcdefghilmnoprstu") for _ in range(rng.randint(3, 9))) for _ in range(500)]
+    pages = []
+    for _ in range(PAGES):
+        image = Image.new("L", (2480, 3508), 235)  # A4 at 300 dpi
+        draw = ImageDraw.Draw(image)
+        for line in range(60):
+            draw.text((150, 150 + line * 52), " ".join(rng.choices(vocabulary, k=12)), fill=20)
+        image.info['dpi'] = (300, 300)
+        pages.append(image)
+    return pages
+
+
+def recognize_all(engine, pages):
+    started = time.perf_counter()
+    result = engine.recognize(enumerate(pages, start=1))
+    return time.perf_counter() - started, result
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+@pytest.mark.skipif(not HAVE_TESSERACT, reason="tesseract is not installed")
+class TestOCRPerformance:
+    """Serial vs concurrent page recognition"""
+
+    def test_pages_are_recognized_concurrently(self, scanned_pages):
+        if OCR_WORKERS < 2:
+            pytest.skip("needs more than one CPU")
+
+        serial, serial_result = recognize_all(OCREngine(max_workers=1), scanned_pages)
+        parallel, parallel_result = recognize_all(OCREngine(max_workers=OCR_WORKERS), scanned_pages)
+
+        print(f"\n{PAGES} pages: 1 worker {serial:.2f}s, {OCR_WORKERS} workers {parallel:.2f}s "
+              f"({serial / parallel:.1f}x), {parallel_result.word_count} words")
+        assert parallel_result.text == serial_result.text
+        assert not any(page.error for page in parallel_result.pages)
+        assert serial / parallel >= MIN_SPEEDUP
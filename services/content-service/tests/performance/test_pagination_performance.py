@@ -0,0 +1,88 @@
+"""
+Pagination benchmarks for Content Service.
+
+Pages through 200k rows of one organization on SQLite with an
+(organization_id, created_at, id) index, comparing the latency of shallow
+and deep pages for OFFSET and keyset pagination.
+"""
+
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+
+from repositories.pagination import decode_cursor, encode_cursor
+
+ROW_COUNT = 200_000
+PAGE_SIZE = 50
+DEEP_OFFSET = 150_000
+
+
+@pytest.fixture(scope="module")
+def audit_db():
+    conn = sqlite3.connect(":memory:")
+    conn.execute(
+        "CREATE TABLE document_audit (id TEXT PRIMARY KEY, organization_id TEXT, "
+        "created_at TEXT, action TEXT)"
+    )
+    conn.execute(
+        "CREATE INDEX idx_audit_org ON document_audit(organization_id, created_at DESC, id DESC)"
+    )
+    start = datetime(2026, 1, 1)
+    conn.executemany(
+        "INSERT INTO document_audit VALUES (?, 'org-a', ?, 'read')",
+        ((str(uuid4()), (start + timedelta(seconds=i // 3)).isoformat()) for i in range(ROW_COUNT))
+    )
+    return conn
+
+
+def offset_page(conn, offset):
+    return conn.execute(
+        "SELECT id, created_at FROM document_audit WHERE organization_id = 'org-a' "
+        "ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+        (PAGE_SIZE + 1, offset)
+    ).fetchall()
+
+
+def keyset_page(conn, cursor):
+    created_at, entity_id = decode_cursor(cursor)
+    return conn.execute(
+        "SELECT id, created_at FROM document_audit WHERE organization_id = 'org-a' "
+        "AND (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT ?",
+        (created_at.isoformat(), str(entity_id), PAGE_SIZE + 1)
+    ).fetchall()
+
+
+def timed(fn, *args, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        rows = fn(*args)
+    return (time.perf_counter() - start) / repeat, rows
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestPaginationPerformance:
+    """Latency of page N for OFFSET vs keyset pagination"""
+
+    def test_deep_page_latency(self, audit_db):
+        """Keyset page latency doesn't grow with page depth"""
+        shallow_offset, _ = timed(offset_page, audit_db, 0)
+        deep_offset, deep_rows = timed(offset_page, audit_db, DEEP_OFFSET)
+
+        # Cursor pointing at the row just before the deep page
+        before_id, before_created = offset_page(audit_db, DEEP_OFFSET - 1)[0]
+        cursor = encode_cursor(datetime.fromisoformat(before_created), before_id)
+        shallow_keyset, _ = timed(keyset_page, audit_db, encode_cursor(datetime(2100, 1, 1), uuid4()))
+        deep_keyset, keyset_rows = timed(keyset_page, audit_db, cursor)
+
+        print(f"\nPage of {PAGE_SIZE} from {ROW_COUNT} rows:")
+        print(f"  offset page 1        {shallow_offset * 1000:8.3f}ms")
+        print(f"  offset row {DEEP_OFFSET:<9} {deep_offset * 1000:8.3f}ms")
+        print(f"  keyset page 1        {shallow_keyset * 1000:8.3f}ms")
+        print(f"  keyset row {DEEP_OFFSET:<9} {deep_keyset * 1000:8.3f}ms")
+
+        assert keyset_rows == deep_rows
+        assert deep_keyset < deep_offset / 10
@@ -0,0 +1,95 @@
+"""
+Large PDF text extraction benchmarks for Content Service.
+
+Writes a PDF_BENCHMARK_PAGES page PDF and extracts its text twice: the
+previous way, joining every page into one string that the keyword, word
+count and language helpers each rescan, and page by page through the
+streaming analyzer with a capped text store. Reports time and peak RSS for
+both.
+"""
+
+import gc
+import os
+import random
+import time
+
+import pytest
+
+from extractors import PDFExtractor
+
+from .sample_documents import write_pdf
+
+PyPDF2 = pytest.importorskip("PyPDF2")
+
+PAGES = int(os.getenv("PDF_BENCHMARK_PAGES", 2000))
+MAX_TEXT_CHARS = int(os.getenv("PDF_BENCHMARK_MAX_TEXT_CHARS", 1_000_000))
+
+
+def join_then_analyze(extractor, file_path):
+    """The previous extraction: build the whole text, then rescan it per statistic."""
+    with open(file_path, "rb") as file:
+        reader = PyPDF2.PdfReader(file)
+        text = "\n".join(text for text in (page.extract_text() for page in reader.pages) if text)
+    content_lower = text.lower()
+    return {
+        "word_count": extractor._count_words(text),
+        "character_count": extractor._count_characters(text),
+        "language": extractor._detect_language(text),
+        "keywords": extractor._extract_keywords(text),
+        "tables": content_lower.count("table"),
+        "categories": extractor._suggest_categories(text),
+        "tags": extractor._extract_keywords(text, max_keywords=10),
+        "text_chars": len(text)
+    }
+
+
+@pytest.fixture(scope="module")
+def large_pdf(tmp_path_factory):
+    rng = random.Random(9)
+    vocabulary = ["".join(rng.choice("abcdefghilmnoprstu") for _ in range(rng.randint(2, 10))) for _ in range(5000)]
+    vocabulary += ["the", "and", "budget", "report", "with", "for", "this", "table"]
+    path = tmp_path_factory.mktemp("pdf") / "large.pdf"
+    write_pdf(path, rng, vocabulary, PAGES)
+    return path
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestPDFStreamingPerformance:
+    """Page-by-page analysis versus joining the whole text"""
+
+    def test_streaming_extraction_peak_rss(self, large_pdf, peak_rss):
+        """Streaming keeps peak memory near the stored-text cap and gives the same statistics"""
+        extractor = PDFExtractor(max_text_chars=MAX_TEXT_CHARS)
+
+        gc.collect()
+        with peak_rss() as streaming_rss:
+            started = time.perf_counter()
+            pdf_data = extractor._extract_pdf_sync(large_pdf)
+            analysis = pdf_data["analysis"]
+            streamed = {
+                "word_count": analysis.word_count,
+                "character_count": analysis.character_count,
+                "language": analysis.language(),
+                "keywords": analysis.keywords(),
+                "tables": analysis.term_counts["table"],
+                "categories": extractor._categories_for_terms(analysis.found_terms),
+                "tags": analysis.keywords(max_keywords=10)
+            }
+            streaming_time = time.perf_counter() - started
+        stored_chars = len(analysis.text)
+        del pdf_data, analysis
+
+        gc.collect()
+        with peak_rss() as joined_rss:
+            started = time.perf_counter()
+            joined = join_then_analyze(extractor, large_pdf)
+            joined_time = time.perf_counter() - started
+
+        print(f"\n{PAGES} pages, {joined['text_chars'] / 1e6:.1f}M characters, {joined['word_count']:,} words: "
+              f"joined {joined_time:.2f}s / +{joined_rss.peak_delta_mb:.0f}MB peak, "
+              f"streaming {streaming_time:.2f}s / +{streaming_rss.peak_delta_mb:.0f}MB peak "
+              f"({stored_chars / 1e6:.1f}M characters stored)")
+        assert {key: joined[key] for key in streamed} == streamed
+        assert stored_chars <= MAX_TEXT_CHARS
+        assert streaming_rss.peak_delta_mb < joined_rss.peak_delta_mb
@@ -0,0 +1,82 @@
+"""
+Processing queue throughput benchmarks for Content Service.
+
+Runs QUEUE_BENCHMARK_TASKS tasks through enqueue, dequeue and complete
+against the Redis at QUEUE_BENCHMARK_REDIS_URL with QUEUE_BENCHMARK_CONCURRENCY
+producers and consumers, and reports tasks per second. Skipped when no
+Redis is reachable; the benchmark flushes the selected database.
+"""
+
+import asyncio
+import os
+import time
+import uuid
+
+import pytest
+import pytest_asyncio
+
+from processing.queue_manager import ProcessingQueueManager, ProcessingTask
+
+REDIS_URL = os.getenv("QUEUE_BENCHMARK_REDIS_URL", "redis://localhost:6379/15")
+TASKS = int(os.getenv("QUEUE_BENCHMARK_TASKS", 5000))
+CONCURRENCY = int(os.getenv("QUEUE_BENCHMARK_CONCURRENCY", 16))
+MIN_TASKS_PER_SECOND = float(os.getenv("QUEUE_MIN_TASKS_PER_SECOND", 500))
+
+
+@pytest_asyncio.fixture
+async def queue():
+    manager = ProcessingQueueManager(REDIS_URL, queue_prefix="benchmark_processing")
+    try:
+        await manager.connect()
+    except Exception as e:
+        pytest.skip(f"Redis not available at {REDIS_URL}: {e}")
+    await manager.redis_client.flushdb()
+    yield manager
+    await manager.redis_client.flushdb()
+    await manager.disconnect()
+
+
+def make_task(i):
+    return ProcessingTask(
+        id=str(uuid.uuid4()), document_id=str(uuid.uuid4()), organization_id="org", user_id="user",
+        task_type="metadata_extraction", priority=1 + i % 10,
+        file_path=f"/storage/documents/{i}.pdf", mime_type="application/pdf",
+        parameters={"file_hash": uuid.uuid4().hex}
+    )
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestQueuePerformance:
+    """Task throughput against a local Redis"""
+
+    @pytest.mark.asyncio
+    async def test_queue_throughput(self, queue):
+        tasks = [make_task(i) for i in range(TASKS)]
+
+        async def produce(batch):
+            for task in batch:
+                assert await queue.enqueue_task(task)
+
+        async def consume(counts):
+            while (task := await queue.dequeue_task(timeout=1)) is not None:
+                await queue.complete_task(task, {"ok": True})
+                counts.append(task.id)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(produce(tasks[i::CONCURRENCY]) for i in range(CONCURRENCY)))
+        enqueued = time.perf_counter()
+        completed = []
+        await asyncio.gather(*(consume(completed) for _ in range(CONCURRENCY)))
+        # Each consumer ends with one empty dequeue that waits out its timeout
+        finished = time.perf_counter() - 1
+
+        enqueue_rate = TASKS / (enqueued - started)
+        drain_rate = TASKS / (finished - enqueued)
+        print(f"\n{TASKS} tasks, {CONCURRENCY} clients: enqueue {enqueue_rate:.0f} tasks/s, "
+              f"dequeue+complete {drain_rate:.0f} tasks/s")
+
+        stats = await queue.get_queue_stats()
+        assert sorted(completed) == sorted(task.id for task in tasks)
+        assert (stats["completed_count"], stats["processing_count"]) == (TASKS, 0)
+        assert min(enqueue_rate, drain_rate) >= MIN_TASKS_PER_SECOND
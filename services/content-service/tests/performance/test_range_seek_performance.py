@@ -0,0 +1,125 @@
+"""
+Range request benchmarks for Content Service.
+
+Measures fetching a page-sized slice deep inside a 500MB document with a
+Range request against the legacy stream endpoint, which always starts at byte
+0 so a client has to read everything up to the offset.
+"""
+
+import os
+import time
+
+import aiofiles
+import pytest
+
+from transport import build_file_response, make_etag
+
+MB = 1024 * 1024
+FILE_SIZE = 500 * MB
+SLICE_OFFSET = 400 * MB
+SLICE_LENGTH = 256 * 1024
+SEEKS = 20
+
+
+async def _collect_body(response, headers=None):
+    """Run an ASGI response and return (status, bytes received)."""
+    received = bytearray()
+    status = {}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status["code"] = message["status"]
+        else:
+            received.extend(message.get("body", b""))
+
+    scope = {"type": "http", "method": "GET", "headers": headers or []}
+    await response(scope, receive, send)
+    return status["code"], bytes(received)
+
+
+async def _legacy_seek(path, offset: int, length: int) -> bytes:
+    """Legacy stream endpoint: 8KB chunks from byte 0, client discards up to offset."""
+    position = 0
+    wanted = bytearray()
+    async with aiofiles.open(path, 'rb') as file:
+        while chunk := await file.read(8192):
+            chunk_end = position + len(chunk)
+            if chunk_end > offset:
+                wanted.extend(chunk[max(offset - position, 0):])
+                if len(wanted) >= length:
+                    return bytes(wanted[:length])
+            position = chunk_end
+    return bytes(wanted)
+
+
+@pytest.fixture(scope="module")
+def large_document(tmp_path_factory):
+    """500MB sparse document with a marker slice at the seek offset"""
+    path = tmp_path_factory.mktemp("ranges") / "large.pdf"
+    marker = os.urandom(SLICE_LENGTH)
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        f.seek(SLICE_OFFSET)
+        f.write(marker)
+        f.truncate(FILE_SIZE)
+    return path, marker
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestRangeSeekPerformance:
+    """Seek latency for ranged reads of large documents"""
+
+    @pytest.mark.asyncio
+    async def test_range_seek_vs_full_stream(self, large_document):
+        """Ranged reads at 400MB return the right bytes far faster than streaming"""
+        path, marker = large_document
+        range_header = f"bytes={SLICE_OFFSET}-{SLICE_OFFSET + SLICE_LENGTH - 1}"
+
+        start = time.perf_counter()
+        for _ in range(SEEKS):
+            response = build_file_response(
+                {"range": range_header}, path, make_etag("0" * 64), "application/pdf"
+            )
+            status, body = await _collect_body(response)
+        range_time = (time.perf_counter() - start) / SEEKS
+
+        assert status == 206
+        assert body == marker
+
+        start = time.perf_counter()
+        legacy_body = await _legacy_seek(path, SLICE_OFFSET, SLICE_LENGTH)
+        legacy_time = time.perf_counter() - start
+
+        assert legacy_body == marker
+
+        print(
+            f"\nSeek to {SLICE_OFFSET // MB}MB in {FILE_SIZE // MB}MB file: "
+            f"range {range_time * 1000:.2f}ms, legacy stream {legacy_time * 1000:.0f}ms "
+            f"({legacy_time / range_time:.0f}x)"
+        )
+
+        assert range_time * 10 < legacy_time
+
+    @pytest.mark.asyncio
+    async def test_multi_range_page_fetch(self, large_document):
+        """A viewer fetching several scattered pages pays only for those pages"""
+        path, marker = large_document
+        offsets = [i * 50 * MB for i in range(10)]
+        range_header = "bytes=" + ",".join(f"{o}-{o + 64 * 1024 - 1}" for o in offsets)
+
+        start = time.perf_counter()
+        response = build_file_response(
+            {"range": range_header}, path, make_etag("0" * 64), "application/pdf"
+        )
+        status, body = await _collect_body(response)
+        elapsed = time.perf_counter() - start
+
+        print(f"\n10-range multipart fetch from {FILE_SIZE // MB}MB file: {elapsed * 1000:.2f}ms")
+
+        assert status == 206
+        assert len(body) == response.content_length
+        assert len(body) < 2 * MB
@@ -0,0 +1,55 @@
+"""
+Full-text search latency benchmarks for Content Service.
+
+Runs against a migrated Postgres database named by
+SEARCH_BENCHMARK_DATABASE_URL, generating SEARCH_BENCHMARK_DOCUMENTS
+synthetic documents first if the corpus is smaller. The production target
+is p95 under 100ms at 10M documents; generate that corpus once with
+
+    python -m tests.performance.search_benchmark generate --documents 10000000
+"""
+
+import os
+
+import pytest
+
+from .search_benchmark import (
+    corpus_size, generate_corpus, run_latency_harness, session_factory_for
+)
+
+DATABASE_URL = os.getenv("SEARCH_BENCHMARK_DATABASE_URL")
+CORPUS_DOCUMENTS = int(os.getenv("SEARCH_BENCHMARK_DOCUMENTS", 200_000))
+P95_TARGET_MS = float(os.getenv("SEARCH_P95_TARGET_MS", 100))
+
+
+@pytest.fixture(scope="module")
+def search_corpus():
+    return session_factory_for(DATABASE_URL)
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+@pytest.mark.database
+@pytest.mark.asyncio
+@pytest.mark.skipif(not DATABASE_URL, reason="SEARCH_BENCHMARK_DATABASE_URL not set")
+class TestSearchPerformance:
+    """Search latency percentiles over a synthetic corpus"""
+
+    async def test_permission_filtered_p95(self, search_corpus):
+        """Permission-filtered searches with highlights and facets meet the p95 target"""
+        existing = await corpus_size(search_corpus)
+        if existing < CORPUS_DOCUMENTS:
+            await generate_corpus(search_corpus, CORPUS_DOCUMENTS - existing)
+
+        report = await run_latency_harness(search_corpus, queries=300)
+
+        print(f"\nSearch over {max(existing, CORPUS_DOCUMENTS):,} documents")
+        print(f"  {report.summary()}")
+        assert report.p95 < P95_TARGET_MS
+
+    async def test_organization_wide_p95(self, search_corpus):
+        """Searches without a permission filter meet the p95 target"""
+        report = await run_latency_harness(search_corpus, queries=300, permission_filtered=False)
+
+        print(f"\n  {report.summary()}")
+        assert report.p95 < P95_TARGET_MS
@@ -0,0 +1,128 @@
+"""
+Token validation benchmarks for Content Service.
+
+Measures requests/sec for GET /api/v1/documents against a local Identity
+Service stub (2ms per validation, like an identity database lookup) with
+the legacy per-request client and with the cached, pooled TokenValidator.
+Repositories are mocked so the numbers isolate authentication cost.
+"""
+
+import asyncio
+import json
+import time
+from unittest.mock import AsyncMock, Mock, patch
+
+import httpx
+import pytest
+
+import main
+from auth import TokenValidator
+from database import get_db_session
+from repositories import Page
+
+REQUESTS = 200
+CONCURRENCY = 20
+TOKEN = "bench.token.value"
+USER = {
+    "user_id": "12345678-1234-5678-9012-123456789012",
+    "organization_id": "87654321-4321-8765-2109-876543210987",
+    "email": "bench@example.com",
+    "roles": ["user"]
+}
+
+
+async def _identity_stub(reader, writer):
+    """Minimal keep-alive HTTP/1.1 /auth/validate endpoint."""
+    body = json.dumps(USER).encode()
+    try:
+        while True:
+            headers = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in headers.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":")[1])
+            if length:
+                await reader.readexactly(length)
+            await asyncio.sleep(0.002)  # Identity database lookup
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionResetError):
+        pass
+    finally:
+        writer.close()
+
+
+def _legacy_validate(identity_url):
+    """The previous dependency: a new client and connection per request."""
+    from fastapi import Depends
+
+    async def validate_jwt_token(token=Depends(main.security)):
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            response = await client.post(
+                f"{identity_url}/auth/validate",
+                headers={"Authorization": f"Bearer {token.credentials}"},
+                timeout=5.0
+            )
+            return response.json()
+
+    return validate_jwt_token
+
+
+async def _requests_per_second(client) -> float:
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def one():
+        async with semaphore:
+            response = await client.get(
+                "/api/v1/documents", headers={"Authorization": f"Bearer {TOKEN}"}
+            )
+            assert response.status_code == 200, response.text
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(REQUESTS)])
+    return REQUESTS / (time.perf_counter() - start)
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestTokenValidationPerformance:
+    """Throughput of authenticated document listing"""
+
+    @pytest.mark.asyncio
+    async def test_cached_validation_throughput(self):
+        """Cached validation serves more requests per second"""
+        server = await asyncio.start_server(_identity_stub, "127.0.0.1", 0)
+        identity_url = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+
+        doc_repo = Mock(find_page_by_organization=AsyncMock(return_value=Page()), count_up_to=AsyncMock(return_value=0))
+        audit_repo = Mock(log_action=AsyncMock())
+        validator = TokenValidator(identity_url, cache_ttl_seconds=60)
+
+        main.app.dependency_overrides[get_db_session] = lambda: Mock()
+        transport = httpx.ASGITransport(app=main.app)
+        try:
+            with patch('main.DocumentRepository', return_value=doc_repo), \
+                 patch('main.AuditRepository', return_value=audit_repo), \
+                 patch.object(main, 'token_validator', validator):
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                    main.app.dependency_overrides[main.validate_jwt_token] = _legacy_validate(identity_url)
+                    before = await _requests_per_second(client)
+
+                    del main.app.dependency_overrides[main.validate_jwt_token]
+                    after = await _requests_per_second(client)
+        finally:
+            main.app.dependency_overrides.clear()
+            await validator.close()
+            server.close()
+            await server.wait_closed()
+
+        print(f"\nGET /api/v1/documents ({REQUESTS} requests, {CONCURRENCY} concurrent):")
+        print(f"  per-request validation {before:8.0f} req/s")
+        print(f"  cached validation      {after:8.0f} req/s")
+        print(f"  identity calls: {validator.stats.remote_validations}, cache hits: {validator.stats.hits}")
+
+        assert validator.stats.remote_validations == 1
+        assert after > before
@@ -0,0 +1,107 @@
+"""
+Download transfer benchmarks for Content Service.
+
+Compares the legacy 8KB aiofiles streamer, the chunked positional-read
+fallback and the zero-copy path (with a server stub that performs the
+os.sendfile() a supporting ASGI server would) on a 200MB file, reporting
+throughput and process CPU time.
+"""
+
+import os
+import time
+
+import aiofiles
+import pytest
+
+from transport import ByteRange, FileRangeResponse, TransferMetrics
+
+MB = 1024 * 1024
+FILE_SIZE = 200 * MB
+
+
+@pytest.fixture(scope="module")
+def large_scan(tmp_path_factory):
+    path = tmp_path_factory.mktemp("transfer") / "scan.tiff"
+    block = os.urandom(MB)
+    with open(path, "wb") as f:
+        for _ in range(FILE_SIZE // MB):
+            f.write(block)
+    return path
+
+
+@pytest.fixture
+def sink():
+    fd = os.open(os.devnull, os.O_WRONLY)
+    yield fd
+    os.close(fd)
+
+
+def _server_send(sink_fd):
+    """ASGI send stub that writes bodies to a sink like a real server would."""
+    sent = {"bytes": 0}
+
+    async def send(message):
+        if message["type"] == "http.response.zerocopysend":
+            offset, remaining = message["offset"], message["count"]
+            while remaining > 0:
+                copied = os.sendfile(sink_fd, message["file"].fileno(), offset, remaining)
+                if copied == 0:
+                    break
+                offset += copied
+                remaining -= copied
+                sent["bytes"] += copied
+        elif message["type"] == "http.response.body":
+            sent["bytes"] += os.write(sink_fd, message["body"]) if message["body"] else 0
+
+    return send, sent
+
+
+async def _receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def _timed(coro):
+    wall, cpu = time.perf_counter(), time.process_time()
+    await coro
+    return time.perf_counter() - wall, time.process_time() - cpu
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestTransferPerformance:
+    """Throughput and CPU cost of download transports"""
+
+    @pytest.mark.asyncio
+    async def test_zero_copy_vs_chunked_vs_legacy(self, large_scan, sink):
+        """Zero-copy serves the file with a fraction of the CPU time"""
+
+        async def legacy():
+            async with aiofiles.open(large_scan, 'rb') as file:
+                while chunk := await file.read(8192):
+                    os.write(sink, chunk)
+
+        results = {"legacy 8KB": await _timed(legacy())}
+
+        for label, scope in [
+            ("chunked 256KB", {"type": "http", "method": "GET", "scheme": "http"}),
+            ("zero-copy", {
+                "type": "http", "method": "GET", "scheme": "http",
+                "extensions": {"http.response.zerocopysend": {}}
+            }),
+        ]:
+            metrics = TransferMetrics()
+            response = FileRangeResponse(
+                large_scan, [ByteRange(0, FILE_SIZE - 1)],
+                chunk_size=256 * 1024, metrics=metrics
+            )
+            send, sent = _server_send(sink)
+            results[label] = await _timed(response({**scope}, _receive, send))
+            assert sent["bytes"] == FILE_SIZE
+            assert metrics.total_bytes == FILE_SIZE
+
+        print(f"\n{FILE_SIZE // MB}MB download:")
+        for label, (wall, cpu) in results.items():
+            print(f"  {label:14s} {FILE_SIZE / MB / wall:8.0f} MB/s  cpu {cpu * 1000:7.1f}ms")
+
+        assert results["zero-copy"][1] < results["legacy 8KB"][1]
+        assert results["chunked 256KB"][1] < results["legacy 8KB"][1]
@@ -0,0 +1,116 @@
+"""
+Upload pipeline benchmarks for Content Service.
+
+Compares the legacy validate/save/re-hash upload path (three passes over the
+upload) with the single-pass streaming ingest, reporting throughput and peak
+RSS. The 1GB case only runs with CONTENT_SERVICE_BENCH_LARGE=1.
+"""
+
+import hashlib
+import os
+import time
+from pathlib import Path
+
+import aiofiles
+import pytest
+from fastapi import UploadFile
+
+from storage.ingest import ingest_upload
+
+MB = 1024 * 1024
+
+BENCH_SIZES = [1 * MB, 100 * MB]
+if os.getenv("CONTENT_SERVICE_BENCH_LARGE") == "1":
+    BENCH_SIZES.append(1024 * MB)
+
+
+class CountingUploadFile(UploadFile):
+    """UploadFile that counts how many bytes are read from it."""
+
+    bytes_read = 0
+
+    async def read(self, size: int = -1) -> bytes:
+        data = await super().read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+def _make_source_file(directory: Path, size: int) -> Path:
+    """Write a PDF-looking file of the given size."""
+    path = directory / f"source_{size}.pdf"
+    block = os.urandom(MB)
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        remaining = size - 9
+        while remaining > 0:
+            f.write(block[:min(MB, remaining)])
+            remaining -= MB
+    return path
+
+
+async def _legacy_upload(file: UploadFile, destination: Path) -> str:
+    """Legacy upload path: sniff, save in 8KB chunks, then re-read to hash."""
+    import magic
+
+    content_start = await file.read(1024)
+    await file.seek(0)
+    magic.from_buffer(content_start, mime=True)
+
+    async with aiofiles.open(destination, 'wb') as f:
+        while chunk := await file.read(8192):
+            await f.write(chunk)
+
+    file_hash = hashlib.sha256()
+    await file.seek(0)
+    while chunk := await file.read(8192):
+        file_hash.update(chunk)
+    await file.seek(0)
+
+    return file_hash.hexdigest()
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestUploadPipelinePerformance:
+    """Throughput and memory benchmarks for the upload pipeline"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("size", BENCH_SIZES, ids=lambda s: f"{s // MB}MB")
+    async def test_single_pass_vs_legacy(self, size, tmp_path, peak_rss):
+        """Single-pass ingest reads each byte once and is at least as fast"""
+        source_path = _make_source_file(tmp_path, size)
+
+        with open(source_path, "rb") as handle:
+            legacy_file = CountingUploadFile(file=handle, filename="bench.pdf")
+            start = time.perf_counter()
+            with peak_rss() as legacy_rss:
+                legacy_hash = await _legacy_upload(legacy_file, tmp_path / "legacy.pdf")
+            legacy_time = time.perf_counter() - start
+        os.remove(tmp_path / "legacy.pdf")
+
+        with open(source_path, "rb") as handle:
+            ingest_file = CountingUploadFile(file=handle, filename="bench.pdf")
+            start = time.perf_counter()
+            with peak_rss() as ingest_rss:
+                result = await ingest_upload(
+                    ingest_file, tmp_path / "ingest.pdf", max_size=size
+                )
+            ingest_time = time.perf_counter() - start
+        os.remove(tmp_path / "ingest.pdf")
+
+        legacy_throughput = size / MB / legacy_time
+        ingest_throughput = size / MB / ingest_time
+        print(
+            f"\n{size // MB}MB upload: "
+            f"legacy {legacy_throughput:.1f} MB/s, peak RSS +{legacy_rss.peak_delta_mb:.1f}MB, "
+            f"{legacy_file.bytes_read / size:.2f} reads/byte | "
+            f"single-pass {ingest_throughput:.1f} MB/s, peak RSS +{ingest_rss.peak_delta_mb:.1f}MB, "
+            f"{ingest_file.bytes_read / size:.2f} reads/byte"
+        )
+
+        assert result.sha256 == legacy_hash
+        assert result.size == size
+        assert ingest_file.bytes_read == size
+        assert legacy_file.bytes_read > 2 * size
+        if size >= 100 * MB:
+            assert ingest_throughput > legacy_throughput
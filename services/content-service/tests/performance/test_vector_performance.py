@@ -0,0 +1,61 @@
+"""
+Semantic search recall and latency benchmarks for Content Service.
+
+Builds a synthetic index of VECTOR_BENCHMARK_CHUNKS chunk embeddings in
+VECTOR_BENCHMARK_DIRECTORY (a temporary directory by default), reusing
+an existing corpus of that size. The production targets are recall@10
+of at least 0.9 and p95 under 50ms at 1M and 10M chunks; build those
+corpora once with
+
+    python -m tests.performance.vector_benchmark generate --directory /data/vectors-10m --chunks 10000000
+
+and point VECTOR_BENCHMARK_DIRECTORY at the directory.
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from .vector_benchmark import CorpusConfig, generate_corpus, run_benchmark
+
+CORPUS_CHUNKS = int(os.getenv("VECTOR_BENCHMARK_CHUNKS", 100_000))
+CORPUS_DIRECTORY = os.getenv("VECTOR_BENCHMARK_DIRECTORY")
+RECALL_TARGET = float(os.getenv("VECTOR_RECALL_TARGET", 0.9))
+P95_TARGET_MS = float(os.getenv("VECTOR_P95_TARGET_MS", 50))
+
+
+@pytest.fixture(scope="module")
+def vector_corpus(tmp_path_factory):
+    directory = Path(CORPUS_DIRECTORY) if CORPUS_DIRECTORY else tmp_path_factory.mktemp("vectors")
+    try:
+        if CorpusConfig.load(directory).chunks == CORPUS_CHUNKS:
+            return directory
+    except FileNotFoundError:
+        pass
+    generate_corpus(directory, CorpusConfig(chunks=CORPUS_CHUNKS))
+    return directory
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestVectorSearchPerformance:
+    """Recall against an exact scan and per-query latency"""
+
+    def test_inverted_list_search(self, vector_corpus):
+        """Large organizations are searched through the inverted lists"""
+        report, index = run_benchmark(vector_corpus, queries=200)
+
+        print(f"\nVector search over {index.chunk_count():,} chunks in {index.list_count:,} lists")
+        print(f"  {report.summary()}")
+        assert report.recall >= RECALL_TARGET
+        assert report.p95 < P95_TARGET_MS
+
+    def test_small_organization_exact_search(self, vector_corpus):
+        """Small organizations are scanned exactly"""
+        report, _ = run_benchmark(vector_corpus, queries=200, small_organization=True)
+
+        print(f"\n  {report.summary()}")
+        # Only int8 quantization separates the scan from the exact answer
+        assert report.recall >= 0.97
+        assert report.p95 < P95_TARGET_MS
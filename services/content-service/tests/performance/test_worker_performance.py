@@ -0,0 +1,93 @@
+"""
+Background worker burst benchmarks for Content Service.
+
+Enqueues a burst of WORKER_BENCHMARK_TASKS short tasks into the Redis at
+QUEUE_BENCHMARK_REDIS_URL and drains it with one BackgroundWorker running
+WORKER_BENCHMARK_CONCURRENCY tasks at a time, with and without prefetch.
+Utilization is the ideal drain time (tasks x task time / slots) over the
+measured one. Skipped when no Redis is reachable; the benchmark flushes the
+selected database.
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+
+from processing.background_worker import BackgroundWorker
+from processing.queue_manager import ProcessingQueueManager, ProcessingTask
+
+REDIS_URL = os.getenv("QUEUE_BENCHMARK_REDIS_URL", "redis://localhost:6379/15")
+TASKS = int(os.getenv("WORKER_BENCHMARK_TASKS", 1000))
+CONCURRENCY = int(os.getenv("WORKER_BENCHMARK_CONCURRENCY", 8))
+TASK_SECONDS = float(os.getenv("WORKER_BENCHMARK_TASK_SECONDS", 0.01))
+MIN_UTILIZATION = float(os.getenv("WORKER_MIN_UTILIZATION", 0.6))
+
+
+@pytest_asyncio.fixture
+async def queue():
+    manager = ProcessingQueueManager(REDIS_URL, queue_prefix="benchmark_processing")
+    try:
+        await manager.connect()
+    except Exception as e:
+        pytest.skip(f"Redis not available at {REDIS_URL}: {e}")
+    await manager.redis_client.flushdb()
+    yield manager
+    await manager.redis_client.flushdb()
+    await manager.disconnect()
+
+
+class SleepingProcessor:
+    def __init__(self):
+        self.processed = 0
+
+    async def process_task(self, task):
+        await asyncio.sleep(TASK_SECONDS)
+        self.processed += 1
+        return {"ok": True}
+
+
+async def drain_burst(queue, prefetch_count):
+    for _ in range(TASKS):
+        await queue.enqueue_task(ProcessingTask(
+            id=str(uuid.uuid4()), document_id=str(uuid.uuid4()), organization_id="org",
+            user_id="user", task_type="metadata_extraction"
+        ))
+
+    processor = SleepingProcessor()
+    worker = BackgroundWorker(
+        queue, max_concurrent_tasks=CONCURRENCY, polling_interval=1, prefetch_count=prefetch_count
+    )
+    worker.processors = {"metadata_extraction": processor}
+
+    with patch.object(queue, "dequeue_tasks", wraps=queue.dequeue_tasks) as dequeue:
+        started = time.perf_counter()
+        running = asyncio.create_task(worker.start())
+        while processor.processed < TASKS:
+            await asyncio.sleep(0.005)
+        elapsed = time.perf_counter() - started
+        await worker.shutdown()
+        await running
+
+    utilization = TASKS * TASK_SECONDS / CONCURRENCY / elapsed
+    return elapsed, utilization, dequeue.call_count
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestWorkerPerformance:
+    """Worker utilization under a burst"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("prefetch_count", [0, CONCURRENCY])
+    async def test_burst_keeps_slots_busy(self, queue, prefetch_count):
+        elapsed, utilization, round_trips = await drain_burst(queue, prefetch_count)
+
+        print(f"\n{TASKS} tasks x {TASK_SECONDS * 1000:.0f}ms, {CONCURRENCY} slots, prefetch {prefetch_count}: "
+              f"{elapsed:.2f}s, utilization {utilization:.0%}, {round_trips} dequeue round trips")
+        assert round_trips < TASKS
+        assert utilization >= MIN_UTILIZATION
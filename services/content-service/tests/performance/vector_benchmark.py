@@ -0,0 +1,249 @@
+"""
+Semantic search benchmark: recall and latency of the vector index.
+
+Fills a VectorIndex with synthetic chunk embeddings drawn around cluster
+centres, the way sentence embeddings of related passages group together,
+then measures per-query latency and document-level recall@k against an
+exact float32 scan. Vectors are regenerated from the seed for the exact
+scan, so recall includes the int8 quantization error.
+
+    python -m tests.performance.vector_benchmark generate --directory /data/vectors --chunks 10000000
+    python -m tests.performance.vector_benchmark run --directory /data/vectors --queries 500 --nprobe 16
+
+Most chunks belong to one large organization, searched through the
+inverted lists; the rest are spread over small organizations that are
+scanned exactly.
+"""
+
+import argparse
+import json
+import statistics
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import List, Optional, Tuple
+from uuid import NAMESPACE_URL, UUID, uuid5
+
+import numpy as np
+
+from search.vector_index import VectorIndex
+
+CONFIG_NAME = "benchmark.json"
+DOCUMENTS_PER_BATCH = 10_000
+LARGE_ORGANIZATION_SHARE = 5        # every 5th document belongs to a small organization
+
+
+@dataclass
+class CorpusConfig:
+    """Parameters that regenerate the same corpus."""
+    chunks: int
+    dimension: int = 384
+    chunks_per_document: int = 8
+    clusters: int = 4096
+    noise: float = 0.6
+    small_organizations: int = 100
+    seed: int = 17
+
+    @property
+    def documents(self) -> int:
+        return self.chunks // self.chunks_per_document
+
+    def save(self, directory: Path) -> None:
+        (Path(directory) / CONFIG_NAME).write_text(json.dumps(asdict(self)))
+
+    @classmethod
+    def load(cls, directory: Path) -> "CorpusConfig":
+        return cls(**json.loads((Path(directory) / CONFIG_NAME).read_text()))
+
+
+def document_id(index: int) -> UUID:
+    return uuid5(NAMESPACE_URL, f"vector-benchmark/document/{index}")
+
+
+def organization_id(index: Optional[int]) -> UUID:
+    """The large organization for None, else small organization index."""
+    name = "large" if index is None else f"small/{index}"
+    return uuid5(NAMESPACE_URL, f"vector-benchmark/organization/{name}")
+
+
+def document_organization(index: int, config: CorpusConfig) -> Optional[int]:
+    if index % LARGE_ORGANIZATION_SHARE:
+        return None
+    return (index // LARGE_ORGANIZATION_SHARE) % config.small_organizations
+
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    return (vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)).astype(np.float32)
+
+
+def cluster_centres(config: CorpusConfig) -> np.ndarray:
+    return _unit(np.random.default_rng(config.seed).standard_normal((config.clusters, config.dimension)))
+
+
+def _around(centres: np.ndarray, rng: np.random.Generator, count: int, config: CorpusConfig) -> np.ndarray:
+    chosen = centres[rng.integers(len(centres), size=count)]
+    noise = rng.standard_normal((count, config.dimension)) * (config.noise / np.sqrt(config.dimension))
+    return _unit(chosen + noise)
+
+
+def batch_vectors(batch: int, centres: np.ndarray, config: CorpusConfig) -> np.ndarray:
+    """Chunk vectors of one batch of documents, shaped (documents, chunks_per_document, dimension)."""
+    first = batch * DOCUMENTS_PER_BATCH
+    documents = min(DOCUMENTS_PER_BATCH, config.documents - first)
+    rng = np.random.default_rng((config.seed, batch))
+    vectors = _around(centres, rng, documents * config.chunks_per_document, config)
+    return vectors.reshape(documents, config.chunks_per_document, config.dimension)
+
+
+def generate_corpus(directory: Path, config: CorpusConfig, progress: bool = False) -> VectorIndex:
+    """Write the corpus into a fresh index and train it."""
+    index = VectorIndex(directory, config.dimension, auto_train=False)
+    centres = cluster_centres(config)
+    spans = [(i * 1000, (i + 1) * 1000) for i in range(config.chunks_per_document)]
+    batches = (config.documents + DOCUMENTS_PER_BATCH - 1) // DOCUMENTS_PER_BATCH
+
+    for batch in range(batches):
+        vectors = batch_vectors(batch, centres, config)
+        first = batch * DOCUMENTS_PER_BATCH
+        index.add_batch(
+            (document_id(first + i), organization_id(document_organization(first + i, config)), vectors[i], spans)
+            for i in range(len(vectors))
+        )
+        if progress:
+            print(f"  {(first + len(vectors)) * config.chunks_per_document:,} chunks", end="\r", flush=True)
+
+    started = time.perf_counter()
+    index.train()
+    if progress:
+        print(f"\nTrained {index.list_count:,} lists in {time.perf_counter() - started:.0f}s")
+    config.save(directory)
+    return index
+
+
+def query_vectors(config: CorpusConfig, count: int) -> np.ndarray:
+    # A stream of its own, distinct from every corpus batch
+    rng = np.random.default_rng((config.seed, 1 << 30))
+    return _around(cluster_centres(config), rng, count, config)
+
+
+def exact_top_documents(
+    config: CorpusConfig,
+    queries: np.ndarray,
+    organization: Optional[int],
+    k: int
+) -> List[set]:
+    """Document-level exact top-k per query within one organization."""
+    centres = cluster_centres(config)
+    best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    best_documents = np.full((len(queries), k), -1, dtype=np.int64)
+    batches = (config.documents + DOCUMENTS_PER_BATCH - 1) // DOCUMENTS_PER_BATCH
+
+    for batch in range(batches):
+        vectors = batch_vectors(batch, centres, config)
+        first = batch * DOCUMENTS_PER_BATCH
+        members = np.array([
+            document_organization(first + i, config) == organization for i in range(len(vectors))
+        ])
+        if not members.any():
+            continue
+        # Best chunk of each member document per query: (queries, documents)
+        chunks = vectors[members].reshape(-1, config.dimension)
+        scores = (chunks @ queries.T).reshape(int(members.sum()), config.chunks_per_document, -1).max(axis=1).T
+        ids = first + np.flatnonzero(members)
+
+        merged_scores = np.concatenate([best_scores, scores], axis=1)
+        merged_ids = np.concatenate([best_documents, np.broadcast_to(ids, scores.shape)], axis=1)
+        keep = np.argpartition(-merged_scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(merged_scores, keep, axis=1)
+        best_documents = np.take_along_axis(merged_ids, keep, axis=1)
+
+    return [{document_id(int(i)) for i in row if i >= 0} for row in best_documents]
+
+
+@dataclass
+class VectorBenchmarkReport:
+    """Latency (milliseconds) and recall of one run."""
+    samples: List[float] = field(default_factory=list)
+    recalls: List[float] = field(default_factory=list)
+
+    def percentile(self, pct: float) -> float:
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    @property
+    def p50(self) -> float:
+        return self.percentile(50)
+
+    @property
+    def p95(self) -> float:
+        return self.percentile(95)
+
+    @property
+    def recall(self) -> float:
+        return statistics.mean(self.recalls)
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.samples)} queries: recall@k {self.recall:.3f}  "
+            f"p50 {self.p50:.2f}ms  p95 {self.p95:.2f}ms  p99 {self.percentile(99):.2f}ms  "
+            f"max {max(self.samples):.2f}ms"
+        )
+
+
+def run_benchmark(
+    directory: Path,
+    queries: int = 200,
+    k: int = 10,
+    nprobe: Optional[int] = None,
+    small_organization: bool = False
+) -> Tuple[VectorBenchmarkReport, VectorIndex]:
+    """Search the corpus in directory and compare with the exact answers."""
+    config = CorpusConfig.load(directory)
+    index = VectorIndex(directory, config.dimension, auto_train=False)
+    organization = 0 if small_organization else None
+    vectors = query_vectors(config, queries)
+    truth = exact_top_documents(config, vectors, organization, k)
+
+    report = VectorBenchmarkReport()
+    for vector, expected in zip(vectors, truth):
+        started = time.perf_counter()
+        matches = index.search(organization_id(organization), vector, limit=k, nprobe=nprobe)
+        report.samples.append((time.perf_counter() - started) * 1000)
+        report.recalls.append(len(expected & {match.document_id for match in matches}) / len(expected))
+    return report, index
+
+
+def _main(args: argparse.Namespace) -> None:
+    directory = Path(args.directory)
+    if args.command == "generate":
+        config = CorpusConfig(chunks=args.chunks, dimension=args.dimension)
+        started = time.perf_counter()
+        generate_corpus(directory, config, progress=True)
+        print(f"Indexed {config.chunks:,} chunks in {time.perf_counter() - started:.0f}s")
+    else:
+        for small in (False, True):
+            report, index = run_benchmark(
+                directory, queries=args.queries, k=args.k, nprobe=args.nprobe, small_organization=small
+            )
+            scope = "small organization (exact)" if small else "large organization (IVF)"
+            print(f"{index.chunk_count():,} chunks, {index.list_count:,} lists, {scope}")
+            print(f"  {report.summary()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vector index recall and latency benchmark")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    generate = subparsers.add_parser("generate", help="Build a synthetic index")
+    generate.add_argument("--directory", required=True)
+    generate.add_argument("--chunks", type=int, default=1_000_000)
+    generate.add_argument("--dimension", type=int, default=384)
+
+    run = subparsers.add_parser("run", help="Measure recall and latency")
+    run.add_argument("--directory", required=True)
+    run.add_argument("--queries", type=int, default=500)
+    run.add_argument("--k", type=int, default=10)
+    run.add_argument("--nprobe", type=int, default=None)
+
+    _main(parser.parse_args())
@@ -0,0 +1,278 @@
+"""
+Tests for the two-tier document ACL cache.
+"""
+
+import asyncio
+import json
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, Mock, patch
+from uuid import uuid4
+
+import fakeredis
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from repositories import AclCache, PermissionResolver
+from repositories.permission_repository import (
+    CHANGED_DOCUMENTS_KEY, PrincipalGrant, principal_keys
+)
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def redis_server():
+    return fakeredis.FakeServer()
+
+
+def make_cache(redis_server=None, **kwargs):
+    client = FakeAsyncRedis(server=redis_server) if redis_server else None
+    return AclCache(redis_client=client, **kwargs)
+
+
+def make_resolver(cache, grants_by_document):
+    """Resolver whose repository serves grants_by_document and counts queries."""
+    resolver = PermissionResolver(Mock(), cache=cache)
+    resolver.repository.get_principal_grants = AsyncMock(
+        side_effect=lambda ids, user_id, roles: {doc: dict(grants_by_document.get(doc, {})) for doc in ids}
+    )
+    return resolver
+
+
+def read_grant(expires_at=None):
+    return PrincipalGrant(frozenset({"read"}), expires_at)
+
+
+def fail_version_bumps(client):
+    """Make INCR in the client's pipelines fail, as if the connection dropped."""
+    make_pipeline = client.pipeline
+
+    def pipeline(*args, **kwargs):
+        pipe = make_pipeline(*args, **kwargs)
+        pipe.incr = Mock(side_effect=ConnectionError("down"))
+        return pipe
+
+    return patch.object(client, "pipeline", side_effect=pipeline)
+
+
+class TestAclCacheTiers:
+    """Hits in the in-process and Redis tiers."""
+
+    async def test_local_tier_hit(self):
+        cache = make_cache()
+        user_id, document_id = uuid4(), uuid4()
+        principals = principal_keys(user_id, ["editor"])
+
+        lookup = await cache.get_many([document_id], principals)
+        assert lookup.misses == [document_id]
+        await cache.put_many(lookup, {document_id: {principals[0]: read_grant(), principals[1]: None}})
+
+        lookup = await cache.get_many([document_id], principals)
+        assert lookup.misses == []
+        assert lookup.entries[document_id][principals[0]] == read_grant()
+        assert lookup.entries[document_id][principals[1]] is None
+        assert cache.stats.local_hits == 1
+        assert cache.stats.misses == 1
+
+        # Another principal set is not a hit
+        lookup = await cache.get_many([document_id], principal_keys(user_id, ["viewer"]))
+        assert lookup.misses == [document_id]
+
+    async def test_redis_tier_shared_between_instances(self, redis_server):
+        writer, reader = make_cache(redis_server), make_cache(redis_server)
+        document_id = uuid4()
+        principals = principal_keys(uuid4(), [])
+        expires_at = datetime.utcnow() + timedelta(hours=1)
+
+        lookup = await writer.get_many([document_id], principals)
+        await writer.put_many(lookup, {document_id: {principals[0]: read_grant(expires_at)}})
+
+        lookup = await reader.get_many([document_id], principals)
+        assert lookup.entries[document_id][principals[0]] == read_grant(expires_at)
+        assert reader.stats.redis_hits == 1
+
+        # Filled into the reader's local tier
+        await reader.get_many([document_id], principals)
+        assert reader.stats.local_hits == 1
+
+    async def test_local_entries_expire(self):
+        cache = make_cache(local_ttl_seconds=0.0)
+        document_id = uuid4()
+        principals = principal_keys(uuid4(), [])
+
+        lookup = await cache.get_many([document_id], principals)
+        await cache.put_many(lookup, {document_id: {principals[0]: read_grant()}})
+        await asyncio.sleep(0.01)
+
+        assert (await cache.get_many([document_id], principals)).misses == [document_id]
+
+
+class TestAclCacheInvalidation:
+    """Changes to grants are never served from the cache afterwards."""
+
+    async def test_invalidate_bumps_version_for_all_instances(self, redis_server):
+        first, second = make_cache(redis_server), make_cache(redis_server)
+        document_id = uuid4()
+        principals = principal_keys(uuid4(), [])
+
+        lookup = await first.get_many([document_id], principals)
+        await first.put_many(lookup, {document_id: {principals[0]: read_grant()}})
+        await second.get_many([document_id], principals)
+
+        await second.invalidate([document_id])
+
+        # first still has a local copy until the pub/sub message arrives,
+        # but Redis no longer serves the old version
+        assert (await second.get_many([document_id], principals)).misses == [document_id]
+        first.handle_invalidation_message({"versions": {str(document_id): 1}})
+        assert (await first.get_many([document_id], principals)).misses == [document_id]
+        assert second.stats.invalidations == 1
+
+    async def test_fill_racing_an_invalidation_is_dropped(self, redis_server):
+        cache = make_cache(redis_server)
+        document_id = uuid4()
+        principals = principal_keys(uuid4(), [])
+
+        # Read version, then a grant changes before the database result is cached
+        lookup = await cache.get_many([document_id], principals)
+        await cache.invalidate([document_id])
+        await cache.put_many(lookup, {document_id: {principals[0]: None}})
+
+        assert cache.stats.stale_fills_skipped == 1
+        assert (await cache.get_many([document_id], principals)).misses == [document_id]
+
+    async def test_listener_applies_published_invalidations(self, redis_server):
+        publisher, listener = make_cache(redis_server), make_cache(redis_server)
+        document_id = uuid4()
+        principals = principal_keys(uuid4(), [])
+        lookup = await listener.get_many([document_id], principals)
+        await listener.put_many(lookup, {document_id: {principals[0]: read_grant()}})
+
+        shutdown_event = asyncio.Event()
+        task = asyncio.create_task(listener.listen_for_invalidations(shutdown_event))
+        await asyncio.sleep(0.05)
+        await publisher.invalidate([document_id])
+        for _ in range(50):
+            if listener._versions.get(document_id):
+                break
+            await asyncio.sleep(0.02)
+        shutdown_event.set()
+        await task
+
+        assert listener._versions[document_id] == 1
+        assert not listener._local
+        assert listener.stats.invalidation_lag_ms >= 0
+
+    async def test_failed_version_bump_bypasses_redis_until_retried(self, redis_server):
+        writer, cache = make_cache(redis_server), make_cache(redis_server, retry_seconds=0)
+        document_id = uuid4()
+        principals = principal_keys(uuid4(), [])
+        lookup = await writer.get_many([document_id], principals)
+        await writer.put_many(lookup, {document_id: {principals[0]: read_grant()}})
+
+        with fail_version_bumps(cache._fixed_client):
+            await cache.invalidate([document_id])
+            assert cache.cache_info()["acl_cache_unpublished_invalidations"] == 1
+
+            # Redis still holds the old entry; this process neither reads it
+            # nor writes grants under a version Redis has not reached
+            lookup = await cache.get_many([document_id], principals)
+            assert lookup.misses == [document_id]
+            assert cache.stats.redis_hits == 0
+            await cache.put_many(lookup, {document_id: {principals[0]: None}})
+            assert not await FakeAsyncRedis(server=redis_server).exists(f"acl:{document_id}:1")
+
+        # The next lookup that reaches Redis retries the bump
+        await cache.get_many([document_id], principal_keys(uuid4(), []))
+        assert cache.cache_info()["acl_cache_unpublished_invalidations"] == 0
+        assert (await make_cache(redis_server).get_many([document_id], principals)).misses == [document_id]
+
+    async def test_invalidate_pending_uses_session_changes(self):
+        cache = make_cache()
+        cache.invalidate = AsyncMock()
+        document_id = uuid4()
+        session = Mock(info={CHANGED_DOCUMENTS_KEY: {document_id}})
+
+        await cache.invalidate_pending(session)
+        await cache.invalidate_pending(session)
+
+        cache.invalidate.assert_awaited_once_with({document_id})
+        assert CHANGED_DOCUMENTS_KEY not in session.info
+
+    async def test_publishes_versions(self, redis_server):
+        cache = make_cache(redis_server)
+        pubsub = FakeAsyncRedis(server=redis_server).pubsub()
+        await pubsub.subscribe(cache.channel)
+        await pubsub.get_message(timeout=1.0)
+        document_id = uuid4()
+
+        await cache.invalidate([document_id, document_id])
+
+        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+        assert json.loads(message["data"])["versions"] == {str(document_id): 1}
+        await pubsub.close()
+
+
+class TestResolverWithCache:
+    """PermissionResolver reads through the cache."""
+
+    async def test_second_request_needs_no_query(self, redis_server):
+        cache = make_cache(redis_server)
+        user_id = uuid4()
+        documents = [uuid4() for _ in range(10)]
+        grants = {documents[0]: {f"user:{user_id}": read_grant()}}
+
+        first = make_resolver(cache, grants)
+        resolved = await first.resolve(documents, user_id, ["editor"])
+        assert first.queries == 1
+        assert resolved[documents[0]].allows("read")
+        assert resolved[documents[0]].sources == ["direct"]
+        assert not any(resolved[documents[1]].permissions.values())
+
+        second = make_resolver(make_cache(redis_server), grants)
+        resolved = await second.resolve(documents, user_id, ["editor"])
+        assert second.queries == 0
+        assert resolved[documents[0]].allows("read")
+        assert not resolved[documents[1]].allows("read")
+
+    async def test_cached_grant_honours_expiry(self):
+        cache = make_cache()
+        user_id, document_id = uuid4(), uuid4()
+        expires_at = datetime.utcnow() + timedelta(milliseconds=50)
+        grants = {document_id: {f"user:{user_id}": read_grant(expires_at)}}
+
+        assert await make_resolver(cache, grants).check(document_id, user_id, [], "read")
+        await asyncio.sleep(0.1)
+
+        resolver = make_resolver(cache, grants)
+        assert not await resolver.check(document_id, user_id, [], "read")
+        assert resolver.queries == 0
+
+    async def test_falls_back_to_database_when_redis_fails(self):
+        client = Mock()
+        client.mget = AsyncMock(side_effect=ConnectionError("down"))
+        cache = AclCache(redis_client=client, retry_seconds=60)
+        user_id, document_id = uuid4(), uuid4()
+
+        resolver = make_resolver(cache, {document_id: {f"user:{user_id}": read_grant()}})
+        assert await resolver.check(document_id, user_id, [], "read")
+
+        assert resolver.queries == 1
+        assert cache.stats.redis_errors == 1
+        # Redis is skipped while it's down; the local tier still serves
+        assert await make_resolver(cache, {}).check(document_id, user_id, [], "read")
+        assert client.mget.await_count == 1
+
+    async def test_metrics(self):
+        cache = make_cache()
+        user_id, document_id = uuid4(), uuid4()
+
+        await make_resolver(cache, {}).resolve([document_id], user_id, [])
+        await make_resolver(cache, {}).resolve([document_id], user_id, [])
+
+        info = cache.cache_info()
+        assert info["acl_cache_hit_rate"] == 0.5
+        assert info["acl_cache_misses"] == 1
+        assert info["acl_cache_local_hits"] == 1
+        assert info["acl_cache_local_entries"] == 1
+        assert info["acl_cache_redis"] is False
@@ -0,0 +1,236 @@
+"""
+Tests for the batched audit writer.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from repositories.audit_writer import AuditWriter, DEFAULT_SYNCHRONOUS_ACTIONS
+
+
+class RecordingSessions:
+    """Session factory that records executed insert batches."""
+
+    def __init__(self, fail_times=0, integrity_error_for=None, duplicate_ids=()):
+        self.batches = []
+        self.fail_times = fail_times
+        self.integrity_error_for = integrity_error_for
+        self.duplicate_ids = set(duplicate_ids)
+
+    def __call__(self):
+        return self._session()
+
+    @asynccontextmanager
+    async def _session(self):
+        session = MagicMock()
+
+        async def execute(statement, rows):
+            if self.fail_times:
+                self.fail_times -= 1
+                raise ConnectionError("database unavailable")
+            if self.integrity_error_for and any(
+                row["document_id"] == self.integrity_error_for for row in rows
+            ):
+                raise IntegrityError("INSERT", {}, Exception("fk violation"))
+            if any(row["id"] in self.duplicate_ids for row in rows):
+                raise IntegrityError("INSERT", {}, Exception("duplicate key"))
+            self.batches.append(list(rows))
+
+        session.execute = execute
+        yield session
+
+    @property
+    def rows(self):
+        return [row for batch in self.batches for row in batch]
+
+
+def audit_kwargs(action="read", document_id=None):
+    return {
+        "action": action,
+        "user_id": uuid4(),
+        "organization_id": uuid4(),
+        "document_id": document_id or uuid4(),
+        "details": {"filename": "report.pdf"}
+    }
+
+
+def start(writer):
+    """Mark the writer as running without starting its loop."""
+    writer._running = True
+    return writer
+
+
+@pytest.fixture
+def repository():
+    repo = MagicMock()
+    repo.log_action = AsyncMock(return_value="inline-entry")
+    return repo
+
+
+class TestAuditWriter:
+    """Routing and batching behaviour of AuditWriter."""
+
+    @pytest.mark.asyncio
+    async def test_read_actions_are_queued(self, repository):
+        sessions = RecordingSessions()
+        writer = start(AuditWriter(session_factory=sessions, batch_size=10))
+
+        kwargs = audit_kwargs("read")
+        entry = await writer.log_action(repository, **kwargs)
+
+        repository.log_action.assert_not_called()
+        assert writer.pending == 1
+        assert entry.id is not None
+        assert entry.created_at is not None
+        assert entry.resource_id == kwargs["document_id"]
+        assert sessions.batches == []
+
+    @pytest.mark.asyncio
+    async def test_synchronous_actions_are_written_inline(self, repository):
+        writer = start(AuditWriter(session_factory=RecordingSessions()))
+
+        for action in ("delete", "share_document", "revoke_user_permission"):
+            result = await writer.log_action(repository, **audit_kwargs(action))
+            assert result == "inline-entry"
+
+        assert repository.log_action.await_count == 3
+        assert writer.pending == 0
+        assert "delete" in DEFAULT_SYNCHRONOUS_ACTIONS
+
+    @pytest.mark.asyncio
+    async def test_writes_inline_when_not_running(self, repository):
+        writer = AuditWriter(session_factory=RecordingSessions())
+
+        await writer.log_action(repository, **audit_kwargs("read"))
+
+        repository.log_action.assert_awaited_once()
+        assert writer.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_writes_inline_when_disabled(self, repository):
+        writer = start(AuditWriter(session_factory=RecordingSessions(), enabled=False))
+
+        await writer.log_action(repository, **audit_kwargs("read"))
+
+        repository.log_action.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_full_buffer_falls_back_to_inline(self, repository):
+        writer = start(AuditWriter(
+            session_factory=RecordingSessions(), batch_size=2, max_buffer_size=2
+        ))
+
+        for _ in range(3):
+            await writer.log_action(repository, **audit_kwargs("read"))
+
+        assert writer.pending == 2
+        repository.log_action.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_flush_writes_multi_row_batches(self, repository):
+        sessions = RecordingSessions()
+        writer = start(AuditWriter(session_factory=sessions, batch_size=3))
+
+        for _ in range(7):
+            await writer.log_action(repository, **audit_kwargs("read"))
+
+        written = await writer.flush()
+
+        assert written == 7
+        assert [len(batch) for batch in sessions.batches] == [3, 3, 1]
+        assert writer.pending == 0
+        assert writer.snapshot()["audit_batches_written"] == 3
+        row = sessions.rows[0]
+        assert row["action"] == "read"
+        assert row["details"] == {"filename": "report.pdf"}
+        assert row["id"] is not None
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_keeps_events_for_retry(self, repository):
+        sessions = RecordingSessions(fail_times=1)
+        writer = start(AuditWriter(session_factory=sessions, batch_size=10))
+
+        for _ in range(4):
+            await writer.log_action(repository, **audit_kwargs("read"))
+
+        assert await writer.flush() == 0
+        assert writer.pending == 4
+        assert writer.failed_flushes == 1
+
+        assert await writer.flush() == 4
+        assert len(sessions.rows) == 4
+
+    @pytest.mark.asyncio
+    async def test_deleted_document_is_recorded_without_reference(self, repository):
+        deleted_id = uuid4()
+        sessions = RecordingSessions(integrity_error_for=deleted_id)
+        writer = start(AuditWriter(session_factory=sessions, batch_size=10))
+
+        await writer.log_action(repository, **audit_kwargs("read"))
+        await writer.log_action(repository, **audit_kwargs("read", document_id=deleted_id))
+
+        assert await writer.flush() == 2
+        assert len(sessions.rows) == 2
+        orphan = [row for row in sessions.rows if row["resource_id"] == deleted_id][0]
+        assert orphan["document_id"] is None
+
+    @pytest.mark.asyncio
+    async def test_rows_that_always_fail_are_dropped(self, repository):
+        sessions = RecordingSessions()
+        writer = start(AuditWriter(session_factory=sessions, batch_size=10))
+
+        await writer.log_action(repository, **audit_kwargs("read"))
+        duplicate = await writer.log_action(repository, **audit_kwargs("read"))
+        await writer.log_action(repository, **audit_kwargs("read"))
+        sessions.duplicate_ids.add(duplicate.id)
+
+        assert await writer.flush() == 2
+        assert writer.pending == 0
+        assert len(sessions.rows) == 2
+        assert writer.snapshot()["audit_events_dropped"] == 1
+
+        # Later events are not stuck behind it
+        await writer.log_action(repository, **audit_kwargs("read"))
+        assert await writer.flush() == 1
+
+    @pytest.mark.asyncio
+    async def test_run_flushes_full_batches_and_drains_on_shutdown(self, repository):
+        sessions = RecordingSessions()
+        writer = AuditWriter(session_factory=sessions, batch_size=5, flush_interval_seconds=60)
+        shutdown_event = asyncio.Event()
+        task = asyncio.create_task(writer.run(shutdown_event))
+        await asyncio.sleep(0)
+
+        for _ in range(5):
+            await writer.log_action(repository, **audit_kwargs("read"))
+        await asyncio.sleep(0.05)
+        assert len(sessions.rows) == 5
+
+        await writer.log_action(repository, **audit_kwargs("viewed"))
+        shutdown_event.set()
+        writer._batch_ready.set()
+        await asyncio.wait_for(task, timeout=2)
+
+        assert len(sessions.rows) == 6
+        assert not writer.running
+        repository.log_action.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_run_flushes_on_interval(self, repository):
+        sessions = RecordingSessions()
+        writer = AuditWriter(session_factory=sessions, batch_size=100, flush_interval_seconds=0.05)
+        shutdown_event = asyncio.Event()
+        task = asyncio.create_task(writer.run(shutdown_event))
+        await asyncio.sleep(0)
+
+        await writer.log_action(repository, **audit_kwargs("downloaded"))
+        await asyncio.sleep(0.2)
+        assert len(sessions.rows) == 1
+
+        shutdown_event.set()
+        await asyncio.wait_for(task, timeout=2)
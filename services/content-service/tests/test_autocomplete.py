@@ -0,0 +1,253 @@
+"""
+Tests for the autocomplete index and its database feed.
+"""
+
+import random
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+from uuid import UUID, uuid4
+
+import pytest
+
+from repositories import AuditRepository, DocumentRepository
+from search import AutocompleteIndex, suggest_for_user
+from search.autocomplete import refresh_autocomplete
+
+
+def texts(suggestions):
+    return [s.text for s in suggestions]
+
+
+class TestAutocompleteIndex:
+    """Ranking, updates and snapshots."""
+
+    def test_completes_by_frequency_within_organization(self):
+        index = AutocompleteIndex()
+        org, other_org = uuid4(), uuid4()
+        index.set_document(uuid4(), org, title="Budget Report 2026", tags=["budget", "finance"])
+        index.set_document(uuid4(), org, title="Budget review", tags=["budget"], keywords=["Budgeting"])
+        index.set_document(uuid4(), other_org, title="Budget secrets")
+
+        suggestions = index.suggest(org, "BUD", limit=10)
+
+        assert texts(suggestions) == ["budget", "Budgeting", "Budget review", "Budget Report 2026"]
+        assert (suggestions[0].frequency, suggestions[0].type) == (2, "term")
+        assert (suggestions[1].type, suggestions[2].type) == ("term", "document")
+        assert index.suggest(other_org, "budget r") == []
+        assert index.suggest(uuid4(), "bud") == []
+
+    def test_queries_need_distinct_users(self):
+        index = AutocompleteIndex(min_query_users=2)
+        org, alice, bob = uuid4(), uuid4(), uuid4()
+
+        index.record_query(org, "quarterly  revenue", alice)
+        index.record_query(org, "Quarterly revenue", alice)
+        assert index.suggest(org, "quar") == []
+
+        index.record_query(org, "quarterly revenue", bob)
+        suggestion = index.suggest(org, "quar")[0]
+        assert (suggestion.text, suggestion.frequency, suggestion.type) == ("quarterly revenue", 3, "phrase")
+
+    def test_replaced_and_removed_documents_are_withdrawn(self):
+        index = AutocompleteIndex()
+        org, document = uuid4(), uuid4()
+        index.set_document(document, org, title="Draft plan", tags=["planning"])
+        index.set_document(uuid4(), org, tags=["planning"])
+
+        index.set_document(document, org, title="Final plan")
+        assert texts(index.suggest(org, "")) == []
+        assert texts(index.suggest(org, "d")) == []
+        assert [(s.text, s.frequency) for s in index.suggest(org, "pl")] == [("planning", 1)]
+
+        index.remove_document(document)
+        assert texts(index.suggest(org, "f")) == []
+        assert index.phrase_count() == 1
+
+    def test_broad_prefixes_stay_exact_under_updates(self):
+        index = AutocompleteIndex(scan_limit=8, cache_size=5)
+        org = uuid4()
+        rng = random.Random(7)
+        words = ["".join(rng.choice("abc") for _ in range(rng.randint(2, 6))) for _ in range(300)]
+        documents = [uuid4() for _ in range(200)]
+
+        def expected(prefix, limit):
+            counts = {}
+            for tags in assigned.values():
+                for tag in tags:
+                    counts[tag] = counts.get(tag, 0) + 1
+            ranked = sorted((key for key in counts if key.startswith(prefix)), key=lambda k: (-counts[k], len(k), k))
+            return ranked[:limit]
+
+        assigned = {}
+        for step in range(1500):
+            document = rng.choice(documents)
+            if rng.random() < 0.2:
+                index.remove_document(document)
+                assigned.pop(document, None)
+            else:
+                tags = sorted(set(rng.sample(words, 3)))
+                index.set_document(document, org, tags=tags)
+                assigned[document] = tags
+            if step % 10 == 0:
+                prefix = rng.choice(["a", "b", "c", "ab", "ca", "abc"])
+                assert texts(index.suggest(org, prefix, limit=5)) == expected(prefix, 5)
+
+    def test_snapshot_round_trip(self, tmp_path):
+        index = AutocompleteIndex()
+        org, document = uuid4(), uuid4()
+        index.set_document(document, org, title="Onboarding guide", tags=["hr"])
+        index.record_query(org, "onboarding checklist", uuid4(), count=3)
+        for _ in range(3):
+            index.record_query(org, "onboarding checklist", uuid4())
+        user = uuid4()
+        index.record_query(org, "onboarding faq", user)
+        index.document_cursor = (datetime(2026, 10, 1, 12, 0), uuid4())
+        index.seen_queries = {uuid4(): datetime(2026, 10, 1, 12, 0)}
+        path = tmp_path / "autocomplete.json.gz"
+
+        index.save(path)
+        restored = AutocompleteIndex()
+        assert restored.load(path)
+
+        assert restored.suggest(org, "onb") == index.suggest(org, "onb")
+        assert restored.candidates(org, "onb", 10, user) == index.candidates(org, "onb", 10, user)
+        assert restored.document_cursor == index.document_cursor
+        assert restored.query_cursor is None
+        assert restored.seen_queries == index.seen_queries
+
+        restored.remove_document(document)
+        assert texts(restored.suggest(org, "o")) == ["onboarding checklist"]
+        assert not AutocompleteIndex().load(tmp_path / "missing.json.gz")
+
+
+@pytest.mark.asyncio
+class TestSuggestForUser:
+    """Suggestions limited to what the user can see."""
+
+    async def test_only_readable_documents_are_suggested(self):
+        index = AutocompleteIndex()
+        org, user = uuid4(), uuid4()
+        public, private = uuid4(), uuid4()
+        index.set_document(public, org, title="Merger timeline", tags=["merger"])
+        index.set_document(private, org, title="Merger secret terms", tags=["merger"])
+        readable = AsyncMock(side_effect=lambda ids: {public} & set(ids))
+
+        suggestions = await suggest_for_user(index, org, user, "mer", 10, readable)
+
+        assert [(s.text, s.frequency, s.type) for s in suggestions] == [
+            ("merger", 1, "term"), ("Merger timeline", 1, "document")
+        ]
+        assert set(readable.await_args.args[0]) == {public, private}
+
+    async def test_own_queries_are_suggested_before_others_see_them(self):
+        index = AutocompleteIndex(min_query_users=2)
+        org, alice, bob = uuid4(), uuid4(), uuid4()
+        readable = AsyncMock(return_value=set())
+        index.record_query(org, "layoff plan", alice)
+        index.record_query(org, "layoff plan", alice)
+
+        suggestions = await suggest_for_user(index, org, alice, "lay", 10, readable)
+        assert [(s.text, s.frequency, s.type) for s in suggestions] == [("layoff plan", 2, "phrase")]
+        assert await suggest_for_user(index, org, bob, "lay", 10, readable) == []
+        readable.assert_not_awaited()
+
+        index.record_query(org, "layoff plan", bob)
+        assert texts(await suggest_for_user(index, org, uuid4(), "lay", 10, readable)) == ["layoff plan"]
+
+    async def test_hidden_candidates_are_replaced_from_a_wider_pass(self):
+        index = AutocompleteIndex(cache_size=2)
+        org, user = uuid4(), uuid4()
+        hidden = [uuid4() for _ in range(5)]
+        for i, document in enumerate(hidden):
+            index.set_document(document, org, tags=["alpha", f"alpha{i}"])
+        shown = uuid4()
+        index.set_document(shown, org, tags=["alphabet"])
+        readable = AsyncMock(side_effect=lambda ids: {shown} & set(ids))
+
+        assert texts(await suggest_for_user(index, org, user, "alp", 2, readable)) == ["alphabet"]
+        assert readable.await_count == 2
+
+
+def document_row(document_id, org, updated_at, status="active", title=None, filename="file.pdf", tags=None):
+    return SimpleNamespace(
+        id=document_id, organization_id=org, status=status, filename=filename,
+        updated_at=updated_at, title=title, tags=tags or [], keywords=None
+    )
+
+
+def query_row(audit_id, org, created_at, query, result_count=1, user_id=None):
+    return SimpleNamespace(
+        id=audit_id, organization_id=org, user_id=user_id or uuid4(), created_at=created_at,
+        query=query, result_count=result_count
+    )
+
+
+@asynccontextmanager
+async def fake_session():
+    yield Mock()
+
+
+@pytest.mark.asyncio
+class TestAutocompleteRefresh:
+    """Polling document changes and audited queries."""
+
+    async def test_refresh_applies_changes_and_counts_queries_once(self, monkeypatch):
+        index = AutocompleteIndex(min_query_users=2)
+        org, kept, deleted = uuid4(), uuid4(), uuid4()
+        now = datetime(2026, 10, 16, 9, 0)
+        index.set_document(deleted, org, title="Old minutes")
+        documents = [
+            document_row(kept, org, now, filename="quarterly-plan.pdf", tags=["planning"]),
+            document_row(deleted, org, now + timedelta(seconds=1), status="deleted")
+        ]
+        queries = [
+            query_row(UUID(int=1), org, now, "quarterly plan"),
+            query_row(UUID(int=2), org, now, "quarterly plan"),
+            query_row(UUID(int=3), org, now, "quarterly nothing", result_count=0)
+        ]
+        changed = AsyncMock(return_value=documents)
+        searched = AsyncMock(return_value=queries)
+        monkeypatch.setattr(DocumentRepository, "get_changed_since", changed)
+        monkeypatch.setattr(AuditRepository, "get_search_queries_since", searched)
+
+        assert await refresh_autocomplete(index, fake_session, batch_size=10) == (2, 2)
+        # The overlap window returns the same rows again
+        assert await refresh_autocomplete(index, fake_session, batch_size=10) == (2, 0)
+
+        assert [(s.text, s.frequency) for s in index.suggest(org, "quarterly")] == [
+            ("quarterly plan", 2), ("quarterly-plan", 1)
+        ]
+        assert index.suggest(org, "old") == []
+        assert index.document_cursor == (now + timedelta(seconds=1), deleted)
+        assert changed.await_args.args == (now + timedelta(seconds=1) - timedelta(seconds=30), None)
+
+    async def test_get_changed_since_keyset_condition(self):
+        session = Mock()
+        result = Mock()
+        result.all.return_value = []
+        session.execute = AsyncMock(return_value=result)
+        position = datetime(2026, 10, 16, 9, 0)
+
+        await DocumentRepository(session).get_changed_since(position, uuid4(), limit=50)
+
+        sql = str(session.execute.await_args.args[0])
+        assert "documents.updated_at > :updated_at_1 OR documents.updated_at = :updated_at_2 AND documents.id > :id_1" in sql
+        assert "ORDER BY documents.updated_at, documents.id" in sql
+
+    async def test_filter_readable_applies_search_permissions(self):
+        session = Mock()
+        result = Mock()
+        result.scalars.return_value.all.return_value = []
+        session.execute = AsyncMock(return_value=result)
+        org, user = uuid4(), uuid4()
+
+        assert await DocumentRepository(session).filter_readable([], org, user) == set()
+        session.execute.assert_not_awaited()
+        await DocumentRepository(session).filter_readable([uuid4()], org, user, ["editor"])
+
+        sql = str(session.execute.await_args.args[0])
+        assert "documents.organization_id = :organization_id_1" in sql
+        assert "documents.status = :status_1" in sql
+        assert "documents.created_by = :created_by_1 OR documents.id IN" in sql
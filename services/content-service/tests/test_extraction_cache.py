@@ -0,0 +1,142 @@
+"""
+Tests for the persistent extraction result cache.
+"""
+
+import os
+import time
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from extractors import ExtractionCache, MetadataExtractorFactory, PDFExtractor, TextExtractor
+from extractors.base_extractor import ExtractedMetadata
+from extractors.cache import hash_file
+
+
+@pytest.fixture
+def notes(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("Quarterly budget report. The budget covers revenue and hiring plans. " * 20)
+    return path
+
+
+class TestExtractionCache:
+    """Keys, round trips and eviction."""
+
+    def test_round_trip_keeps_fields(self, tmp_path):
+        cache = ExtractionCache(str(tmp_path / "cache"), max_bytes=1024 * 1024)
+        metadata = ExtractedMetadata(
+            text_content="hello", keywords=["hello"], page_count=3,
+            creation_date=datetime(2026, 10, 1, 9, 30), raw_metadata={"producer": "scanner"}
+        )
+
+        assert cache.get("a" * 64) is None
+        cache.put("a" * 64, metadata)
+
+        assert cache.get("a" * 64) == metadata
+        assert cache.stats.snapshot()["hit_rate"] == 0.5
+
+    def test_key_covers_version_options_and_mime_type(self):
+        pdf = PDFExtractor(max_text_chars=100)
+        key = ExtractionCache.make_key("f" * 64, pdf, "application/pdf")
+
+        assert key == ExtractionCache.make_key("f" * 64, PDFExtractor(max_text_chars=100), "application/pdf")
+        assert key != ExtractionCache.make_key("e" * 64, pdf, "application/pdf")
+        assert key != ExtractionCache.make_key("f" * 64, PDFExtractor(max_text_chars=200), "application/pdf")
+        assert key != ExtractionCache.make_key("f" * 64, pdf, "application/x-pdf")
+        pdf.version = "1.1.0"
+        assert key != ExtractionCache.make_key("f" * 64, pdf, "application/pdf")
+
+    def test_evicts_least_recently_used_across_restarts(self, tmp_path):
+        directory = str(tmp_path / "cache")
+        cache = ExtractionCache(directory, max_bytes=1024 * 1024)
+        for i, key in enumerate(["1" * 64, "2" * 64, "3" * 64]):
+            cache.put(key, ExtractedMetadata(text_content=os.urandom(1500).hex()))
+            os.utime(cache._path(key), (time.time() - 100 + i, time.time() - 100 + i))
+        cache.get("1" * 64)
+        # Room for three entries
+        max_bytes = cache.get_stats()["bytes"] + 1000
+
+        restarted = ExtractionCache(directory, max_bytes=max_bytes)
+        restarted.put("4" * 64, ExtractedMetadata(text_content=os.urandom(1500).hex()))
+
+        assert restarted.stats.evictions == 1
+        assert restarted.get("2" * 64) is None
+        assert all(restarted.get(key) is not None for key in ("1" * 64, "3" * 64, "4" * 64))
+        assert restarted.get_stats()["bytes"] <= max_bytes
+
+    def test_entries_stored_by_other_processes_are_hits(self, tmp_path):
+        directory = str(tmp_path / "cache")
+        reader, writer = ExtractionCache(directory, 1024 * 1024), ExtractionCache(directory, 1024 * 1024)
+        assert reader.get("a" * 64) is None
+
+        writer.put("a" * 64, ExtractedMetadata(text_content="hello"))
+
+        assert reader.get("a" * 64).text_content == "hello"
+        assert (reader.stats.hits, reader.stats.misses) == (1, 1)
+        assert reader.get_stats()["entries"] == 1
+        assert reader.get_stats()["bytes"] == writer.get_stats()["bytes"]
+
+    def test_bound_holds_across_processes_sharing_the_directory(self, tmp_path):
+        directory = str(tmp_path / "cache")
+        entry = ExtractedMetadata(text_content=os.urandom(1500).hex())
+        probe = ExtractionCache(directory, 1024 * 1024)
+        probe.put("0" * 64, entry)
+        size = probe.get_stats()["bytes"]
+        probe._path("0" * 64).unlink()
+
+        # Room for five entries; each worker stores four distinct ones
+        workers = [ExtractionCache(directory, 5 * size + size // 2) for _ in range(3)]
+        for i in range(12):
+            workers[i % 3].put(f"{i:02x}" * 32, entry)
+
+        stored = list((tmp_path / "cache").glob("*/*.json.gz"))
+        assert sum(path.stat().st_size for path in stored) <= 5 * size + size // 2
+        assert len(stored) == 5
+        # Entries evicted by another worker are dropped from the index
+        workers[0].put("ff" * 32, entry)
+        assert workers[0].get_stats()["entries"] == 5
+
+    def test_unreadable_entry_is_a_miss(self, tmp_path):
+        cache = ExtractionCache(str(tmp_path / "cache"), max_bytes=1024 * 1024)
+        cache.put("a" * 64, ExtractedMetadata(text_content="hello"))
+        cache._path("a" * 64).write_bytes(b"not gzip")
+
+        assert cache.get("a" * 64) is None
+        assert (cache.stats.errors, cache.stats.misses) == (1, 1)
+        assert not cache._path("a" * 64).exists()
+
+
+@pytest.mark.asyncio
+class TestFactoryCaching:
+    """The factory consults the cache before running an extractor."""
+
+    async def test_same_bytes_are_extracted_once(self, tmp_path, notes):
+        cache = ExtractionCache(str(tmp_path / "cache"), max_bytes=1024 * 1024)
+        factory = MetadataExtractorFactory(cache=cache)
+        copy = tmp_path / "duplicate-upload.txt"
+        copy.write_bytes(notes.read_bytes())
+
+        with patch.object(TextExtractor, "extract_metadata", wraps=factory.extractors[2].extract_metadata) as extract:
+            first = await factory.extract_metadata(notes, "text/plain")
+            second = await factory.extract_metadata(copy, "text/plain", file_hash=hash_file(notes))
+            as_csv = await factory.extract_metadata(notes, "text/csv")
+
+        assert extract.call_count == 2
+        assert second.keywords == first.keywords
+        assert second.word_count == first.word_count
+        assert as_csv.extractor_version == first.extractor_version
+        assert factory.get_extractor_info()["cache"]["hits"] == 1
+
+    async def test_failed_extractions_are_not_cached(self, tmp_path, notes):
+        cache = ExtractionCache(str(tmp_path / "cache"), max_bytes=1024 * 1024)
+        factory = MetadataExtractorFactory(cache=cache)
+        failed = ExtractedMetadata(errors=["Text extraction failed: disk hiccup"])
+
+        with patch.object(TextExtractor, "extract_metadata", return_value=failed) as extract:
+            await factory.extract_metadata(notes, "text/plain")
+            await factory.extract_metadata(notes, "text/plain")
+
+        assert extract.call_count == 2
+        assert cache.stats.stores == 0
@@ -0,0 +1,124 @@
+"""
+Tests for the extraction process pool and the factory running through it.
+"""
+
+import asyncio
+import os
+import time
+
+import pytest
+import pytest_asyncio
+
+from extractors import (
+    ExtractionProcessPool, ExtractionTimeoutError, MetadataExtractorFactory, WorkerCrashedError
+)
+from extractors.process_pool import _parse_limits
+
+
+def worker_pid():
+    return os.getpid()
+
+
+def sleep_for(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def exit_worker():
+    os._exit(3)
+
+
+def fail(message):
+    raise ValueError(message)
+
+
+def allocate(megabytes):
+    return len(bytearray(megabytes * 1024 * 1024))
+
+
+@pytest_asyncio.fixture
+async def pool():
+    pool = ExtractionProcessPool(max_workers=2, memory_limit_mb=512, task_timeout=10, preload=())
+    yield pool
+    await pool.close()
+
+
+@pytest.mark.asyncio
+class TestExtractionProcessPool:
+    """Worker reuse, timeouts, crashes and limits."""
+
+    async def test_reuses_warm_workers_and_recycles(self):
+        pool = ExtractionProcessPool(max_workers=1, max_tasks_per_worker=2, preload=())
+        try:
+            first = await pool.run("TextExtractor", worker_pid)
+            assert first != os.getpid()
+            assert await pool.run("TextExtractor", worker_pid) == first
+            # Recycled after max_tasks_per_worker jobs
+            assert await pool.run("TextExtractor", worker_pid) != first
+            assert pool.get_stats()["extractors"]["TextExtractor"]["completed"] == 3
+        finally:
+            await pool.close()
+
+    async def test_job_errors_propagate_and_keep_the_worker(self, pool):
+        pid = await pool.run("TextExtractor", worker_pid)
+
+        with pytest.raises(ValueError, match="unreadable"):
+            await pool.run("TextExtractor", fail, "unreadable")
+
+        assert await pool.run("TextExtractor", worker_pid) == pid
+        assert pool.stats["TextExtractor"]["failed"] == 1
+
+    async def test_timeout_kills_the_worker(self, pool):
+        pid = await pool.run("PDFExtractor", worker_pid)
+
+        with pytest.raises(ExtractionTimeoutError):
+            await pool.run("PDFExtractor", sleep_for, 30, timeout=0.5)
+
+        assert await pool.run("PDFExtractor", worker_pid) != pid
+        assert pool.stats["PDFExtractor"]["timed_out"] == 1
+
+    async def test_crashed_and_oversized_jobs_fail_alone(self, pool):
+        with pytest.raises(WorkerCrashedError):
+            await pool.run("ImageExtractor", exit_worker)
+        with pytest.raises(MemoryError):
+            await pool.run("ImageExtractor", allocate, 1024)
+
+        assert await pool.run("ImageExtractor", allocate, 16) == 16 * 1024 * 1024
+        assert pool.stats["ImageExtractor"]["crashed"] == 1
+
+    async def test_per_extractor_limit(self):
+        pool = ExtractionProcessPool(max_workers=2, extractor_limits={"PDFExtractor": 1}, preload=())
+        try:
+            await asyncio.gather(pool.run("PDFExtractor", worker_pid), pool.run("TextExtractor", worker_pid))
+            started = time.perf_counter()
+            await asyncio.gather(*(pool.run("PDFExtractor", sleep_for, 0.3) for _ in range(2)))
+            assert time.perf_counter() - started >= 0.6
+        finally:
+            await pool.close()
+
+    async def test_closed_pool_rejects_jobs(self, pool):
+        await pool.close()
+        with pytest.raises(RuntimeError):
+            await pool.run("TextExtractor", worker_pid)
+
+
+def test_parse_limits():
+    assert _parse_limits("PDFExtractor=4, ImageExtractor=2,") == {"PDFExtractor": 4, "ImageExtractor": 2}
+    assert _parse_limits("") == {}
+
+
+@pytest.mark.asyncio
+async def test_factory_extracts_in_worker_process(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("Quarterly budget report. The budget covers revenue and hiring plans. " * 20)
+    pool = ExtractionProcessPool(max_workers=1, preload=())
+    factory = MetadataExtractorFactory(process_pool=pool)
+    try:
+        pooled = await factory.extract_metadata(path, "text/plain")
+        local = await MetadataExtractorFactory().extract_metadata(path, "text/plain")
+
+        assert pooled.word_count == local.word_count
+        assert pooled.keywords == local.keywords
+        assert factory.get_extractor_info()["process_pool"]["extractors"]["TextExtractor"]["completed"] == 1
+    finally:
+        await factory.close()
@@ -23,7 +23,7 @@ import io
 # Service layer functions for testing (copied from main.py)
 MAX_FILE_SIZE_MB = int(os.getenv("MAX_FILE_SIZE_MB", 50))
 MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
-STORAGE_DIRECTORY = Path(os.getenv("STORAGE_DIRECTORY", "./storage"))
+STORAGE_DIRECTORY = Path(os.getenv("STORAGE_DIRECTORY", "./data/storage"))
 ALLOWED_CONTENT_TYPES = os.getenv(
     "ALLOWED_CONTENT_TYPES", 
     "application/pdf,application/msword,application/vnd.openxmlformats-officedocument.wordprocessingml.document,text/plain,image/jpeg,image/png,image/tiff"
@@ -0,0 +1,208 @@
+"""
+Tests for PostgreSQL full-text search query building and result shaping.
+"""
+
+import re
+from unittest.mock import AsyncMock, Mock
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from repositories import DocumentRepository
+from repositories.full_text import (
+    HIGHLIGHT_START, HIGHLIGHT_STOP, build_tsquery, fragment_offsets, headline_options,
+    split_headline
+)
+
+
+def _sql_literal(value) -> str:
+    if isinstance(value, (int, float)):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def compile_pg(stmt) -> str:
+    # REGCONFIG has no literal renderer, so bound values are inlined here instead of via literal_binds
+    compiled = stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"render_postcompile": True})
+    return re.sub(
+        r"%\((\w+)\)s", lambda match: _sql_literal(compiled.params[match.group(1)]), str(compiled)
+    )
+
+
+def compile_pg_params(stmt):
+    compiled = stmt.compile(dialect=postgresql.dialect())
+    return str(compiled), compiled.params
+
+
+class _Row(tuple):
+    """Result row supporting both index and attribute access."""
+
+    def __new__(cls, document, rank, headline=None, text_prefix=None):
+        row = super().__new__(cls, (document, rank, headline, text_prefix))
+        row.rank, row.headline, row.text_prefix = rank, headline, text_prefix
+        return row
+
+
+def search_session(rows, facet_rows=()):
+    session = Mock()
+    page_result = Mock()
+    page_result.all.return_value = rows
+    session.execute = AsyncMock(side_effect=[page_result, list(facet_rows)])
+    return session
+
+
+class TestTsQuery:
+    """User queries map onto tsquery functions."""
+
+    def test_plain_query_uses_websearch_syntax(self):
+        sql = compile_pg(build_tsquery('"quarterly report" -draft'))
+
+        assert "websearch_to_tsquery" in sql
+        assert "'english'" in sql
+
+    def test_exact_phrase(self):
+        assert "phraseto_tsquery" in compile_pg(build_tsquery("annual budget", exact_phrase=True))
+
+    def test_prefix_and_weights_build_terms(self):
+        sql = compile_pg(build_tsquery("Budg Rep", prefix=True, weights="AB"))
+
+        assert "to_tsquery" in sql
+        assert "''budg'':*AB & ''rep'':*AB" in sql
+
+    def test_phrase_with_weights_uses_followed_by(self):
+        sql = compile_pg(build_tsquery("annual budget", exact_phrase=True, weights="C"))
+
+        assert "<->" in sql
+
+    def test_query_without_terms(self):
+        assert build_tsquery("!!! ???", prefix=True) is None
+
+
+class TestHighlights:
+    """ts_headline output is split into located fragments."""
+
+    def test_headline_options(self):
+        options = headline_options(30, 3)
+
+        assert "MaxWords=30" in options
+        assert "MinWords=10" in options
+        assert "MaxFragments=3" in options
+
+    def test_split_keeps_fragments_with_matches(self):
+        headline = (
+            f"the {HIGHLIGHT_START}budget{HIGHLIGHT_STOP} grew ... no match here ... "
+            f"{HIGHLIGHT_START}budget{HIGHLIGHT_STOP} cut"
+        )
+
+        assert split_headline(headline) == [
+            f"the {HIGHLIGHT_START}budget{HIGHLIGHT_STOP} grew",
+            f"{HIGHLIGHT_START}budget{HIGHLIGHT_STOP} cut"
+        ]
+        assert split_headline(None) == []
+
+    def test_fragment_offsets(self):
+        text = "Intro. The budget grew by ten percent."
+
+        start, end = fragment_offsets(f"The {HIGHLIGHT_START}budget{HIGHLIGHT_STOP} grew", text)
+
+        assert text[start:end] == "The budget grew"
+        assert fragment_offsets("missing <mark>words</mark>", text) == (-1, -1)
+        assert fragment_offsets("anything", None) == (-1, -1)
+
+
+@pytest.mark.asyncio
+class TestSearchDocuments:
+    """DocumentRepository.search_documents query shape and results."""
+
+    async def test_query_is_index_backed_and_permission_filtered(self):
+        session = search_session([])
+        organization_id, user_id = uuid4(), uuid4()
+
+        await DocumentRepository(session).search_documents(
+            organization_id, "budget", user_id=user_id, user_roles=["viewer"]
+        )
+
+        page_sql = compile_pg(session.execute.await_args_list[0].args[0])
+        assert "documents.search_vector @@ websearch_to_tsquery" in page_sql
+        assert "documents.status = 'active'" in page_sql
+        assert "documents.created_by = " in page_sql
+        assert "document_permissions.can_read" in page_sql
+        assert "document_permissions.role_name IN ('viewer')" in page_sql
+        assert "ts_headline" in page_sql
+        assert "LIMIT 21" in page_sql
+        # Full text isn't loaded, only the prefix highlights are cut from
+        assert "left(documents.extracted_text, 50000)" in page_sql
+        assert page_sql.count("documents.extracted_text") == page_sql.count("left(documents.extracted_text")
+
+    async def test_without_user_skips_permission_filter(self):
+        session = search_session([])
+
+        await DocumentRepository(session).search_documents(uuid4(), "budget", highlight=False)
+
+        page_sql = compile_pg(session.execute.await_args_list[0].args[0])
+        assert "document_permissions" not in page_sql
+        assert "ts_headline" not in page_sql
+
+    async def test_filters_and_sorting(self):
+        session = search_session([])
+
+        await DocumentRepository(session).search_documents(
+            uuid4(), "budget", tags=["finance"], classifications=["internal"],
+            file_size_min=10, include_content=False, sort_by="created_at", sort_order="asc"
+        )
+
+        page_sql, params = compile_pg_params(session.execute.await_args_list[0].args[0])
+        assert "documents.metadata @> " in page_sql
+        assert "documents.classification IN (" in page_sql
+        assert "documents.file_size >= " in page_sql
+        assert "ORDER BY documents.created_at ASC" in page_sql
+        # Metadata-only search is restricted to the A and B weights
+        assert "'budget':AB" in params.values()
+
+    async def test_unknown_sort_field(self):
+        with pytest.raises(ValueError):
+            await DocumentRepository(search_session([])).search_documents(
+                uuid4(), "budget", sort_by="storage_path"
+            )
+
+    async def test_empty_query_does_not_hit_database(self):
+        session = search_session([])
+
+        results = await DocumentRepository(session).search_documents(uuid4(), "???", prefix=True)
+
+        assert results.hits == [] and results.total == 0
+        session.execute.assert_not_awaited()
+
+    async def test_results_hits_and_facets(self):
+        documents = [Mock(id=uuid4()) for _ in range(3)]
+        rows = [
+            _Row(doc, 0.5, f"a {HIGHLIGHT_START}budget{HIGHLIGHT_STOP}", "a budget")
+            for doc in documents
+        ]
+        facet_rows = [
+            ("report", "internal", "application/pdf", 7),
+            (None, "internal", "text/plain", 2),
+            ("report", "public", "application/pdf", 1),
+        ]
+        session = search_session(rows, facet_rows)
+
+        results = await DocumentRepository(session).search_documents(
+            uuid4(), "budget", limit=2, count_limit=10
+        )
+
+        assert [hit.document for hit in results.hits] == documents[:2]
+        assert results.has_next
+        assert results.hits[0].fragments == [f"a {HIGHLIGHT_START}budget{HIGHLIGHT_STOP}"]
+        assert results.hits[0].text_prefix == "a budget"
+        assert results.total == 10
+        assert results.total_is_estimate
+        assert results.facets == {
+            "document_type": {"report": 8, "unknown": 2},
+            "classification": {"internal": 9, "public": 1},
+            "content_type": {"application/pdf": 8, "text/plain": 2},
+        }
+
+        facet_sql = compile_pg(session.execute.await_args_list[1].args[0])
+        assert "LIMIT 10" in facet_sql
+        assert "GROUP BY" in facet_sql
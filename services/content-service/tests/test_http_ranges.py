@@ -0,0 +1,149 @@
+"""
+HTTP Range and conditional request tests for Content Service
+Tests range parsing, ETag/Last-Modified preconditions and file responses
+"""
+
+import hashlib
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from transport import (
+    ByteRange, RangeNotSatisfiableError, build_file_response,
+    evaluate_preconditions, make_etag, parse_range_header
+)
+from transport.ranges import format_http_date
+
+
+CONTENT = bytes(range(256)) * 40  # 10240 bytes
+ETAG = make_etag(hashlib.sha256(CONTENT).hexdigest())
+
+
+@pytest.fixture
+def range_client(tmp_path):
+    """Client for a minimal app serving one file through build_file_response"""
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(CONTENT)
+    app = FastAPI()
+
+    @app.get("/file")
+    async def serve(request: Request):
+        return build_file_response(request.headers, path, ETAG, "application/pdf")
+
+    return TestClient(app)
+
+
+class TestRangeParsing:
+    """Test Range header parsing"""
+
+    def test_single_and_open_ranges(self):
+        """Explicit, open-ended and suffix ranges resolve against the size"""
+        assert parse_range_header("bytes=0-99", 1000) == [ByteRange(0, 99)]
+        assert parse_range_header("bytes=900-", 1000) == [ByteRange(900, 999)]
+        assert parse_range_header("bytes=-100", 1000) == [ByteRange(900, 999)]
+        assert parse_range_header("bytes=990-5000", 1000) == [ByteRange(990, 999)]
+
+    def test_multiple_ranges_are_coalesced(self):
+        """Overlapping and adjacent ranges merge; disjoint ones stay apart"""
+        ranges = parse_range_header("bytes=500-599,0-9,10-19,550-650", 1000)
+        assert ranges == [ByteRange(0, 19), ByteRange(500, 650)]
+
+    def test_invalid_headers_are_ignored(self):
+        """Malformed headers and other units fall back to a full response"""
+        assert parse_range_header(None, 1000) is None
+        assert parse_range_header("items=0-1", 1000) is None
+        assert parse_range_header("bytes=abc", 1000) is None
+        assert parse_range_header("bytes=10-5", 1000) is None
+
+    def test_unsatisfiable_range(self):
+        """Ranges entirely past the end raise"""
+        with pytest.raises(RangeNotSatisfiableError):
+            parse_range_header("bytes=2000-3000", 1000)
+
+
+class TestPreconditions:
+    """Test conditional request evaluation"""
+
+    def test_if_none_match(self):
+        """Matching ETags (including weak and wildcard) yield 304"""
+        assert evaluate_preconditions({"if-none-match": ETAG}, ETAG, 1000.0) == 304
+        assert evaluate_preconditions({"if-none-match": f"W/{ETAG}"}, ETAG, 1000.0) == 304
+        assert evaluate_preconditions({"if-none-match": "*"}, ETAG, 1000.0) == 304
+        assert evaluate_preconditions({"if-none-match": '"other"'}, ETAG, 1000.0) is None
+
+    def test_if_modified_since(self):
+        """If-Modified-Since applies only without If-None-Match"""
+        headers = {"if-modified-since": format_http_date(1000.0)}
+        assert evaluate_preconditions(headers, ETAG, 1000.0) == 304
+        assert evaluate_preconditions(headers, ETAG, 2000.0) is None
+
+        headers["if-none-match"] = '"other"'
+        assert evaluate_preconditions(headers, ETAG, 1000.0) is None
+
+    def test_if_match_failure(self):
+        """If-Match with a different ETag yields 412"""
+        assert evaluate_preconditions({"if-match": '"other"'}, ETAG, 1000.0) == 412
+
+
+class TestFileRangeResponses:
+    """Test responses built for stored files"""
+
+    def test_full_response_advertises_ranges(self, range_client):
+        """Plain GETs return the whole file with validators"""
+        response = range_client.get("/file")
+
+        assert response.status_code == 200
+        assert response.content == CONTENT
+        assert response.headers["accept-ranges"] == "bytes"
+        assert response.headers["etag"] == ETAG
+        assert "last-modified" in response.headers
+
+    def test_single_range(self, range_client):
+        """A single range returns 206 with Content-Range"""
+        response = range_client.get("/file", headers={"Range": "bytes=5000-5099"})
+
+        assert response.status_code == 206
+        assert response.content == CONTENT[5000:5100]
+        assert response.headers["content-range"] == f"bytes 5000-5099/{len(CONTENT)}"
+        assert response.headers["content-length"] == "100"
+
+    def test_multiple_ranges(self, range_client):
+        """Multiple ranges return a multipart/byteranges body"""
+        response = range_client.get("/file", headers={"Range": "bytes=0-9,-10"})
+
+        assert response.status_code == 206
+        content_type = response.headers["content-type"]
+        assert content_type.startswith("multipart/byteranges; boundary=")
+        boundary = content_type.split("boundary=")[1]
+
+        body = response.content
+        assert body.endswith(f"--{boundary}--\r\n".encode())
+        assert f"Content-Range: bytes 0-9/{len(CONTENT)}".encode() in body
+        assert b"\r\n\r\n" + CONTENT[:10] + b"\r\n" in body
+        assert b"\r\n\r\n" + CONTENT[-10:] + b"\r\n" in body
+        assert int(response.headers["content-length"]) == len(body)
+
+    def test_not_modified(self, range_client):
+        """Cached clients revalidating by ETag get an empty 304"""
+        response = range_client.get("/file", headers={"If-None-Match": ETAG})
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == ETAG
+
+    def test_unsatisfiable_range_response(self, range_client):
+        """Out-of-bounds ranges return 416 with the full length"""
+        response = range_client.get("/file", headers={"Range": "bytes=99999-"})
+
+        assert response.status_code == 416
+        assert response.headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+    def test_stale_if_range_serves_full_file(self, range_client):
+        """A non-matching If-Range validator ignores the Range header"""
+        response = range_client.get(
+            "/file", headers={"Range": "bytes=0-9", "If-Range": '"stale"'}
+        )
+
+        assert response.status_code == 200
+        assert response.content == CONTENT
@@ -0,0 +1,274 @@
+"""
+Tests for keyset (cursor) pagination.
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, Mock, patch
+from uuid import UUID, uuid4
+
+import pytest
+from sqlalchemy import DateTime, String, Uuid, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+from models.document import Document
+from repositories import DocumentRepository, PermissionRepository
+from repositories.pagination import (
+    InvalidCursorError, Page, apply_keyset, build_page, decode_cursor, encode_cursor
+)
+
+
+class _Base(DeclarativeBase):
+    pass
+
+
+class _Row(_Base):
+    __tablename__ = "keyset_rows"
+
+    id: Mapped[UUID] = mapped_column(Uuid, primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime)
+    name: Mapped[str] = mapped_column(String)
+
+
+def compile_pg(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+class TestCursorEncoding:
+    """Opaque cursor round trips."""
+
+    def test_round_trip(self):
+        created_at = datetime(2026, 10, 16, 12, 30, 5, 123456)
+        entity_id = uuid4()
+
+        cursor = encode_cursor(created_at, entity_id)
+
+        assert "=" not in cursor
+        assert decode_cursor(cursor) == (created_at, entity_id)
+
+    @pytest.mark.parametrize("cursor", ["not-a-cursor", "", "W10", "WyJ4IiwieSJd"])
+    def test_invalid_cursor(self, cursor):
+        with pytest.raises(InvalidCursorError):
+            decode_cursor(cursor)
+
+    def test_build_page_trims_look_ahead_row(self):
+        rows = [Mock(created_at=datetime(2026, 1, 1), id=uuid4()) for _ in range(4)]
+
+        page = build_page(rows, limit=3)
+
+        assert page.items == rows[:3]
+        assert page.has_next
+        assert decode_cursor(page.next_cursor) == (rows[2].created_at, rows[2].id)
+
+        last_page = build_page(rows[:2], limit=3)
+        assert last_page.items == rows[:2]
+        assert not last_page.has_next
+
+
+class TestKeysetQueries:
+    """Generated SQL seeks instead of skipping rows."""
+
+    def test_cursor_replaces_offset(self):
+        cursor = encode_cursor(datetime(2026, 1, 1), uuid4())
+
+        sql = compile_pg(apply_keyset(
+            select(Document), Document.created_at, Document.id, 20, cursor, offset=500
+        ))
+
+        assert "OFFSET" not in sql
+        assert "(documents.created_at, documents.id) < " in sql
+        assert "ORDER BY documents.created_at DESC, documents.id DESC" in sql
+        assert "LIMIT" in sql
+
+    def test_offset_kept_without_cursor(self):
+        stmt = apply_keyset(select(Document), Document.created_at, Document.id, 20, offset=40)
+
+        assert "OFFSET" in compile_pg(stmt)
+        assert stmt._limit == 21
+
+    def test_accessible_documents_uses_semi_join(self):
+        repo = PermissionRepository(Mock())
+
+        sql = compile_pg(repo._accessible_documents_query(uuid4(), ["editor"], uuid4()))
+
+        assert "DISTINCT" not in sql
+        assert "documents.id IN (SELECT document_permissions.document_id" in sql
+
+    @pytest.mark.asyncio
+    async def test_repository_page(self):
+        rows = [Mock(created_at=datetime(2026, 1, 1), id=uuid4()) for _ in range(3)]
+        result = Mock()
+        result.scalars.return_value.all.return_value = rows
+        session = Mock(execute=AsyncMock(return_value=result))
+
+        page = await DocumentRepository(session).find_page_by_organization(uuid4(), limit=2)
+
+        assert page.items == rows[:2]
+        assert page.has_next
+        stmt = session.execute.call_args.args[0]
+        assert "documents.organization_id = " in compile_pg(stmt)
+
+    @pytest.mark.asyncio
+    async def test_count_up_to_is_bounded(self):
+        result = Mock(scalar=Mock(return_value=7))
+        session = Mock(execute=AsyncMock(return_value=result))
+
+        assert await DocumentRepository(session).count_up_to(1000, status="active") == 7
+        sql = compile_pg(session.execute.call_args.args[0])
+        assert "LIMIT" in sql
+
+
+class TestKeysetWalk:
+    """Walking every page visits each row exactly once, in order."""
+
+    @pytest.mark.asyncio
+    async def test_walk_with_timestamp_ties(self):
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        base_time = datetime(2026, 10, 16, 9, 0, 0)
+        rows = [
+            # Groups of five rows share a timestamp to exercise the id tie-breaker
+            {"id": uuid4(), "created_at": base_time + timedelta(seconds=i // 5), "name": f"row-{i}"}
+            for i in range(53)
+        ]
+
+        async with engine.begin() as conn:
+            await conn.run_sync(_Base.metadata.create_all)
+            await conn.execute(_Row.__table__.insert(), rows)
+
+            seen = []
+            cursor = None
+            while True:
+                stmt = apply_keyset(select(_Row), _Row.created_at, _Row.id, 7, cursor)
+                page = build_page(list((await conn.execute(stmt)).all()), 7)
+                seen.extend(row.id for row in page.items)
+                if not page.has_next:
+                    break
+                cursor = page.next_cursor
+
+        await engine.dispose()
+
+        expected = [
+            row["id"] for row in
+            sorted(rows, key=lambda row: (row["created_at"], row["id"]), reverse=True)
+        ]
+        assert seen == expected
+
+
+class TestListDocumentsEndpoint:
+    """Cursor parameters on GET /api/v1/documents."""
+
+    @pytest.fixture
+    def override_auth(self, mock_user_data):
+        import main
+        from database import get_db_session
+
+        main.app.dependency_overrides[main.get_current_user] = lambda: {
+            **mock_user_data, "id": mock_user_data["user_id"]
+        }
+        main.app.dependency_overrides[get_db_session] = lambda: Mock()
+        yield
+        main.app.dependency_overrides.clear()
+
+    def _document(self):
+        doc = Mock(
+            id=uuid4(), filename="a.pdf", content_type="application/pdf", file_size=10,
+            document_type=None, created_at=datetime(2026, 1, 1), created_by=uuid4(),
+            status="active", classification="internal", thumbnail_generated=False
+        )
+        doc.get_metadata_value.side_effect = lambda key, default=None: default
+        doc.is_processing_complete.return_value = True
+        return doc
+
+    def test_returns_next_cursor_and_skips_total(self, client, override_auth):
+        docs = [self._document(), self._document()]
+        doc_repo = Mock(
+            find_page_by_organization=AsyncMock(return_value=Page(items=docs, next_cursor="abc")),
+            count_up_to=AsyncMock()
+        )
+
+        with patch("main.DocumentRepository", return_value=doc_repo), \
+             patch("main.AuditRepository", return_value=Mock(log_action=AsyncMock())):
+            response = client.get("/api/v1/documents?limit=2&cursor=xyz&include_total=false")
+
+        assert response.status_code == 200
+        pagination = response.json()["pagination"]
+        assert pagination["next_cursor"] == "abc"
+        assert pagination["has_next"] is True
+        assert pagination["has_prev"] is True
+        assert pagination["total"] is None
+        doc_repo.count_up_to.assert_not_called()
+        assert doc_repo.find_page_by_organization.call_args.kwargs["cursor"] == "xyz"
+
+    def test_total_is_bounded_estimate(self, client, override_auth):
+        import main
+
+        doc_repo = Mock(
+            find_page_by_organization=AsyncMock(return_value=Page(items=[self._document()])),
+            count_up_to=AsyncMock(return_value=main.PAGINATION_COUNT_LIMIT)
+        )
+
+        with patch("main.DocumentRepository", return_value=doc_repo), \
+             patch("main.AuditRepository", return_value=Mock(log_action=AsyncMock())):
+            response = client.get("/api/v1/documents")
+
+        pagination = response.json()["pagination"]
+        assert pagination["total"] == main.PAGINATION_COUNT_LIMIT
+        assert pagination["total_is_estimate"] is True
+        assert pagination["has_next"] is False
+
+    def test_invalid_cursor_is_bad_request(self, client, override_auth):
+        doc_repo = Mock(find_page_by_organization=AsyncMock(
+            side_effect=InvalidCursorError("Invalid pagination cursor: 'bad'")
+        ))
+
+        with patch("main.DocumentRepository", return_value=doc_repo), \
+             patch("main.AuditRepository", return_value=Mock(log_action=AsyncMock())):
+            response = client.get("/api/v1/documents?cursor=bad")
+
+        assert response.status_code == 400
+
+
+class TestOrganizationActivityEndpoint:
+    """Cursor paged organization audit log on GET /api/v1/audit/activity."""
+
+    @pytest.fixture
+    def override_auth(self, mock_user_data):
+        import main
+        from database import get_db_session
+
+        def override(roles):
+            main.app.dependency_overrides[main.get_current_user] = lambda: {
+                **mock_user_data, "id": mock_user_data["user_id"], "roles": roles
+            }
+            main.app.dependency_overrides[get_db_session] = lambda: Mock()
+
+        yield override
+        main.app.dependency_overrides.clear()
+
+    def test_members_without_audit_role_are_forbidden(self, client, override_auth):
+        override_auth(["user"])
+        audit_repo = Mock(get_organization_activity_page=AsyncMock())
+
+        with patch("main.AuditRepository", return_value=audit_repo):
+            response = client.get("/api/v1/audit/activity")
+
+        assert response.status_code == 403
+        audit_repo.get_organization_activity_page.assert_not_called()
+
+    def test_auditors_page_by_cursor(self, client, override_auth):
+        override_auth(["user", "auditor"])
+        entry = Mock(
+            id=uuid4(), document_id=uuid4(), action="viewed", user_id=uuid4(),
+            created_at=datetime(2026, 1, 1), details={}, ip_address=None, execution_time_ms=3
+        )
+        audit_repo = Mock(get_organization_activity_page=AsyncMock(
+            return_value=Page(items=[entry], next_cursor="abc")
+        ))
+
+        with patch("main.AuditRepository", return_value=audit_repo):
+            response = client.get("/api/v1/audit/activity?limit=1&cursor=xyz")
+
+        assert response.status_code == 200
+        assert response.json()["pagination"]["next_cursor"] == "abc"
+        assert audit_repo.get_organization_activity_page.call_args.kwargs["cursor"] == "xyz"
@@ -0,0 +1,108 @@
+"""
+Metadata index tests for Content Service
+Tests indexed listings and info lookups, staleness detection and rebuilds
+"""
+
+import hashlib
+import io
+import os
+
+import pytest
+from unittest.mock import patch
+
+from storage import LocalFileStorage
+
+
+CONTENT = b"%PDF-1.4\n" + b"meeting minutes" * 64
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalFileStorage({"base_path": str(tmp_path), "content_addressed": True})
+
+
+async def _ingest(storage, path, content=CONTENT, metadata=None):
+    temp_path = storage.new_temp_path()
+    temp_path.write_bytes(content)
+    return await storage.store_ingested(
+        temp_path, path, hashlib.sha256(content).hexdigest(),
+        metadata=metadata, content_type="application/pdf"
+    )
+
+
+class TestMetadataIndex:
+    """Test index-backed lookups"""
+
+    @pytest.mark.asyncio
+    async def test_list_and_info_read_only_the_index(self, storage):
+        """Listing never opens, hashes or sniffs stored files"""
+        await _ingest(storage, "org-a/1.pdf", metadata={"title": "Minutes"})
+        await _ingest(storage, "org-a/2.pdf", CONTENT + b"2")
+        await _ingest(storage, "org-b/1.pdf", CONTENT + b"3")
+
+        with patch('aiofiles.open', side_effect=AssertionError("opened file")), \
+             patch('magic.from_file', side_effect=AssertionError("sniffed file")):
+            files = await storage.list_files("org-a")
+            info = await storage.get_info("org-a/1.pdf")
+
+        assert [f.path for f in files] == ["org-a/1.pdf", "org-a/2.pdf"]
+        assert files[0].content_type == "application/pdf"
+        assert files[1].hash == hashlib.sha256(CONTENT + b"2").hexdigest()
+        assert info.metadata == {"title": "Minutes"}
+        assert len(await storage.list_files(limit=2)) == 2
+
+    @pytest.mark.asyncio
+    @patch('magic.from_buffer')
+    async def test_store_and_delete_maintain_index(self, mock_magic, tmp_path):
+        """Non-CAS stores are indexed and deletes are unindexed"""
+        mock_magic.return_value = "application/pdf"
+        storage = LocalFileStorage({"base_path": str(tmp_path)})
+
+        await storage.store(io.BytesIO(CONTENT), "org-a/doc.pdf", {"v": 1})
+        await storage.move_file("org-a/doc.pdf", "org-a/moved.pdf")
+
+        assert storage.metadata_index.get("org-a/doc.pdf") is None
+        entry = storage.metadata_index.get("org-a/moved.pdf")
+        assert entry.hash == hashlib.sha256(CONTENT).hexdigest()
+        assert [f.path for f in await storage.list_files()] == ["org-a/moved.pdf"]
+
+    @pytest.mark.asyncio
+    async def test_stale_entry_is_refreshed(self, storage, tmp_path):
+        """get_info re-reads a file modified behind the storage layer"""
+        await _ingest(storage, "org-a/1.pdf")
+        path = tmp_path / "org-a" / "1.pdf"
+        os.remove(path)
+        path.write_bytes(b"replaced")
+
+        info = await storage.get_info("org-a/1.pdf")
+
+        assert info.size == len(b"replaced")
+        assert storage.metadata_index.get("org-a/1.pdf").size == len(b"replaced")
+        assert await storage.get_info("org-a/missing.pdf") is None
+
+
+class TestIndexRebuild:
+    """Test recovery of a missing index"""
+
+    @pytest.mark.asyncio
+    async def test_rebuild_after_index_loss(self, tmp_path):
+        """Without an index listings walk the tree until rebuild-index runs"""
+        (tmp_path / "org-a").mkdir()
+        (tmp_path / "org-a" / "old.pdf").write_bytes(CONTENT)
+        (tmp_path / "org-a" / "old.pdf.metadata").write_text('{"title": "Old"}')
+
+        storage = LocalFileStorage({"base_path": str(tmp_path)})
+        assert not storage.metadata_index.complete
+        assert [f.path for f in await storage.list_files()] == ["org-a/old.pdf"]
+
+        count = await storage.rebuild_index()
+
+        assert count == 1
+        assert storage.metadata_index.complete
+        entry = storage.metadata_index.get("org-a/old.pdf")
+        assert entry.hash == hashlib.sha256(CONTENT).hexdigest()
+        assert entry.metadata == {"title": "Old"}
+
+    def test_empty_storage_index_starts_complete(self, storage):
+        """A fresh storage directory needs no rebuild"""
+        assert storage.metadata_index.complete
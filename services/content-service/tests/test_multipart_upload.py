@@ -0,0 +1,224 @@
+"""
+Resumable multipart upload tests for Content Service
+Tests parallel out-of-order parts, resumption, incremental hashing and completion
+"""
+
+import asyncio
+import hashlib
+import os
+from datetime import datetime
+from uuid import UUID, uuid4
+
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from storage import LocalFileStorage, MultipartUploadManager
+from storage.ingest import ContentTypeNotAllowedError, UploadTooLargeError
+from storage.multipart import (
+    MIN_PART_SIZE, IncompleteUploadError, InvalidUploadPartError,
+    UploadConflictError, UploadSessionNotFoundError
+)
+
+
+PART_SIZE = MIN_PART_SIZE
+CONTENT = b"%PDF-1.4\n" + os.urandom(3 * PART_SIZE + 1234)
+
+
+async def _stream(data: bytes, chunk_size: int = 64 * 1024):
+    for i in range(0, len(data), chunk_size):
+        yield data[i:i + chunk_size]
+
+
+def _part(number: int) -> bytes:
+    return CONTENT[(number - 1) * PART_SIZE:number * PART_SIZE]
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalFileStorage({"base_path": str(tmp_path), "content_addressed": True})
+
+
+@pytest.fixture
+def uploads(storage):
+    return MultipartUploadManager(
+        storage, max_size=64 * 1024 * 1024, part_size=PART_SIZE, chunk_size=256 * 1024
+    )
+
+
+class TestMultipartUpload:
+    """Test the resumable upload protocol"""
+
+    @pytest.mark.asyncio
+    @patch('magic.from_buffer')
+    async def test_parallel_out_of_order_parts(self, mock_magic, uploads, storage):
+        """Parts sent concurrently in any order assemble into the file"""
+        mock_magic.return_value = "application/pdf"
+        session = await uploads.initiate("org-a/doc.pdf", len(CONTENT), filename="doc.pdf")
+        assert session.part_count == 4
+
+        await asyncio.gather(*[
+            uploads.write_part(session.upload_id, n, _stream(_part(n))) for n in (4, 2, 3, 1)
+        ])
+        session, ingested = await uploads.complete(
+            session.upload_id, allowed_content_types=["application/pdf"]
+        )
+
+        assert ingested.sha256 == hashlib.sha256(CONTENT).hexdigest()
+        assert ingested.size == len(CONTENT)
+        assert (storage.base_path / "org-a" / "doc.pdf").read_bytes() == CONTENT
+        assert (await storage.get_storage_stats("org-a"))["organization"]["used_bytes"] == len(CONTENT)
+        with pytest.raises(UploadSessionNotFoundError):
+            await uploads.get_session(session.upload_id)
+
+    @pytest.mark.asyncio
+    async def test_resume_after_interrupted_part(self, uploads):
+        """An interrupted part isn't recorded and the offset shows where to resume"""
+        session = await uploads.initiate("org-a/doc.pdf", len(CONTENT))
+        await uploads.write_part(session.upload_id, 1, _stream(_part(1)))
+
+        with pytest.raises(InvalidUploadPartError):
+            await uploads.write_part(session.upload_id, 2, _stream(_part(2)[:1000]))
+
+        session = await uploads.get_session(session.upload_id)
+        assert session.received_offset == PART_SIZE
+        assert session.missing_parts == [2, 3, 4]
+
+        await uploads.write_part(session.upload_id, 2, _stream(_part(2)))
+        assert (await uploads.get_session(session.upload_id)).received_offset == 2 * PART_SIZE
+
+    @pytest.mark.asyncio
+    async def test_hash_advances_as_prefix_grows(self, uploads):
+        """The running hash covers received parts before completion"""
+        session = await uploads.initiate("org-a/doc.pdf", len(CONTENT))
+        await uploads.write_part(session.upload_id, 2, _stream(_part(2)))
+        await uploads.write_part(session.upload_id, 1, _stream(_part(1)))
+
+        state = await uploads._advance_hash(session.upload_id)
+
+        assert state.offset == 2 * PART_SIZE
+        assert (await uploads.get_session(session.upload_id)).hashed_bytes == 2 * PART_SIZE
+
+    @pytest.mark.asyncio
+    async def test_part_validation(self, uploads):
+        """Out-of-range, oversized and duplicate parts are rejected"""
+        session = await uploads.initiate("org-a/doc.pdf", len(CONTENT))
+
+        with pytest.raises(InvalidUploadPartError):
+            await uploads.write_part(session.upload_id, 5, _stream(b"x"))
+        with pytest.raises(InvalidUploadPartError):
+            await uploads.write_part(session.upload_id, 4, _stream(_part(4) + b"extra"))
+
+        await uploads.write_part(session.upload_id, 4, _stream(_part(4)))
+        with pytest.raises(UploadConflictError):
+            await uploads.write_part(session.upload_id, 4, _stream(_part(4)))
+
+        with pytest.raises(IncompleteUploadError) as exc_info:
+            await uploads.complete(session.upload_id)
+        assert exc_info.value.missing_parts == [1, 2, 3]
+
+    @pytest.mark.asyncio
+    async def test_size_limit_enforced_at_initiate(self, uploads):
+        """Uploads larger than max_size never start"""
+        with pytest.raises(UploadTooLargeError):
+            await uploads.initiate("org-a/huge.pdf", 65 * 1024 * 1024)
+
+    @pytest.mark.asyncio
+    @patch('magic.from_buffer')
+    async def test_disallowed_content_discards_upload(self, mock_magic, uploads, storage):
+        """Rejected content is removed along with its session"""
+        mock_magic.return_value = "application/x-executable"
+        session = await uploads.initiate("org-a/doc.pdf", 100)
+        await uploads.write_part(session.upload_id, 1, _stream(b"M" * 100))
+
+        with pytest.raises(ContentTypeNotAllowedError):
+            await uploads.complete(session.upload_id, allowed_content_types=["application/pdf"])
+
+        assert not session.temp_path.exists()
+        assert not await storage.exists("org-a/doc.pdf")
+
+    @pytest.mark.asyncio
+    async def test_abort_and_expiry(self, uploads):
+        """Aborted and expired uploads release their temporary files"""
+        first = await uploads.initiate("org-a/1.pdf", 100)
+        assert await uploads.abort(first.upload_id)
+        assert not first.temp_path.exists()
+
+        second = await uploads.initiate("org-a/2.pdf", 100)
+        uploads.session_ttl_seconds = -1
+        assert await uploads.expire_sessions() == 1
+        assert not second.temp_path.exists()
+
+
+class TestMultipartUploadEndpoints:
+    """Test resumable upload API access control"""
+
+    def test_upload_endpoints_require_auth(self, client):
+        """Every upload endpoint requires authentication"""
+        requests = [
+            ("POST", "/api/v1/uploads", {"json": {"filename": "scan.pdf", "file_size": 1024}}),
+            ("GET", "/api/v1/uploads/abc", {}),
+            ("PUT", "/api/v1/uploads/abc/parts/1", {"content": b"part"}),
+            ("POST", "/api/v1/uploads/abc/complete", {}),
+            ("DELETE", "/api/v1/uploads/abc", {}),
+        ]
+
+        for method, url, kwargs in requests:
+            response = client.request(method, url, **kwargs)
+            assert response.status_code in [401, 403], f"{method} {url}"
+
+    @patch('magic.from_buffer')
+    def test_resumable_upload_flow(self, mock_magic, client, uploads, mock_user_data):
+        """Initiate, send parts, query, complete into a document record"""
+        import main
+        from database import get_db_session
+
+        mock_magic.return_value = "application/pdf"
+        document = Mock(
+            id=uuid4(), filename="scan.pdf", original_filename="scan.pdf",
+            content_type="application/pdf", file_size=len(CONTENT),
+            file_hash=hashlib.sha256(CONTENT).hexdigest(), status="active",
+            document_type=None, metadata={}, organization_id=mock_user_data["organization_id"],
+            created_at=datetime.now(), updated_at=datetime.now()
+        )
+        doc_repo = Mock(create_document=AsyncMock(return_value=document))
+        audit_repo = Mock(log_action=AsyncMock())
+
+        # Override the token check, so the identity payload goes through get_current_user
+        main.app.dependency_overrides[main.validate_jwt_token] = lambda: mock_user_data
+        main.app.dependency_overrides[get_db_session] = lambda: Mock()
+        try:
+            with patch.object(main, 'multipart_uploads', uploads), \
+                 patch.object(main, 'file_storage', uploads.storage), \
+                 patch('main.DocumentRepository', return_value=doc_repo), \
+                 patch('main.AuditRepository', return_value=audit_repo):
+                created = client.post(
+                    "/api/v1/uploads",
+                    json={"filename": "scan.pdf", "file_size": len(CONTENT), "part_size": PART_SIZE}
+                )
+                assert created.status_code == 201
+                upload_id = created.json()["upload_id"]
+
+                for number in (3, 1, 4):
+                    response = client.put(
+                        f"/api/v1/uploads/{upload_id}/parts/{number}", content=_part(number)
+                    )
+                    assert response.status_code == 200
+
+                status = client.get(f"/api/v1/uploads/{upload_id}").json()
+                assert status["missing_parts"] == [2]
+                assert status["offset"] == PART_SIZE
+
+                incomplete = client.post(f"/api/v1/uploads/{upload_id}/complete")
+                assert incomplete.status_code == 409
+
+                client.put(f"/api/v1/uploads/{upload_id}/parts/2", content=_part(2))
+                completed = client.post(f"/api/v1/uploads/{upload_id}/complete")
+        finally:
+            main.app.dependency_overrides.clear()
+
+        assert completed.status_code == 200
+        kwargs = doc_repo.create_document.call_args.kwargs
+        assert kwargs["file_hash"] == hashlib.sha256(CONTENT).hexdigest()
+        assert kwargs["metadata"]["upload_source"] == "multipart"
+        assert kwargs["created_by"] == UUID(mock_user_data["user_id"])
+        assert audit_repo.log_action.call_args.kwargs["action"] == "uploaded"
@@ -0,0 +1,182 @@
+"""
+Tests for the page-level OCR engine.
+
+tesseract itself is replaced by a fake that "reads" the number of black
+bars on a band, so the tests cover splitting, preprocessing, concurrency
+and merging without the binary installed.
+"""
+
+import io
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+pytesseract = pytest.importorskip("pytesseract")
+
+from extractors import ImageExtractor, MetadataExtractorFactory, PDFExtractor
+from extractors.base_extractor import ExtractedMetadata
+from extractors.ocr_engine import OCREngine, OCRPage, OCRResult, otsu_threshold, split_tiles
+
+
+def page_with_bars(bars, height=400, width=300, dpi=300):
+    """A light page with the given number of dark bars, each on its own text line."""
+    pixels = np.full((height, width), 220, dtype=np.uint8)
+    for i in range(bars):
+        top = 20 + i * 30
+        pixels[top:top + 10, 20:width - 20] = 25
+    image = Image.fromarray(pixels)
+    image.info['dpi'] = (dpi, dpi)
+    return image
+
+
+class FakeTesseract:
+    """Stands in for pytesseract.image_to_data and records concurrency."""
+
+    def __init__(self, delay=0.05, fail_on=None):
+        self.delay = delay
+        self.fail_on = fail_on
+        self.running = 0
+        self.max_running = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, image, config, output_type):
+        with self._lock:
+            self.running += 1
+            self.calls += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            time.sleep(self.delay)
+            pixels = np.asarray(image)
+            ink_rows = np.count_nonzero((pixels == 0).any(axis=1))
+            bars = ink_rows // 10
+            if bars == self.fail_on:
+                raise RuntimeError("tesseract crashed")
+            return {
+                'text': ['', f'bars{bars}', 'noise'],
+                'conf': ['-1', '90.5', '12'],
+                'block_num': [0, 1, 1], 'par_num': [0, 1, 1], 'line_num': [0, 1, 1]
+            }
+        finally:
+            with self._lock:
+                self.running -= 1
+
+
+class TestPreprocessing:
+    """Vectorized preprocessing and band splitting."""
+
+    def test_downsamples_and_binarizes(self):
+        engine = OCREngine(target_dpi=300)
+        binary = engine.preprocess(page_with_bars(3, height=800, width=600, dpi=600))
+
+        assert binary.shape == (400, 300)
+        assert set(np.unique(binary)) == {0, 255}
+        assert 25 <= otsu_threshold(np.asarray(page_with_bars(3))) < 220
+
+    def test_tiles_are_cut_on_blank_rows_and_skip_blank_bands(self):
+        binary = np.full((1000, 100), 255, dtype=np.uint8)
+        for top in (10, 70, 140, 310):
+            binary[top:top + 20] = 0
+
+        tiles = split_tiles(binary, max_rows=150)
+
+        # The bar at 140 crosses the first band's limit, so the cut moves up to 140
+        assert tiles == [(0, 140), (140, 290), (290, 440)]
+        assert all(not (binary[end - 1] == 0).any() for _, end in tiles)
+
+
+class TestRecognition:
+    """Pages are recognized concurrently and merged in order."""
+
+    def test_pages_merge_in_order_with_confidence(self):
+        engine = OCREngine(max_workers=4, max_tile_rows=400)
+        fake = FakeTesseract()
+        pages = [(number, page_with_bars(number)) for number in range(1, 7)]
+        pages.insert(2, (99, OCRPage(99, "text layer page", None, 3, source="text_layer")))
+
+        with patch.object(pytesseract, "image_to_data", fake):
+            result = engine.recognize(iter(pages))
+
+        assert [page.page_number for page in result.pages] == [1, 2, 99, 3, 4, 5, 6]
+        assert result.text.split("\n") == ["bars1", "bars2", "text layer page", "bars3", "bars4", "bars5", "bars6"]
+        assert result.confidence == 90.5
+        assert fake.max_running > 1
+
+    def test_failed_page_is_reported_and_others_kept(self):
+        engine = OCREngine(max_workers=2)
+        with patch.object(pytesseract, "image_to_data", FakeTesseract(delay=0, fail_on=2)):
+            result = engine.recognize([(1, page_with_bars(1)), (2, page_with_bars(2)), (3, page_with_bars(3))])
+
+        metadata = ExtractedMetadata()
+        result.apply_to(metadata)
+        assert metadata.text_content == "bars1\nbars3"
+        assert metadata.raw_metadata['ocr']['failed_pages'] == [2]
+        assert metadata.ocr_confidence == 90.5
+        assert "tesseract crashed" in metadata.warnings[0]
+
+    def test_pdf_pages_with_text_layer_are_not_recognized(self):
+        engine = OCREngine(max_workers=2)
+        scan = io.BytesIO()
+        page_with_bars(2).save(scan, format="PNG")
+        logo = io.BytesIO()
+        page_with_bars(1, height=40, width=40).save(logo, format="PNG")
+        reader = SimpleNamespace(pages=[
+            SimpleNamespace(extract_text=lambda: "A page that has a proper text layer", images=[]),
+            SimpleNamespace(extract_text=lambda: "", images=[
+                SimpleNamespace(data=logo.getvalue()), SimpleNamespace(data=scan.getvalue())
+            ]),
+            SimpleNamespace(extract_text=lambda: "", images=[])
+        ])
+
+        with patch.object(pytesseract, "image_to_data", FakeTesseract(delay=0)) as fake:
+            result = engine.recognize(engine._pdf_pages(reader))
+
+        assert [(page.source, page.text) for page in result.pages] == [
+            ("text_layer", "A page that has a proper text layer"), ("ocr", "bars2"), ("text_layer", "")
+        ]
+        assert fake.calls == 1
+
+
+@pytest.mark.asyncio
+class TestOCRIntegration:
+    """ImageExtractor and OCR processing requests use the engine."""
+
+    async def test_multi_page_tiff_is_recognized_page_by_page(self, tmp_path):
+        path = tmp_path / "scan.tiff"
+        frames = [page_with_bars(n) for n in (1, 2, 3)]
+        frames[0].save(path, save_all=True, append_images=frames[1:])
+        extractor = ImageExtractor()
+
+        with patch.object(pytesseract, "image_to_data", FakeTesseract(delay=0)):
+            metadata = await extractor.extract_metadata(path, "image/tiff")
+
+        assert metadata.page_count == 3
+        assert metadata.text_content == "bars1\nbars2\nbars3"
+        assert metadata.ocr_confidence == 90.5
+        assert not metadata.errors
+
+    async def test_ocr_requests_merge_scanned_pdf_pages(self, tmp_path):
+        path = tmp_path / "scan.pdf"
+        path.write_bytes(b"%PDF-1.4")
+        factory = MetadataExtractorFactory(ocr_engine=OCREngine())
+        layer_only = ExtractedMetadata(text_content="cover", word_count=1, page_count=2)
+        recognized = OCRResult([
+            OCRPage(1, "cover page text", None, 3, source="text_layer"),
+            OCRPage(2, "quarterly budget scanned appendix", 80.0, 4)
+        ])
+
+        with patch.object(PDFExtractor, "extract_metadata", return_value=layer_only), \
+                patch.object(OCREngine, "recognize_pdf", return_value=recognized) as recognize:
+            plain = await factory.extract_metadata(path, "application/pdf")
+            assert plain.text_content == "cover"
+            metadata = await factory.extract_metadata(path, "application/pdf", ocr=True)
+
+        assert recognize.call_count == 1
+        assert metadata.text_content == "cover page text\nquarterly budget scanned appendix"
+        assert (metadata.word_count, metadata.ocr_confidence, metadata.text_extraction_confidence) == (7, 80.0, 0.8)
+        assert metadata.raw_metadata['ocr']['pages_recognized'] == 1
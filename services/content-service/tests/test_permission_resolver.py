@@ -0,0 +1,208 @@
+"""
+Tests for the batched effective-permission resolver.
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, Mock, patch
+from uuid import uuid4
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from models.permission import DocumentPermission
+from repositories import PermissionRepository, PermissionResolver
+from repositories.permission_repository import EffectivePermissions
+
+
+@pytest_asyncio.fixture
+async def permission_session():
+    """SQLite session with only the document_permissions table."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync_conn: DocumentPermission.__table__.create(sync_conn))
+
+    statements = []
+    event.listen(
+        engine.sync_engine, "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement)
+    )
+
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        session.statements = statements
+        yield session
+
+    await engine.dispose()
+
+
+def grant(document_id, user_id=None, role_name=None, expires_at=None, granted_at=None, **flags):
+    return DocumentPermission(
+        id=uuid4(), document_id=document_id, user_id=user_id, role_name=role_name,
+        granted_by=uuid4(), granted_at=granted_at or datetime.utcnow() - timedelta(days=7),
+        expires_at=expires_at,
+        **{f"can_{perm}": flags.get(perm, False) for perm in ("read", "write", "delete", "share", "admin")}
+    )
+
+
+@pytest.mark.asyncio
+class TestEffectivePermissionsBatch:
+    """Set-based resolution in PermissionRepository."""
+
+    async def test_combines_direct_and_role_grants(self, permission_session):
+        user_id = uuid4()
+        doc_a, doc_b, doc_c = uuid4(), uuid4(), uuid4()
+        permission_session.add_all([
+            grant(doc_a, user_id=user_id, read=True),
+            grant(doc_a, role_name="editor", write=True),
+            grant(doc_b, role_name="viewer", read=True),
+            grant(doc_b, role_name="reviewer", share=True),
+            grant(doc_c, user_id=uuid4(), admin=True),  # Someone else's grant
+        ])
+        await permission_session.flush()
+        permission_session.statements.clear()
+
+        resolved = await PermissionRepository(permission_session).get_effective_permissions_batch(
+            [doc_a, doc_b, doc_c], user_id, ["reviewer", "editor", "viewer"]
+        )
+
+        assert len(permission_session.statements) == 1
+        assert resolved[doc_a].permissions == {
+            "read": True, "write": True, "delete": False, "share": False, "admin": False
+        }
+        assert resolved[doc_a].sources == ["direct", "role:editor"]
+        assert resolved[doc_b].allows("read") and resolved[doc_b].allows("share")
+        assert resolved[doc_b].sources == ["role:reviewer", "role:viewer"]
+        assert not any(resolved[doc_c].permissions.values())
+        assert resolved[doc_c].sources == []
+
+    async def test_ignores_expired_grants(self, permission_session):
+        user_id = uuid4()
+        document_id = uuid4()
+        permission_session.add_all([
+            grant(document_id, user_id=user_id, delete=True,
+                  expires_at=datetime.utcnow() - timedelta(days=1)),
+            grant(document_id, role_name="editor", write=True,
+                  expires_at=datetime.utcnow() + timedelta(days=1)),
+        ])
+        await permission_session.flush()
+
+        resolved = await PermissionRepository(permission_session).get_effective_permissions_batch(
+            [document_id], user_id, ["editor"]
+        )
+
+        assert not resolved[document_id].allows("delete")
+        assert resolved[document_id].allows("write")
+        assert resolved[document_id].sources == ["role:editor"]
+
+    async def test_empty_request_runs_no_query(self, permission_session):
+        resolved = await PermissionRepository(permission_session).get_effective_permissions_batch(
+            [], uuid4(), ["editor"]
+        )
+
+        assert resolved == {}
+        assert permission_session.statements == []
+
+    async def test_owner_copy_grants_everything(self):
+        effective = EffectivePermissions(uuid4(), sources=["role:viewer"])
+
+        owner = effective.as_owner()
+
+        assert all(owner.permissions.values())
+        assert owner.sources == ["owner", "role:viewer"]
+        assert not any(effective.permissions.values())
+
+
+@pytest.mark.asyncio
+class TestPermissionResolver:
+    """Per-request memo over the batch query."""
+
+    async def test_fifty_documents_five_roles_is_one_query(self, permission_session):
+        user_id = uuid4()
+        roles = ["r1", "r2", "r3", "r4", "r5"]
+        documents = [uuid4() for _ in range(50)]
+        permission_session.add_all(
+            grant(doc, role_name=roles[i % 5], read=True) for i, doc in enumerate(documents)
+        )
+        await permission_session.flush()
+        permission_session.statements.clear()
+
+        resolver = PermissionResolver(permission_session)
+        resolved = await resolver.resolve(documents, user_id, roles)
+
+        assert len(permission_session.statements) == 1
+        assert all(resolved[doc].allows("read") for doc in documents)
+
+    async def test_memoizes_within_request(self):
+        resolver = PermissionResolver(Mock())
+        doc_a, doc_b = uuid4(), uuid4()
+        resolver.repository.get_effective_permissions_batch = AsyncMock(
+            side_effect=lambda ids, user_id, roles: {doc: EffectivePermissions(doc) for doc in ids}
+        )
+        user_id = uuid4()
+
+        await resolver.resolve([doc_a], user_id, ["editor"])
+        await resolver.resolve([doc_a, doc_b], user_id, ["editor"])
+        assert await resolver.check(doc_b, user_id, ["editor"], "read") is False
+
+        calls = resolver.repository.get_effective_permissions_batch.await_args_list
+        assert [call.args[0] for call in calls] == [[doc_a], [doc_b]]
+        assert resolver.queries == 2
+
+        # Different roles are a different principal set
+        await resolver.resolve([doc_a], user_id, ["viewer"])
+        assert resolver.queries == 3
+
+        resolver.invalidate(doc_a)
+        await resolver.resolve([doc_a, doc_b], user_id, ["editor"])
+        assert resolver.repository.get_effective_permissions_batch.await_args.args[0] == [doc_a]
+
+
+class TestDocumentListPermissions:
+    """GET /api/v1/documents annotates items with one resolver call."""
+
+    def test_list_annotates_permissions(self, client, mock_user_data):
+        import main
+        from database import get_db_session
+        from repositories import Page
+
+        user_id = uuid4()
+        owned, shared = Mock(created_by=user_id), Mock(created_by=uuid4())
+        for doc in (owned, shared):
+            doc.configure_mock(
+                id=uuid4(), filename="a.pdf", content_type="application/pdf", file_size=1,
+                document_type=None, created_at=datetime(2026, 1, 1), status="active",
+                classification="internal", thumbnail_generated=False
+            )
+            doc.get_metadata_value.side_effect = lambda key, default=None: default
+            doc.is_processing_complete.return_value = True
+        doc_repo = Mock(
+            find_page_by_organization=AsyncMock(return_value=Page(items=[owned, shared])),
+            count_up_to=AsyncMock(return_value=2)
+        )
+        resolver = PermissionResolver(Mock())
+        resolver.repository.get_effective_permissions_batch = AsyncMock(return_value={
+            shared.id: EffectivePermissions(shared.id, {
+                "read": True, "write": False, "delete": False, "share": False, "admin": False
+            }, ["role:user"])
+        })
+
+        main.app.dependency_overrides[main.get_current_user] = lambda: {
+            "id": user_id, "organization_id": mock_user_data["organization_id"], "roles": ["user"]
+        }
+        main.app.dependency_overrides[get_db_session] = lambda: Mock()
+        main.app.dependency_overrides[main.get_permission_resolver] = lambda: resolver
+        try:
+            with patch("main.DocumentRepository", return_value=doc_repo), \
+                 patch("main.AuditRepository", return_value=Mock(log_action=AsyncMock())):
+                response = client.get("/api/v1/documents")
+        finally:
+            main.app.dependency_overrides.clear()
+
+        assert response.status_code == 200
+        items = {item["id"]: item["permissions"] for item in response.json()["documents"]}
+        assert all(items[str(owned.id)].values())
+        assert items[str(shared.id)]["read"] is True
+        assert items[str(shared.id)]["write"] is False
+        resolver.repository.get_effective_permissions_batch.assert_awaited_once()
+        assert resolver.repository.get_effective_permissions_batch.await_args.args[0] == [shared.id]
@@ -0,0 +1,467 @@
+"""
+Tests for the Redis processing queue.
+"""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+import pytest_asyncio
+from fakeredis import FakeAsyncRedis
+from redis.asyncio.client import Pipeline
+
+pytest.importorskip("lupa")
+
+from processing.background_worker import BackgroundWorker
+from processing.queue_manager import ProcessingQueueManager, ProcessingTask
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest_asyncio.fixture
+async def queue():
+    manager = ProcessingQueueManager(queue_prefix="test_processing")
+    client = FakeAsyncRedis(server=fakeredis.FakeServer(), decode_responses=True)
+    with patch("processing.queue_manager.aioredis.from_url", return_value=client):
+        await manager.connect()
+    yield manager
+    await manager.disconnect()
+
+
+def make_task(task_id, priority=5, organization_id="org", **kwargs):
+    return ProcessingTask(
+        id=task_id, document_id=f"doc-{task_id}", organization_id=organization_id, user_id="user",
+        task_type="metadata_extraction", priority=priority, parameters={"file_hash": "abc"}, **kwargs
+    )
+
+
+class RoundTrips:
+    """Counts commands and pipelines sent to Redis."""
+
+    def __init__(self, client):
+        self.count = 0
+        self._execute_command = client.execute_command
+        self._pipeline_execute = Pipeline.execute
+
+        async def execute_command(*args, **kwargs):
+            self.count += 1
+            return await self._execute_command(*args, **kwargs)
+
+        async def pipeline_execute(pipe, *args, **kwargs):
+            self.count += 1
+            return await self._pipeline_execute(pipe, *args, **kwargs)
+
+        self._patches = [
+            patch.object(client, "execute_command", execute_command),
+            patch.object(Pipeline, "execute", pipeline_execute)
+        ]
+
+    def __enter__(self):
+        for p in self._patches:
+            p.start()
+        return self
+
+    def __exit__(self, *exc):
+        for p in self._patches:
+            p.stop()
+
+
+class TestQueueOperations:
+    """Each operation is one round trip and leaves consistent state."""
+
+    async def test_round_trip_marks_task_processing(self, queue):
+        await queue.enqueue_task(make_task("t1"))
+
+        task = await queue.dequeue_task(timeout=1)
+
+        assert (task.id, task.status, task.attempts) == ("t1", "processing", 1)
+        assert task.started_at and task.parameters == {"file_hash": "abc"}
+        assert await queue.get_task("t1") == task
+        assert await queue.redis_client.zrange(queue.leases_key, 0, -1) == ["t1"]
+        stats = await queue.get_queue_stats()
+        assert (stats["queue_normal_length"], stats["processing_count"], stats["tasks_enqueued"]) == (0, 1, 1)
+
+    async def test_one_round_trip_per_operation(self, queue):
+        # Load the scripts so the counts below are steady state
+        await queue.enqueue_task(make_task("warm"))
+        await queue.dequeue_task(timeout=1)
+        await queue.process_delayed_tasks()
+        await queue.cancel_task("none")
+        await queue.complete_task(make_task("none"))
+
+        with RoundTrips(queue.redis_client) as round_trips:
+            await queue.enqueue_task(make_task("t1"))
+            assert round_trips.count == 1
+            task = await queue.dequeue_task(timeout=1)
+            assert round_trips.count == 2
+            await queue.fail_task(task, "boom")
+            assert round_trips.count == 3
+            await queue.process_delayed_tasks()
+            assert round_trips.count == 4
+            await queue.get_queue_stats()
+            assert round_trips.count == 5
+
+    async def test_higher_priority_queues_are_served_first(self, queue):
+        for task_id, priority in [("low", 9), ("normal", 5), ("high", 1), ("high2", 2)]:
+            await queue.enqueue_task(make_task(task_id, priority=priority))
+
+        order = [(await queue.dequeue_task(timeout=1)).id for _ in range(4)]
+
+        assert order == ["high", "high2", "normal", "low"]
+        assert await queue.dequeue_task(timeout=1) is None
+
+    async def test_task_without_data_is_skipped(self, queue):
+        await queue.enqueue_task(make_task("gone"))
+        await queue.enqueue_task(make_task("kept"))
+        await queue.redis_client.delete(queue._task_key("gone"))
+
+        assert (await queue.dequeue_task(timeout=1)).id == "kept"
+
+    async def test_waiting_consumer_wakes_on_enqueue(self, queue):
+        consumer = asyncio.create_task(queue.dequeue_task(timeout=5))
+        await asyncio.sleep(0.2)
+        started = time.monotonic()
+        await queue.enqueue_task(make_task("t1"))
+
+        task = await consumer
+
+        assert task.id == "t1"
+        assert time.monotonic() - started < 1
+
+    async def test_failed_task_is_retried_after_delay(self, queue):
+        await queue.enqueue_task(make_task("t1", priority=2))
+        task = await queue.dequeue_task(timeout=1)
+
+        await queue.fail_task(task, "boom")
+        assert await queue.redis_client.zcard(queue.leases_key) == 0
+        assert (await queue.get_task("t1")).status == "pending"
+        await queue.process_delayed_tasks()
+        assert await queue.dequeue_task(timeout=1) is None
+
+        await queue.redis_client.zadd(queue.delayed_set, {"t1": time.time() - 1})
+        await queue.process_delayed_tasks()
+        retried = await queue.dequeue_task(timeout=1)
+        assert (retried.id, retried.attempts, retried.error_message) == ("t1", 2, "boom")
+
+    async def test_exhausted_task_fails_permanently(self, queue):
+        await queue.enqueue_task(make_task("t1", max_attempts=1))
+        task = await queue.dequeue_task(timeout=1)
+
+        await queue.fail_task(task, "boom")
+
+        assert await queue.redis_client.zrange(queue.failed_set, 0, -1) == ["t1"]
+        assert (await queue.get_queue_stats())["delayed_count"] == 0
+
+    async def test_complete_moves_task_to_completed(self, queue):
+        await queue.enqueue_task(make_task("t1"))
+        task = await queue.dequeue_task(timeout=1)
+
+        await queue.complete_task(task, {"pages": 3})
+
+        stats = await queue.get_queue_stats()
+        assert (stats["processing_count"], stats["completed_count"], stats["tasks_completed"]) == (0, 1, 1)
+        assert (await queue.get_task("t1")).result == {"pages": 3}
+
+    async def test_cancel_only_affects_pending_tasks(self, queue):
+        await queue.enqueue_task(make_task("running"))
+        await queue.enqueue_task(make_task("waiting"))
+        await queue.dequeue_task(timeout=1)
+
+        assert await queue.cancel_task("running") is False
+        assert await queue.cancel_task("waiting") is True
+        assert await queue.cancel_task("waiting") is True
+        assert await queue.cancel_task("unknown") is False
+        assert (await queue.get_task("waiting")).status == "cancelled"
+        assert await queue.dequeue_task(timeout=1) is None
+
+
+class TestFairScheduling:
+    """Organizations share each priority class; long-waiting low priority work moves up."""
+
+    async def enqueue(self, queue, organization_id, count, priority=5):
+        for i in range(count):
+            await queue.enqueue_task(make_task(f"{organization_id}-{i}", priority, organization_id))
+
+    async def dequeue_organizations(self, queue, count, batch=1):
+        tasks = []
+        while len(tasks) < count:
+            tasks += await queue.dequeue_tasks(batch, timeout=1)
+        return [task.organization_id for task in tasks]
+
+    async def test_organizations_take_turns(self, queue):
+        await self.enqueue(queue, "bulk", 50)
+        await self.enqueue(queue, "a", 2)
+        await self.enqueue(queue, "b", 2)
+
+        order = await self.dequeue_organizations(queue, 8)
+
+        assert order == ["bulk", "a", "b", "bulk", "a", "b", "bulk", "bulk"]
+        stats = await queue.get_queue_stats()
+        assert (stats["queue_normal_length"], stats["queue_normal_organizations"]) == (46, 1)
+
+    async def test_weights_set_share_across_batches(self, queue):
+        await queue.set_organization_weight("big", 3)
+        await queue.set_organization_weight("half", 0.5)
+        await self.enqueue(queue, "big", 20)
+        await self.enqueue(queue, "small", 20)
+        await self.enqueue(queue, "half", 20)
+
+        # The first batch ends mid-turn for "big"; the rest of its turn comes first in the next one
+        order = await self.dequeue_organizations(queue, 15, batch=5)
+
+        assert order == (
+            ["big"] * 3 + ["small"] + ["big"] * 3 + ["small", "half"] + ["big"] * 3 + ["small"] + ["big"] * 2
+        )
+        with pytest.raises(ValueError):
+            await queue.set_organization_weight("big", 0)
+
+    async def test_classes_are_strict_across_organizations(self, queue):
+        await self.enqueue(queue, "bulk", 5, priority=5)
+        await self.enqueue(queue, "user", 1, priority=2)
+        await self.enqueue(queue, "batch", 5, priority=9)
+
+        order = await self.dequeue_organizations(queue, 11, batch=3)
+
+        assert order == ["user"] + ["bulk"] * 5 + ["batch"] * 5
+
+    async def test_low_priority_task_ages_into_normal_class(self, queue):
+        for i in range(3):
+            await queue.enqueue_task(make_task(f"normal-{i}", priority=5))
+        for i in range(2):
+            await queue.enqueue_task(make_task(f"low-{i}", priority=9))
+        low_waiting = queue._scheduler_key("waiting", "low")
+        await queue.redis_client.zadd(low_waiting, {"low-1": time.time() - queue.aging_seconds - 1})
+
+        await queue.age_waiting_tasks()
+
+        assert await queue.redis_client.zrange(low_waiting, 0, -1) == ["low-0"]
+        stats = await queue.get_queue_stats()
+        assert (stats["queue_normal_length"], stats["queue_low_length"]) == (4, 1)
+        # The aged task runs ahead of its own organization's normal work
+        assert [task.id for task in await queue.dequeue_tasks(5, timeout=1)] == [
+            "low-1", "normal-0", "normal-1", "normal-2", "low-0"
+        ]
+
+    async def test_cancelling_last_task_ends_organization_turn(self, queue):
+        await self.enqueue(queue, "a", 1)
+        await self.enqueue(queue, "b", 1)
+        tenants = queue._scheduler_key("tenants", "normal")
+
+        assert await queue.cancel_task("a-0") is True
+        assert await queue.redis_client.lrange(tenants, 0, -1) == ["b"]
+        await self.enqueue(queue, "a", 1)
+        assert await queue.redis_client.lrange(tenants, 0, -1) == ["a", "b"]
+
+
+class TestRetention:
+    """Finished tasks expire, and cleanup only touches expired index entries."""
+
+    async def finish(self, queue, task_id, fail=False):
+        await queue.enqueue_task(make_task(task_id, max_attempts=1))
+        task = await queue.dequeue_task(timeout=1)
+        if fail:
+            await queue.fail_task(task, "boom")
+        else:
+            await queue.complete_task(task)
+
+    async def test_only_finished_tasks_expire(self, queue):
+        await self.finish(queue, "done")
+        await self.finish(queue, "broken", fail=True)
+        await queue.enqueue_task(make_task("retried"))
+        await queue.fail_task(await queue.dequeue_task(timeout=1), "boom")
+        await queue.enqueue_task(make_task("pending"))
+
+        ttls = {task_id: await queue.redis_client.ttl(queue._task_key(task_id))
+                for task_id in ("pending", "done", "broken", "retried")}
+
+        assert ttls["pending"] == ttls["retried"] == -1
+        assert 0 < ttls["done"] <= queue.retention_seconds
+        assert 0 < ttls["broken"] <= queue.retention_seconds
+
+    async def test_cleanup_removes_tasks_older_than_cutoff_in_batches(self, queue):
+        for i in range(7):
+            await self.finish(queue, f"old{i}", fail=i % 2)
+        await self.finish(queue, "recent")
+        two_weeks_ago = time.time() - 14 * 24 * 3600
+        for i in range(7):
+            index = queue.failed_set if i % 2 else queue.completed_set
+            await queue.redis_client.zadd(index, {f"old{i}": two_weeks_ago})
+
+        with patch("processing.queue_manager.DELAYED_BATCH_SIZE", 2):
+            assert await queue.cleanup_old_tasks(days_to_keep=7) == 7
+
+        assert await queue.get_task("old0") is None
+        assert await queue.redis_client.zrange(queue.completed_set, 0, -1) == ["recent"]
+        assert (await queue.get_queue_stats())["failed_count"] == 0
+        assert await queue.cleanup_old_tasks(days_to_keep=7) == 0
+
+
+class TestLeases:
+    """Tasks of dead workers come back; outcomes are recorded once."""
+
+    async def expire_lease(self, queue, task_id):
+        await queue.redis_client.zadd(queue.leases_key, {task_id: time.time() - 1})
+
+    async def test_expired_lease_is_requeued_and_stale_outcome_ignored(self, queue):
+        await queue.enqueue_task(make_task("t1"))
+        crashed = await queue.dequeue_task(timeout=1)
+        await self.expire_lease(queue, "t1")
+
+        await queue.requeue_expired_tasks()
+        assert (await queue.get_task("t1")).status == "pending"
+        retried = await queue.dequeue_task(timeout=1)
+
+        assert retried.attempts == 2 and retried.lease_id != crashed.lease_id
+        assert await queue.complete_task(crashed, {"by": "crashed"}) is False
+        assert await queue.fail_task(crashed, "late failure") is False
+        assert await queue.complete_task(retried, {"by": "retried"}) is True
+        assert await queue.complete_task(retried, {"by": "again"}) is False
+
+        stored = await queue.get_task("t1")
+        stats = await queue.get_queue_stats()
+        assert (stored.status, stored.result, stored.lease_id) == ("completed", {"by": "retried"}, None)
+        assert (stats["tasks_completed"], stats.get("tasks_failed", 0), stats["tasks_lease_expired"]) == (1, 0, 1)
+        assert (stats["processing_count"], stats["completed_count"]) == (0, 1)
+
+    async def test_expired_lease_on_last_attempt_fails_task(self, queue):
+        await queue.enqueue_task(make_task("t1", max_attempts=1))
+        await queue.dequeue_task(timeout=1)
+        await self.expire_lease(queue, "t1")
+        assert (await queue.get_queue_stats())["expired_lease_count"] == 1
+
+        await queue.requeue_expired_tasks()
+
+        stored = await queue.get_task("t1")
+        assert (stored.status, stored.error_message) == ("failed", "Worker lease expired")
+        assert await queue.redis_client.zrange(queue.failed_set, 0, -1) == ["t1"]
+        assert await queue.dequeue_task(timeout=1) is None
+
+    async def test_heartbeat_extends_only_held_leases(self, queue):
+        await queue.enqueue_task(make_task("t1"))
+        await queue.enqueue_task(make_task("t2"))
+        held = await queue.dequeue_task(timeout=1)
+        lost = await queue.dequeue_task(timeout=1)
+        await self.expire_lease(queue, lost.id)
+        await queue.requeue_expired_tasks()
+        before = await queue.redis_client.zscore(queue.leases_key, held.id)
+
+        assert await queue.extend_leases([held, lost]) == [lost.id]
+        assert await queue.redis_client.zscore(queue.leases_key, held.id) > before
+        assert await queue.redis_client.zscore(queue.leases_key, lost.id) is None
+
+    async def test_worker_heartbeats_running_tasks(self, queue):
+        queue.lease_timeout = 0.3
+        worker = BackgroundWorker(queue, worker_id="test-worker")
+        await queue.enqueue_task(make_task("t1"))
+        task = await queue.dequeue_task(timeout=1)
+        worker.leased_tasks[task.id] = task
+
+        heartbeat = asyncio.create_task(worker._heartbeat_loop())
+        await asyncio.sleep(0.6)
+        await queue.requeue_expired_tasks()
+        heartbeat.cancel()
+
+        assert (await queue.get_task("t1")).status == "processing"
+        assert await queue.complete_task(task) is True
+
+
+class FakeProcessor:
+    """Processor that sleeps, or waits for release, and records concurrency."""
+
+    def __init__(self, delay=0.05, release=None):
+        self.delay = delay
+        self.release = release
+        self.running = 0
+        self.max_running = 0
+        self.processed = []
+
+    async def process_task(self, task):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            if self.release is not None:
+                await self.release.wait()
+            await asyncio.sleep(self.delay)
+            self.processed.append(task.id)
+            return {"ok": True}
+        finally:
+            self.running -= 1
+
+
+def make_worker(queue, processor, **kwargs):
+    worker = BackgroundWorker(queue, worker_id="test-worker", polling_interval=1, **kwargs)
+    worker.processors = {"metadata_extraction": processor}
+    return worker
+
+
+async def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+class TestBatchDequeue:
+    """Workers take several tasks per round trip and keep every slot busy."""
+
+    async def test_batch_follows_priority_with_distinct_leases(self, queue):
+        for task_id, priority in [("low", 9), ("normal", 5), ("high", 1), ("high2", 2), ("normal2", 4)]:
+            await queue.enqueue_task(make_task(task_id, priority=priority))
+
+        batch = await queue.dequeue_tasks(3, timeout=1)
+
+        assert [task.id for task in batch] == ["high", "high2", "normal"]
+        assert len({task.lease_id for task in batch}) == 3
+        assert [task.id for task in await queue.dequeue_tasks(5, timeout=1)] == ["normal2", "low"]
+        assert await queue.dequeue_tasks(5, timeout=1) == []
+
+    async def test_released_tasks_are_next_in_line(self, queue):
+        for task_id in ("a", "b", "c"):
+            await queue.enqueue_task(make_task(task_id))
+        batch = await queue.dequeue_tasks(2, timeout=1)
+
+        assert await queue.release_tasks(batch) == 2
+        assert await queue.release_tasks(batch) == 0
+
+        again = await queue.dequeue_tasks(3, timeout=1)
+        assert [task.id for task in again] == ["a", "b", "c"]
+        assert [task.attempts for task in again] == [1, 1, 1]
+
+    async def test_worker_fills_free_slots_in_few_round_trips(self, queue):
+        processor = FakeProcessor()
+        worker = make_worker(queue, processor, max_concurrent_tasks=4)
+        for i in range(20):
+            await queue.enqueue_task(make_task(f"t{i}"))
+
+        with patch.object(queue, "dequeue_tasks", wraps=queue.dequeue_tasks) as dequeue:
+            running = asyncio.create_task(worker.start())
+            await wait_for(lambda: len(processor.processed) == 20)
+            await worker.shutdown()
+            await running
+
+        assert processor.max_running == 4
+        # The first call fills all four slots; later ones refill what finished
+        assert dequeue.call_count < 20
+        assert dequeue.call_args_list[0].args[0] == 4
+        assert (await queue.get_queue_stats())["completed_count"] == 20
+
+    async def test_prefetched_tasks_are_released_on_shutdown(self, queue):
+        release = asyncio.Event()
+        processor = FakeProcessor(delay=0, release=release)
+        worker = make_worker(queue, processor, max_concurrent_tasks=1, prefetch_count=2)
+        for task_id in ("a", "b", "c"):
+            await queue.enqueue_task(make_task(task_id))
+
+        running = asyncio.create_task(worker.start())
+        await wait_for(lambda: processor.running == 1)
+        assert worker.get_worker_stats()["prefetched_tasks"] == 2
+        await worker.shutdown()
+        await wait_for(lambda: not worker.prefetched)
+        release.set()
+        await running
+
+        assert processor.processed == ["a"]
+        assert [(await queue.get_task(task_id)).status for task_id in ("b", "c")] == ["pending", "pending"]
+        assert [task.id for task in await queue.dequeue_tasks(2, timeout=1)] == ["b", "c"]
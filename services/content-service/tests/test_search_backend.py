@@ -0,0 +1,308 @@
+"""
+Tests for the embedded inverted-index search backend.
+"""
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+from uuid import uuid4
+
+import pytest
+
+from repositories import DocumentRepository
+from search import EmbeddedSearchBackend, IndexedDocument, InvertedIndex, search_backend_from_env
+from search.analysis import highlight_fragments, term_frequencies, tokenize
+from search.inverted_index import Segment
+
+
+def doc(organization_id, text="", title=None, keywords=(), document_id=None):
+    return IndexedDocument(
+        document_id=document_id or uuid4(), organization_id=organization_id,
+        text=text, title=title, keywords=list(keywords)
+    )
+
+
+@pytest.fixture
+def index(tmp_path):
+    return InvertedIndex(tmp_path / "index", merge_factor=4, background_merge=False)
+
+
+class TestAnalysis:
+    """Tokenizing and highlighting."""
+
+    def test_tokenize_drops_stopwords_and_short_tokens(self):
+        assert tokenize("The Budget of a Q3 report, x!") == ["budget", "q3", "report"]
+
+    def test_title_and_keywords_are_boosted(self):
+        frequencies = term_frequencies("budget budget memo", ["Budget"], boost=3)
+
+        assert frequencies["budget"] == 5
+        assert frequencies["memo"] == 1
+
+    def test_highlight_marks_prefix_matches_with_offsets(self):
+        text = "Intro text. The annual budget grew while budgeting stayed hard."
+
+        fragments = highlight_fragments(text, {"budget"}, "<mark>", "</mark>", fragment_chars=40)
+
+        fragment, start, end = fragments[0]
+        assert "<mark>budget</mark>" in fragment
+        assert "<mark>budgeting</mark>" in fragment
+        assert fragment.replace("<mark>", "").replace("</mark>", "") == text[start:end].strip()
+
+
+class TestInvertedIndex:
+    """Indexing, BM25 ranking, deletes and merges."""
+
+    def test_bm25_prefers_frequent_and_title_matches(self, index):
+        org = uuid4()
+        body_once = doc(org, "the budget was approved with other items and notes")
+        body_often = doc(org, "budget budget budget review")
+        in_title = doc(org, "meeting notes", title="Budget")
+        index.add(body_once)
+        index.add(body_often)
+        index.add(in_title)
+        index.add(doc(org, "unrelated holiday schedule"))
+        index.commit()
+
+        matches = index.search(org, "budget")
+
+        assert [m.document_id for m in matches][-1] == body_once.document_id
+        assert {m.document_id for m in matches} == {
+            body_once.document_id, body_often.document_id, in_title.document_id
+        }
+        assert all(a.score >= b.score for a, b in zip(matches, matches[1:]))
+
+    def test_rare_terms_outweigh_common_ones(self, index):
+        org = uuid4()
+        for _ in range(20):
+            index.add(doc(org, "report common filler"))
+        rare = doc(org, "report zeppelin")
+        index.add(rare)
+        index.commit()
+
+        assert index.search(org, "report zeppelin", limit=1)[0].document_id == rare.document_id
+
+    def test_organizations_are_isolated(self, index):
+        org_a, org_b = uuid4(), uuid4()
+        index.add(doc(org_a, "confidential merger"))
+        index.commit()
+
+        assert index.search(org_b, "merger") == []
+        assert index.suggest(org_b, "mer") == []
+
+    def test_uncommitted_writes_are_invisible(self, index):
+        org = uuid4()
+        index.add(doc(org, "pending"))
+
+        assert index.search(org, "pending") == []
+        index.commit()
+        assert len(index.search(org, "pending")) == 1
+
+    def test_prefix_search_and_suggestions(self, index):
+        org = uuid4()
+        documents = [doc(org, text) for text in ("invoice march", "invoice april", "investment plan", "inventory count")]
+        for document in documents:
+            index.add(document)
+        index.commit()
+
+        assert len(index.search(org, "inv")) == 0
+        assert len(index.search(org, "inv", prefix=True)) == 4
+        assert [(term, frequency) for term, frequency, _ in index.suggest(org, "budget for inv", limit=2)] == [
+            ("invoice", 2), ("inventory", 1)
+        ]
+        invoice, inventory = index.suggest(org, "inv", limit=2, sample_size=1)
+        assert invoice[2] == [documents[0].document_id]
+        assert inventory[2] == [documents[3].document_id]
+
+        index.delete(documents[0].document_id)
+        index.commit()
+        assert index.suggest(org, "invoi")[0][2] == [documents[1].document_id]
+
+    def test_delete_and_replace(self, index):
+        org = uuid4()
+        kept, removed = doc(org, "quarterly report"), doc(org, "quarterly report")
+        index.add(kept)
+        index.add(removed)
+        index.commit()
+
+        index.delete(removed.document_id)
+        index.add(doc(org, "annual summary", document_id=kept.document_id))
+        index.commit()
+
+        assert index.search(org, "quarterly") == []
+        assert [m.document_id for m in index.search(org, "annual")] == [kept.document_id]
+        assert index.document_count() == 1
+
+    def test_tiered_merge_drops_deleted_documents(self, index, tmp_path):
+        org = uuid4()
+        documents = [doc(org, f"contract clause {i}") for i in range(8)]
+        for first, second in zip(documents[::2], documents[1::2]):
+            index.add(first)
+            index.add(second)
+            index.commit()
+        index.delete(documents[0].document_id)
+        index.commit()
+
+        candidates = index.merge_candidates()
+        assert len(candidates) == 4
+        assert index.merge(candidates)
+
+        assert index.segment_count() == 1
+        assert index.document_count() == 7
+        assert len(list((tmp_path / "index").glob("*.seg"))) == 1
+        assert documents[0].document_id not in {m.document_id for m in index.search(org, "contract")}
+
+    def test_deletes_during_merge_are_carried_over(self, index):
+        org = uuid4()
+        documents = [doc(org, "lease agreement") for _ in range(4)]
+        for document in documents:
+            index.add(document)
+            index.commit()
+        candidates = index.merge_candidates()
+
+        # Delete committed after the merge snapshot but before it publishes
+        original_write = Segment.write
+
+        def write_then_delete(*args, **kwargs):
+            segment = original_write(*args, **kwargs)
+            index.delete(documents[1].document_id)
+            index.commit()
+            return segment
+
+        Segment.write = write_then_delete
+        try:
+            assert index.merge(candidates)
+        finally:
+            Segment.write = original_write
+
+        assert documents[1].document_id not in {m.document_id for m in index.search(org, "lease")}
+        assert index.document_count() == 3
+
+    def test_background_merge(self, tmp_path):
+        index = InvertedIndex(tmp_path / "index", merge_factor=3)
+        org = uuid4()
+        for i in range(9):
+            index.add(doc(org, f"memo {i}"))
+            index.commit()
+        index.wait_for_merges(timeout=10)
+
+        assert index.segment_count() < 9
+        assert index.document_count() == 9
+
+    def test_second_instance_sees_commits(self, index, tmp_path):
+        other = InvertedIndex(tmp_path / "index", background_merge=False)
+        org = uuid4()
+        index.add(doc(org, "shared directory"))
+        index.commit()
+
+        assert len(other.search(org, "shared")) == 1
+
+        other.delete(index.search(org, "shared")[0].document_id)
+        other.commit()
+        assert index.search(org, "shared") == []
+
+
+@pytest.mark.asyncio
+class TestEmbeddedSearchBackend:
+    """Async backend wrapper and configuration."""
+
+    async def test_writes_are_committed(self, tmp_path):
+        backend = EmbeddedSearchBackend({"directory": tmp_path / "index"})
+        org = uuid4()
+        document = doc(org, "service level agreement", keywords=["sla"])
+
+        await backend.index_document(document)
+        assert (await backend.search(org, "sla"))[0].document_id == document.document_id
+        assert await backend.suggest(org, "serv") == [("service", 1, [document.document_id])]
+
+        await backend.delete_document(document.document_id)
+        assert await backend.search(org, "sla") == []
+        await backend.close()
+
+    async def test_from_metadata(self):
+        metadata = SimpleNamespace(
+            text_content="Extracted body text of the file", title="Budget",
+            keywords=["finance"], suggested_tags=["report"],
+            has_text_content=lambda: True
+        )
+
+        document = IndexedDocument.from_metadata(uuid4(), uuid4(), metadata, filename="q3.pdf")
+
+        assert document.title == "Budget q3.pdf"
+        assert document.keywords == ["finance", "report"]
+        assert document.text == "Extracted body text of the file"
+
+    async def test_backend_selection(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("SEARCH_INDEX_DIRECTORY", str(tmp_path / "index"))
+        monkeypatch.delenv("SEARCH_BACKEND", raising=False)
+
+        monkeypatch.setenv("DATABASE_URL", "sqlite+aiosqlite:///content.db")
+        assert isinstance(search_backend_from_env(), EmbeddedSearchBackend)
+
+        monkeypatch.setenv("DATABASE_URL", "postgresql+asyncpg://localhost/content")
+        assert search_backend_from_env() is None
+
+        monkeypatch.setenv("SEARCH_BACKEND", "elastic")
+        with pytest.raises(ValueError):
+            search_backend_from_env()
+
+
+@pytest.mark.asyncio
+class TestRankSearchCandidates:
+    """Filtering, ordering and facets of backend candidates."""
+
+    def document(self, created_at, **attrs):
+        metadata = {"tags": attrs.pop("tags", [])}
+        document = Mock(
+            id=uuid4(), created_at=created_at, document_type="report",
+            classification="internal", content_type="application/pdf", **attrs
+        )
+        document.get_metadata_value = lambda key, default=None: metadata.get(key, default)
+        return document
+
+    def session(self, documents, prefixes=()):
+        session = Mock()
+        loaded = Mock()
+        loaded.scalars.return_value.all.return_value = documents
+        text_rows = Mock()
+        text_rows.all.return_value = list(prefixes)
+        session.execute = AsyncMock(side_effect=[loaded, text_rows])
+        return session
+
+    async def test_orders_by_score_and_pages(self):
+        now = datetime(2026, 10, 16)
+        a, b, c = (self.document(now - timedelta(days=i)) for i in range(3))
+        session = self.session([a, b, c], [(b.id, "the budget grew")])
+
+        results = await DocumentRepository(session).rank_search_candidates(
+            {a.id: 1.0, b.id: 3.0, c.id: 2.0}, uuid4(), user_id=uuid4(),
+            limit=1, highlight_terms={"budget"}
+        )
+
+        assert [hit.document for hit in results.hits] == [b]
+        assert results.total == 3 and results.has_next
+        assert results.hits[0].fragments == ["the <mark>budget</mark> grew"]
+        assert results.facets["document_type"] == {"report": 3}
+
+        loaded_sql = str(session.execute.await_args_list[0].args[0])
+        assert "document_permissions" in loaded_sql
+        assert "documents.id IN" in loaded_sql
+
+    async def test_tags_filter_in_memory(self):
+        now = datetime(2026, 10, 16)
+        tagged = self.document(now, tags=["finance"])
+        untagged = self.document(now)
+
+        results = await DocumentRepository(self.session([tagged, untagged])).rank_search_candidates(
+            {tagged.id: 1.0, untagged.id: 2.0}, uuid4(), tags=["finance"]
+        )
+
+        assert [hit.document for hit in results.hits] == [tagged]
+
+    async def test_no_candidates(self):
+        session = self.session([])
+
+        results = await DocumentRepository(session).rank_search_candidates({}, uuid4())
+
+        assert results.total == 0
+        session.execute.assert_not_awaited()
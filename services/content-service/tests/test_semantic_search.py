@@ -0,0 +1,188 @@
+"""
+Tests for chunking, embeddings and the quantized vector index.
+"""
+
+from unittest.mock import AsyncMock, Mock
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from repositories import DocumentRepository
+from search import HashingEmbeddingProvider, IndexedDocument, SearchBackendError, SemanticIndex, VectorIndex
+from search.embeddings import chunk_text
+from search.vector_index import quantize
+
+
+def unit(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+
+def random_vectors(rng, count, dimension=32):
+    return unit(rng.standard_normal((count, dimension)))
+
+
+class TestChunking:
+    """Chunk boundaries and embeddings."""
+
+    def test_chunks_overlap_and_end_on_whitespace(self):
+        text = " ".join(f"word{i}" for i in range(400))
+
+        spans = chunk_text(text, chunk_chars=200, overlap_chars=50)
+
+        assert spans[0][0] == 0 and spans[-1][1] == len(text)
+        for (_, end), (next_start, _) in zip(spans, spans[1:]):
+            assert next_start < end
+            assert text[next_start - 1] == " "
+        assert all(end == len(text) or text[end] == " " for _, end in spans)
+
+    def test_chunk_limit_and_empty_text(self):
+        assert len(chunk_text("x " * 5000, chunk_chars=100, max_chunks=3)) == 3
+        assert chunk_text("   ") == []
+
+    def test_hashing_embeddings_are_unit_length_and_lexical(self):
+        provider = HashingEmbeddingProvider(dimension=64)
+
+        vectors = provider.embed(["quarterly budget report", "budget report", "holiday schedule"])
+
+        assert vectors.shape == (3, 64)
+        assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+        assert vectors[0] @ vectors[1] > vectors[0] @ vectors[2]
+
+    def test_quantization_preserves_similarity(self):
+        vectors = random_vectors(np.random.default_rng(0), 100, 128)
+
+        codes, scales = quantize(vectors)
+
+        restored = codes.astype(np.float32) * scales[:, None]
+        assert codes.dtype == np.int8
+        assert np.abs(restored @ vectors[0] - vectors @ vectors[0]).max() < 0.02
+
+
+class TestVectorIndex:
+    """Adding, replacing, deleting and searching chunk vectors."""
+
+    def test_exact_search_returns_best_chunk_per_document(self, tmp_path):
+        index = VectorIndex(tmp_path, dimension=32)
+        rng = np.random.default_rng(1)
+        org, doc_a, doc_b = uuid4(), uuid4(), uuid4()
+        vectors_a, vectors_b = random_vectors(rng, 3), random_vectors(rng, 2)
+        index.add(doc_a, org, vectors_a, [(0, 10), (10, 20), (20, 30)])
+        index.add(doc_b, org, vectors_b, [(0, 5), (5, 9)])
+
+        matches = index.search(org, vectors_a[1], limit=5)
+
+        assert matches[0].document_id == doc_a
+        assert (matches[0].start_offset, matches[0].end_offset) == (10, 20)
+        assert matches[0].score == pytest.approx(1.0, abs=0.02)
+        assert {m.document_id for m in matches} == {doc_a, doc_b}
+
+    def test_min_score_and_organization_isolation(self, tmp_path):
+        index = VectorIndex(tmp_path, dimension=32)
+        rng = np.random.default_rng(2)
+        org, other_org = uuid4(), uuid4()
+        vectors = random_vectors(rng, 2)
+        index.add(uuid4(), org, vectors[:1], [(0, 1)])
+        index.add(uuid4(), org, vectors[1:], [(0, 1)])
+
+        assert len(index.search(org, vectors[0], min_score=0.9)) == 1
+        assert index.search(other_org, vectors[0]) == []
+
+    def test_replace_and_delete(self, tmp_path):
+        index = VectorIndex(tmp_path, dimension=32)
+        rng = np.random.default_rng(3)
+        org, document = uuid4(), uuid4()
+        old, new = random_vectors(rng, 2)
+        index.add(document, org, [old], [(0, 1)])
+        index.add(document, org, [new], [(5, 6)])
+
+        assert index.chunk_count() == 1
+        assert index.search(org, old, min_score=0.9) == []
+        assert index.search(org, new)[0].start_offset == 5
+
+        index.delete(document)
+        assert index.chunk_count() == 0
+        assert index.search(org, new) == []
+
+    def test_other_instance_sees_writes(self, tmp_path):
+        writer = VectorIndex(tmp_path, dimension=32)
+        reader = VectorIndex(tmp_path, dimension=32)
+        rng = np.random.default_rng(4)
+        org, document = uuid4(), uuid4()
+        vector = random_vectors(rng, 1)
+
+        writer.add(document, org, vector, [(0, 1)])
+        assert reader.search(org, vector[0])[0].document_id == document
+
+        reader.delete(document)
+        assert writer.search(org, vector[0]) == []
+
+    def test_dimension_mismatch_is_rejected(self, tmp_path):
+        VectorIndex(tmp_path, dimension=32).add(uuid4(), uuid4(), random_vectors(np.random.default_rng(5), 1), [(0, 1)])
+
+        with pytest.raises(SearchBackendError):
+            VectorIndex(tmp_path, dimension=64)
+
+    def test_training_partitions_rows_and_keeps_recall(self, tmp_path):
+        rng = np.random.default_rng(6)
+        centres = random_vectors(rng, 50)
+        index = VectorIndex(tmp_path, dimension=32, train_threshold=500, nprobe=8)
+        org = uuid4()
+        documents = [uuid4() for _ in range(400)]
+        vectors = unit(centres[rng.integers(50, size=(400, 4))] + 0.05 * rng.standard_normal((400, 4, 32)))
+        index.add_batch((documents[i], org, vectors[i], [(0, 1)] * 4) for i in range(400))
+        index.delete(documents[0])
+
+        assert index.list_count > 1
+        assert index.chunk_count() == 1596
+        assert len(list(tmp_path.glob("gen_*"))) == 1
+
+        hits = 0
+        for i in range(1, 51):
+            hits += index.search(org, vectors[i][0], limit=1)[0].document_id == documents[i]
+        assert hits >= 48
+
+        reopened = VectorIndex(tmp_path, dimension=32)
+        assert reopened.list_count == index.list_count
+        assert reopened.search(org, vectors[1][0], limit=1)[0].document_id == documents[1]
+
+
+@pytest.mark.asyncio
+class TestSemanticIndex:
+    """Document embedding through the async wrapper."""
+
+    async def test_documents_are_chunked_and_found(self, tmp_path):
+        semantic = SemanticIndex(
+            HashingEmbeddingProvider(dimension=128),
+            {"directory": tmp_path, "chunk_chars": 60, "overlap_chars": 10}
+        )
+        org = uuid4()
+        text = "Opening remarks about the venue. " * 3 + "The quarterly budget report shows revenue growth."
+        document = IndexedDocument(document_id=uuid4(), organization_id=org, text=text)
+        await semantic.index_document(document)
+        await semantic.index_document(IndexedDocument(
+            document_id=uuid4(), organization_id=org, text="Holiday schedule for the warehouse team."
+        ))
+
+        matches = await semantic.search(org, "budget report revenue", limit=1)
+
+        assert matches[0].document_id == document.document_id
+        assert "budget" in text[matches[0].start_offset:matches[0].end_offset]
+
+        await semantic.delete_document(document.document_id)
+        assert document.document_id not in {m.document_id for m in await semantic.search(org, "budget")}
+
+    async def test_get_text_spans_in_one_query(self):
+        session = Mock()
+        result = Mock()
+        doc_id = uuid4()
+        result.all.return_value = [(doc_id, "budget grew")]
+        session.execute = AsyncMock(return_value=result)
+
+        spans = await DocumentRepository(session).get_text_spans({doc_id: (10, 21)})
+
+        assert spans == {doc_id: "budget grew"}
+        sql = str(session.execute.await_args.args[0])
+        assert "substr(documents.extracted_text, CASE documents.id" in sql
+        assert await DocumentRepository(session).get_text_spans({}) == {}
@@ -0,0 +1,94 @@
+"""
+Content-addressed storage tests for Content Service
+Tests blob deduplication, reference counting and last-reference deletion
+"""
+
+import hashlib
+import io
+
+import pytest
+from unittest.mock import patch
+
+from storage import LocalFileStorage
+
+
+PDF_CONTENT = b"%PDF-1.4\n" + b"same document body" * 100
+PDF_HASH = hashlib.sha256(PDF_CONTENT).hexdigest()
+
+
+@pytest.fixture
+def cas_storage(tmp_path):
+    """Content-addressed local storage rooted in a temp directory"""
+    return LocalFileStorage({"base_path": str(tmp_path), "content_addressed": True})
+
+
+async def _ingest(storage, path, content=PDF_CONTENT):
+    temp_path = storage.new_temp_path()
+    temp_path.write_bytes(content)
+    return await storage.store_ingested(
+        temp_path, path, hashlib.sha256(content).hexdigest(), content_type="application/pdf"
+    )
+
+
+class TestContentAddressedStorage:
+    """Test deduplicating blob store"""
+
+    @pytest.mark.asyncio
+    async def test_reupload_shares_one_blob(self, cas_storage, tmp_path):
+        """Identical uploads are hard links to a single blob"""
+        await _ingest(cas_storage, "org/a.pdf")
+        await _ingest(cas_storage, "org/b.pdf")
+
+        first = (tmp_path / "org/a.pdf").stat()
+        second = (tmp_path / "org/b.pdf").stat()
+        assert first.st_ino == second.st_ino
+        assert await cas_storage.get_reference_count(PDF_HASH) == 2
+        assert list((tmp_path / ".blobs/tmp").iterdir()) == []
+
+        stats = await cas_storage.get_storage_stats()
+        assert stats["used_bytes"] == len(PDF_CONTENT)
+        assert stats["logical_bytes"] == 2 * len(PDF_CONTENT)
+        assert stats["file_count"] == 2
+
+    @pytest.mark.asyncio
+    async def test_blob_removed_with_last_reference(self, cas_storage, tmp_path):
+        """Deleting one reference keeps the blob until the last one goes"""
+        await _ingest(cas_storage, "org/a.pdf")
+        await _ingest(cas_storage, "org/b.pdf")
+        blob = cas_storage._get_blob_path(PDF_HASH)
+
+        assert await cas_storage.delete("org/a.pdf")
+        assert blob.exists()
+        assert (tmp_path / "org/b.pdf").read_bytes() == PDF_CONTENT
+        assert await cas_storage.get_reference_count(PDF_HASH) == 1
+
+        assert await cas_storage.delete("org/b.pdf")
+        assert not blob.exists()
+        assert await cas_storage.get_reference_count(PDF_HASH) == 0
+
+    @pytest.mark.asyncio
+    @patch('magic.from_buffer')
+    async def test_store_skips_write_for_known_content(self, mock_magic, cas_storage):
+        """store() links existing content instead of writing it again"""
+        mock_magic.return_value = "application/pdf"
+        await _ingest(cas_storage, "org/a.pdf")
+
+        with patch('aiofiles.open') as mock_open:
+            info = await cas_storage.store(io.BytesIO(PDF_CONTENT), "org/c.pdf")
+
+        # Only the sidecar is written, never the content
+        assert all(call.args[1] != 'wb' for call in mock_open.call_args_list)
+        assert info.hash == PDF_HASH
+        assert await cas_storage.get_reference_count(PDF_HASH) == 2
+
+    @pytest.mark.asyncio
+    async def test_get_info_uses_recorded_hash(self, cas_storage):
+        """get_info reports the blob hash without exposing the sidecar key"""
+        await _ingest(cas_storage, "org/a.pdf")
+
+        info = await cas_storage.get_info("org/a.pdf")
+        files = await cas_storage.list_files()
+
+        assert info.hash == PDF_HASH
+        assert info.metadata == {}
+        assert [f.path for f in files] == ["org/a.pdf"]
@@ -0,0 +1,205 @@
+"""
+Storage usage ledger tests for Content Service
+Tests incremental usage accounting, per-organization quotas and reconciliation
+"""
+
+import asyncio
+import hashlib
+import io
+
+import pytest
+from unittest.mock import patch
+
+from storage import LocalFileStorage, reconcile_usage_periodically
+from storage.base import StorageQuotaExceededError
+
+
+CONTENT = b"%PDF-1.4\n" + b"quarterly report" * 64
+
+
+async def _ingest(storage, path, content=CONTENT):
+    temp_path = storage.new_temp_path()
+    temp_path.write_bytes(content)
+    return await storage.store_ingested(temp_path, path, hashlib.sha256(content).hexdigest())
+
+
+@pytest.fixture
+def storage(tmp_path):
+    """Content-addressed storage with usage tracking"""
+    return LocalFileStorage({"base_path": str(tmp_path), "content_addressed": True})
+
+
+class TestUsageLedger:
+    """Test incremental usage accounting"""
+
+    @pytest.mark.asyncio
+    async def test_store_and_delete_update_usage(self, storage):
+        """Usage follows stores and deletes per organization"""
+        await _ingest(storage, "org-a/1.pdf")
+        await _ingest(storage, "org-a/2.pdf", CONTENT + b"v2")
+        await _ingest(storage, "org-b/1.pdf", CONTENT + b"v3")
+
+        stats = await storage.get_storage_stats("org-a")
+        assert stats["organization"]["used_bytes"] == 2 * len(CONTENT) + 2
+        assert stats["organization"]["file_count"] == 2
+        assert stats["file_count"] == 3
+
+        await storage.delete("org-a/2.pdf")
+
+        stats = await storage.get_storage_stats("org-a")
+        assert stats["organization"]["used_bytes"] == len(CONTENT)
+        assert stats["used_bytes"] == 2 * len(CONTENT) + 2
+
+    @pytest.mark.asyncio
+    async def test_deduplicated_content_counts_once_on_disk(self, storage):
+        """Shared blobs add logical usage to each tenant but physical usage once"""
+        await _ingest(storage, "org-a/1.pdf")
+        await _ingest(storage, "org-b/1.pdf")
+
+        stats = await storage.get_storage_stats("org-b")
+        assert stats["used_bytes"] == len(CONTENT)
+        assert stats["logical_bytes"] == 2 * len(CONTENT)
+        assert stats["organization"]["used_bytes"] == len(CONTENT)
+
+        await storage.delete("org-a/1.pdf")
+        assert (await storage.get_storage_stats())["used_bytes"] == len(CONTENT)
+
+        await storage.delete("org-b/1.pdf")
+        assert (await storage.get_storage_stats())["used_bytes"] == 0
+
+    @pytest.mark.asyncio
+    async def test_copy_and_move_are_accounted(self, storage):
+        """copy_file adds a reference; move_file leaves totals unchanged"""
+        await _ingest(storage, "org-a/1.pdf")
+        await storage.copy_file("org-a/1.pdf", "org-a/copy.pdf")
+        await storage.move_file("org-a/copy.pdf", "org-b/moved.pdf")
+
+        stats = await storage.get_storage_stats("org-b")
+        assert stats["organization"]["used_bytes"] == len(CONTENT)
+        assert stats["logical_bytes"] == 2 * len(CONTENT)
+        assert stats["used_bytes"] == len(CONTENT)
+
+    @pytest.mark.asyncio
+    async def test_quota_check_does_not_walk_tree(self, storage):
+        """Quota checks and stats are ledger lookups"""
+        await _ingest(storage, "org-a/1.pdf")
+
+        with patch('os.walk', side_effect=AssertionError("walked storage tree")):
+            await storage.check_quota(1024, "org-a/2.pdf")
+            await storage.get_storage_stats("org-a")
+
+
+class TestOrganizationQuotas:
+    """Test per-tenant quotas"""
+
+    @pytest.mark.asyncio
+    async def test_organization_quota_enforced(self, storage):
+        """Each organization is limited independently"""
+        storage.usage_ledger.set_quota("org-a", len(CONTENT) + 10)
+        await _ingest(storage, "org-a/1.pdf")
+
+        with pytest.raises(StorageQuotaExceededError):
+            await _ingest(storage, "org-a/2.pdf", CONTENT + b"more")
+
+        # Other tenants are unaffected
+        await _ingest(storage, "org-b/1.pdf", CONTENT + b"more")
+        assert not (storage.blob_path / "tmp").exists() or not any((storage.blob_path / "tmp").iterdir())
+
+    @pytest.mark.asyncio
+    @patch('magic.from_buffer')
+    async def test_default_organization_quota(self, mock_magic, tmp_path):
+        """organization_quota_bytes applies to tenants without their own quota"""
+        mock_magic.return_value = "application/pdf"
+        storage = LocalFileStorage({
+            "base_path": str(tmp_path), "organization_quota_bytes": 100
+        })
+
+        with pytest.raises(StorageQuotaExceededError):
+            await storage.store(io.BytesIO(CONTENT), "org-c/1.pdf")
+
+        storage.usage_ledger.set_quota("org-c", 10 * len(CONTENT))
+        await storage.store(io.BytesIO(CONTENT), "org-c/1.pdf")
+
+    @pytest.mark.asyncio
+    async def test_concurrent_stores_cannot_exceed_quota(self, storage):
+        """Reservations taken before writing count against the quota"""
+        storage.usage_ledger.set_quota("org-a", 3 * len(CONTENT))
+
+        results = await asyncio.gather(
+            *(_ingest(storage, f"org-a/{i}.pdf", CONTENT[:-1] + bytes([i])) for i in range(8)),
+            return_exceptions=True
+        )
+
+        stored = [result for result in results if not isinstance(result, Exception)]
+        rejected = [result for result in results if isinstance(result, StorageQuotaExceededError)]
+        assert len(stored) == 3 and len(rejected) == 5
+        assert storage.usage_ledger.get_usage("org-a") == {"bytes": 3 * len(CONTENT), "files": 3}
+
+    def test_failed_reservation_leaves_nothing_held(self, storage):
+        """A rejected reservation is rolled back; a released one frees its bytes"""
+        ledger = storage.usage_ledger
+        ledger.set_quota("org-a", 100)
+
+        reservation = ledger.reserve("org-a", 60)
+        with pytest.raises(StorageQuotaExceededError):
+            ledger.reserve("org-a", 60)
+
+        ledger.release(reservation)
+        ledger.apply("org-a", 60, 1, 60, 1, ledger.reserve("org-a", 60))
+        assert ledger.get_usage("org-a") == {"bytes": 60, "files": 1}
+        with pytest.raises(StorageQuotaExceededError):
+            ledger.check_quota("org-a", 60)
+
+
+class TestUsageReconcile:
+    """Test drift correction"""
+
+    @pytest.mark.asyncio
+    async def test_reconcile_corrects_drift(self, storage, tmp_path):
+        """Files changed behind the storage layer's back are picked up"""
+        await _ingest(storage, "org-a/1.pdf")
+        (tmp_path / "org-a" / "stray.bin").write_bytes(b"x" * 100)
+
+        corrections = await storage.reconcile_usage()
+
+        assert corrections["org:org-a"] == {"bytes": 100, "files": 1}
+        stats = await storage.get_storage_stats("org-a")
+        assert stats["organization"]["used_bytes"] == len(CONTENT) + 100
+        assert await storage.reconcile_usage() == {}
+
+    @pytest.mark.asyncio
+    async def test_ledger_bootstrapped_from_existing_tree(self, tmp_path):
+        """A new ledger on an existing tree is filled by the first reconcile, not on init"""
+        (tmp_path / "org-a").mkdir()
+        (tmp_path / "org-a" / "old.pdf").write_bytes(CONTENT)
+
+        with patch.object(
+            LocalFileStorage, '_scan_usage_sync', side_effect=AssertionError("scanned on init")
+        ):
+            storage = LocalFileStorage({"base_path": str(tmp_path)})
+        assert storage.usage_scan_pending
+
+        shutdown_event = asyncio.Event()
+        reconciler = asyncio.create_task(
+            reconcile_usage_periodically(storage, 3600, shutdown_event)
+        )
+        while storage.usage_scan_pending:
+            await asyncio.sleep(0.01)
+        shutdown_event.set()
+        await reconciler
+
+        stats = await storage.get_storage_stats("org-a")
+        assert stats["organization"]["used_bytes"] == len(CONTENT)
+        assert stats["file_count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_scan_counts_only_organization_layout(self, storage, tmp_path):
+        """Top-level files and hidden or private directories are not usage"""
+        await _ingest(storage, "org-a/1.pdf")
+        (tmp_path / "stray.txt").write_bytes(b"x" * 100)
+        (tmp_path / "__pycache__").mkdir()
+        (tmp_path / "__pycache__" / "module.pyc").write_bytes(b"x" * 100)
+
+        assert await storage.reconcile_usage() == {}
+        assert storage.usage_ledger.get_usage() == {"bytes": len(CONTENT), "files": 1}
+        assert storage.usage_ledger.get_physical_usage() == {"bytes": len(CONTENT), "files": 1}
@@ -0,0 +1,96 @@
+"""
+Tests for single-pass text analysis and page-by-page PDF text extraction.
+"""
+
+import random
+from types import SimpleNamespace
+
+from extractors import PDFExtractor
+from extractors.base_extractor import ExtractedMetadata
+from extractors.text_analysis import StreamingTextAnalyzer
+
+WORDS = [
+    "the", "and", "budget", "report", "contract", "patient", "und", "der", "ist", "les", "avec",
+    "pour", "table", "https://example.com", "système", "analysis", "über", "Quarterly", "data-driven", "2026"
+]
+
+
+def random_pages(rng, count):
+    pages = []
+    for _ in range(count):
+        if rng.random() < 0.1:
+            pages.append("")
+            continue
+        lines = [" ".join(rng.choices(WORDS, k=rng.randint(1, 12))) for _ in range(rng.randint(1, 5))]
+        pages.append("  " + "\n\t".join(lines) + rng.choice(["", " ", "\n"]))
+    return pages
+
+
+class FakePage:
+    def __init__(self, text):
+        self.text = text
+
+    def extract_text(self):
+        if self.text is None:
+            raise ValueError("damaged page")
+        return self.text
+
+
+class TestStreamingTextAnalyzer:
+    """Results match the batch helpers on the joined text."""
+
+    def test_matches_batch_analysis(self):
+        extractor = PDFExtractor()
+        rng = random.Random(3)
+        for count in (0, 1, 2, 7, 40):
+            pages = random_pages(rng, count)
+            text = "\n".join(page for page in pages if page)
+            analysis = StreamingTextAnalyzer(count_terms=("table", "http"))
+            for page in pages:
+                if page:
+                    analysis.feed(page)
+
+            assert analysis.text == text
+            assert analysis.stripped_length == len(text.strip())
+            assert analysis.word_count == extractor._count_words(text)
+            assert analysis.character_count == extractor._count_characters(text)
+            assert analysis.keywords() == extractor._extract_keywords(text)
+            assert analysis.keywords(5) == extractor._extract_keywords(text, max_keywords=5)
+            assert analysis.language() == extractor._detect_language(text)
+            assert analysis.term_counts == {"table": text.lower().count("table"), "http": text.lower().count("http")}
+
+    def test_stored_text_is_capped(self):
+        analysis = StreamingTextAnalyzer(max_stored_chars=12)
+        for page in ("first page", "second page", "third page"):
+            analysis.feed(page)
+
+        assert analysis.text == "first page\ns"
+        assert analysis.truncated
+        assert analysis.word_count == 6
+
+
+class TestPDFPageStreaming:
+    """PDFExtractor analyzes pages as they are extracted."""
+
+    def test_pages_are_analyzed_with_cut_off(self):
+        extractor = PDFExtractor(max_text_chars=40, max_pages=3)
+        reader = SimpleNamespace(pages=[
+            FakePage("Quarterly budget report for the board"),
+            FakePage(None),
+            FakePage("Contract table: https://example.com/terms and the budget"),
+            FakePage("never read")
+        ])
+
+        analysis, pages_read = extractor._analyze_pages(extractor._iter_page_text(reader))
+        metadata = ExtractedMetadata(page_count=4, title="Board Budget")
+        extractor._apply_analysis(metadata, analysis, {"pages_read": pages_read, "image_count": 2})
+
+        assert pages_read == 3
+        assert metadata.text_content == "Quarterly budget report for the board\nCo"
+        assert metadata.text_truncated
+        assert metadata.word_count == 12
+        assert metadata.keywords[0] == "budget"
+        assert (metadata.tables_detected, metadata.links_detected, metadata.images_detected) == (1, 1, 2)
+        assert metadata.suggested_categories == ["business"]
+        assert {"board", "budget", "quarterly"} <= set(metadata.suggested_tags)
+        assert len(metadata.warnings) == 2
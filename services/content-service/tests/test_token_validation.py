@@ -0,0 +1,173 @@
+"""
+Token validation cache tests for Content Service
+Tests local verification, TTL/exp-capped caching, pooling and revocation
+"""
+
+import asyncio
+import time
+
+import jwt
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from auth import InvalidTokenError, TokenValidator
+from auth.token_validation import token_digest
+
+
+SECRET = "test-signing-key"
+USER = {
+    "user_id": "12345678-1234-5678-9012-123456789012",
+    "organization_id": "87654321-4321-8765-2109-876543210987",
+    "roles": ["user"]
+}
+
+
+def _token(exp_in: float = 3600, **claims) -> str:
+    now = time.time()
+    payload = {"sub": USER["user_id"], "iat": int(now) - 1, "exp": now + exp_in, "type": "access"}
+    payload.update(claims)
+    return jwt.encode(payload, SECRET, algorithm="HS256")
+
+
+def _identity_service(mock_client, user_data=USER, delay: float = 0):
+    """Configure the patched httpx.AsyncClient to answer /auth/validate."""
+    response = Mock(status_code=200)
+    response.json.return_value = user_data
+
+    async def post(*args, **kwargs):
+        if delay:
+            await asyncio.sleep(delay)
+        return response
+
+    post_mock = AsyncMock(side_effect=post)
+    mock_client.return_value.__aenter__.return_value.post = post_mock
+    return post_mock
+
+
+@pytest.fixture
+def validator():
+    return TokenValidator("http://identity", verification_key=SECRET, cache_ttl_seconds=60)
+
+
+class TestTokenCache:
+    """Test cached validation"""
+
+    @pytest.mark.asyncio
+    @patch('httpx.AsyncClient')
+    async def test_repeat_validation_served_from_cache(self, mock_client, validator):
+        """Only the first validation reaches the Identity Service"""
+        post = _identity_service(mock_client)
+        token = _token()
+
+        for _ in range(5):
+            assert await validator.validate(token) == USER
+
+        assert post.await_count == 1
+        assert validator.stats.hits == 4
+        # One pooled client, reused
+        assert mock_client.call_count == 1
+
+    @pytest.mark.asyncio
+    @patch('httpx.AsyncClient')
+    async def test_cache_lifetime_capped_by_exp(self, mock_client, validator):
+        """Entries never outlive the token"""
+        post = _identity_service(mock_client)
+        token = _token(exp_in=5)
+
+        await validator.validate(token)
+
+        entry = validator._cache[token_digest(token)]
+        assert entry.expires_at - time.monotonic() <= 5
+
+        # Expired entries are validated again
+        entry.expires_at = time.monotonic() - 1
+        await validator.validate(token)
+        assert post.await_count == 2
+
+    @pytest.mark.asyncio
+    @patch('httpx.AsyncClient')
+    async def test_concurrent_misses_share_one_call(self, mock_client, validator):
+        """Simultaneous requests with a new token make one round trip"""
+        post = _identity_service(mock_client, delay=0.05)
+        token = _token()
+
+        results = await asyncio.gather(*[validator.validate(token) for _ in range(10)])
+
+        assert all(result == USER for result in results)
+        assert post.await_count == 1
+
+    @pytest.mark.asyncio
+    @patch('httpx.AsyncClient')
+    async def test_lru_is_bounded(self, mock_client):
+        """The least recently used entry is evicted at capacity"""
+        _identity_service(mock_client)
+        validator = TokenValidator("http://identity", cache_max_entries=2)
+        tokens = [_token(jti=str(i)) for i in range(3)]
+
+        for token in tokens:
+            await validator.validate(token)
+
+        assert validator.cache_info()["token_cache_entries"] == 2
+        assert token_digest(tokens[0]) not in validator._cache
+
+
+class TestLocalVerification:
+    """Test signature checks without a network call"""
+
+    @pytest.mark.asyncio
+    @patch('httpx.AsyncClient')
+    async def test_forged_and_expired_tokens_rejected_locally(self, mock_client, validator):
+        """Bad signatures and expired tokens never reach the Identity Service"""
+        post = _identity_service(mock_client)
+        forged = jwt.encode({"sub": "x", "exp": time.time() + 60}, "other-key", algorithm="HS256")
+
+        for token in (forged, _token(exp_in=-10), "not-a-jwt", _token(type="refresh")):
+            with pytest.raises(InvalidTokenError):
+                await validator.validate(token)
+
+        assert post.await_count == 0
+        assert validator.stats.local_rejections == 4
+
+    @pytest.mark.asyncio
+    @patch('httpx.AsyncClient')
+    async def test_opaque_tokens_without_key_go_remote(self, mock_client):
+        """Without a verification key the Identity Service decides"""
+        post = _identity_service(mock_client)
+        validator = TokenValidator("http://identity")
+
+        assert await validator.validate("opaque-token") == USER
+        assert post.await_count == 1
+
+
+class TestRevocation:
+    """Test cache invalidation on revocation"""
+
+    @pytest.mark.asyncio
+    @patch('httpx.AsyncClient')
+    async def test_revoke_user_invalidates_cached_tokens(self, mock_client, validator):
+        """User revocation drops cached entries and rejects older tokens"""
+        _identity_service(mock_client)
+        token = _token()
+        await validator.validate(token)
+
+        assert validator.revoke_user(USER["user_id"]) == 1
+
+        with pytest.raises(InvalidTokenError):
+            await validator.validate(token)
+
+    @pytest.mark.asyncio
+    @patch('httpx.AsyncClient')
+    async def test_revoke_single_token(self, mock_client, validator):
+        """Revoking by jti or hash invalidates just that token"""
+        _identity_service(mock_client)
+        by_jti, by_hash, other = _token(jti="a"), _token(jti="b"), _token(jti="c")
+        for token in (by_jti, by_hash, other):
+            await validator.validate(token)
+
+        validator.revoke_jti("a")
+        validator.revoke_digest(token_digest(by_hash))
+
+        for token in (by_jti, by_hash):
+            with pytest.raises(InvalidTokenError):
+                await validator.validate(token)
+        assert await validator.validate(other) == USER
@@ -0,0 +1,95 @@
+"""
+Single-pass upload ingest tests for Content Service
+Tests hashing, size limits and content type rejection of the streaming ingest
+"""
+
+import asyncio
+import hashlib
+import io
+import threading
+
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+from fastapi import UploadFile
+
+from storage.ingest import (
+    ingest_upload, UploadTooLargeError, ContentTypeNotAllowedError
+)
+
+
+def _upload(content: bytes, filename: str = "test.pdf") -> UploadFile:
+    return UploadFile(file=io.BytesIO(content), filename=filename)
+
+
+class TestSinglePassIngest:
+    """Test the streaming ingest stage"""
+
+    @pytest.mark.asyncio
+    @patch('magic.from_buffer')
+    async def test_ingest_writes_and_hashes(self, mock_magic, tmp_path):
+        """Ingest writes the file and returns its size, hash and type"""
+        mock_magic.return_value = "application/pdf"
+        content = b"%PDF-1.4\n" + b"x" * 50000
+
+        result = await ingest_upload(
+            _upload(content), tmp_path / "doc.pdf",
+            max_size=1024 * 1024, allowed_content_types=["application/pdf"],
+            chunk_size=4096
+        )
+
+        assert result.size == len(content)
+        assert result.sha256 == hashlib.sha256(content).hexdigest()
+        assert result.content_type == "application/pdf"
+        assert (tmp_path / "doc.pdf").read_bytes() == content
+
+    @pytest.mark.asyncio
+    @patch('magic.from_buffer')
+    async def test_oversized_upload_removes_partial_file(self, mock_magic, tmp_path):
+        """Exceeding max_size mid-stream raises and leaves nothing behind"""
+        mock_magic.return_value = "application/pdf"
+        destination = tmp_path / "big.pdf"
+
+        with pytest.raises(UploadTooLargeError):
+            await ingest_upload(
+                _upload(b"x" * 20000), destination, max_size=10000, chunk_size=4096
+            )
+
+        assert not destination.exists()
+
+    @pytest.mark.asyncio
+    @patch('magic.from_buffer')
+    async def test_cancelled_cleanup_removes_partial_file(self, mock_magic, tmp_path):
+        """Cancellation while waiting for the last write still closes and removes the file"""
+        mock_magic.return_value = "application/pdf"
+        destination = tmp_path / "dropped.pdf"
+        release = threading.Event()
+        source = Mock(read=AsyncMock(side_effect=[b"x" * 4096, ConnectionError("client went away")]))
+
+        with patch('storage.ingest._write_and_hash', lambda *args: release.wait(5)):
+            task = asyncio.create_task(
+                ingest_upload(source, destination, max_size=1024 * 1024, chunk_size=4096)
+            )
+            # The failed read leaves the task waiting for the blocked write
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        release.set()
+
+        assert not destination.exists()
+
+    @pytest.mark.asyncio
+    @patch('magic.from_buffer')
+    async def test_disallowed_type_writes_nothing(self, mock_magic, tmp_path):
+        """Disallowed content types are rejected before any write"""
+        mock_magic.return_value = "application/x-executable"
+        destination = tmp_path / "malware.pdf"
+
+        with pytest.raises(ContentTypeNotAllowedError) as exc_info:
+            await ingest_upload(
+                _upload(b"MZ malicious"), destination,
+                max_size=1024, allowed_content_types=["application/pdf"]
+            )
+
+        assert exc_info.value.content_type == "application/x-executable"
+        assert not destination.exists()
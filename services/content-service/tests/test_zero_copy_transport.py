@@ -0,0 +1,108 @@
+"""
+Zero-copy transport tests for Content Service
+Tests sendfile extension use, chunked fallback and transfer metrics
+"""
+
+import os
+
+import pytest
+
+from transport import ByteRange, FileRangeResponse, TransferMetrics
+
+
+CONTENT = os.urandom(300 * 1024)
+
+
+async def _run(response, scope):
+    """Run an ASGI response, returning the messages it sent."""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await response(scope, receive, send)
+    return messages
+
+
+@pytest.fixture
+def document_path(tmp_path):
+    path = tmp_path / "scan.pdf"
+    path.write_bytes(CONTENT)
+    return path
+
+
+class TestZeroCopyTransport:
+    """Test choice between sendfile and chunked transfers"""
+
+    @pytest.mark.asyncio
+    async def test_zero_copy_when_server_supports_it(self, document_path):
+        """Ranges go to the server as zerocopysend messages"""
+        metrics = TransferMetrics()
+        response = FileRangeResponse(
+            document_path, [ByteRange(100, 199)], status_code=206, metrics=metrics
+        )
+        scope = {
+            "type": "http", "method": "GET", "scheme": "http",
+            "extensions": {"http.response.zerocopysend": {}}
+        }
+
+        messages = await _run(response, scope)
+
+        zero_copy = [m for m in messages if m["type"] == "http.response.zerocopysend"]
+        assert len(zero_copy) == 1
+        assert zero_copy[0]["offset"] == 100
+        assert zero_copy[0]["count"] == 100
+        assert metrics.zero_copy_bytes == 100
+        assert metrics.chunked_bytes == 0
+
+    @pytest.mark.asyncio
+    async def test_tls_falls_back_to_chunks(self, document_path):
+        """TLS connections get chunked reads of the configured size"""
+        metrics = TransferMetrics()
+        response = FileRangeResponse(
+            document_path, [ByteRange(0, len(CONTENT) - 1)],
+            chunk_size=64 * 1024, metrics=metrics
+        )
+        scope = {
+            "type": "http", "method": "GET", "scheme": "https",
+            "extensions": {"http.response.zerocopysend": {}}
+        }
+
+        messages = await _run(response, scope)
+
+        bodies = [m["body"] for m in messages if m["type"] == "http.response.body" and m["body"]]
+        assert b"".join(bodies) == CONTENT
+        assert max(len(body) for body in bodies) == 64 * 1024
+        assert metrics.chunked_bytes == len(CONTENT)
+        assert metrics.transfers == 1
+
+    @pytest.mark.asyncio
+    async def test_encoded_response_falls_back(self, document_path):
+        """Responses with a content encoding are never zero-copied"""
+        response = FileRangeResponse(
+            document_path, [ByteRange(0, 9)],
+            headers={"content-encoding": "gzip"}, metrics=TransferMetrics()
+        )
+        scope = {
+            "type": "http", "method": "GET", "scheme": "http",
+            "extensions": {"http.response.zerocopysend": {}}
+        }
+
+        messages = await _run(response, scope)
+
+        assert all(m["type"] != "http.response.zerocopysend" for m in messages)
+
+    def test_metrics_rate(self):
+        """Bytes per second averages over the elapsed window"""
+        metrics = TransferMetrics(window_seconds=60)
+        metrics.record(1000)
+        metrics.record(500, zero_copy=True)
+
+        assert metrics.bytes_per_second() == 1500
+        snapshot = metrics.snapshot()
+        assert snapshot["bytes_served_total"] == 1500
+        assert snapshot["bytes_served_zero_copy"] == 500
+
@@ -0,0 +1,25 @@
+"""
+Transport layer for serving stored document bytes over HTTP.
+"""
+
+from .ranges import (
+    ByteRange,
+    RangeNotSatisfiableError,
+    evaluate_preconditions,
+    make_etag,
+    parse_range_header
+)
+from .responses import FileRangeResponse, build_file_response
+from .sendfile import TransferMetrics, transfer_metrics
+
+__all__ = [
+    "ByteRange",
+    "RangeNotSatisfiableError",
+    "evaluate_preconditions",
+    "make_etag",
+    "parse_range_header",
+    "FileRangeResponse",
+    "build_file_response",
+    "TransferMetrics",
+    "transfer_metrics"
+]
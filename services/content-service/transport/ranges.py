@@ -0,0 +1,205 @@
+"""
+HTTP Range (RFC 7233) and conditional request (RFC 7232) evaluation.
+"""
+
+import logging
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from typing import List, Mapping, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on ranges served in one multipart response; more than this is
+# treated as abusive and the Range header is ignored (RFC 7233 section 6.1)
+MAX_RANGES = 32
+
+
+class RangeNotSatisfiableError(Exception):
+    """None of the requested byte ranges overlap the representation."""
+
+    def __init__(self, file_size: int):
+        super().__init__(f"Requested range not satisfiable for size {file_size}")
+        self.file_size = file_size
+
+
+class ByteRange(NamedTuple):
+    """Inclusive byte range within a file."""
+    start: int
+    end: int
+
+    @property
+    def length(self) -> int:
+        return self.end - self.start + 1
+
+
+def make_etag(file_hash: str) -> str:
+    """Build a strong ETag from a document's content hash."""
+    return f'"{file_hash}"'
+
+
+def format_http_date(timestamp: float) -> str:
+    """Format a POSIX timestamp as an IMF-fixdate."""
+    return formatdate(timestamp, usegmt=True)
+
+
+def _parse_http_date(value: str) -> Optional[datetime]:
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _etag_list(header: str) -> List[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def _weak_match(header: str, etag: str) -> bool:
+    """Weak comparison used by If-None-Match."""
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for tag in _etag_list(header):
+        if tag == "*":
+            return True
+        if (tag[2:] if tag.startswith("W/") else tag) == opaque:
+            return True
+    return False
+
+
+def _strong_match(header: str, etag: str) -> bool:
+    """Strong comparison used by If-Match and If-Range."""
+    if etag.startswith("W/"):
+        return False
+    return any(tag == "*" or tag == etag for tag in _etag_list(header))
+
+
+def evaluate_preconditions(
+    headers: Mapping[str, str],
+    etag: str,
+    last_modified: float
+) -> Optional[int]:
+    """
+    Evaluate conditional request headers in RFC 7232 section 6 order.
+
+    Args:
+        headers: Request headers (case-insensitive mapping)
+        etag: Current ETag of the representation
+        last_modified: Modification time as a POSIX timestamp
+
+    Returns:
+        304 or 412 if the request short-circuits, None to serve normally
+    """
+    modified = datetime.fromtimestamp(int(last_modified), tz=timezone.utc)
+
+    if_match = headers.get("if-match")
+    if if_match is not None:
+        if not _strong_match(if_match, etag):
+            return 412
+    else:
+        if_unmodified_since = headers.get("if-unmodified-since")
+        if if_unmodified_since is not None:
+            since = _parse_http_date(if_unmodified_since)
+            if since is not None and modified > since:
+                return 412
+
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        if _weak_match(if_none_match, etag):
+            return 304
+    else:
+        if_modified_since = headers.get("if-modified-since")
+        if if_modified_since is not None:
+            since = _parse_http_date(if_modified_since)
+            if since is not None and modified <= since:
+                return 304
+
+    return None
+
+
+def if_range_allows(headers: Mapping[str, str], etag: str, last_modified: float) -> bool:
+    """Check whether an If-Range validator still matches (RFC 7233 section 3.2)."""
+    if_range = headers.get("if-range")
+    if if_range is None:
+        return True
+
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return _strong_match(if_range, etag)
+
+    since = _parse_http_date(if_range)
+    return since is not None and int(since.timestamp()) == int(last_modified)
+
+
+def parse_range_header(header: Optional[str], file_size: int) -> Optional[List[ByteRange]]:
+    """
+    Parse a Range header into sorted, coalesced byte ranges.
+
+    Syntactically invalid headers, non-byte units and abusive range counts are
+    ignored, as RFC 7233 allows, so the caller serves the full representation.
+
+    Args:
+        header: Raw Range header value
+        file_size: Size of the representation in bytes
+
+    Returns:
+        List of satisfiable ranges, or None to ignore the header
+
+    Raises:
+        RangeNotSatisfiableError: If no requested range overlaps the file
+    """
+    if not header:
+        return None
+
+    unit, _, range_set = header.partition("=")
+    if unit.strip().lower() != "bytes" or not range_set.strip():
+        return None
+
+    specs = [spec.strip() for spec in range_set.split(",")]
+    if len(specs) > MAX_RANGES:
+        logger.warning(f"Ignoring Range header with {len(specs)} ranges")
+        return None
+
+    ranges: List[ByteRange] = []
+    for spec in specs:
+        first, dash, last = spec.partition("-")
+        if not dash:
+            return None
+        first, last = first.strip(), last.strip()
+
+        try:
+            if not first:
+                # Suffix range: last N bytes
+                suffix_length = int(last)
+                if suffix_length < 0:
+                    return None
+                if suffix_length == 0 or file_size == 0:
+                    continue
+                ranges.append(ByteRange(max(file_size - suffix_length, 0), file_size - 1))
+                continue
+
+            start = int(first)
+            end = int(last) if last else file_size - 1
+        except ValueError:
+            return None
+
+        if start < 0 or (last and end < start):
+            return None
+        if start >= file_size:
+            continue  # Unsatisfiable on its own; others may still apply
+        ranges.append(ByteRange(start, min(end, file_size - 1)))
+
+    if not ranges:
+        raise RangeNotSatisfiableError(file_size)
+
+    # Coalesce overlapping or adjacent ranges
+    ranges.sort()
+    coalesced = [ranges[0]]
+    for byte_range in ranges[1:]:
+        previous = coalesced[-1]
+        if byte_range.start <= previous.end + 1:
+            coalesced[-1] = ByteRange(previous.start, max(previous.end, byte_range.end))
+        else:
+            coalesced.append(byte_range)
+
+    return coalesced
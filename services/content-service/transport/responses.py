@@ -0,0 +1,231 @@
+"""
+File responses with byte-range and conditional request support.
+"""
+
+import os
+import uuid
+import asyncio
+import logging
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Union
+
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from .ranges import (
+    ByteRange, RangeNotSatisfiableError, evaluate_preconditions,
+    format_http_date, if_range_allows, parse_range_header
+)
+from .sendfile import TransferMetrics, supports_zero_copy, transfer_metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 64 * 1024  # 64KB
+
+# Headers a 304 response repeats from the full response (RFC 7232 section 4.1)
+_NOT_MODIFIED_HEADERS = ("cache-control", "content-location", "expires", "vary")
+
+Segment = Union[bytes, ByteRange]
+
+
+class FileRangeResponse(Response):
+    """
+    Streams a sequence of literal byte strings and file ranges.
+    
+    Literal segments carry multipart boundaries. File ranges are handed to
+    the server for os.sendfile() when it supports the zero-copy extension,
+    and otherwise read with positional reads of chunk_size bytes, so seeking
+    deep into a large file costs no more than reading the requested bytes.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        segments: List[Segment],
+        status_code: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+        media_type: Optional[str] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        zero_copy: bool = True,
+        metrics: Optional[TransferMetrics] = None
+    ):
+        self.path = Path(path)
+        self.segments = segments
+        self.chunk_size = chunk_size
+        self.zero_copy = zero_copy
+        self.metrics = metrics or transfer_metrics
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+
+        content_length = sum(
+            len(segment) if isinstance(segment, bytes) else segment.length
+            for segment in segments
+        )
+        headers = dict(headers or {})
+        headers["content-length"] = str(content_length)
+        self.content_length = content_length
+        self.init_headers(headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+
+        if scope.get("method") != "HEAD" and self.segments:
+            self.metrics.record_transfer()
+            if self.zero_copy and supports_zero_copy(scope, self.headers):
+                await self.send_segments_zero_copy(send)
+            else:
+                await self.send_segments(send)
+
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def send_segments_zero_copy(self, send: Send) -> None:
+        """Send file ranges through the server's sendfile extension."""
+        with open(self.path, 'rb') as file:
+            for segment in self.segments:
+                if isinstance(segment, bytes):
+                    await send({"type": "http.response.body", "body": segment, "more_body": True})
+                    continue
+
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file,
+                    "offset": segment.start,
+                    "count": segment.length,
+                    "more_body": True,
+                })
+                self.metrics.record(segment.length, zero_copy=True)
+
+    async def send_segments(self, send: Send) -> None:
+        """Send all body segments, reading file ranges in chunks."""
+        loop = asyncio.get_running_loop()
+        fd = await loop.run_in_executor(None, os.open, self.path, os.O_RDONLY)
+        try:
+            for segment in self.segments:
+                if isinstance(segment, bytes):
+                    await send({"type": "http.response.body", "body": segment, "more_body": True})
+                    continue
+
+                offset = segment.start
+                remaining = segment.length
+                while remaining > 0:
+                    chunk = await loop.run_in_executor(
+                        None, os.pread, fd, min(self.chunk_size, remaining), offset
+                    )
+                    if not chunk:
+                        break
+                    offset += len(chunk)
+                    remaining -= len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                    self.metrics.record(len(chunk))
+        finally:
+            os.close(fd)
+
+
+def _multipart_segments(
+    ranges: List[ByteRange],
+    file_size: int,
+    media_type: str,
+    boundary: str
+) -> List[Segment]:
+    """Build multipart/byteranges body segments (RFC 7233 appendix A)."""
+    segments: List[Segment] = []
+    for byte_range in ranges:
+        part_header = (
+            f"--{boundary}\r\n"
+            f"Content-Type: {media_type}\r\n"
+            f"Content-Range: bytes {byte_range.start}-{byte_range.end}/{file_size}\r\n"
+            f"\r\n"
+        )
+        segments.append(part_header.encode("latin-1"))
+        segments.append(byte_range)
+        segments.append(b"\r\n")
+    segments.append(f"--{boundary}--\r\n".encode("latin-1"))
+    return segments
+
+
+def build_file_response(
+    request_headers: Mapping[str, str],
+    path: Union[str, Path],
+    etag: str,
+    media_type: str,
+    headers: Optional[Dict[str, str]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    zero_copy: bool = True
+) -> Response:
+    """
+    Build the response for a GET of a stored file.
+
+    Handles If-Match/If-None-Match/If-Modified-Since/If-Unmodified-Since,
+    If-Range and single or multiple byte ranges.
+
+    Args:
+        request_headers: Incoming request headers
+        path: Filesystem path of the file
+        etag: Strong ETag of the content
+        media_type: Content type of the file
+        headers: Extra response headers (disposition, security, caching)
+        chunk_size: Read size for file ranges on the chunked path
+        zero_copy: Allow sendfile when the server supports it
+
+    Returns:
+        A 200, 206, 304, 412 or 416 response
+    """
+    stat = os.stat(path)
+    file_size = stat.st_size
+
+    response_headers = dict(headers or {})
+    response_headers.update({
+        "accept-ranges": "bytes",
+        "etag": etag,
+        "last-modified": format_http_date(stat.st_mtime),
+    })
+
+    precondition_status = evaluate_preconditions(request_headers, etag, stat.st_mtime)
+    if precondition_status == 304:
+        kept = {
+            name: value for name, value in response_headers.items()
+            if name.lower() in _NOT_MODIFIED_HEADERS
+        }
+        kept.update({"etag": etag, "last-modified": response_headers["last-modified"]})
+        return Response(status_code=304, headers=kept)
+    if precondition_status == 412:
+        return Response(status_code=412)
+
+    ranges = None
+    if if_range_allows(request_headers, etag, stat.st_mtime):
+        try:
+            ranges = parse_range_header(request_headers.get("range"), file_size)
+        except RangeNotSatisfiableError:
+            return Response(
+                status_code=416,
+                headers={"content-range": f"bytes */{file_size}", "accept-ranges": "bytes"}
+            )
+
+    if not ranges:
+        return FileRangeResponse(
+            path, [ByteRange(0, file_size - 1)] if file_size else [],
+            headers=response_headers, media_type=media_type, chunk_size=chunk_size,
+            zero_copy=zero_copy
+        )
+
+    if len(ranges) == 1:
+        byte_range = ranges[0]
+        response_headers["content-range"] = f"bytes {byte_range.start}-{byte_range.end}/{file_size}"
+        return FileRangeResponse(
+            path, [byte_range], status_code=206,
+            headers=response_headers, media_type=media_type, chunk_size=chunk_size,
+            zero_copy=zero_copy
+        )
+
+    boundary = uuid.uuid4().hex
+    return FileRangeResponse(
+        path, _multipart_segments(ranges, file_size, media_type, boundary),
+        status_code=206, headers=response_headers,
+        media_type=f"multipart/byteranges; boundary={boundary}", chunk_size=chunk_size,
+        zero_copy=zero_copy
+    )
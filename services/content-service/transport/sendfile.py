@@ -0,0 +1,107 @@
+"""
+Zero-copy file transfer and transfer throughput metrics.
+
+ASGI applications never see the client socket, so zero-copy sends go through
+the ASGI "http.response.zerocopysend" extension: the app hands the server an
+open file plus offset/count and the server calls os.sendfile(). Servers that
+don't advertise the extension, TLS connections and encoded (compressed)
+responses fall back to chunked reads.
+
+Uvicorn, which serves this service, does not implement the extension, so
+downloads are served with chunked reads and ZERO_COPY_TRANSFERS is off by
+default. Turn it on only behind an ASGI server that advertises the extension.
+"""
+
+import time
+import threading
+import logging
+from collections import deque
+from typing import Any, Dict, Mapping
+
+logger = logging.getLogger(__name__)
+
+ZERO_COPY_EXTENSION = "http.response.zerocopysend"
+
+
+class TransferMetrics:
+    """Counts bytes served and tracks throughput over a sliding window."""
+
+    def __init__(self, window_seconds: int = 60):
+        self.window_seconds = window_seconds
+        self.total_bytes = 0
+        self.zero_copy_bytes = 0
+        self.chunked_bytes = 0
+        self.transfers = 0
+        self._buckets = deque()  # (second, bytes) pairs, oldest first
+        self._lock = threading.Lock()
+
+    def _trim(self, now: int) -> None:
+        while self._buckets and self._buckets[0][0] <= now - self.window_seconds:
+            self._buckets.popleft()
+
+    def record(self, nbytes: int, zero_copy: bool = False) -> None:
+        """Record bytes sent to a client."""
+        now = int(time.monotonic())
+        with self._lock:
+            self.total_bytes += nbytes
+            if zero_copy:
+                self.zero_copy_bytes += nbytes
+            else:
+                self.chunked_bytes += nbytes
+
+            if self._buckets and self._buckets[-1][0] == now:
+                self._buckets[-1][1] += nbytes
+            else:
+                self._buckets.append([now, nbytes])
+            self._trim(now)
+
+    def record_transfer(self) -> None:
+        """Record the start of a file transfer."""
+        with self._lock:
+            self.transfers += 1
+
+    def bytes_per_second(self) -> float:
+        """Average bytes served per second over the window."""
+        now = int(time.monotonic())
+        with self._lock:
+            self._trim(now)
+            if not self._buckets:
+                return 0.0
+            window_bytes = sum(nbytes for _, nbytes in self._buckets)
+            elapsed = min(now - self._buckets[0][0] + 1, self.window_seconds)
+        return window_bytes / elapsed
+
+    def snapshot(self) -> Dict[str, float]:
+        """Metrics suitable for the health endpoint."""
+        return {
+            "bytes_served_per_second": round(self.bytes_per_second(), 1),
+            "bytes_served_total": self.total_bytes,
+            "bytes_served_zero_copy": self.zero_copy_bytes,
+            "bytes_served_chunked": self.chunked_bytes,
+            "file_transfers_total": self.transfers
+        }
+
+
+# Global metrics instance
+transfer_metrics = TransferMetrics()
+
+
+def supports_zero_copy(scope: Mapping[str, Any], response_headers: Mapping[str, str]) -> bool:
+    """
+    Check whether a response can be sent with the zero-copy extension.
+
+    Args:
+        scope: ASGI connection scope
+        response_headers: Headers of the outgoing response
+
+    Returns:
+        True if the server advertises zero-copy and the bytes go out unmodified
+    """
+    if ZERO_COPY_EXTENSION not in scope.get("extensions", {}):
+        return False
+    if scope.get("scheme") == "https":
+        return False  # Userspace TLS has to see the bytes
+    if response_headers.get("content-encoding"):
+        return False  # Compression has to see the bytes
+    return True
+